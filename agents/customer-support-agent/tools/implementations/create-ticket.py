@@ -7,10 +7,18 @@
 """
 import os
 import json
-import requests
+import threading
+import time
+import uuid
 from typing import Dict, Any, Optional
 from datetime import datetime
 
+# 재시도할 HTTP 상태 코드 (요청 제한, 일시적인 서버 오류)
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+_session = None
+_token_provider = None
+
 
 def create_ticket(
     title: str,
@@ -21,6 +29,9 @@ def create_ticket(
     """
     고객 지원 티켓을 생성합니다.
     
+    TICKET_API_ENDPOINT 가 설정되면 티켓 API 를 호출하고(agent-definition.yaml 의
+    authentication: oauth2 에 따라 기본은 OAuth2 client credentials), 없으면 더미 티켓을 반환합니다.
+    
     Args:
         title: 티켓 제목
         description: 티켓 설명
@@ -35,41 +46,26 @@ def create_ticket(
             "created_at": "2024-01-01T00:00:00Z"
         }
     """
-    # 실제 구현은 외부 티켓 시스템 API 호출
-    # 예시: REST API 호출
-    # api_endpoint = os.getenv('TICKET_API_ENDPOINT', 'https://api.example.com/tickets')
-    # api_key = os.getenv('TICKET_API_KEY')
-    # 
-    # headers = {
-    #     'Authorization': f'Bearer {api_key}',
-    #     'Content-Type': 'application/json'
-    # }
-    # 
-    # payload = {
-    #     'title': title,
-    #     'description': description,
-    #     'priority': priority,
-    #     'customer_id': customer_id
-    # }
-    # 
-    # response = requests.post(
-    #     api_endpoint,
-    #     headers=headers,
-    #     json=payload,
-    #     timeout=10
-    # )
-    # 
-    # if response.status_code == 201:
-    #     ticket_data = response.json()
-    #     return {
-    #         "ticket_id": ticket_data['id'],
-    #         "status": ticket_data['status'],
-    #         "created_at": ticket_data['created_at']
-    #     }
-    # else:
-    #     raise Exception(f"Failed to create ticket: {response.status_code}")
-    
-    # 임시 더미 구현 (실제 배포 시 위의 실제 구현으로 교체)
+    endpoint = os.getenv('TICKET_API_ENDPOINT')
+    if endpoint:
+        payload = {
+            'title': title,
+            'description': description,
+            'priority': priority,
+            'customer_id': customer_id
+        }
+        # 재시도가 같은 티켓을 두 번 만들지 않도록 호출마다 하나의 키를 쓴다
+        response = _post_ticket(endpoint, payload, uuid.uuid4().hex)
+        if response.status_code not in (200, 201):
+            raise RuntimeError(f"Failed to create ticket: {response.status_code} {response.text[:200]}")
+        ticket_data = response.json()
+        return {
+            "ticket_id": ticket_data['id'],
+            "status": ticket_data['status'],
+            "created_at": ticket_data['created_at']
+        }
+    
+    # 임시 더미 구현 (TICKET_API_ENDPOINT 가 없는 로컬 테스트용)
     print(f"Creating ticket: {title}")
     print(f"Priority: {priority}, Customer ID: {customer_id}")
     
@@ -83,6 +79,137 @@ def create_ticket(
     }
 
 
+def _post_ticket(endpoint: str, payload: Dict[str, Any], idempotency_key: str):
+    """
+    티켓 API POST (429/5xx 와 연결 오류는 세션이 백오프로 재시도)
+    
+    401 이면 캐시된 OAuth2 토큰을 버리고 새 토큰으로 한 번 더 보낸다.
+    """
+    session = _get_session()
+    provider = _get_token_provider()
+    
+    def send():
+        headers = {'Content-Type': 'application/json', 'Idempotency-Key': idempotency_key}
+        headers.update(_auth_headers(session, provider))
+        return session.post(endpoint, headers=headers, json=payload, timeout=_timeout())
+    
+    response = send()
+    if response.status_code == 401 and provider is not None:
+        provider.invalidate()
+        response = send()
+    return response
+
+
+def _timeout():
+    """(연결, 읽기) 타임아웃 초"""
+    return (float(os.getenv('TICKET_API_CONNECT_TIMEOUT', '3.05')),
+            float(os.getenv('TICKET_API_READ_TIMEOUT', '10')))
+
+
+def _auth_headers(session, provider: Optional["OAuth2TokenProvider"]) -> Dict[str, str]:
+    if provider is not None:
+        return {'Authorization': f'Bearer {provider.token(session)}'}
+    if os.getenv('TICKET_API_AUTH', 'oauth2') == 'api_key':
+        return {'Authorization': f"Bearer {os.getenv('TICKET_API_KEY', '')}"}
+    return {}
+
+
+class OAuth2TokenProvider:
+    """
+    OAuth2 client credentials 토큰 캐시 (컨테이너/Lambda 인스턴스당 하나)
+    
+    만료 refresh_margin 초 전까지는 캐시된 토큰을 쓰고, 여러 스레드가 동시에 갱신하려 해도
+    토큰 엔드포인트는 한 번만 호출한다.
+    """
+    
+    def __init__(self, token_url: str, client_id: str, client_secret: str,
+                 scope: Optional[str] = None, refresh_margin: float = 60.0):
+        self.token_url = token_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.scope = scope
+        self.refresh_margin = refresh_margin
+        self.requests = 0
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+    
+    def token(self, session) -> str:
+        with self._lock:
+            if self._token is None or time.monotonic() >= self._expires_at - self.refresh_margin:
+                self._refresh(session)
+            return self._token
+    
+    def _refresh(self, session):
+        data = {"grant_type": "client_credentials", "client_id": self.client_id, "client_secret": self.client_secret}
+        if self.scope:
+            data["scope"] = self.scope
+        response = session.post(self.token_url, data=data, timeout=_timeout())
+        response.raise_for_status()
+        body = response.json()
+        self.requests += 1
+        self._token = body["access_token"]
+        self._expires_at = time.monotonic() + float(body.get("expires_in", 3600))
+    
+    def invalidate(self):
+        """401 응답을 받으면 캐시된 토큰을 버린다"""
+        with self._lock:
+            self._token = None
+
+
+def _get_token_provider() -> Optional[OAuth2TokenProvider]:
+    """
+    TICKET_API_AUTH=oauth2(기본값)일 때의 토큰 캐시 (api_key / none 이면 None)
+    
+    토큰은 TICKET_OAUTH_TOKEN_URL 에서 TICKET_OAUTH_CLIENT_ID / TICKET_OAUTH_CLIENT_SECRET 으로 받는다.
+    """
+    global _token_provider
+    if os.getenv('TICKET_API_AUTH', 'oauth2') != 'oauth2':
+        return None
+    if _token_provider is None:
+        token_url = os.getenv('TICKET_OAUTH_TOKEN_URL')
+        if not token_url:
+            raise ValueError("TICKET_OAUTH_TOKEN_URL is required for oauth2 ticket API authentication "
+                             "(set TICKET_API_AUTH=api_key or none otherwise)")
+        _token_provider = OAuth2TokenProvider(token_url, os.getenv('TICKET_OAUTH_CLIENT_ID', ''),
+                                              os.getenv('TICKET_OAUTH_CLIENT_SECRET', ''),
+                                              os.getenv('TICKET_OAUTH_SCOPE') or None)
+    return _token_provider
+
+
+def _get_session():
+    """
+    티켓 API 요청에 재사용하는 HTTP 세션 (컨테이너/Lambda 인스턴스당 하나)
+    
+    requests 는 첫 API 호출에서 import 하므로 모듈 import(Lambda 초기화 단계)가 가볍고,
+    따뜻한 호출은 keep-alive 연결을 재사용한다. 연결 풀은 TICKET_API_POOL_SIZE 개로 제한하고,
+    429/5xx 응답과 연결 오류는 TICKET_API_RETRIES 번까지 지수 백오프(TICKET_API_BACKOFF 초부터,
+    Retry-After 헤더 우선)로 재시도한다. POST 도 재시도하므로 티켓 요청에는 Idempotency-Key 를 보낸다.
+    """
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        retries = int(os.getenv('TICKET_API_RETRIES', '3'))
+        retry = Retry(
+            total=retries,
+            backoff_factor=float(os.getenv('TICKET_API_BACKOFF', '0.5')),
+            status_forcelist=RETRYABLE_STATUS,
+            allowed_methods=frozenset({'GET', 'POST'}),
+            raise_on_status=False,
+        )
+        # 호스트별 풀 2개 (티켓 API, OAuth2 토큰 엔드포인트), 풀마다 최대 TICKET_API_POOL_SIZE 연결
+        pool_size = int(os.getenv('TICKET_API_POOL_SIZE', '10'))
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, pool_block=True, max_retries=retry)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _session = session
+    return _session
+
+
 # Lambda 함수 핸들러 (AWS Bedrock Agent용)
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
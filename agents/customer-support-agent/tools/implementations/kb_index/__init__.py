@@ -0,0 +1,45 @@
+"""
+Knowledge Base 인덱스 공용 모듈
+
+scripts/sync-knowledge-base.py(인덱스 생성)와 search-knowledge-base.py(검색 런타임)가
+함께 사용하는 온디스크 포맷을 정의한다. Lambda 배포 시 검색 도구와 함께 패키징된다.
+"""
+from kb_index.ann import IVF_FILES, IVFIndex, build_ivf, recall_at_k, top_k
+from kb_index.bundle import IndexBundle, IndexBundleWriter
+from kb_index.embedding_cache import EmbeddingCache, content_key
+from kb_index.hashing import hashed_embeddings
+from kb_index.lexical import BM25Index, reciprocal_rank_fusion, tokenize
+from kb_index.metadata import FILTER_KEYS, MetadataIndex, detect_language
+from kb_index.query_cache import QueryEmbeddingCache, normalize_query
+from kb_index.rerank import Reranker
+from kb_index.result_cache import SearchResultCache, result_cache_key
+from kb_index.vectors import STORAGE_MODES, dequantize, normalize, quantize, storage_nbytes
+
+__all__ = [
+    "BM25Index",
+    "EmbeddingCache",
+    "FILTER_KEYS",
+    "IVFIndex",
+    "IVF_FILES",
+    "IndexBundle",
+    "IndexBundleWriter",
+    "MetadataIndex",
+    "QueryEmbeddingCache",
+    "Reranker",
+    "STORAGE_MODES",
+    "SearchResultCache",
+    "build_ivf",
+    "content_key",
+    "dequantize",
+    "detect_language",
+    "hashed_embeddings",
+    "normalize",
+    "normalize_query",
+    "quantize",
+    "recall_at_k",
+    "reciprocal_rank_fusion",
+    "result_cache_key",
+    "storage_nbytes",
+    "tokenize",
+    "top_k",
+]
@@ -0,0 +1,142 @@
+"""
+IVF(inverted file) 근사 최근접 이웃 인덱스
+
+번들 벡터를 spherical k-means 로 lists 개 클러스터에 나누고, 질의와 가까운 probes 개
+클러스터의 행만 점수를 계산한다 (N 개 전체 대신 약 N * probes / lists 개).
+
+    ivf.centroids.f32   (lists, D) 정규화된 클러스터 중심
+    ivf.rows.u32        클러스터 순서로 정렬한 번들 행 번호
+    ivf.offsets.u64     클러스터별 ivf.rows.u32 시작 위치 (lists + 1)
+
+HNSW 그래프 대신 IVF 를 쓰는 이유: 번들을 기록할 때 numpy 만으로 만들 수 있고, 세 파일 모두
+메모리 매핑으로 바로 열 수 있어 Lambda/컨테이너 시작 시 그래프를 복원하는 비용이 없다.
+"""
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from kb_index.vectors import dequantize, dot_scores, normalize
+
+IVF_FILES = ("ivf.centroids.f32", "ivf.rows.u32", "ivf.offsets.u64")
+
+# 클러스터 배정 시 한 번에 점수를 계산할 행 수 ((블록, lists) 점수 행렬 크기 제한)
+_ASSIGN_BLOCK_ROWS = 16384
+
+
+def default_lists(count: int) -> int:
+    """클러스터 수 기본값: sqrt(N) (클러스터당 평균 sqrt(N) 행)"""
+    return max(1, min(count, int(round(np.sqrt(count)))))
+
+
+def assign(vectors: np.ndarray, scales: Optional[np.ndarray], centroids: np.ndarray) -> np.ndarray:
+    """각 행을 내적이 가장 큰 클러스터에 배정 (블록 단위, memmap 가능)"""
+    labels = np.empty(vectors.shape[0], dtype=np.int64)
+    for start in range(0, vectors.shape[0], _ASSIGN_BLOCK_ROWS):
+        stop = start + _ASSIGN_BLOCK_ROWS
+        block_scales = scales[start:stop] if scales is not None else None
+        labels[start:stop] = dot_scores(vectors[start:stop], block_scales, centroids).argmax(axis=1)
+    return labels
+
+
+def train_centroids(vectors: np.ndarray, scales: Optional[np.ndarray], lists: int,
+                    iterations: int = 10, sample_size: Optional[int] = None, seed: int = 0) -> np.ndarray:
+    """
+    spherical k-means 로 클러스터 중심 학습
+
+    전체 행 대신 최대 sample_size 개(기본: 클러스터당 256 개) 표본으로 학습하고,
+    빈 클러스터는 표본 중 임의의 행으로 다시 시작한다.
+    """
+    rng = np.random.default_rng(seed)
+    count = vectors.shape[0]
+    sample_size = min(count, sample_size or lists * 256)
+    rows = np.sort(rng.choice(count, size=sample_size, replace=False))
+    sample = normalize(dequantize(vectors[rows], scales[rows] if scales is not None else None))
+
+    centroids = sample[rng.choice(sample_size, size=lists, replace=False)]
+    for _ in range(iterations):
+        labels = (sample @ centroids.T).argmax(axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        empty = np.bincount(labels, minlength=lists) == 0
+        sums[empty] = sample[rng.choice(sample_size, size=int(empty.sum()))]
+        centroids = normalize(sums)
+    return centroids
+
+
+def build_ivf(path: str, vectors: np.ndarray, scales: Optional[np.ndarray], lists: Optional[int] = None,
+              iterations: int = 10, seed: int = 0) -> Dict[str, Any]:
+    """
+    path 디렉터리(번들)에 IVF 파일을 기록하고 manifest 에 넣을 설정을 반환
+
+    Args:
+        vectors: (N, D) 저장 모드 벡터 (memmap 가능)
+        scales: int8 모드의 scale
+        lists: 클러스터 수 (None 또는 0 이면 sqrt(N))
+    """
+    lists = min(lists or default_lists(vectors.shape[0]), vectors.shape[0])
+    centroids = train_centroids(vectors, scales, lists, iterations=iterations, seed=seed)
+    labels = assign(vectors, scales, centroids)
+    order = np.argsort(labels, kind="stable").astype(np.uint32)
+    offsets = np.zeros(lists + 1, dtype=np.uint64)
+    np.cumsum(np.bincount(labels, minlength=lists), out=offsets[1:])
+
+    centroids.astype(np.float32).tofile(os.path.join(path, IVF_FILES[0]))
+    order.tofile(os.path.join(path, IVF_FILES[1]))
+    offsets.tofile(os.path.join(path, IVF_FILES[2]))
+    return {"type": "ivf", "lists": lists, "iterations": iterations}
+
+
+class IVFIndex:
+    """번들 디렉터리의 IVF 파일 읽기 (메모리 매핑)"""
+
+    def __init__(self, path: str, count: int, dimensions: int, lists: int):
+        self.lists = lists
+        self.centroids = np.fromfile(os.path.join(path, IVF_FILES[0]), dtype=np.float32).reshape(lists, dimensions)
+        self.rows = np.memmap(os.path.join(path, IVF_FILES[1]), dtype=np.uint32, mode="r", shape=(count,))
+        self.offsets = np.fromfile(os.path.join(path, IVF_FILES[2]), dtype=np.uint64)
+
+    def candidates(self, query: np.ndarray, probes: int) -> np.ndarray:
+        """질의와 가장 가까운 probes 개 클러스터에 속한 행 번호 (오름차순)"""
+        return self.candidates_many(query[None, :], probes)[0]
+
+    def candidates_many(self, queries: np.ndarray, probes: int) -> List[np.ndarray]:
+        """(Q, D) 질의별 후보 행 번호 - 중심과의 점수는 행렬 곱 한 번으로 계산"""
+        probes = min(probes, self.lists)
+        nearest = np.argpartition(-(queries @ self.centroids.T), probes - 1, axis=1)[:, :probes]
+        candidates = []
+        for lists in nearest:
+            rows = [self.rows[int(self.offsets[c]):int(self.offsets[c + 1])] for c in lists]
+            candidates.append(np.sort(np.concatenate(rows)) if rows else np.empty(0, dtype=np.uint32))
+        return candidates
+
+
+def top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    점수 상위 k 개의 (위치, 점수) 를 점수 내림차순으로
+
+    전체를 정렬하지 않고 argpartition(O(N))으로 상위 k 개만 고른 뒤 그 k 개만 정렬한다.
+    """
+    n = scores.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    positions = np.argpartition(scores, n - k)[n - k:]
+    positions = positions[np.argsort(-scores[positions], kind="stable")]
+    return positions, scores[positions]
+
+
+def recall_at_k(bundle, queries: np.ndarray, k: int, probes: Optional[int] = None) -> float:
+    """
+    근사 검색(bundle.search)의 recall@k - 정확 검색(bundle.exact_search) 결과를 정답으로 본다
+
+    Args:
+        queries: (Q, D) 정규화된 질의 벡터
+    """
+    found = expected = 0
+    for query in np.asarray(queries, dtype=np.float32):
+        truth, _ = bundle.exact_search(query, k)
+        rows, _ = bundle.search(query, k, probes=probes)
+        found += len(np.intersect1d(truth, rows))
+        expected += len(truth)
+    return found / expected if expected else 1.0
@@ -0,0 +1,420 @@
+"""
+로컬 KB 인덱스 번들
+
+KB 동기화 결과를 검색 도구가 프로세스 안에서 바로 읽을 수 있는 디렉터리로 저장한다.
+
+    manifest.json   형식 버전, 벡터 수, 차원, 저장 모드, 임베딩 모델, 게시 버전, 번들 ID
+    vectors.bin     (N, D) 정규화 벡터 행렬 (저장 모드 dtype, 메모리 매핑으로 읽음)
+    scales.f32      int8 모드의 벡터별 scale
+    chunks.jsonl    행 순서대로 청크 ID / 내용 / 메타데이터
+    chunks.idx      chunks.jsonl 의 행별 바이트 오프셋 (uint64)
+    ivf.*           (선택) IVF 근사 최근접 이웃 인덱스 (kb_index.ann)
+    bm25.*          (선택) 하이브리드 검색용 BM25 역색인 (kb_index.lexical)
+    metadata.*      메타데이터 필터용 컬럼 / 비트맵 인덱스 (kb_index.metadata)
+
+IndexBundleWriter 는 임시 디렉터리에 기록한 뒤 close() 에서 교체하므로,
+읽는 쪽이 절반만 기록된 번들을 보는 일은 없다.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from kb_index.ann import IVFIndex, build_ivf, top_k
+from kb_index.lexical import BM25Index, build_bm25, read_contents, reciprocal_rank_fusion
+from kb_index.metadata import MetadataIndex, build_metadata_index
+from kb_index.vectors import dequantize, dot_scores, normalize, quantize, storage_dtype
+
+FORMAT_VERSION = 1
+
+
+class IndexBundleWriter:
+    """
+    청크 배치를 받아 인덱스 번들을 스트리밍으로 기록
+
+    Args:
+        path: 번들 디렉터리
+        dimensions: 벡터 차원 수
+        storage: 벡터 저장 모드 (float32 / float16 / int8)
+        model: 임베딩 모델 이름 (manifest 기록용)
+        ann: 근사 최근접 이웃 인덱스 설정 {"type": "ivf", "lists", "probes", "minVectors"}
+             (None 이면 만들지 않음, 벡터 수가 minVectors 미만이어도 만들지 않음)
+        lexical: BM25 역색인 설정 {"enabled", "k1", "b"} (None 이거나 enabled 가 false 이면 만들지 않음)
+        version: 게시 버전 (검색 결과 캐시 무효화 기준, None 이면 새로 만든다)
+    """
+
+    def __init__(self, path: str, dimensions: int, storage: str = "float32", model: Optional[str] = None,
+                 ann: Optional[Dict[str, Any]] = None, lexical: Optional[Dict[str, Any]] = None,
+                 version: Optional[str] = None):
+        storage_dtype(storage)
+        if ann and ann.get("type", "ivf") != "ivf":
+            raise ValueError(f"Unsupported ANN index type: {ann.get('type')} (expected ivf)")
+        self.path = path
+        self.dimensions = dimensions
+        self.storage = storage
+        self.model = model
+        self.ann = ann
+        self.lexical = lexical
+        self.version = version or uuid.uuid4().hex
+        # 빈 상태에서 새로 만든 번들마다 달라지고, carry_over 로 이어 쓴 번들은 이전 번들의 ID 를 물려받는다
+        self.bundle_id = uuid.uuid4().hex
+        self.count = 0
+
+        self._tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        if os.path.exists(self._tmp_path):
+            shutil.rmtree(self._tmp_path)
+        os.makedirs(self._tmp_path)
+        self._vectors = open(os.path.join(self._tmp_path, "vectors.bin"), "wb")
+        self._scales = open(os.path.join(self._tmp_path, "scales.f32"), "wb") if storage == "int8" else None
+        self._chunks = open(os.path.join(self._tmp_path, "chunks.jsonl"), "wb")
+        self._offsets: List[int] = []
+        self._metadata_updates: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, records: List[Dict[str, Any]], vectors: np.ndarray,
+            scales: Optional[np.ndarray] = None, encoded: bool = False):
+        """
+        청크 배치 추가
+
+        Args:
+            records: {"id", "content", "metadata"} 딕셔너리 리스트
+            vectors: (len(records), D) 벡터
+            scales: int8 로 이미 양자화된 벡터의 scale
+            encoded: True 이면 vectors 가 이미 정규화 후 storage 모드로 변환된 상태
+        """
+        if encoded:
+            vectors = np.asarray(vectors, dtype=storage_dtype(self.storage))
+            if self.storage == "int8" and scales is None:
+                raise ValueError("int8 vectors require scales")
+        else:
+            vectors, scales = quantize(normalize(vectors), self.storage)
+
+        self._vectors.write(np.ascontiguousarray(vectors).tobytes())
+        if self._scales is not None:
+            self._scales.write(np.asarray(scales, dtype=np.float32).tobytes())
+        for record in records:
+            self._offsets.append(self._chunks.tell())
+            line = json.dumps({
+                "id": record["id"],
+                "content": record.get("content", ""),
+                "metadata": record.get("metadata", {}),
+            }, ensure_ascii=False)
+            self._chunks.write(line.encode("utf-8") + b"\n")
+        self.count += len(records)
+
+    def carry_over(self, bundle: "IndexBundle", keep: Callable[[Dict[str, Any]], bool],
+                   block_size: int = 4096) -> int:
+        """
+        기존 번들에서 keep(record) 가 True 인 행을 벡터 재계산 없이 그대로 복사
+
+        증분 동기화에서 이번에 다시 수집하지 않은(변경되지 않은) 문서의 청크를 유지하는 데 쓴다.
+        저장 모드와 차원이 같은 번들만 복사할 수 있다.
+        """
+        if bundle.storage != self.storage or bundle.dimensions != self.dimensions:
+            raise ValueError("Cannot carry over rows from a bundle with a different storage mode or dimensions")
+        self.bundle_id = bundle.bundle_id
+        records = bundle.iter_chunks()
+        copied = 0
+        for start in range(0, bundle.count, block_size):
+            stop = min(start + block_size, bundle.count)
+            block = [next(records) for _ in range(start, stop)]
+            rows = [i for i, record in enumerate(block) if keep(record)]
+            if not rows:
+                continue
+            scales = bundle.scales[start:stop][rows] if bundle.scales is not None else None
+            self.add([block[i] for i in rows], bundle.vectors[start:stop][rows], scales, encoded=True)
+            copied += len(rows)
+        return copied
+
+    def update_metadata(self, chunk_id: str, fields: Dict[str, Any]):
+        """
+        chunk_id 청크의 메타데이터에 fields 를 덮어쓴다
+
+        close() 할 때 적용되므로 이미 add() 한 청크와 이후 carry_over() 로 복사될 청크 모두에 반영된다.
+        """
+        self._metadata_updates.setdefault(chunk_id, {}).update(fields)
+
+    def _apply_metadata_updates(self):
+        path = os.path.join(self._tmp_path, "chunks.jsonl")
+        offsets = []
+        with open(path, "rb") as src, open(f"{path}.new", "wb") as dst:
+            for line in src:
+                offsets.append(dst.tell())
+                record = json.loads(line)
+                fields = self._metadata_updates.get(record["id"])
+                if fields:
+                    record["metadata"] = {**record["metadata"], **fields}
+                    line = json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+                dst.write(line)
+        os.replace(f"{path}.new", path)
+        self._offsets = offsets
+
+    def abort(self):
+        """기록 중인 번들을 버린다 (기존 번들은 그대로 유지)"""
+        for f in (self._vectors, self._scales, self._chunks):
+            if f is not None:
+                f.close()
+        shutil.rmtree(self._tmp_path, ignore_errors=True)
+
+    def _build_ann(self) -> Dict[str, Any]:
+        """임시 디렉터리에 기록된 벡터로 IVF 인덱스를 만든다 (번들 교체 전에 함께 준비)"""
+        shape = (self.count, self.dimensions)
+        vectors = np.memmap(os.path.join(self._tmp_path, "vectors.bin"), dtype=storage_dtype(self.storage),
+                            mode="r", shape=shape)
+        scales = None
+        if self.storage == "int8":
+            scales = np.memmap(os.path.join(self._tmp_path, "scales.f32"), dtype=np.float32, mode="r",
+                               shape=(self.count,))
+        ann = build_ivf(self._tmp_path, vectors, scales, self.ann.get("lists") or None,
+                        iterations=self.ann.get("iterations", 10))
+        ann["probes"] = self.ann.get("probes", 8)
+        return ann
+
+    def close(self) -> str:
+        """파일을 닫고 manifest 를 기록한 뒤 번들을 path 로 교체"""
+        for f in (self._vectors, self._scales, self._chunks):
+            if f is not None:
+                f.close()
+        if self._metadata_updates:
+            self._apply_metadata_updates()
+        np.asarray(self._offsets, dtype=np.uint64).tofile(os.path.join(self._tmp_path, "chunks.idx"))
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "count": self.count,
+            "dimensions": self.dimensions,
+            "storage": self.storage,
+            "model": self.model,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "version": self.version,
+            "bundle_id": self.bundle_id,
+        }
+        if self.ann and self.count and self.count >= self.ann.get("minVectors", 0):
+            manifest["ann"] = self._build_ann()
+        manifest["metadata"] = build_metadata_index(self._tmp_path, _read_records(
+            os.path.join(self._tmp_path, "chunks.jsonl")))
+        if self.lexical and self.lexical.get("enabled", True):
+            manifest["lexical"] = build_bm25(self._tmp_path,
+                                             read_contents(os.path.join(self._tmp_path, "chunks.jsonl")),
+                                             k1=self.lexical.get("k1", 1.2), b=self.lexical.get("b", 0.75))
+        with open(os.path.join(self._tmp_path, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        return self._publish()
+
+    def _publish(self) -> str:
+        """
+        기록한 번들을 path 로 게시 (읽는 쪽은 이전 번들이나 새 번들 중 하나를 온전히 본다)
+
+        path 가 없으면 임시 디렉터리를 그대로 옮긴다 (첫 동기화, blue/green 버전 디렉터리).
+        있으면 번들을 <path>.<id> 디렉터리로 옮기고 path 심볼릭 링크를 rename 으로 교체한 뒤,
+        이 방식으로 게시했던 이전 디렉터리를 지운다 (blue/green 버전 디렉터리는 LocalBundleVersions 가 정리한다).
+        링크가 아닌 이전 번들 디렉터리는 옆으로 옮긴 직후 링크로 교체한다 (링크로 바꾸는 첫 게시에서만).
+        """
+        if not os.path.lexists(self.path):
+            os.replace(self._tmp_path, self.path)
+            return self.path
+        name = os.path.basename(self.path)
+        target = f"{self.path}.{uuid.uuid4().hex[:12]}"
+        os.replace(self._tmp_path, target)
+        if os.path.islink(self.path):
+            previous = os.path.join(os.path.dirname(self.path), os.readlink(self.path))
+            if not os.path.basename(previous).startswith(f"{name}."):
+                previous = None
+        else:
+            previous = f"{self.path}.old-{os.getpid()}-{threading.get_ident()}"
+            os.replace(self.path, previous)
+        link = f"{self.path}.link-{os.getpid()}-{threading.get_ident()}"
+        if os.path.lexists(link):
+            os.unlink(link)
+        os.symlink(os.path.basename(target), link)
+        os.replace(link, self.path)
+        if previous is not None:
+            shutil.rmtree(previous, ignore_errors=True)
+        return self.path
+
+
+class IndexBundle:
+    """
+    인덱스 번들 읽기 (벡터와 청크 오프셋은 메모리 매핑)
+
+    path 가 링크이면 열 때 한 번만 따라가므로, 그 뒤에 링크가 새 번들로 교체되어도
+    이 객체는 끝까지 연 시점의 번들 파일만 읽는다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.root = root = os.path.realpath(path)
+        with open(os.path.join(root, "manifest.json"), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported index bundle format: {self.manifest.get('format_version')}")
+
+        self.count = self.manifest["count"]
+        self.dimensions = self.manifest["dimensions"]
+        self.storage = self.manifest["storage"]
+        # 이전 번들에는 게시 버전이 없다
+        self.version = self.manifest.get("version") or self.manifest.get("created_at", "")
+        self.bundle_id = self.manifest.get("bundle_id")
+        self.vectors = self._map("vectors.bin", storage_dtype(self.storage), (self.count, self.dimensions))
+        self.scales = self._map("scales.f32", np.float32, (self.count,)) if self.storage == "int8" else None
+        self._offsets = self._map("chunks.idx", np.uint64, (self.count,))
+        self._chunks_file = os.path.join(root, "chunks.jsonl")
+        # 청크 내용도 메모리 매핑해 두면 교체된 이전 번들 디렉터리가 지워져도 검색 중인 호출이 끝까지 읽는다
+        self._chunk_bytes = self._map("chunks.jsonl", np.uint8, (os.path.getsize(self._chunks_file),))
+        ann = self.manifest.get("ann")
+        self.ivf = IVFIndex(root, self.count, self.dimensions, ann["lists"]) if ann else None
+        lexical = self.manifest.get("lexical")
+        self.lexical = BM25Index(root, lexical) if lexical else None
+        self.metadata = MetadataIndex(root) if self.manifest.get("metadata") else None
+
+    def _map(self, name: str, dtype, shape) -> np.ndarray:
+        if self.count == 0:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.root, name), dtype=dtype, mode="r", shape=shape)
+
+    @property
+    def nbytes(self) -> int:
+        """벡터 저장에 사용되는 바이트 수 (scale 포함)"""
+        return self.vectors.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def scores(self, queries: np.ndarray) -> np.ndarray:
+        """정규화된 질의 벡터(들)와 전체 벡터의 코사인 유사도"""
+        return dot_scores(self.vectors, self.scales, queries)
+
+    def exact_search(self, query: np.ndarray, k: int):
+        """
+        전체 행과 비교하는 정확한 kNN (인덱스 빌드 없이 사용, 근사 검색 recall 측정의 정답)
+
+        float32 번들은 메모리 매핑된 (N, D) 행렬과 질의 벡터의 행렬-벡터 곱 한 번으로 점수를 내고,
+        상위 k 개는 argpartition 으로 고른다. 수십만 청크까지는 이것만으로도 충분히 빠르다.
+
+        Returns:
+            (행 번호, 코사인 유사도) - 유사도 내림차순
+        """
+        return top_k(self.scores(np.asarray(query, dtype=np.float32)), k)
+
+    def filter_mask(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """
+        메타데이터 필터를 만족하는 행의 bool 마스크 (필터가 없으면 None)
+
+        필터 형식은 kb_index.metadata 참고. 메타데이터 인덱스가 없는 번들에 필터를 주면 ValueError.
+        """
+        if not filters:
+            return None
+        if self.metadata is None:
+            raise ValueError(f"Index bundle {self.path} has no metadata index; rebuild it to use search filters")
+        return self.metadata.mask(filters)
+
+    def search(self, query: np.ndarray, k: int, probes: Optional[int] = None, exact: bool = False,
+               allowed: Optional[np.ndarray] = None):
+        """
+        정규화된 질의 벡터와 가장 가까운 k 개 행
+
+        IVF 인덱스가 있으면 가까운 probes 개(기본: manifest 의 probes) 클러스터의 행만 점수를 계산하고,
+        없거나 exact 이거나 probes 가 전체 클러스터 수 이상이면 exact_search 와 같다.
+        allowed(filter_mask 결과)가 주어지면 허용된 행만 점수를 계산한다.
+
+        Returns:
+            (행 번호, 코사인 유사도) - 유사도 내림차순
+        """
+        return self.search_many(np.asarray(query, dtype=np.float32)[None, :], k, probes, exact, allowed)[0]
+
+    def search_many(self, queries: np.ndarray, k: int, probes: Optional[int] = None, exact: bool = False,
+                    allowed: Optional[np.ndarray] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        (Q, D) 질의 배치의 search 결과 목록
+
+        전체 비교는 (N, D) x (D, Q) 행렬 곱 한 번, IVF 는 중심 점수를 행렬 곱 한 번으로 계산한다.
+
+        allowed 가 주어지면 점수 계산 전에 후보를 줄인다 (top-k 뒤에 거르지 않으므로 recall 손실 없음):
+        - 허용 행이 IVF 탐색 범위(N * probes / lists)보다 적거나 전체 비교 모드이면 허용 행만 모아 정확히 비교
+        - 그 외에는 IVF 후보 중 허용 행만 비교
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        if self.ivf is not None:
+            probes = probes or self.manifest["ann"].get("probes", 8)
+        use_ivf = not exact and self.ivf is not None and probes < self.ivf.lists
+        if allowed is not None:
+            subset = np.flatnonzero(allowed)
+            if not use_ivf or len(subset) * self.ivf.lists <= self.count * probes:
+                scores = np.ascontiguousarray(np.atleast_2d(self.similarity(subset, queries).T))
+                return [(subset[positions], top) for positions, top in (top_k(row, k) for row in scores)]
+        if not use_ivf:
+            if len(queries) == 1:
+                return [self.exact_search(queries[0], k)]
+            scores = np.ascontiguousarray(self.scores(queries).T)
+            return [top_k(row_scores, k) for row_scores in scores]
+        results = []
+        for query, rows in zip(queries, self.ivf.candidates_many(queries, probes)):
+            if allowed is not None:
+                rows = rows[allowed[rows]]
+            positions, scores = top_k(self.similarity(rows, query), k)
+            results.append((rows[positions].astype(np.int64), scores))
+        return results
+
+    def hybrid_search(self, query: np.ndarray, text: str, k: int, candidates: int = 50,
+                      probes: Optional[int] = None, exact: bool = False, rrf_k: int = 60,
+                      allowed: Optional[np.ndarray] = None):
+        """
+        벡터 검색과 BM25 검색 결과를 reciprocal rank fusion 으로 합친 상위 k 개
+
+        각 검색에서 상위 max(k, candidates) 개를 가져와 순위만으로 합치므로, 정확한 상품 코드 /
+        주문 번호 일치는 벡터 순위가 낮아도 올라온다. BM25 역색인이 없으면 search 와 같다.
+
+        Returns:
+            (행 번호, RRF 점수) - 점수 내림차순 (역색인이 없으면 코사인 유사도)
+        """
+        return self.hybrid_search_many(np.asarray(query, dtype=np.float32)[None, :], [text], k,
+                                       candidates, probes, exact, rrf_k, allowed)[0]
+
+    def hybrid_search_many(self, queries: np.ndarray, texts: Sequence[str], k: int, candidates: int = 50,
+                           probes: Optional[int] = None, exact: bool = False, rrf_k: int = 60,
+                           allowed: Optional[np.ndarray] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """(Q, D) 질의 벡터와 질의 텍스트 배치의 hybrid_search 결과 목록 (벡터 검색은 search_many 한 번)"""
+        limit = max(k, candidates)
+        vector_results = self.search_many(queries, limit, probes=probes, exact=exact, allowed=allowed)
+        if self.lexical is None:
+            return [(rows[:k], scores[:k]) for rows, scores in vector_results]
+        results = []
+        for (vector_rows, _), text in zip(vector_results, texts):
+            lexical_rows, _ = self.lexical.search(text, limit, allowed=allowed)
+            rows, scores = reciprocal_rank_fusion([vector_rows, lexical_rows], k=rrf_k)
+            results.append((rows[:k], scores[:k]))
+        return results
+
+    def similarity(self, rows, query: np.ndarray) -> np.ndarray:
+        """지정한 행들과 질의 벡터(들)의 코사인 유사도 - (len(rows),) 또는 (len(rows), Q)"""
+        rows = np.asarray(rows, dtype=np.int64)
+        scales = self.scales[rows] if self.scales is not None else None
+        return dot_scores(self.vectors[rows], scales, np.asarray(query, dtype=np.float32))
+
+    def decode(self) -> np.ndarray:
+        """전체 벡터를 float32 로 복원"""
+        return dequantize(self.vectors, self.scales)
+
+    def iter_chunks(self) -> Iterator[Dict[str, Any]]:
+        """전체 청크 레코드를 행 순서대로"""
+        if self.count == 0:
+            return
+        with open(self._chunks_file, "rb") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def chunks(self, rows) -> List[Dict[str, Any]]:
+        """행 번호 목록에 해당하는 청크 레코드"""
+        records = []
+        for row in rows:
+            start = int(self._offsets[row])
+            end = int(self._offsets[row + 1]) if row + 1 < self.count else len(self._chunk_bytes)
+            records.append(json.loads(self._chunk_bytes[start:end].tobytes()))
+        return records
+
+
+def _read_records(chunks_file: str) -> Iterator[Dict[str, Any]]:
+    with open(chunks_file, "rb") as f:
+        for line in f:
+            yield json.loads(line)
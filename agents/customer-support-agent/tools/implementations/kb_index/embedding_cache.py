@@ -0,0 +1,205 @@
+"""
+콘텐츠 주소 기반 임베딩 캐시
+
+(임베딩 모델, 청크 내용 해시) 를 키로 임베딩 벡터를 디스크에 저장한다.
+Dev/Staging/Production 동기화와 검색 도구의 generate_embedding 이 같은 캐시를 공유하므로
+같은 문서를 환경마다 다시 임베딩하지 않는다.
+
+디렉터리 구조 (<root>/<model>/):
+    meta.json     모델 이름, 차원 수, dtype
+    vectors.f32   float32 행렬 (행 = 벡터), append-only, 메모리 매핑으로 읽는다
+    index.tsv     "<sha256>\\t<행 번호>" 줄 목록, append-only
+
+쓰기는 lock 파일로 직렬화하며, 벡터를 먼저 기록한 뒤 인덱스 줄을 추가하므로
+읽는 쪽은 항상 완전히 기록된 행만 보게 된다. 쓰는 도중 중단된 프로세스가 남긴 불완전한
+벡터 행과 인덱스 줄은 다음 쓰기가 잠금 안에서 잘라낸 뒤 이어서 기록한다.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows 등 fcntl 이 없는 환경에서는 프로세스 간 잠금 없이 동작
+    fcntl = None
+
+_DTYPE = np.float32
+
+
+def content_key(text: str) -> str:
+    """청크 내용의 SHA-256 해시 (캐시 키)"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _model_dir_name(model: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", model)
+
+
+class EmbeddingCache:
+    """
+    임베딩 모델 하나에 대한 온디스크 캐시
+
+    Args:
+        root: 캐시 루트 디렉터리 (모델별 하위 디렉터리가 생성됨)
+        model: 임베딩 모델 이름
+        dimensions: 벡터 차원 수
+    """
+
+    def __init__(self, root: str, model: str, dimensions: int):
+        self.model = model
+        self.dimensions = dimensions
+        self.path = os.path.join(root, _model_dir_name(model))
+        self.hits = 0
+        self.misses = 0
+
+        self._vectors_file = os.path.join(self.path, "vectors.f32")
+        self._index_file = os.path.join(self.path, "index.tsv")
+        self._lock_file = os.path.join(self.path, ".lock")
+        self._rows: Dict[str, int] = {}
+        self._index_offset = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._mutex = threading.Lock()
+
+        os.makedirs(self.path, exist_ok=True)
+        self._check_meta()
+        self._refresh_index()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _check_meta(self):
+        meta_file = os.path.join(self.path, "meta.json")
+        meta = {"model": self.model, "dimensions": self.dimensions, "dtype": "float32"}
+        if os.path.exists(meta_file):
+            with open(meta_file, "r", encoding="utf-8") as f:
+                existing = json.load(f)
+            if existing.get("dimensions") != self.dimensions:
+                raise ValueError(
+                    f"Embedding cache {self.path} has dimensions {existing.get('dimensions')}, "
+                    f"expected {self.dimensions}"
+                )
+            return
+        with open(meta_file, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    def _refresh_index(self):
+        """다른 프로세스가 추가한 인덱스 줄을 이어서 읽는다"""
+        if not os.path.exists(self._index_file):
+            return
+        with open(self._index_file, "r", encoding="utf-8") as f:
+            f.seek(self._index_offset)
+            while True:
+                line = f.readline()
+                if not line.endswith("\n"):
+                    # 기록 중인 줄은 다음 갱신 때 다시 읽는다
+                    break
+                key, row = line.rstrip("\n").split("\t")
+                self._rows[key] = int(row)
+                self._index_offset = f.tell()
+
+    def _map(self, min_rows: int) -> np.ndarray:
+        """vectors.f32 를 메모리 매핑 (필요한 행 수보다 작으면 다시 매핑)"""
+        if self._matrix is None or self._matrix.shape[0] < min_rows:
+            rows = os.path.getsize(self._vectors_file) // self._row_bytes
+            self._matrix = np.memmap(self._vectors_file, dtype=_DTYPE, mode="r",
+                                     shape=(rows, self.dimensions))
+        return self._matrix
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        """캐시에 있는 키의 벡터를 반환 (없는 키는 결과에서 빠짐)"""
+        keys = list(keys)
+        with self._mutex:
+            if any(k not in self._rows for k in keys):
+                self._refresh_index()
+            found = {k: self._rows[k] for k in keys if k in self._rows}
+            if not found:
+                return {}
+            matrix = self._map(max(found.values()) + 1)
+            return {k: np.array(matrix[row]) for k, row in found.items()}
+
+    def put_many(self, items: Dict[str, Sequence[float]]):
+        """벡터를 캐시에 추가 (이미 있는 키는 건너뜀)"""
+        if not items:
+            return
+        with self._mutex, open(self._lock_file, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._truncate_torn_tail()
+                self._refresh_index()
+                new_keys = [k for k in items if k not in self._rows]
+                if not new_keys:
+                    return
+                vectors = np.asarray([items[k] for k in new_keys], dtype=_DTYPE)
+                if vectors.shape[1] != self.dimensions:
+                    raise ValueError(f"Expected {self.dimensions}-dim vectors, got {vectors.shape[1]}")
+
+                with open(self._vectors_file, "ab") as f:
+                    start = f.tell() // self._row_bytes
+                    f.write(vectors.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                with open(self._index_file, "a", encoding="utf-8") as f:
+                    f.write("".join(f"{k}\t{start + i}\n" for i, k in enumerate(new_keys)))
+                self._refresh_index()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @property
+    def _row_bytes(self) -> int:
+        return self.dimensions * _DTYPE().itemsize
+
+    def _truncate_torn_tail(self, block_size: int = 4096):
+        """
+        중단된 쓰기가 남긴 vectors.f32 의 불완전한 행과 index.tsv 의 줄바꿈 없는 끝을 잘라낸다 (잠금 안에서 호출)
+
+        그대로 두면 다음 행이 어긋난 위치에 기록되어 잘못된 벡터를 읽고, 다음 인덱스 줄이 끊긴 줄에 이어 붙는다.
+        """
+        if os.path.exists(self._vectors_file):
+            size = os.path.getsize(self._vectors_file)
+            if size % self._row_bytes:
+                os.truncate(self._vectors_file, size - size % self._row_bytes)
+        if not os.path.exists(self._index_file):
+            return
+        with open(self._index_file, "rb+") as f:
+            end = position = f.seek(0, os.SEEK_END)
+            while position > 0:
+                start = max(position - block_size, 0)
+                f.seek(start)
+                newline = f.read(position - start).rfind(b"\n")
+                if newline >= 0:
+                    position = start + newline + 1
+                    break
+                position = start
+            if position < end:
+                f.truncate(position)
+
+    def get_or_compute(self, texts: List[str],
+                       embed_fn: Callable[[List[str]], Sequence[Sequence[float]]]) -> np.ndarray:
+        """
+        texts 의 임베딩을 (len(texts), dimensions) float32 행렬로 반환
+
+        캐시에 없는 텍스트만 모아 embed_fn 을 한 번 호출하고 결과를 캐시에 저장한다.
+        """
+        keys = [content_key(t) for t in texts]
+        cached = self.get_many(keys)
+        missing = list(dict.fromkeys(k for k in keys if k not in cached))
+        self.hits += len(keys) - sum(1 for k in keys if k not in cached)
+        self.misses += len(missing)
+
+        if missing:
+            text_by_key = dict(zip(keys, texts))
+            computed = embed_fn([text_by_key[k] for k in missing])
+            new_items = dict(zip(missing, computed))
+            self.put_many(new_items)
+            cached.update({k: np.asarray(v, dtype=_DTYPE) for k, v in new_items.items()})
+
+        if not keys:
+            return np.empty((0, self.dimensions), dtype=_DTYPE)
+        return np.stack([cached[k] for k in keys])
@@ -0,0 +1,33 @@
+"""
+문자 n-gram 해싱 임베딩 (임시 더미 임베딩)
+
+실제 임베딩 모델을 연동하기 전까지 KB 동기화와 검색 도구가 공통으로 사용하는
+결정적(deterministic) 임베딩. 같은 텍스트는 항상 같은 벡터가 되고, 문자 2/3-gram 을
+공유하는 텍스트끼리 가까워지므로 한국어 질의로도 검색 동작을 확인할 수 있다.
+"""
+import hashlib
+import re
+from typing import List
+
+import numpy as np
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _ngrams(text: str):
+    text = _WHITESPACE.sub(" ", text.strip().lower())
+    for n in (2, 3):
+        for i in range(max(len(text) - n + 1, 1)):
+            yield text[i:i + n]
+
+
+def hashed_embeddings(texts: List[str], dimensions: int) -> np.ndarray:
+    """texts 를 (len(texts), dimensions) L2 정규화 float32 행렬로 변환"""
+    matrix = np.zeros((len(texts), dimensions), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for gram in _ngrams(text):
+            digest = hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            matrix[row, value % dimensions] += 1.0 if (value >> 63) else -1.0
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
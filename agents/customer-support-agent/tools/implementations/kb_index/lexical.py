@@ -0,0 +1,182 @@
+"""
+BM25 역색인 (하이브리드 검색의 어휘 검색)
+
+벡터 검색은 상품 코드, 주문 번호, 정책 이름 같은 정확한 문자열 일치를 놓치기 쉬우므로,
+KB 동기화 때 청크 내용으로 역색인을 만들어 번들에 함께 저장하고 BM25 로 점수를 매긴다.
+
+토큰화 (형태소 분석기 없이 한국어에 동작):
+- 영문/숫자 토큰(SKU-1234, ORD20240101 등)은 통째로 하나의 용어, '-' / '_' 로 나뉜 부분도 각각 용어
+- 한글 등 그 외 문자 토큰은 문자 2-gram (1글자 토큰은 그 글자), 조사가 붙어도 어간 2-gram 이 겹친다
+
+파일 (용어는 64비트 해시로 저장해 어휘 사전 없이 메모리 매핑으로 바로 연다):
+    bm25.terms.u64      정렬된 용어 해시
+    bm25.offsets.u64    용어별 postings 시작 위치 (용어 수 + 1)
+    bm25.rows.u32       postings 행 번호 (용어 순서, 용어 안에서는 행 오름차순)
+    bm25.tf.u16         postings 용어 빈도
+    bm25.lengths.u32    행별 토큰 수
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from kb_index.ann import top_k
+
+BM25_FILES = ("bm25.terms.u64", "bm25.offsets.u64", "bm25.rows.u32", "bm25.tf.u16", "bm25.lengths.u32")
+
+# 영문/숫자 토큰 (내부의 -, _ 포함) 또는 그 외 문자(한글 등) 토큰 - "주문번호ORD-7" 은 두 토큰
+_TOKEN = re.compile(r"([0-9a-z]+(?:[-_][0-9a-z]+)*)|([^\W0-9a-z_]+)")
+
+
+def tokenize(text: str) -> List[str]:
+    """텍스트를 BM25 용어 목록으로 (중복 포함)"""
+    terms = []
+    for ascii_token, other in _TOKEN.findall(unicodedata.normalize("NFKC", text).lower()):
+        if ascii_token:
+            terms.append(ascii_token)
+            if "-" in ascii_token or "_" in ascii_token:
+                terms.extend(part for part in re.split(r"[-_]", ascii_token) if part)
+        elif len(other) == 1:
+            terms.append(other)
+        else:
+            terms.extend(other[i:i + 2] for i in range(len(other) - 1))
+    return terms
+
+
+def term_hash(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def build_bm25(path: str, contents: Iterable[str], k1: float = 1.2, b: float = 0.75) -> Dict[str, Any]:
+    """
+    path 디렉터리(번들)에 BM25 역색인 파일을 기록하고 manifest 에 넣을 설정을 반환
+
+    contents 는 번들 행 순서대로의 청크 내용이다.
+    """
+    hashes: List[np.ndarray] = []
+    rows: List[np.ndarray] = []
+    freqs: List[np.ndarray] = []
+    lengths: List[int] = []
+    for row, content in enumerate(contents):
+        terms = tokenize(content)
+        lengths.append(len(terms))
+        counts = Counter(term_hash(term) for term in terms)
+        if counts:
+            hashes.append(np.fromiter(counts.keys(), dtype=np.uint64, count=len(counts)))
+            freqs.append(np.fromiter(counts.values(), dtype=np.uint32, count=len(counts)))
+            rows.append(np.full(len(counts), row, dtype=np.uint32))
+
+    term_of = np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64)
+    row_of = np.concatenate(rows) if rows else np.empty(0, dtype=np.uint32)
+    tf = np.concatenate(freqs) if freqs else np.empty(0, dtype=np.uint32)
+    order = np.lexsort((row_of, term_of))
+    term_of, row_of, tf = term_of[order], row_of[order], tf[order]
+    terms, counts = np.unique(term_of, return_counts=True)
+    offsets = np.zeros(len(terms) + 1, dtype=np.uint64)
+    np.cumsum(counts, out=offsets[1:])
+
+    terms.astype(np.uint64).tofile(os.path.join(path, BM25_FILES[0]))
+    offsets.tofile(os.path.join(path, BM25_FILES[1]))
+    row_of.astype(np.uint32).tofile(os.path.join(path, BM25_FILES[2]))
+    np.minimum(tf, np.iinfo(np.uint16).max).astype(np.uint16).tofile(os.path.join(path, BM25_FILES[3]))
+    np.asarray(lengths, dtype=np.uint32).tofile(os.path.join(path, BM25_FILES[4]))
+    return {
+        "type": "bm25",
+        "k1": k1,
+        "b": b,
+        "terms": int(len(terms)),
+        "average_length": float(np.mean(lengths)) if lengths else 0.0,
+    }
+
+
+def _map(path: str, name: str, dtype) -> np.ndarray:
+    file = os.path.join(path, name)
+    if os.path.getsize(file) == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(file, dtype=dtype, mode="r")
+
+
+class BM25Index:
+    """번들 디렉터리의 BM25 역색인 읽기 (메모리 매핑)"""
+
+    def __init__(self, path: str, config: Dict[str, Any]):
+        self.k1 = config.get("k1", 1.2)
+        self.b = config.get("b", 0.75)
+        self.average_length = config.get("average_length", 0.0) or 1.0
+        self.terms = _map(path, BM25_FILES[0], np.uint64)
+        self.offsets = np.fromfile(os.path.join(path, BM25_FILES[1]), dtype=np.uint64)
+        self.rows = _map(path, BM25_FILES[2], np.uint32)
+        self.tf = _map(path, BM25_FILES[3], np.uint16)
+        self.lengths = _map(path, BM25_FILES[4], np.uint32)
+        self.count = len(self.lengths)
+
+    def _postings(self, term: str):
+        h = np.uint64(term_hash(term))
+        i = int(np.searchsorted(self.terms, h))
+        if i >= len(self.terms) or self.terms[i] != h:
+            return None
+        start, stop = int(self.offsets[i]), int(self.offsets[i + 1])
+        return self.rows[start:stop], self.tf[start:stop]
+
+    def scores(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        질의 용어가 하나라도 있는 행과 그 BM25 점수
+
+        전체 행 대신 질의 용어의 postings 만 읽으므로 질의 길이와 용어 빈도에만 비례한다.
+        """
+        matched_rows, contributions = [], []
+        for term, query_tf in Counter(tokenize(query)).items():
+            postings = self._postings(term)
+            if postings is None:
+                continue
+            rows, tf = postings
+            df = len(rows)
+            idf = math.log(1.0 + (self.count - df + 0.5) / (df + 0.5))
+            tf = tf.astype(np.float32)
+            norm = self.k1 * (1.0 - self.b + self.b * self.lengths[rows] / self.average_length)
+            matched_rows.append(np.asarray(rows))
+            contributions.append(query_tf * idf * tf * (self.k1 + 1.0) / (tf + norm))
+        if not matched_rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        rows, inverse = np.unique(np.concatenate(matched_rows), return_inverse=True)
+        return rows.astype(np.int64), np.bincount(inverse, weights=np.concatenate(contributions)).astype(np.float32)
+
+    def search(self, query: str, k: int, allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """BM25 점수 상위 k 개의 (행 번호, 점수) - 점수 내림차순 (allowed: 허용 행 bool 마스크)"""
+        rows, scores = self.scores(query)
+        if allowed is not None:
+            keep = allowed[rows]
+            rows, scores = rows[keep], scores[keep]
+        positions, top_scores = top_k(scores, k)
+        return rows[positions], top_scores
+
+
+def reciprocal_rank_fusion(rankings: Sequence[np.ndarray], k: int = 60) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    여러 순위 목록(행 번호 배열, 앞이 상위)을 RRF 로 합친다: score(d) = Σ 1 / (k + rank(d))
+
+    점수 척도가 다른 BM25 와 코사인 유사도를 정규화 없이 순위만으로 합칠 수 있다.
+
+    Returns:
+        (행 번호, RRF 점수) - 점수 내림차순 (같으면 먼저 나온 목록의 순위 순)
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, start=1):
+            fused[int(row)] = fused.get(int(row), 0.0) + 1.0 / (k + rank)
+    ordered = sorted(fused.items(), key=lambda item: -item[1])
+    return (np.array([row for row, _ in ordered], dtype=np.int64),
+            np.array([score for _, score in ordered], dtype=np.float32))
+
+
+def read_contents(chunks_file: str) -> Iterable[str]:
+    """chunks.jsonl 의 청크 내용을 행 순서대로"""
+    with open(chunks_file, "rb") as f:
+        for line in f:
+            yield json.loads(line).get("content", "")
@@ -0,0 +1,149 @@
+"""
+메타데이터 필터용 컬럼 저장 + 비트맵 인덱스
+
+검색 결과를 소스(s3-documents / database-faq), 파일 형식, 언어, 최신성으로 제한할 때
+상위 k 개를 뽑은 뒤 거르면 recall 이 줄고 버릴 행까지 점수를 계산하게 된다. 번들을 기록할 때
+메타데이터를 컬럼 형태로 저장하고 값별 비트맵을 만들어 두면, 점수 계산 전에 후보 행을 줄일 수 있다.
+
+    metadata.json           컬럼별 값 사전 (비트맵 순서)
+    metadata.bitmaps.u8     값별 행 비트맵 (np.packbits, 행 = 값, 열 = ceil(N / 8) 바이트)
+    metadata.updated_at.i64 행별 변경 시각 (UNIX 초, 알 수 없으면 -1)
+
+필터 형식 (같은 키의 값은 OR, 키끼리는 AND):
+    {"source_id": "s3-documents", "file_type": ["pdf", "md"], "language": "ko",
+     "updated_after": "2024-01-01T00:00:00Z"}
+"""
+import json
+import os
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+METADATA_FILES = ("metadata.json", "metadata.bitmaps.u8", "metadata.updated_at.i64")
+CATEGORICAL_COLUMNS = ("source_id", "file_type", "language")
+FILTER_KEYS = CATEGORICAL_COLUMNS + ("updated_after",)
+
+# 변경 시각으로 쓸 메타데이터 키 (S3 LastModified, DB incrementalColumn 기본값)
+_TIMESTAMP_KEYS = ("last_modified", "updated_at")
+_HANGUL = re.compile(r"[가-힣]")
+_LATIN = re.compile(r"[A-Za-z]")
+
+
+def detect_language(text: str) -> str:
+    """한글이 있으면 ko, 라틴 문자만 있으면 en, 둘 다 없으면 빈 문자열"""
+    if _HANGUL.search(text):
+        return "ko"
+    if _LATIN.search(text):
+        return "en"
+    return ""
+
+
+def parse_timestamp(value: Any) -> int:
+    """ISO 8601 문자열 / 숫자(UNIX 초)를 UNIX 초로 (알 수 없으면 -1)"""
+    if value is None or value == "":
+        return -1
+    if isinstance(value, (int, float)):
+        return int(value)
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return -1
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def record_timestamp(metadata: Dict[str, Any]) -> int:
+    """청크 메타데이터의 변경 시각 (UNIX 초, 알 수 없으면 -1)"""
+    return next((parse_timestamp(metadata[key]) for key in _TIMESTAMP_KEYS if metadata.get(key)), -1)
+
+
+def build_metadata_index(path: str, records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    path 디렉터리(번들)에 메타데이터 컬럼/비트맵을 기록하고 manifest 에 넣을 설정을 반환
+
+    records 는 번들 행 순서대로의 청크 레코드이다. 언어가 메타데이터에 없으면 내용으로 판별한다.
+    """
+    values: Dict[str, Dict[str, int]] = {column: {} for column in CATEGORICAL_COLUMNS}
+    codes: Dict[str, List[int]] = {column: [] for column in CATEGORICAL_COLUMNS}
+    updated_at: List[int] = []
+    for record in records:
+        metadata = record.get("metadata", {})
+        row_values = {
+            "source_id": metadata.get("source_id", ""),
+            "file_type": metadata.get("file_type", ""),
+            "language": metadata.get("language") or detect_language(record.get("content", "")),
+        }
+        for column, value in row_values.items():
+            codes[column].append(values[column].setdefault(str(value), len(values[column])))
+        updated_at.append(record_timestamp(metadata))
+
+    count = len(updated_at)
+    bitmaps = []
+    for column in CATEGORICAL_COLUMNS:
+        column_codes = np.asarray(codes[column], dtype=np.int64)
+        for code in range(len(values[column])):
+            bitmaps.append(np.packbits(column_codes == code))
+    matrix = np.stack(bitmaps) if bitmaps else np.empty((0, (count + 7) // 8), dtype=np.uint8)
+    matrix.astype(np.uint8).tofile(os.path.join(path, METADATA_FILES[1]))
+    np.asarray(updated_at, dtype=np.int64).tofile(os.path.join(path, METADATA_FILES[2]))
+
+    columns = {column: list(values[column]) for column in CATEGORICAL_COLUMNS}
+    with open(os.path.join(path, METADATA_FILES[0]), "w", encoding="utf-8") as f:
+        json.dump({"count": count, "columns": columns}, f, ensure_ascii=False)
+    return {"columns": list(CATEGORICAL_COLUMNS), "values": sum(len(v) for v in columns.values())}
+
+
+class MetadataIndex:
+    """번들 디렉터리의 메타데이터 비트맵 읽기 (메모리 매핑)"""
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, METADATA_FILES[0]), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.count = meta["count"]
+        self.columns: Dict[str, List[str]] = meta["columns"]
+        width = (self.count + 7) // 8
+        total = sum(len(values) for values in self.columns.values())
+        self._bitmaps = np.memmap(os.path.join(path, METADATA_FILES[1]), dtype=np.uint8, mode="r",
+                                  shape=(total, width)) if total and width else np.zeros((total, width), np.uint8)
+        self._updated_at = np.memmap(os.path.join(path, METADATA_FILES[2]), dtype=np.int64, mode="r",
+                                     shape=(self.count,)) if self.count else np.empty(0, dtype=np.int64)
+        self._bitmap_row: Dict[str, Dict[str, int]] = {}
+        position = 0
+        for column in CATEGORICAL_COLUMNS:
+            self._bitmap_row[column] = {value: position + i for i, value in enumerate(self.columns.get(column, []))}
+            position += len(self.columns.get(column, []))
+
+    def bitmap(self, filters: Dict[str, Any]) -> np.ndarray:
+        """
+        필터를 만족하는 행의 packed 비트맵 (바이트 단위 AND/OR 라 행 수의 1/8 만 다룬다)
+
+        알 수 없는 필터 키는 ValueError, 색인에 없는 값은 어떤 행과도 일치하지 않는다.
+        """
+        unknown = set(filters) - set(FILTER_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown search filter: {', '.join(sorted(unknown))} "
+                             f"(expected {', '.join(FILTER_KEYS)})")
+        result = np.full(self._bitmaps.shape[1], 0xFF, dtype=np.uint8)
+        for column in CATEGORICAL_COLUMNS:
+            if column not in filters:
+                continue
+            wanted = filters[column] if isinstance(filters[column], (list, tuple, set)) else [filters[column]]
+            selected = np.zeros_like(result)
+            for value in wanted:
+                row = self._bitmap_row[column].get(str(value))
+                if row is not None:
+                    selected |= self._bitmaps[row]
+            result &= selected
+        if filters.get("updated_after") is not None:
+            threshold = parse_timestamp(filters["updated_after"])
+            if threshold < 0:
+                raise ValueError(f"Invalid updated_after filter: {filters['updated_after']}")
+            result &= np.packbits(np.asarray(self._updated_at) >= threshold)
+        return result
+
+    def mask(self, filters: Dict[str, Any]) -> np.ndarray:
+        """필터를 만족하는 행의 (N,) bool 마스크"""
+        return np.unpackbits(self.bitmap(filters), count=self.count).astype(bool)
@@ -0,0 +1,148 @@
+"""
+검색 질의 임베딩 캐시
+
+고객 질문은 "반품 절차", "배송 기간" 처럼 같은 질의가 반복되므로, 따뜻한(warm) Lambda/컨테이너
+프로세스 안에 정규화한 질의 → 임베딩 벡터를 LRU + TTL 로 보관해 임베딩 모델 호출을 건너뛴다.
+
+- 1차: 프로세스 메모리 (항목 수 상한, 오래 쓰지 않은 항목부터 제거, 항목별 만료 시간)
+- 2차: (선택) KB 동기화와 공유하는 온디스크 EmbeddingCache - 콜드 스타트 직후에도 재사용
+"""
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.。？！]+$")
+
+
+def normalize_query(text: str) -> str:
+    """
+    캐시 키용 질의 정규화
+
+    유니코드 NFKC, 소문자, 연속 공백 하나로, 앞뒤 공백과 끝의 물음표/마침표 제거
+    ("반품 절차?" 와 " 반품  절차" 는 같은 키)
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = _WHITESPACE.sub(" ", text).strip()
+    return _TRAILING_PUNCTUATION.sub("", text)
+
+
+class QueryEmbeddingCache:
+    """
+    Args:
+        max_entries: 메모리에 보관할 최대 질의 수
+        ttl_seconds: 항목 만료 시간 (0 이면 만료 없음)
+        shared: 2차 온디스크 캐시 (EmbeddingCache, 선택)
+        clock: 시간 함수 (테스트용)
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600, shared=None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.shared = shared
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # 키 -> (만료 시각, 벡터)
+        self._mutex = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """정규화된 질의 key 의 벡터 (없거나 만료되었으면 None)"""
+        with self._mutex:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, vector = entry
+            if expires_at and expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return vector
+
+    def put(self, key: str, vector: np.ndarray):
+        expires_at = self._clock() + self.ttl_seconds if self.ttl_seconds else 0.0
+        with self._mutex:
+            self._entries[key] = (expires_at, vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, text: str, embed_fn: Callable[[list], Sequence[Sequence[float]]]) -> np.ndarray:
+        """
+        질의 임베딩 (float32 벡터)
+
+        캐시에 없으면 정규화한 질의로 2차 캐시 또는 embed_fn 을 호출한다. 같은 키에는 항상
+        같은 텍스트의 임베딩이 저장되도록 원문 대신 정규화한 질의를 임베딩한다.
+        """
+        key = normalize_query(text)
+        return self._lookup([key], embed_fn)[key]
+
+    def get_or_compute_many(self, texts: Sequence[str],
+                            embed_fn: Callable[[list], Sequence[Sequence[float]]]) -> np.ndarray:
+        """
+        여러 질의의 임베딩을 (len(texts), D) float32 행렬로
+
+        캐시에 없는 질의만 중복 없이 모아 2차 캐시 / embed_fn 을 한 번 호출한다.
+        """
+        keys = [normalize_query(text) for text in texts]
+        if not keys:
+            return np.empty((0, 0), dtype=np.float32)
+        vectors = self._lookup(keys, embed_fn)
+        return np.stack([vectors[key] for key in keys])
+
+    def _lookup(self, keys: Sequence[str], embed_fn) -> dict:
+        """정규화된 질의 키 → 벡터 (없는 키만 모아 한 번에 계산)"""
+        vectors = {}
+        hits = 0
+        for key in keys:
+            if key in vectors:
+                hits += 1
+                continue
+            vector = self.get(key)
+            if vector is not None:
+                hits += 1
+                vectors[key] = vector
+        missing = [key for key in dict.fromkeys(keys) if key not in vectors]
+        # 여러 스레드가 동시에 조회해도 카운터가 빠지지 않도록 잠금 안에서 더한다
+        with self._mutex:
+            self.hits += hits
+            self.misses += len(missing)
+
+        if missing:
+            if self.shared is not None:
+                shared_misses = self.shared.misses
+                computed = self.shared.get_or_compute(missing, embed_fn)
+                with self._mutex:
+                    self.shared_hits += len(missing) - (self.shared.misses - shared_misses)
+            else:
+                computed = np.asarray(embed_fn(missing), dtype=np.float32)
+            for key, vector in zip(missing, computed):
+                vector = np.array(vector, dtype=np.float32)
+                vector.setflags(write=False)
+                self.put(key, vector)
+                vectors[key] = vector
+        return vectors
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared_hits": self.shared_hits,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,114 @@
+"""
+2단계 재순위화(rerank)와 relevance_score 보정
+
+1단계(벡터/하이브리드 검색)에서 후보를 넉넉히 가져온 뒤 상위 후보만 더 비싼 점수로 다시 매긴다.
+크로스 인코더 대신 질의와 청크 내용의 어휘 겹침(BM25 와 같은 토큰화)과 문서 최신성을 코사인
+유사도와 함께 로지스틱 모델로 합친다. 시간 예산을 넘기면 남은 후보는 다시 매기지 않는다.
+
+relevance_score (0~1):
+    sigmoid(slope * (cosine - midpoint) + lexical_weight * 어휘 겹침 + recency_weight * 최신성
+            + rank_weight * log(rank_k / (rank_k + 1단계 순위)))
+
+    어휘 겹침  질의 용어 중 청크에 있는 용어의 비율 (0~1)
+    최신성     0.5 ** (경과 일수 / half_life_days), 변경 시각을 모르면 0
+    1단계 순위 1단계 결과에서의 위치 (0부터). 하이브리드 검색의 RRF 순위는 코사인 유사도가 모르는
+               정확한 일치(상품 코드 등)를 반영하므로, 1위는 그대로 두고 아래 순위일수록 점수를 낮춘다
+
+다시 매긴 후보는 점수 순으로 정렬하고, 다시 매기지 않은 후보(candidates 밖, 시간 예산 초과)는
+그 뒤에 1단계 순서 그대로 둔다 (점수는 앞 후보를 넘지 않게 자른다).
+"""
+import math
+import time
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from kb_index.lexical import tokenize
+from kb_index.metadata import record_timestamp
+
+# (메타데이터, 내용, 코사인 유사도)
+Candidate = Tuple[Dict[str, Any], str, float]
+
+
+def _sigmoid(value: float) -> float:
+    if value < -60:
+        return 0.0
+    return 1.0 / (1.0 + math.exp(-value))
+
+
+class Reranker:
+    """
+    Args:
+        candidates: 다시 매길 1단계 후보 수 (0 이면 재순위화 없이 점수만 보정)
+        budget_ms: 질의당 재순위화 시간 예산 (밀리초, 0 이면 제한 없음)
+        slope, midpoint: 코사인 유사도 보정 (임베딩 모델마다 관련 문서의 유사도 분포가 다르다)
+        lexical_weight, recency_weight, half_life_days: 재순위화 특징 가중치
+        rank_weight, rank_k: 1단계 순위 가중치와 감쇠 상수 (rank_weight=0 이면 1단계 순위 무시)
+        clock: 예산 측정용 시간 함수, now: 최신성 기준 시각 함수 (테스트용)
+    """
+
+    def __init__(self, candidates: int = 0, budget_ms: float = 50.0, slope: float = 10.0,
+                 midpoint: float = 0.75, lexical_weight: float = 2.0, recency_weight: float = 0.5,
+                 half_life_days: float = 180.0, rank_weight: float = 1.0, rank_k: float = 3.0,
+                 clock: Callable[[], float] = time.monotonic,
+                 now: Callable[[], float] = time.time):
+        self.candidates = candidates
+        self.budget_ms = budget_ms
+        self.slope = slope
+        self.midpoint = midpoint
+        self.lexical_weight = lexical_weight
+        self.recency_weight = recency_weight
+        self.half_life_days = half_life_days
+        self.rank_weight = rank_weight
+        self.rank_k = rank_k
+        self.reranked = 0
+        self.truncated = 0
+        self._clock = clock
+        self._now = now
+
+    def calibrate(self, cosine: float, lexical: float = 0.0, recency: float = 0.0, position: int = 0) -> float:
+        """특징과 1단계 순위(position)를 0~1 의 relevance_score 로"""
+        return _sigmoid(self.slope * (cosine - self.midpoint)
+                        + self.lexical_weight * lexical + self.recency_weight * recency
+                        + self.rank_weight * math.log(self.rank_k / (self.rank_k + position)))
+
+    def features(self, query_terms: set, metadata: Dict[str, Any], content: str) -> Tuple[float, float]:
+        """(어휘 겹침, 최신성)"""
+        lexical = len(query_terms & set(tokenize(content))) / len(query_terms) if query_terms else 0.0
+        timestamp = record_timestamp(metadata)
+        if timestamp < 0:
+            return lexical, 0.0
+        age_days = max(0.0, self._now() - timestamp) / 86400.0
+        return lexical, 0.5 ** (age_days / self.half_life_days)
+
+    def rerank(self, query: str, candidates: Sequence[Candidate]) -> List[Tuple[int, float]]:
+        """
+        후보(1단계 순서)를 최종 순서의 (후보 위치, 점수) 목록으로 (점수는 내림차순)
+
+        앞에서부터 candidates 개를 다시 매겨 점수 순으로 정렬하고, 그 뒤 후보와 시간 예산을 넘겨
+        다시 매기지 못한 후보는 1단계 순서대로 뒤에 붙인다. 1단계 상위 후보부터 처리하므로 예산이
+        부족해도 상위 결과의 품질은 유지된다.
+        """
+        deadline = self._clock() + self.budget_ms / 1000.0 if self.budget_ms else None
+        query_terms = set(tokenize(query))
+        limit = self.candidates
+        rescored, rest = [], []
+        for position, (metadata, content, cosine) in enumerate(candidates):
+            if position < limit:
+                if deadline is not None and self._clock() >= deadline:
+                    self.truncated += 1
+                    limit = 0
+                else:
+                    features = self.features(query_terms, metadata, content)
+                    self.reranked += 1
+                    rescored.append((position, self.calibrate(cosine, *features, position=position)))
+                    continue
+            rest.append((position, self.calibrate(cosine, position=position)))
+
+        ranked = sorted(rescored, key=lambda item: -item[1])
+        floor = ranked[-1][1] if ranked else 1.0
+        for position, score in rest:
+            floor = min(floor, score)
+            ranked.append((position, floor))
+        return ranked
+
+    def stats(self) -> dict:
+        return {"reranked": self.reranked, "truncated": self.truncated}
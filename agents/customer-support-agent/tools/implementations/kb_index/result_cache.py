@@ -0,0 +1,93 @@
+"""
+검색 결과 캐시 (KB 게시 버전 기준 무효화)
+
+같은 (질의, max_results, filters) 도구 호출이 몇 분 안에 반복되므로, 따뜻한 Lambda/컨테이너
+프로세스 안에 검색 결과를 보관한다. 항목은 KB 게시 버전(로컬 번들 manifest 의 version,
+OpenSearch 인덱스 _meta 의 kb_version)에 묶여 있어, KB 동기화가 새 버전을 게시하면 다음 조회에서
+전체가 비워진다. 버전이 바뀌지 않는 한 결과도 바뀌지 않으므로 시간 기반 만료는 두지 않는다.
+"""
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from kb_index.metadata import CATEGORICAL_COLUMNS, parse_timestamp
+from kb_index.query_cache import normalize_query
+
+
+def result_cache_key(query: str, max_results: int, filters: Optional[Dict[str, Any]] = None) -> str:
+    """
+    캐시 키: 정규화한 질의 + max_results + 정규화한 필터
+
+    같은 의미의 필터는 같은 키가 된다 ({"file_type": "md"} == {"file_type": ["md"]},
+    값 순서 무관, updated_after 는 UNIX 초).
+    """
+    canonical = {}
+    for key, value in (filters or {}).items():
+        if key in CATEGORICAL_COLUMNS:
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            canonical[key] = sorted({str(v) for v in values})
+        elif key == "updated_after":
+            canonical[key] = parse_timestamp(value)
+        else:
+            canonical[key] = value
+    return json.dumps([normalize_query(query), max_results, canonical], sort_keys=True, ensure_ascii=False)
+
+
+class SearchResultCache:
+    """
+    Args:
+        max_entries: 보관할 최대 결과 수 (오래 쓰지 않은 항목부터 제거)
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.version: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._mutex = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _check_version(self, version: str):
+        """게시 버전이 바뀌었으면 전체를 비운다 (잠금 안에서 호출)"""
+        if version != self.version:
+            if self.version is not None:
+                self.invalidations += 1
+            self._entries.clear()
+            self.version = version
+
+    def get(self, version: str, key: str) -> Optional[List[Dict[str, Any]]]:
+        """버전 version 에서 key 의 결과 복사본 (없으면 None)"""
+        with self._mutex:
+            self._check_version(version)
+            results = self._entries.get(key)
+            if results is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return [dict(result) for result in results]
+
+    def put(self, version: str, key: str, results: List[Dict[str, Any]]):
+        with self._mutex:
+            self._check_version(version)
+            self._entries[key] = [dict(result) for result in results]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
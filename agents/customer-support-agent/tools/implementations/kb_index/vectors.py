@@ -0,0 +1,99 @@
+"""
+임베딩 벡터 저장 형식
+
+벡터를 Python float 리스트(1536개 ≈ 50KB/청크) 대신 numpy 행렬로 다루고,
+다음 저장 모드 중 하나로 보관한다.
+
+- float32: 원본 정밀도 (6KB/청크)
+- float16: 반정밀도 (3KB/청크)
+- int8:    벡터별 scale 을 둔 스칼라 양자화 (1.5KB/청크 + scale 4바이트)
+           x ≈ q * scale, scale = max(|x|) / 127
+
+벡터는 L2 정규화된 상태로 저장하므로 내적이 곧 코사인 유사도다.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+STORAGE_MODES = ("float32", "float16", "int8")
+
+_STORAGE_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+# 대용량 행렬 점수 계산 시 한 번에 float32 로 변환할 최대 행 수
+_SCORE_BLOCK_ROWS = 65536
+
+
+def storage_dtype(mode: str) -> np.dtype:
+    if mode not in _STORAGE_DTYPES:
+        raise ValueError(f"Unknown vector storage mode: {mode} (expected one of {', '.join(STORAGE_MODES)})")
+    return np.dtype(_STORAGE_DTYPES[mode])
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    """행 단위 L2 정규화 (영벡터는 그대로 둔다)"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def quantize(matrix: np.ndarray, mode: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    float32 행렬을 저장 모드로 변환
+
+    Returns:
+        (data, scales) - scales 는 int8 모드에서만 (행 수,) float32 배열, 그 외에는 None
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    dtype = storage_dtype(mode)
+    if mode != "int8":
+        return matrix.astype(dtype), None
+
+    scales = np.abs(matrix).max(axis=-1) / 127.0
+    safe = np.where(scales == 0, 1.0, scales)
+    data = np.clip(np.rint(matrix / safe[..., None]), -127, 127).astype(np.int8)
+    return data, scales.astype(np.float32)
+
+
+def dequantize(data: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """저장 모드 행렬을 float32 로 복원"""
+    matrix = np.asarray(data, dtype=np.float32)
+    if scales is not None:
+        matrix = matrix * np.asarray(scales, dtype=np.float32)[..., None]
+    return matrix
+
+
+def dot_scores(data: np.ndarray, scales: Optional[np.ndarray], queries: np.ndarray) -> np.ndarray:
+    """
+    저장 모드 행렬과 질의 벡터(들)의 내적
+
+    float32 가 아닌 모드는 블록 단위로 변환하므로 전체 행렬을 한 번에 복원하지 않는다.
+
+    Args:
+        data: (N, D) 저장 행렬 (memmap 가능)
+        scales: int8 모드의 (N,) scale, 그 외 None
+        queries: (D,) 또는 (Q, D) float32
+
+    Returns:
+        (N,) 또는 (N, Q) float32 점수
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    if data.dtype == np.float32:
+        return data @ queries.T
+
+    out = np.empty((data.shape[0],) + queries.shape[:-1], dtype=np.float32)
+    for start in range(0, data.shape[0], _SCORE_BLOCK_ROWS):
+        block = np.asarray(data[start:start + _SCORE_BLOCK_ROWS], dtype=np.float32)
+        scores = block @ queries.T
+        if scales is not None:
+            block_scales = np.asarray(scales[start:start + _SCORE_BLOCK_ROWS])
+            scores *= block_scales.reshape((-1,) + (1,) * (scores.ndim - 1))
+        out[start:start + len(block)] = scores
+    return out
+
+
+def storage_nbytes(count: int, dimensions: int, mode: str) -> int:
+    """count 개 벡터를 mode 로 저장할 때의 바이트 수 (scale 포함)"""
+    size = count * dimensions * storage_dtype(mode).itemsize
+    if mode == "int8":
+        size += count * 4
+    return size
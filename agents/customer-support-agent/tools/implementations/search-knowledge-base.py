@@ -8,16 +8,43 @@ Azure/GCP의 경우 Function Calling으로 호출됩니다.
 """
 import os
 import json
+import time
 from typing import Dict, Any, List, Optional
 
+# KB 동기화(scripts/sync-knowledge-base.py)와 같은 임베딩 모델을 사용해야 한다
+EMBEDDING_MODEL = os.getenv('KB_EMBEDDING_MODEL', 'text-embedding-ada-002')
+EMBEDDING_DIMENSIONS = int(os.getenv('KB_EMBEDDING_DIMENSIONS', '1536'))
+# 원격 벡터 검색에 사용할 OpenSearch 인덱스 (KB 동기화의 <에이전트>-kb-<환경> 인덱스 또는 alias)
+KB_INDEX_NAME = os.getenv('KB_INDEX_NAME', 'customer-support-kb')
+# lambda_handler 가 받는 max_results 의 허용 범위
+MAX_RESULTS_LIMIT = 50
 
-def search_knowledge_base(query: str, max_results: int = 5) -> List[Dict[str, Any]]:
+_embedding_cache = None
+_query_cache = None
+_local_index = None
+_local_index_stat = None
+_reranker = None
+_result_cache = None
+_http_session = None
+# (OpenSearch KB 게시 버전, 만료 시각) - KB_INDEX_VERSION_TTL 을 설정한 경우에만 재사용한다
+_remote_index_version = None
+
+
+def search_knowledge_base(query: str, max_results: int = 5,
+                          filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
     """
     Knowledge Base에서 관련 정보를 검색합니다.
     
+    KB 동기화가 만든 로컬 인덱스 번들(KB_INDEX_PATH)이 있으면 프로세스 안에서 바로
+    (기본: 벡터 + BM25 하이브리드) 검색하고,
+    없거나 검색에 실패하면 OpenSearch kNN 검색(OPENSEARCH_ENDPOINT)을 사용합니다.
+    
     Args:
         query: 검색할 질문이나 키워드
         max_results: 반환할 최대 결과 수 (기본값: 5)
+        filters: 검색 대상을 제한하는 메타데이터 필터 (선택). 같은 키의 값 목록은 OR, 키끼리는 AND
+            {"source_id": "s3-documents" | [...], "file_type": "pdf" | [...],
+             "language": "ko" | [...], "updated_after": "2024-01-01T00:00:00Z"}
     
     Returns:
         검색 결과 리스트. 각 항목은 다음 구조를 가집니다:
@@ -30,90 +57,467 @@ def search_knowledge_base(query: str, max_results: int = 5) -> List[Dict[str, An
             ...
         ]
     """
-    # 실제 구현은 벡터 스토어(OpenSearch, Azure Search, Vertex Search)를 사용
-    # 예시: AWS OpenSearch 사용
-    # import boto3
-    # from opensearchpy import OpenSearch
-    # 
-    # opensearch = OpenSearch(
-    #     hosts=[os.getenv('OPENSEARCH_ENDPOINT')],
-    #     http_auth=(os.getenv('OPENSEARCH_USER'), os.getenv('OPENSEARCH_PASSWORD'))
-    # )
-    # 
-    # # 임베딩 생성
-    # embedding = generate_embedding(query)
-    # 
-    # # 벡터 검색
-    # response = opensearch.search(
-    #     index='customer-support-kb',
-    #     body={
-    #         "query": {
-    #             "knn": {
-    #                 "embedding": {
-    #                     "vector": embedding,
-    #                     "k": max_results
-    #                 }
-    #             }
-    #         }
-    #     }
-    # )
-    # 
-    # results = []
-    # for hit in response['hits']['hits']:
-    #     results.append({
-    #         "title": hit['_source'].get('title', ''),
-    #         "content": hit['_source'].get('content', ''),
-    #         "relevance_score": hit['_score']
-    #     })
-    # 
-    # return results
+    return search_knowledge_base_batch([query], max_results, filters)[0]
+
+
+def search_knowledge_base_batch(queries: List[str], max_results: int = 5,
+                                filters: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+    """
+    여러 질의를 한 번에 검색합니다 (한 턴의 여러 검색, 평가 데이터셋 등).
+    
+    캐시에 없는 질의는 임베딩 모델을 한 번만 호출해 함께 임베딩하고, 로컬 번들은 행렬-행렬 곱
+    한 번으로, OpenSearch 는 _msearch 요청 한 번으로 검색합니다. 각 질의의 결과는
+    search_knowledge_base(query, max_results) 와 같습니다.
+    
+    KB_RERANK_CANDIDATES 가 설정되면 그 수만큼 후보를 가져와 어휘 겹침과 최신성으로 다시 순위를
+    매기며(질의당 KB_RERANK_BUDGET_MS 안에서), relevance_score 는 항상 0~1 로 보정됩니다.
+    
+    같은 (질의, max_results, filters) 의 결과는 KB 게시 버전이 바뀔 때까지 프로세스 안에 캐시됩니다
+    (KB_RESULT_CACHE_SIZE).
+    
+    Args:
+        queries: 검색할 질문 목록
+        max_results: 질의당 반환할 최대 결과 수 (기본값: 5)
+        filters: 모든 질의에 적용할 메타데이터 필터 (search_knowledge_base 와 같은 형식)
+    
+    Returns:
+        queries 순서대로의 검색 결과 리스트 (각 항목은 search_knowledge_base 반환값과 같은 구조)
+    """
+    if not queries:
+        return []
+    _check_filters(filters)
+    
+    cache = _get_result_cache()
+    version = _index_version() if cache is not None else None
+    if version is None:
+        return _search_batch(queries, max_results, filters)
+    
+    from kb_index import result_cache_key
+    
+    keys = [result_cache_key(query, max_results, filters) for query in queries]
+    found = {}
+    for query, key in zip(queries, keys):
+        if key not in found:
+            found[key] = cache.get(version, key)
+    missing = {key: query for query, key in zip(queries, keys) if found[key] is None}
+    if missing:
+        for key, results in zip(missing, _search_batch(list(missing.values()), max_results, filters)):
+            cache.put(version, key, results)
+            found[key] = results
+    return [[dict(result) for result in found[key]] for key in keys]
+
+
+def _search_batch(queries: List[str], max_results: int,
+                  filters: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+    """결과 캐시를 거치지 않는 검색 (임베딩 → 1단계 검색 → 재순위화)"""
+    embeddings = _embed_queries(queries)
+    reranker = _get_reranker()
+    limit = max(max_results, reranker.candidates)
+    
+    candidates = None
+    index = _get_local_index()
+    if index is not None:
+        try:
+            candidates = _search_local_index(index, queries, embeddings, limit, filters)
+        except Exception as e:
+            print(f"⚠ Local index search failed, falling back to remote vector search: {e}")
+    
+    if candidates is None and os.getenv('OPENSEARCH_ENDPOINT'):
+        candidates = _search_opensearch(embeddings, limit, filters)
+    
+    if candidates is None:
+        print("⚠ No local index (KB_INDEX_PATH) or OPENSEARCH_ENDPOINT configured; returning no results")
+        return [[] for _ in queries]
+    
+    results = []
+    for query, query_candidates in zip(queries, candidates):
+        ranked = reranker.rerank(query, query_candidates)[:max_results]
+        results.append([
+            {
+                "title": _title(query_candidates[position][0]),
+                "content": query_candidates[position][1],
+                "relevance_score": round(score, 4),
+            }
+            for position, score in ranked
+        ])
+    return results
+
+
+def _get_local_index():
+    """
+    로컬 인덱스 번들 (KB_INDEX_PATH 설정 시에만 사용)
+    
+    벡터와 IVF 인덱스는 메모리 매핑으로 열리므로 컨테이너/Lambda 인스턴스당 한 번만 열고,
+    KB 동기화가 번들을 다시 게시하면(manifest.json 이 바뀌면) 새로 연다.
+    임베딩 모델이나 차원이 다른 번들은 사용하지 않는다.
+    """
+    global _local_index, _local_index_stat
+    path = os.getenv('KB_INDEX_PATH')
+    if not path:
+        return None
+    try:
+        # 번들은 디렉터리(또는 blue/green 링크)째 교체되므로 manifest 의 inode 가 바뀐다
+        stat = os.stat(os.path.join(path, 'manifest.json'))
+    except FileNotFoundError:
+        if _local_index is not None and _local_index.path == path:
+            # 번들을 교체하는 중 (열어 둔 이전 번들의 메모리 매핑은 그대로 유효하다)
+            return _local_index
+        print(f"⚠ Local index bundle not found: {path}")
+        return None
+    signature = (stat.st_ino, stat.st_mtime_ns)
+    if _local_index is None or _local_index.path != path or _local_index_stat != signature:
+        _local_index = None
+        from kb_index import IndexBundle
+        bundle = IndexBundle(path)
+        if bundle.dimensions != EMBEDDING_DIMENSIONS or bundle.manifest.get('model') not in (None, EMBEDDING_MODEL):
+            print(f"⚠ Local index {path} was built with {bundle.manifest.get('model')} ({bundle.dimensions} dims), "
+                  f"expected {EMBEDDING_MODEL} ({EMBEDDING_DIMENSIONS} dims)")
+            return None
+        _local_index, _local_index_stat = bundle, signature
+    return _local_index
+
+
+def _get_result_cache():
+    """검색 결과 캐시 (KB_RESULT_CACHE_SIZE=0 이면 사용하지 않음)"""
+    global _result_cache
+    max_entries = int(os.getenv('KB_RESULT_CACHE_SIZE', '256'))
+    if max_entries <= 0:
+        return None
+    if _result_cache is None:
+        from kb_index import SearchResultCache
+        _result_cache = SearchResultCache(max_entries)
+    return _result_cache
+
+
+def _index_version() -> Optional[str]:
+    """
+    현재 검색 대상의 KB 게시 버전 (알 수 없으면 None - 결과를 캐시하지 않는다)
+    
+    로컬 번들은 manifest 의 version, OpenSearch 는 KB_INDEX_NAME 이 가리키는 인덱스 이름과
+    KB 동기화가 인덱스 _meta 에 기록한 kb_version 이다 (alias 전환과 증분 동기화 모두 반영).
+    
+    OpenSearch 버전은 기본적으로 검색마다 _mapping 을 읽으므로 새 게시 버전이 바로 반영되고,
+    이전 버전의 결과를 돌려주는 일이 없다. KB_INDEX_VERSION_TTL 초를 설정하면 그동안 재사용한다
+    (그만큼 늦게 반영되는 것을 감수하고 _mapping 요청을 줄인다).
+    """
+    global _remote_index_version
+    index = _get_local_index()
+    if index is not None:
+        return f"local:{index.version}"
+    if not os.getenv('OPENSEARCH_ENDPOINT'):
+        return None
+    now = time.monotonic()
+    if _remote_index_version is not None and now < _remote_index_version[1]:
+        return _remote_index_version[0]
+    version = _read_opensearch_version()
+    _remote_index_version = (version, now + float(os.getenv('KB_INDEX_VERSION_TTL', '0')))
+    return version
+
+
+def _read_opensearch_version() -> Optional[str]:
+    """KB_INDEX_NAME 이 가리키는 인덱스들의 (이름, kb_version) - 하나라도 없으면 None"""
+    endpoint = os.environ['OPENSEARCH_ENDPOINT'].rstrip('/')
+    try:
+        response = _get_http_session().get(f"{endpoint}/{KB_INDEX_NAME}/_mapping",
+                                           timeout=float(os.getenv('OPENSEARCH_TIMEOUT', '5')))
+        response.raise_for_status()
+        versions = []
+        for name, mapping in sorted(response.json().items()):
+            kb_version = mapping.get('mappings', {}).get('_meta', {}).get('kb_version')
+            if not kb_version:
+                return None
+            versions.append(f"{name}:{kb_version}")
+    except Exception as e:
+        print(f"⚠ Failed to read the KB index version; not caching results: {e}")
+        return None
+    return "opensearch:" + ",".join(versions)
+
+
+def _check_filters(filters: Optional[Dict[str, Any]]):
+    """
+    잘못된 필터는 로컬/원격 검색 모두에서 ValueError
+    
+    로컬 검색 오류는 원격 검색으로 넘어가므로, 알 수 없는 키를 여기서 거르지 않으면 원격에서 조용히
+    무시되어 필터 없이 검색된다.
+    """
+    if not filters:
+        return
+    from kb_index import FILTER_KEYS
+    from kb_index.metadata import parse_timestamp
+    
+    unknown = set(filters) - set(FILTER_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown search filter: {', '.join(sorted(unknown))} (expected {', '.join(FILTER_KEYS)})")
+    if filters.get('updated_after') is not None and parse_timestamp(filters['updated_after']) < 0:
+        raise ValueError(f"Invalid updated_after filter: {filters['updated_after']}")
+
+
+def _get_reranker():
+    """
+    2단계 재순위화 + relevance_score 보정 (kb_index.rerank)
+    
+    KB_RERANK_CANDIDATES=0(기본값)이면 재순위화 없이 1단계 순서 그대로 코사인 유사도만 0~1 로 보정한다.
+    재순위화 점수에는 1단계(하이브리드 RRF) 순위가 KB_RERANK_RANK_WEIGHT 만큼 반영된다.
+    보정 기준(KB_SCORE_MIDPOINT)은 임베딩 모델의 관련 문서 유사도 분포에 맞춘다.
+    """
+    global _reranker
+    if _reranker is None:
+        from kb_index import Reranker
+        _reranker = Reranker(
+            candidates=int(os.getenv('KB_RERANK_CANDIDATES', '0')),
+            budget_ms=float(os.getenv('KB_RERANK_BUDGET_MS', '50')),
+            slope=float(os.getenv('KB_SCORE_SLOPE', '10')),
+            midpoint=float(os.getenv('KB_SCORE_MIDPOINT', '0.75')),
+            rank_weight=float(os.getenv('KB_RERANK_RANK_WEIGHT', '1')),
+        )
+    return _reranker
+
+
+def _search_local_index(index, queries: List[str], embeddings, limit: int,
+                        filters: Optional[Dict[str, Any]] = None) -> List[List[tuple]]:
+    """
+    로컬 번들에서 질의별 1단계 후보 (메타데이터, 내용, 코사인 유사도) 목록을 검색
+    
+    KB_SEARCH_MODE:
+        hybrid (기본) 벡터 검색과 BM25 역색인 검색을 reciprocal rank fusion 으로 합침
+                      (상품 코드, 주문 번호 등 정확한 일치 보완, 역색인이 없는 번들은 ann 과 같음)
+        ann           벡터 검색만 (IVF 인덱스가 있으면 근사 검색, KB_ANN_PROBES 로 탐색 범위 조정)
+        exact         전체 벡터와 비교하는 정확 검색
     
-    # 임시 더미 구현 (실제 배포 시 위의 실제 구현으로 교체)
-    print(f"Searching Knowledge Base for: {query}")
-    print(f"Max results: {max_results}")
+    코사인 유사도는 모드와 관계없이 질의마다 따로 계산하므로 배치 크기와 관계없이 같은 값이 된다.
+    filters 는 번들의 메타데이터 비트맵으로 점수 계산 전에 적용한다.
+    """
+    import numpy as np
+    from kb_index import normalize
+    
+    vectors = normalize(embeddings)
+    mode = os.getenv('KB_SEARCH_MODE', 'hybrid')
+    probes = int(os.getenv('KB_ANN_PROBES', '0')) or None
+    allowed = index.filter_mask(filters)
+    if mode == 'hybrid':
+        found = index.hybrid_search_many(vectors, queries, limit, probes=probes, allowed=allowed)
+    else:
+        found = index.search_many(vectors, limit, probes=probes, exact=mode == 'exact', allowed=allowed)
+    
+    # 모든 질의의 청크를 한 번에 읽는다
+    records = iter(index.chunks(np.concatenate([rows for rows, _ in found])))
+    results = []
+    for vector, (rows, _) in zip(vectors, found):
+        results.append([
+            (record.get("metadata", {}), record.get("content", ""), float(score))
+            for record, score in zip([next(records) for _ in rows], index.similarity(rows, vector))
+        ])
+    return results
+
+
+def _opensearch_filter(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """메타데이터 필터를 kNN 효율적 필터(bool filter)로 변환 - kNN 탐색 중에 적용된다"""
+    if not filters:
+        return None
+    clauses = []
+    for field in ('source_id', 'file_type', 'language'):
+        if field in filters:
+            values = filters[field] if isinstance(filters[field], (list, tuple, set)) else [filters[field]]
+            clauses.append({"terms": {field: list(values)}})
+    if filters.get('updated_after'):
+        # S3 문서는 last_modified, DB 행은 updated_at 에 변경 시각이 있다
+        clauses.append({"bool": {"should": [
+            {"range": {"last_modified": {"gte": filters['updated_after']}}},
+            {"range": {"updated_at": {"gte": filters['updated_after']}}},
+        ], "minimum_should_match": 1}})
+    return {"bool": {"filter": clauses}}
+
+
+def _search_opensearch(embeddings, limit: int,
+                       filters: Optional[Dict[str, Any]] = None) -> List[List[tuple]]:
+    """
+    OpenSearch kNN 검색 (KB 동기화가 색인한 embedding 필드 기준, 질의 배치를 _msearch 한 번으로)
+    
+    _search_local_index 와 같은 (메타데이터, 내용, 코사인 유사도) 후보 목록을 반환한다.
+    """
+    endpoint = os.environ['OPENSEARCH_ENDPOINT'].rstrip('/')
+    knn_filter = _opensearch_filter(filters)
+    lines = []
+    for embedding in embeddings:
+        knn = {"vector": [float(v) for v in embedding], "k": limit}
+        if knn_filter is not None:
+            knn["filter"] = knn_filter
+        lines.append(json.dumps({"index": KB_INDEX_NAME}))
+        lines.append(json.dumps({
+            "size": limit,
+            "_source": {"excludes": ["embedding"]},
+            "query": {"knn": {"embedding": knn}},
+        }, ensure_ascii=False))
+    response = _get_http_session().post(
+        f"{endpoint}/_msearch",
+        data="\n".join(lines) + "\n",
+        headers={"Content-Type": "application/x-ndjson"},
+        timeout=float(os.getenv('OPENSEARCH_TIMEOUT', '5')),
+    )
+    response.raise_for_status()
+    
+    results = []
+    for answer in response.json()['responses']:
+        if 'error' in answer:
+            raise RuntimeError(f"OpenSearch search failed: {answer['error']}")
+        results.append([
+            (hit['_source'], hit['_source'].get('content', ''), _opensearch_cosine(hit['_score']))
+            for hit in answer['hits']['hits']
+        ])
+    return results
+
+
+def _get_http_session():
+    """
+    OpenSearch 요청에 재사용하는 HTTP 세션 (컨테이너/Lambda 인스턴스당 하나)
+    
+    연결을 keep-alive 로 유지하므로 따뜻한 호출은 TCP/TLS 연결을 다시 맺지 않는다.
+    """
+    global _http_session
+    if _http_session is None:
+        import requests
+        
+        _http_session = requests.Session()
+        if os.getenv('OPENSEARCH_USER'):
+            _http_session.auth = (os.getenv('OPENSEARCH_USER'), os.getenv('OPENSEARCH_PASSWORD', ''))
+    return _http_session
+
+
+def _opensearch_cosine(score: float) -> float:
+    """
+    OpenSearch kNN 점수를 코사인 유사도로
+    
+    KB 인덱스는 기본 space(l2)로 만들어지므로 score = 1 / (1 + d²) 이고,
+    정규화된 임베딩에서는 d² = 2 - 2·cos 이다.
+    """
+    return 1.0 - (1.0 / score - 1.0) / 2.0 if score > 0 else -1.0
+
+
+def _title(metadata: Dict[str, Any]) -> str:
+    """청크 메타데이터의 제목 (없으면 원본 문서 이름)"""
+    if metadata.get('title'):
+        return metadata['title']
+    document_id = metadata.get('document_id', '')
+    return os.path.basename(document_id) or document_id
+
+
+def _get_embedding_cache():
+    """
+    KB 동기화와 공유하는 온디스크 임베딩 캐시 (KB_EMBEDDING_CACHE_DIR 설정 시에만 사용)
+
+    컨테이너/Lambda 인스턴스당 한 번만 연다.
+    """
+    global _embedding_cache
+    cache_dir = os.getenv('KB_EMBEDDING_CACHE_DIR')
+    if not cache_dir:
+        return None
+    if _embedding_cache is None:
+        from kb_index import EmbeddingCache
+        _embedding_cache = EmbeddingCache(cache_dir, EMBEDDING_MODEL, EMBEDDING_DIMENSIONS)
+    return _embedding_cache
+
+
+def _get_query_cache():
+    """
+    정규화한 질의 → 임베딩 LRU + TTL 캐시 (컨테이너/Lambda 인스턴스 수명 동안 유지)
     
-    # 더미 검색 결과 반환
-    dummy_results = [
-        {
-            "title": "반품 정책",
-            "content": "제품 구매 후 30일 이내 반품 가능합니다. 반품 신청은 고객센터로 연락주시거나 온라인에서 신청하실 수 있습니다.",
-            "relevance_score": 0.95
-        },
-        {
-            "title": "배송 정책",
-            "content": "일반 배송은 3-5일 소요되며, 급배송은 1-2일 소요됩니다.",
-            "relevance_score": 0.85
-        }
-    ]
+    KB_QUERY_CACHE_SIZE=0 이면 사용하지 않으며, 공유 캐시가 설정되어 있으면 2차 캐시로 쓴다.
+    """
+    global _query_cache
+    max_entries = int(os.getenv('KB_QUERY_CACHE_SIZE', '1024'))
+    if max_entries <= 0:
+        return None
+    if _query_cache is None:
+        from kb_index import QueryEmbeddingCache
+        _query_cache = QueryEmbeddingCache(max_entries, float(os.getenv('KB_QUERY_CACHE_TTL', '3600')),
+                                           shared=_get_embedding_cache())
+    return _query_cache
+
+
+def _invoke_embedding_model(texts: List[str]) -> List[List[float]]:
+    """임베딩 모델 API 호출 (캐시에 없는 텍스트만 전달된다)"""
+    # 실제 구현은 임베딩 모델 API 호출
+    # 예시: AWS Bedrock Embedding
+    # import boto3
+    # bedrock = boto3.client('bedrock-runtime')
+    # 
+    # embeddings = []
+    # for text in texts:
+    #     response = bedrock.invoke_model(
+    #         modelId=EMBEDDING_MODEL,
+    #         body=json.dumps({'inputText': text})
+    #     )
+    #     embeddings.append(json.loads(response['body'].read())['embedding'])
+    # return embeddings
     
-    return dummy_results[:max_results]
+    # 더미 임베딩: 문자 n-gram 해싱 (KB 동기화의 더미 임베딩과 동일, 실제 구현으로 교체 필요)
+    from kb_index import hashed_embeddings
+    return hashed_embeddings(texts, EMBEDDING_DIMENSIONS).tolist()
 
 
 def generate_embedding(text: str) -> List[float]:
     """
     텍스트를 임베딩 벡터로 변환합니다.
     
+    KB 동기화와 같은 임베딩 모델(KB_EMBEDDING_MODEL)을 사용해야 하며,
+    프로세스 내 질의 캐시(KB_QUERY_CACHE_SIZE)와 공유 캐시(KB_EMBEDDING_CACHE_DIR)에
+    없는 경우에만 모델을 호출합니다.
+    
     Args:
         text: 임베딩할 텍스트
     
     Returns:
         임베딩 벡터 (리스트)
     """
-    # 실제 구현은 임베딩 모델 API 호출
-    # 예시: AWS Bedrock Embedding
-    # import boto3
-    # bedrock = boto3.client('bedrock-runtime')
-    # 
-    # response = bedrock.invoke_model(
-    #     modelId='amazon.titan-embed-text-v1',
-    #     body=json.dumps({'inputText': text})
-    # )
-    # 
-    # embedding = json.loads(response['body'].read())['embedding']
-    # return embedding
+    return _embed_queries([text])[0].tolist()
+
+
+def _embed_queries(texts: List[str]):
+    """질의 목록을 (len(texts), D) float32 행렬로 (캐시에 없는 질의만 모아 모델을 한 번 호출)"""
+    import numpy as np
+    
+    query_cache = _get_query_cache()
+    if query_cache is not None:
+        return query_cache.get_or_compute_many(texts, _invoke_embedding_model)
     
-    # 더미 임베딩 (실제 구현으로 교체 필요)
-    return [0.1] * 1536
+    cache = _get_embedding_cache()
+    if cache is not None:
+        return cache.get_or_compute(texts, _invoke_embedding_model)
+    
+    return np.asarray(_invoke_embedding_model(texts), dtype=np.float32)
+
+
+def warm_up():
+    """
+    무거운 모듈(NumPy, kb_index, requests)과 검색 대상을 미리 적재합니다.
+    
+    Lambda 는 핸들러 모듈을 초기화 단계(INIT)에서 import 하므로, KB_PRELOAD=1 이면 이 함수가 그때
+    실행되어 첫 호출이 모듈 import, 인덱스 번들 열기(페이지 적재 포함), OpenSearch 연결 비용을 치르지
+    않습니다. provisioned concurrency / SnapStart 처럼 초기화가 요청 전에 끝나는 배포에서 효과가 있습니다.
+    """
+    import numpy as np
+    
+    _get_query_cache()
+    _get_reranker()
+    _get_result_cache()
+    index = _get_local_index()
+    if index is not None:
+        # 설정된 검색 모드로 한 번 검색해 벡터, IVF, 역색인 페이지를 읽어 둔다
+        probe = np.zeros((1, index.dimensions), dtype=np.float32)
+        probe[0, 0] = 1.0
+        _search_local_index(index, ["warm up"], probe, 1)
+    elif os.getenv('OPENSEARCH_ENDPOINT'):
+        # keep-alive 연결을 미리 맺는다
+        _index_version()
+
+
+def _parse_max_results(value: Any) -> int:
+    """Bedrock Agent 파라미터는 문자열로 전달되므로 정수로 바꾸고 1~MAX_RESULTS_LIMIT 로 제한 (잘못된 값은 5)"""
+    try:
+        max_results = int(value)
+    except (TypeError, ValueError):
+        return 5
+    return min(max(max_results, 1), MAX_RESULTS_LIMIT)
 
 
 # Lambda 함수 핸들러 (AWS Bedrock Agent용)
@@ -130,11 +534,19 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     # Bedrock Agent에서 전달되는 파라미터 추출
     parameters = event.get('parameters', {})
-    query = parameters.get('query', '')
-    max_results = parameters.get('max_results', 5)
+    max_results = _parse_max_results(parameters.get('max_results', 5))
+    filters = parameters.get('filters')
+    if isinstance(filters, str):
+        filters = json.loads(filters) if filters else None
     
-    # Knowledge Base 검색 실행
-    results = search_knowledge_base(query, max_results)
+    # Knowledge Base 검색 실행 (queries 가 있으면 배치 검색, 결과도 질의별 리스트)
+    if 'queries' in parameters:
+        queries = parameters['queries']
+        if isinstance(queries, str):
+            queries = json.loads(queries)
+        results = search_knowledge_base_batch(queries, max_results, filters)
+    else:
+        results = search_knowledge_base(parameters.get('query', ''), max_results, filters)
     
     # Bedrock Agent 형식으로 반환
     return {
@@ -145,6 +557,14 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     }
 
 
+# 초기화 단계에서 미리 적재 (실패해도 첫 호출에서 다시 시도하므로 컨테이너 초기화는 계속한다)
+if os.getenv('KB_PRELOAD', '').lower() in ('1', 'true', 'yes'):
+    try:
+        warm_up()
+    except Exception as e:
+        print(f"⚠ KB preload failed; loading on first invocation instead: {e}")
+
+
 if __name__ == "__main__":
     # 로컬 테스트
     test_results = search_knowledge_base("반품 절차", max_results=3)
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+KB 검색 품질 / 지연 시간 벤치마크
+
+- 정답이 있는 합성 코퍼스(토픽별 벡터 + 한국어 단어/상품 코드 텍스트 + 메타데이터)를 만들어
+- sync-knowledge-base.py 와 같은 IndexBundleWriter 로 번들(IVF, BM25, 메타데이터 인덱스)을 기록하고
+- search-knowledge-base.py 와 같은 검색 경로를 모드별로 실행해
+  recall@k, MRR, 질의당 지연 시간(p50/p99), 인덱스 빌드 시간, 메모리 사용량을 측정한다.
+
+    exact     전체 벡터와 비교하는 정확 검색 (KB_SEARCH_MODE=exact)
+    ann       IVF 근사 검색 (KB_SEARCH_MODE=ann)
+    hybrid    벡터 + BM25 를 RRF 로 합침 (KB_SEARCH_MODE=hybrid)
+    filtered  정답 문서의 source_id 로 필터한 IVF 검색 (filters 파라미터)
+    reranked  hybrid 후보를 어휘 겹침 + 최신성으로 재순위화 (KB_RERANK_CANDIDATES)
+
+질의마다 정답 청크가 하나 있다. 질의 벡터는 정답 청크 벡터에 잡음을 더한 것(바꿔 말한 질문)이고,
+질의 텍스트는 정답 청크의 단어 몇 개와 (일부 질의만) 상품 코드이다.
+
+결과 JSON 은 코퍼스 크기별 실행 목록이며, 같은 설정(--seed 포함)이면 같은 코퍼스와 질의를 만들므로
+커밋 사이에 비교할 수 있다 (--compare 로 이전 결과와의 차이를 출력).
+
+    python scripts/benchmark-kb-search.py --chunks 10000 100000 --output kb-search.json
+    python scripts/benchmark-kb-search.py --chunks 10000 100000 --compare kb-search.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+RESULT_FORMAT_VERSION = 1
+MODES = ("exact", "ann", "hybrid", "filtered", "reranked")
+SOURCES = ("s3-documents", "database-faq", "api-articles", "manuals")
+FILE_TYPES = ("md", "pdf", "txt", "html")
+# 청크당 단어 수, 토픽당 어휘 수
+WORDS_PER_CHUNK = 12
+TOPIC_VOCABULARY = 40
+# 한 번에 생성/기록할 청크 수 (sync 의 indexing.batchSize 와 같은 역할, 메모리 사용량 제한)
+WRITE_BATCH = 10000
+
+
+def import_kb_index(agent_dir: str):
+    """Agent 도구 구현 디렉터리의 kb_index 모듈 로드"""
+    impl_dir = os.path.join(agent_dir, "tools", "implementations")
+    if impl_dir not in sys.path:
+        sys.path.insert(0, impl_dir)
+    import kb_index
+    return kb_index
+
+
+def _hangul_words(rng: np.random.Generator, count: int) -> np.ndarray:
+    """한글 2음절 단어 count 개 (BM25 토큰화에서 한 용어가 된다)"""
+    syllables = rng.integers(0xAC00, 0xD7A4, size=(count, 2))
+    return np.array([chr(a) + chr(b) for a, b in syllables])
+
+
+class SyntheticCorpus:
+    """
+    정답이 있는 합성 코퍼스
+
+    청크 벡터는 토픽 중심 + 잡음(같은 토픽의 청크끼리 비슷함), 텍스트는 토픽 어휘에서 뽑은 단어와
+    청크마다 고유한 상품 코드, 메타데이터는 source_id / file_type / updated_at 이다.
+    """
+
+    def __init__(self, chunks: int, dimensions: int, queries: int, seed: int,
+                 chunk_noise: float = 1.0, query_noise: float = 3.5, code_ratio: float = 0.3):
+        self.chunks = chunks
+        self.dimensions = dimensions
+        self.seed = seed
+        self.chunk_noise = chunk_noise
+        self.query_noise = query_noise
+        rng = np.random.default_rng(seed)
+        self.topics = max(1, int(round(np.sqrt(chunks))))
+        self.centroids = rng.standard_normal((self.topics, dimensions)).astype(np.float32)
+        self.centroids /= np.linalg.norm(self.centroids, axis=1, keepdims=True)
+        self.vocabulary = _hangul_words(rng, self.topics * TOPIC_VOCABULARY).reshape(self.topics, TOPIC_VOCABULARY)
+        self.targets = np.sort(rng.choice(chunks, size=min(queries, chunks), replace=False))
+        self.with_code = rng.random(len(self.targets)) < code_ratio
+        self.now = 1_700_000_000
+
+    def batches(self):
+        """(레코드 목록, (B, D) 벡터) 를 WRITE_BATCH 개씩 - 정답 청크의 벡터/단어/메타데이터는 기록해 둔다"""
+        rng = np.random.default_rng(self.seed + 1)
+        self.target_vectors = np.empty((len(self.targets), self.dimensions), dtype=np.float32)
+        self.target_words: List[List[str]] = [[] for _ in self.targets]
+        self.target_metadata: List[Dict[str, Any]] = [{} for _ in self.targets]
+        for start in range(0, self.chunks, WRITE_BATCH):
+            stop = min(start + WRITE_BATCH, self.chunks)
+            size = stop - start
+            topics = rng.integers(0, self.topics, size=size)
+            noise = rng.standard_normal((size, self.dimensions)).astype(np.float32)
+            vectors = self.centroids[topics] + noise * (self.chunk_noise / np.sqrt(self.dimensions))
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            words = self.vocabulary[topics[:, None], rng.integers(0, TOPIC_VOCABULARY, size=(size, WORDS_PER_CHUNK))]
+            sources = rng.integers(0, len(SOURCES), size=size)
+            file_types = rng.integers(0, len(FILE_TYPES), size=size)
+            ages = rng.integers(0, 3 * 365 * 86400, size=size)
+
+            records = []
+            for i in range(size):
+                row = start + i
+                metadata = {
+                    "source_id": SOURCES[sources[i]],
+                    "file_type": FILE_TYPES[file_types[i]],
+                    "language": "ko",
+                    "document_id": f"{SOURCES[sources[i]]}/doc-{row:07d}",
+                    "updated_at": int(self.now - ages[i]),
+                }
+                records.append({
+                    "id": f"chunk-{row:07d}",
+                    "content": " ".join(words[i]) + f" 상품코드 KB-{row:07d}",
+                    "metadata": metadata,
+                })
+            for t in np.flatnonzero((self.targets >= start) & (self.targets < stop)):
+                i = int(self.targets[t]) - start
+                self.target_vectors[t] = vectors[i]
+                self.target_words[t] = list(words[i])
+                self.target_metadata[t] = records[i]["metadata"]
+            yield records, vectors
+
+    def queries(self):
+        """(Q, D) 정규화된 질의 벡터, 질의 텍스트 목록 (batches() 이후에 호출)"""
+        rng = np.random.default_rng(self.seed + 2)
+        noise = rng.standard_normal(self.target_vectors.shape).astype(np.float32)
+        vectors = self.target_vectors + noise * (self.query_noise / np.sqrt(self.dimensions))
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        texts = []
+        for t, row in enumerate(self.targets):
+            picked = rng.choice(self.target_words[t], size=3, replace=False)
+            text = " ".join(picked)
+            if self.with_code[t]:
+                text += f" KB-{int(row):07d}"
+            texts.append(text)
+        return vectors, texts
+
+
+def build_bundle(kb_index, corpus: SyntheticCorpus, path: str, storage: str,
+                 ann: Optional[Dict[str, Any]], lexical: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """번들 기록 - 벡터/청크 기록 시간과 close()(IVF, BM25, 메타데이터 인덱스) 시간을 따로 측정"""
+    writer = kb_index.IndexBundleWriter(path, corpus.dimensions, storage, "synthetic", ann=ann, lexical=lexical)
+    generate_seconds = write_seconds = 0.0
+    batches = corpus.batches()
+    while True:
+        started = time.perf_counter()
+        batch = next(batches, None)
+        generate_seconds += time.perf_counter() - started
+        if batch is None:
+            break
+        started = time.perf_counter()
+        writer.add(*batch)
+        write_seconds += time.perf_counter() - started
+    started = time.perf_counter()
+    writer.close()
+    close_seconds = time.perf_counter() - started
+    return {
+        "generate_seconds": round(generate_seconds, 3),
+        "write_seconds": round(write_seconds, 3),
+        "index_seconds": round(close_seconds, 3),
+        "seconds": round(write_seconds + close_seconds, 3),
+    }
+
+
+def bundle_footprint(path: str) -> Dict[str, int]:
+    """번들 구성 요소별 바이트 수 (vectors, chunks, ivf, bm25, metadata)"""
+    components: Dict[str, int] = {}
+    for name in sorted(os.listdir(path)):
+        component = name.split(".")[0]
+        if component in ("scales", "vectors"):
+            component = "vectors"
+        elif component == "manifest":
+            continue
+        components[component] = components.get(component, 0) + os.path.getsize(os.path.join(path, name))
+    components["total"] = sum(components.values())
+    return components
+
+
+def _rank_of(rows, target: int) -> int:
+    """결과에서 정답의 순위 (1부터, 없으면 0)"""
+    hits = np.flatnonzero(np.asarray(rows) == target)
+    return int(hits[0]) + 1 if len(hits) else 0
+
+
+def _summary(ranks: List[int], latencies: List[float], k: int) -> Dict[str, Any]:
+    ranks_array = np.asarray(ranks)
+    latency_ms = np.asarray(latencies) * 1000.0
+    return {
+        "queries": len(ranks),
+        f"recall@{k}": round(float(np.mean((ranks_array > 0) & (ranks_array <= k))), 4) if len(ranks) else 0.0,
+        "mrr": round(float(np.mean(np.where(ranks_array > 0, 1.0 / np.maximum(ranks_array, 1), 0.0))), 4)
+        if len(ranks) else 0.0,
+        "latency_ms": {
+            "p50": round(float(np.percentile(latency_ms, 50)), 3) if len(latencies) else 0.0,
+            "p99": round(float(np.percentile(latency_ms, 99)), 3) if len(latencies) else 0.0,
+            "mean": round(float(np.mean(latency_ms)), 3) if len(latencies) else 0.0,
+        },
+    }
+
+
+def run_mode(kb_index, bundle, mode: str, vectors: np.ndarray, texts: List[str], corpus: SyntheticCorpus,
+             k: int, probes: Optional[int], rerank_candidates: int, rerank_budget_ms: float) -> Dict[str, Any]:
+    """한 검색 모드로 질의를 하나씩 실행 (검색 도구와 같이 질의당 호출, 지연 시간은 질의별로)"""
+    reranker = kb_index.Reranker(candidates=rerank_candidates, budget_ms=rerank_budget_ms,
+                                 now=lambda: corpus.now) if mode == "reranked" else None
+    ranks, latencies = [], []
+    for t, (vector, text) in enumerate(zip(vectors, texts)):
+        target = int(corpus.targets[t])
+        started = time.perf_counter()
+        if mode == "exact":
+            rows, _ = bundle.search(vector, k, exact=True)
+        elif mode == "ann":
+            rows, _ = bundle.search(vector, k, probes=probes)
+        elif mode == "hybrid":
+            rows, _ = bundle.hybrid_search(vector, text, k, probes=probes)
+        elif mode == "filtered":
+            allowed = bundle.filter_mask({"source_id": corpus.target_metadata[t]["source_id"]})
+            rows, _ = bundle.search(vector, k, probes=probes, allowed=allowed)
+        else:
+            candidates, _ = bundle.hybrid_search(vector, text, max(k, rerank_candidates), probes=probes)
+            records = bundle.chunks(candidates)
+            cosines = bundle.similarity(candidates, vector)
+            ranked = reranker.rerank(text, [(record.get("metadata", {}), record.get("content", ""), float(cosine))
+                                            for record, cosine in zip(records, cosines)])
+            rows = candidates[[position for position, _ in ranked[:k]]]
+        latencies.append(time.perf_counter() - started)
+        ranks.append(_rank_of(rows, target))
+    result = _summary(ranks, latencies, k)
+    if reranker is not None:
+        result["rerank"] = reranker.stats()
+    return result
+
+
+def benchmark_corpus(kb_index, chunks: int, args) -> Dict[str, Any]:
+    """코퍼스 하나를 만들어 모드별로 측정"""
+    corpus = SyntheticCorpus(chunks, args.dimensions, args.queries, args.seed,
+                             query_noise=args.query_noise, code_ratio=args.code_ratio)
+    ann = {"type": "ivf", "lists": args.lists, "probes": args.probes or 8, "minVectors": 0}
+    lexical = {"enabled": True} if "hybrid" in args.modes or "reranked" in args.modes else None
+    workdir = tempfile.mkdtemp(prefix="kb-search-bench-", dir=args.work_dir)
+    try:
+        path = os.path.join(workdir, "bundle")
+        print(f"Building {chunks} chunks x {args.dimensions} dims ({args.storage}) ...")
+        build = build_bundle(kb_index, corpus, path, args.storage, ann, lexical)
+        bundle = kb_index.IndexBundle(path)
+        vectors, texts = corpus.queries()
+
+        modes = {}
+        for mode in args.modes:
+            modes[mode] = run_mode(kb_index, bundle, mode, vectors, texts, corpus, args.k, args.probes,
+                                   args.rerank_candidates, args.rerank_budget_ms)
+            r = modes[mode]
+            print(f"  {mode:<9} recall@{args.k} {r[f'recall@{args.k}']:.4f}  MRR {r['mrr']:.4f}  "
+                  f"p50 {r['latency_ms']['p50']:.2f} ms  p99 {r['latency_ms']['p99']:.2f} ms")
+        return {
+            "chunks": chunks,
+            "topics": corpus.topics,
+            "ivf_lists": bundle.ivf.lists if bundle.ivf is not None else 0,
+            "build": build,
+            "memory": {
+                "bundle_bytes": bundle_footprint(path),
+                # 프로세스 최대 RSS (코퍼스 생성 포함, 이전 코퍼스 크기의 실행도 포함)
+                "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+            },
+            "modes": modes,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], k: int):
+    """이전 결과와 같은 코퍼스 크기/모드끼리 recall, MRR, p50/p99 차이를 출력"""
+    if baseline.get("config") != current["config"]:
+        print("⚠ Baseline was run with a different configuration; differences may not be meaningful")
+    previous = {run["chunks"]: run for run in baseline.get("runs", [])}
+    print(f"Compared with {baseline.get('git_commit') or 'baseline'}:")
+    for run in current["runs"]:
+        before = previous.get(run["chunks"])
+        if before is None:
+            continue
+        build_delta = run["build"]["seconds"] - before["build"]["seconds"]
+        print(f"  {run['chunks']} chunks: build {run['build']['seconds']:.2f}s ({build_delta:+.2f}s)")
+        for mode, result in run["modes"].items():
+            old = before.get("modes", {}).get(mode)
+            if old is None:
+                continue
+            print(f"    {mode:<9} recall@{k} {result[f'recall@{k}'] - old.get(f'recall@{k}', 0.0):+.4f}  "
+                  f"MRR {result['mrr'] - old['mrr']:+.4f}  "
+                  f"p50 {result['latency_ms']['p50'] - old['latency_ms']['p50']:+.2f} ms  "
+                  f"p99 {result['latency_ms']['p99'] - old['latency_ms']['p99']:+.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark KB search retrieval quality and latency")
+    parser.add_argument("--agent-dir", default="agents/customer-support-agent", help="Agent directory")
+    parser.add_argument("--chunks", type=int, nargs="+", default=[10000], help="Synthetic corpus sizes (e.g. 10000 100000 1000000)")
+    parser.add_argument("--dimensions", type=int, default=256, help="Embedding dimensions")
+    parser.add_argument("--storage", default="float32", help="Vector storage mode (float32 / float16 / int8)")
+    parser.add_argument("--queries", type=int, default=200, help="Labeled queries per corpus")
+    parser.add_argument("--k", type=int, default=10, help="k for recall@k")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES), help="Retrieval modes to run")
+    parser.add_argument("--lists", type=int, default=0, help="IVF lists (0: sqrt(N))")
+    parser.add_argument("--probes", type=int, default=None, help="IVF probes per query (default: 8)")
+    parser.add_argument("--rerank-candidates", type=int, default=50, help="Candidates rescored in reranked mode")
+    parser.add_argument("--rerank-budget-ms", type=float, default=50.0, help="Rerank latency budget per query")
+    parser.add_argument("--query-noise", type=float, default=3.5, help="Query perturbation relative to chunk vectors")
+    parser.add_argument("--code-ratio", type=float, default=0.3, help="Share of queries that mention the product code")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the corpus and queries")
+    parser.add_argument("--work-dir", default=None, help="Directory for temporary bundles (default: system temp)")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--compare", help="Previous JSON results to compare against")
+
+    args = parser.parse_args()
+
+    kb_index = import_kb_index(args.agent_dir)
+    config = {key: getattr(args, key) for key in (
+        "dimensions", "storage", "queries", "k", "modes", "lists", "probes", "rerank_candidates",
+        "rerank_budget_ms", "query_noise", "code_ratio", "seed")}
+    results = {
+        "format_version": RESULT_FORMAT_VERSION,
+        "benchmark": "kb-search",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_commit": git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": config,
+        "runs": [benchmark_corpus(kb_index, chunks, args) for chunks in args.chunks],
+    }
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(results, json.load(f), args.k)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
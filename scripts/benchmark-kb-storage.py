@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+KB 벡터 저장 모드 벤치마크
+
+- sync-knowledge-base.py 가 만든 로컬 인덱스 번들(float32)을 읽어서
+- float32 / float16 / int8 저장 모드별로 메모리 사용량과
+- float32 정확 검색 대비 recall@k 손실을 측정한다.
+
+질의는 평가 데이터셋(evaluation-dataset.json)의 input 과 코퍼스에서 뽑은 청크로 구성한다.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+def import_kb_index(agent_dir: str):
+    """Agent 도구 구현 디렉터리의 kb_index 모듈 로드"""
+    impl_dir = os.path.join(agent_dir, "tools", "implementations")
+    if impl_dir not in sys.path:
+        sys.path.insert(0, impl_dir)
+    import kb_index
+    return kb_index
+
+
+def load_queries(kb_index, dataset_file: str, corpus: np.ndarray, sample: int, seed: int) -> np.ndarray:
+    """평가 데이터셋 질의(더미 임베딩) + 코퍼스 샘플 벡터로 질의 행렬 구성"""
+    queries = []
+    if dataset_file and os.path.exists(dataset_file):
+        with open(dataset_file, 'r', encoding='utf-8') as f:
+            dataset = json.load(f)
+        texts = [tc["input"] for tc in dataset.get("testCases", []) if tc.get("input")]
+        if texts:
+            queries.append(kb_index.hashed_embeddings(texts, corpus.shape[1]))
+
+    if sample and len(corpus):
+        rng = np.random.default_rng(seed)
+        rows = rng.choice(len(corpus), size=min(sample, len(corpus)), replace=False)
+        queries.append(np.asarray(corpus[rows], dtype=np.float32))
+
+    return np.vstack(queries) if queries else np.empty((0, corpus.shape[1]), dtype=np.float32)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """(N, Q) 점수에서 질의별 상위 k 개 행 번호 (순서 무관)"""
+    k = min(k, scores.shape[0])
+    return np.argpartition(-scores, k - 1, axis=0)[:k].T
+
+
+def benchmark_storage(kb_index, corpus: np.ndarray, queries: np.ndarray, k: int) -> List[Dict[str, Any]]:
+    """저장 모드별 메모리 / recall@k / 점수 계산 시간"""
+    corpus = kb_index.normalize(corpus)
+    queries = kb_index.normalize(queries)
+    baseline = top_k(corpus @ queries.T, k)
+    full_bytes = kb_index.storage_nbytes(len(corpus), corpus.shape[1], "float32")
+    # Python float 리스트: float 객체 24바이트 + 포인터 8바이트 + 리스트 헤더 56바이트
+    python_list_bytes = len(corpus) * (corpus.shape[1] * (24 + 8) + 56)
+
+    results = []
+    for mode in kb_index.STORAGE_MODES:
+        data, scales = kb_index.quantize(corpus, mode)
+        started = time.perf_counter()
+        scores = kb_index.vectors.dot_scores(data, scales, queries)
+        elapsed = time.perf_counter() - started
+        found = top_k(scores, k)
+
+        recall = np.mean([len(set(b) & set(f)) / len(b) for b, f in zip(baseline, found)]) if len(queries) else 1.0
+        nbytes = kb_index.storage_nbytes(len(corpus), corpus.shape[1], mode)
+        results.append({
+            "mode": mode,
+            "bytes": nbytes,
+            "bytes_per_vector": nbytes / max(len(corpus), 1),
+            "saved_vs_float32": 1 - nbytes / max(full_bytes, 1),
+            "saved_vs_python_lists": 1 - nbytes / max(python_list_bytes, 1),
+            f"recall@{k}": float(recall),
+            "score_seconds": elapsed,
+        })
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark KB vector storage modes")
+    parser.add_argument("--index-dir", required=True, help="Local index bundle built by sync-knowledge-base.py")
+    parser.add_argument("--agent-dir", default="agents/customer-support-agent", help="Agent directory")
+    parser.add_argument("--dataset", default=None, help="Evaluation dataset JSON (default: <agent-dir>/tests/evaluation-dataset.json)")
+    parser.add_argument("--sample-queries", type=int, default=200, help="Corpus vectors to reuse as queries")
+    parser.add_argument("--k", type=int, default=10, help="k for recall@k")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for query sampling")
+    parser.add_argument("--output", help="Write JSON results to this file")
+
+    args = parser.parse_args()
+
+    kb_index = import_kb_index(args.agent_dir)
+    bundle = kb_index.IndexBundle(args.index_dir)
+    if bundle.storage != "float32":
+        print(f"⚠ Index bundle is stored as {bundle.storage}; recall is measured against that precision")
+
+    corpus = bundle.decode()
+    dataset = args.dataset or os.path.join(args.agent_dir, "tests", "evaluation-dataset.json")
+    queries = load_queries(kb_index, dataset, corpus, args.sample_queries, args.seed)
+
+    print(f"Benchmarking {len(corpus)} vectors x {bundle.dimensions} dims with {len(queries)} queries (k={args.k})")
+    results = benchmark_storage(kb_index, corpus, queries, args.k)
+
+    print(f"{'mode':<8} {'bytes/vec':>10} {'saved':>8} {'vs lists':>9} {'recall@' + str(args.k):>10} {'score ms':>9}")
+    for r in results:
+        print(f"{r['mode']:<8} {r['bytes_per_vector']:>10.0f} {r['saved_vs_float32']:>7.1%} "
+              f"{r['saved_vs_python_lists']:>8.1%} {r[f'recall@{args.k}']:>10.4f} {r['score_seconds'] * 1000:>9.2f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"index": args.index_dir, "vectors": len(corpus), "queries": len(queries),
+                       "k": args.k, "results": results}, f, indent=2)
+        print(f"✓ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+create-ticket 도구의 티켓 API 호출 지연 시간 벤치마크
+
+로컬 HTTP 티켓 API 대역(OAuth2 토큰 엔드포인트 + /tickets, 요청당 --server-latency-ms 지연,
+--failure-every 번째 요청마다 503)을 띄우고 같은 티켓 생성 요청을 두 방식으로 보낸다.
+
+    bare    호출마다 토큰을 받고 requests.post 로 새 연결을 맺는 단순 구현 (재시도 없음)
+    pooled  create-ticket.py 의 create_ticket (keep-alive 연결 풀, 토큰 캐시, 429/5xx 백오프 재시도)
+
+호출별 지연 시간(p50/p99), 서버가 받은 연결/요청/토큰 발급 수, 실패한 호출 수를 보고한다.
+대역은 평문 HTTP 이므로 실제 HTTPS API 에서는 연결 재사용으로 아끼는 TLS 핸드셰이크 비용이 더해진다.
+
+    python scripts/benchmark-ticket-api.py --calls 200 --output ticket-api.json
+    python scripts/benchmark-ticket-api.py --calls 200 --compare ticket-api.json
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import requests
+
+RESULT_FORMAT_VERSION = 1
+MODES = ("bare", "pooled")
+TICKET = {"title": "배송 지연 문의", "description": "주문한 상품이 도착하지 않았습니다",
+          "priority": "medium", "customer_id": "customer-001"}
+
+
+class TicketApiStandIn:
+    """
+    티켓 API 대역 (HTTP/1.1 keep-alive)
+
+    POST /oauth/token 은 client credentials 토큰을, POST /tickets 는 201 과 티켓을 돌려준다.
+    /tickets 요청은 latency 초 뒤에 응답하고, failure_every 번째 요청마다 503 을 돌려준다.
+    """
+
+    def __init__(self, latency: float = 0.0, failure_every: int = 0):
+        self.latency = latency
+        self.failure_every = failure_every
+        self.connections = 0
+        self.ticket_requests = 0
+        self.token_requests = 0
+        self._lock = threading.Lock()
+        store = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # 헤더와 본문을 따로 쓰므로 Nagle 알고리즘이 keep-alive 응답을 지연 ACK 만큼 늦추지 않게 한다
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with store._lock:
+                    store.connections += 1
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if self.path == "/oauth/token":
+                    with store._lock:
+                        store.token_requests += 1
+                    self._send(200, {"access_token": uuid.uuid4().hex, "token_type": "Bearer", "expires_in": 3600})
+                    return
+                with store._lock:
+                    store.ticket_requests += 1
+                    failing = store.failure_every and store.ticket_requests % store.failure_every == 0
+                time.sleep(store.latency)
+                if failing:
+                    self._send(503, {"error": "unavailable"})
+                    return
+                self._send(201, {"id": f"TICKET-{uuid.uuid4().hex[:8]}", "status": "open",
+                                 "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())})
+
+            def _send(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+
+    def counters(self) -> Dict[str, int]:
+        with self._lock:
+            return {"connections": self.connections, "ticket_requests": self.ticket_requests,
+                    "token_requests": self.token_requests}
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def load_tool(agent_dir: str):
+    """create-ticket.py 를 새 모듈로 로드 (세션과 토큰 캐시가 비어 있는 상태)"""
+    path = os.path.join(agent_dir, "tools", "implementations", "create-ticket.py")
+    spec = importlib.util.spec_from_file_location("create_ticket_tool", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def bare_create_ticket(url: str) -> Dict[str, Any]:
+    """연결 재사용, 토큰 캐시, 재시도가 없는 단순 구현 (비교 기준)"""
+    token = requests.post(f"{url}/oauth/token", data={"grant_type": "client_credentials"}, timeout=10)
+    token.raise_for_status()
+    response = requests.post(f"{url}/tickets", json=TICKET, timeout=10,
+                             headers={"Authorization": f"Bearer {token.json()['access_token']}"})
+    if response.status_code != 201:
+        raise RuntimeError(f"Failed to create ticket: {response.status_code}")
+    return response.json()
+
+
+def run_mode(mode: str, args) -> Dict[str, Any]:
+    """대역 서버 하나에 --calls 번 티켓 생성 (첫 호출 포함, 호출별 지연 시간)"""
+    with TicketApiStandIn(args.server_latency_ms / 1000.0, args.failure_every) as server:
+        environment = {
+            "TICKET_API_ENDPOINT": f"{server.url}/tickets",
+            "TICKET_API_AUTH": "oauth2",
+            "TICKET_OAUTH_TOKEN_URL": f"{server.url}/oauth/token",
+            "TICKET_API_RETRIES": str(args.retries),
+            "TICKET_API_BACKOFF": str(args.backoff),
+        }
+        saved = {key: os.environ.get(key) for key in environment}
+        os.environ.update(environment)
+        try:
+            tool = load_tool(args.agent_dir)
+            latencies, failures = [], 0
+            for _ in range(args.calls):
+                started = time.perf_counter()
+                try:
+                    if mode == "bare":
+                        bare_create_ticket(server.url)
+                    else:
+                        tool.create_ticket(**TICKET)
+                except Exception:
+                    failures += 1
+                latencies.append((time.perf_counter() - started) * 1000.0)
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+        return {"calls": args.calls, "failed": failures, "latency_ms": _latency(latencies),
+                "first_call_ms": round(latencies[0], 3) if latencies else 0.0, "server": server.counters()}
+
+
+def _latency(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"p50": 0.0, "p99": 0.0, "mean": 0.0}
+    ordered = sorted(values)
+    return {
+        "p50": round(statistics.median(ordered), 3),
+        "p99": round(ordered[min(len(ordered) - 1, int(round(0.99 * (len(ordered) - 1))))], 3),
+        "mean": round(statistics.fmean(ordered), 3),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]):
+    """이전 결과와 모드별 p50/p99, 실패 수 차이를 출력"""
+    if baseline.get("config") != current["config"]:
+        print("⚠ Baseline was run with a different configuration; differences may not be meaningful")
+    print(f"Compared with {baseline.get('git_commit') or 'baseline'}:")
+    for mode, result in current["modes"].items():
+        old = baseline.get("modes", {}).get(mode)
+        if old is None:
+            continue
+        print(f"  {mode:<7} p50 {result['latency_ms']['p50'] - old['latency_ms']['p50']:+.2f} ms  "
+              f"p99 {result['latency_ms']['p99'] - old['latency_ms']['p99']:+.2f} ms  "
+              f"failed {result['failed'] - old['failed']:+d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark create-ticket API call latency against a local stand-in")
+    parser.add_argument("--agent-dir", default="agents/customer-support-agent", help="Agent directory")
+    parser.add_argument("--calls", type=int, default=200, help="Tickets created per mode")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES), help="Client modes to run")
+    parser.add_argument("--server-latency-ms", type=float, default=5.0, help="Stand-in processing time per ticket")
+    parser.add_argument("--failure-every", type=int, default=50, help="Every Nth ticket request returns 503 (0: never)")
+    parser.add_argument("--retries", type=int, default=3, help="TICKET_API_RETRIES for pooled mode")
+    parser.add_argument("--backoff", type=float, default=0.05, help="TICKET_API_BACKOFF for pooled mode (seconds)")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--compare", help="Previous JSON results to compare against")
+
+    args = parser.parse_args()
+
+    config = {key: getattr(args, key) for key in (
+        "calls", "modes", "server_latency_ms", "failure_every", "retries", "backoff")}
+    modes = {}
+    for mode in args.modes:
+        modes[mode] = result = run_mode(mode, args)
+        print(f"  {mode:<7} p50 {result['latency_ms']['p50']:.2f} ms  p99 {result['latency_ms']['p99']:.2f} ms  "
+              f"first {result['first_call_ms']:.2f} ms  connections {result['server']['connections']}  "
+              f"tokens {result['server']['token_requests']}  failed {result['failed']}")
+
+    results = {
+        "format_version": RESULT_FORMAT_VERSION,
+        "benchmark": "ticket-api",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_commit": git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "requests": requests.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": config,
+        "modes": modes,
+    }
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(results, json.load(f))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
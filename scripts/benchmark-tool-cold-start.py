@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+도구 구현(Lambda 액션 그룹) 콜드/웜 스타트 지연 시간 측정
+
+도구마다 새 Python 프로세스(새 Lambda 컨테이너에 해당)를 --runs 번 띄워 다음을 측정한다.
+
+    import_ms           핸들러 모듈 import 시간 (Lambda 초기화 단계, KB_PRELOAD 적재 포함)
+    first_invocation_ms 첫 lambda_handler 호출 시간 (지연 import, 인덱스 열기, 연결 포함)
+    warm_invocation_ms  같은 프로세스에서 이어지는 호출 시간 (--warm 번)
+    process_ms          인터프리터 시작부터 종료까지의 전체 시간
+
+첫 측정 전에 기록하지 않는 실행을 한 번 해서 .pyc 를 만들어 둔다 (Lambda 패키지에 .pyc 를 함께
+넣은 경우와 같음). --no-bytecode 는 매 실행마다 소스를 다시 컴파일한다 (.pyc 없이 배포한 경우).
+--import-profile 은 -X importtime 으로 핸들러 모듈 import 와 첫 호출에서 오래 걸린 최상위 모듈을 보고한다.
+
+도구 환경 변수는 --env 로 넘긴다 (예: 로컬 인덱스 번들, 초기화 단계 사전 적재).
+
+    python scripts/benchmark-tool-cold-start.py --output cold-start.json
+    python scripts/benchmark-tool-cold-start.py --env KB_INDEX_PATH=build/kb-index/customer-support-agent-kb-dev \\
+        --env KB_PRELOAD=1 --compare cold-start.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+RESULT_FORMAT_VERSION = 1
+# 도구별 기본 이벤트 (Bedrock Agent 가 Lambda 에 전달하는 형식)
+EVENTS = {
+    "search-knowledge-base": {"parameters": {"query": "반품 절차", "max_results": 3}},
+    "create-ticket": {"parameters": {"title": "배송 지연 문의", "description": "주문한 상품이 도착하지 않았습니다",
+                                     "priority": "medium", "customer_id": "customer-001"}},
+}
+# import 시점에 적재되었는지 보고할 무거운 모듈
+HEAVY_MODULES = ("numpy", "requests", "boto3", "kb_index")
+IMPORT_MARKER = "-- tool import --"
+
+
+def run_child(tool_path: str, event: Dict[str, Any], warm: int) -> Dict[str, Any]:
+    """
+    (자식 프로세스) 핸들러 모듈을 import 하고 lambda_handler 를 호출하며 시간 측정
+
+    Lambda 런타임처럼 도구 디렉터리를 sys.path 에 두고 모듈을 import 한다. 도구의 출력은 버린다.
+    """
+    import contextlib
+    import importlib.util
+    import io
+
+    sys.path.insert(0, os.path.dirname(tool_path))
+    output = io.StringIO()
+    sys.stderr.write(IMPORT_MARKER + "\n")
+    sys.stderr.flush()
+    with contextlib.redirect_stdout(output):
+        started = time.perf_counter()
+        spec = importlib.util.spec_from_file_location("lambda_function", tool_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        imported = time.perf_counter()
+        loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+
+        response = module.lambda_handler(event, None)
+        first = time.perf_counter()
+        warm_ms = []
+        for _ in range(warm):
+            call_started = time.perf_counter()
+            module.lambda_handler(event, None)
+            warm_ms.append((time.perf_counter() - call_started) * 1000.0)
+    return {
+        "import_ms": (imported - started) * 1000.0,
+        "first_invocation_ms": (first - imported) * 1000.0,
+        "warm_invocation_ms": warm_ms,
+        "modules_at_import": loaded,
+        "status_code": response.get("statusCode"),
+    }
+
+
+def _child_env(overrides: Dict[str, str], bytecode: bool, pycache: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update(overrides)
+    if not bytecode:
+        # 빈 캐시 디렉터리를 가리키고 쓰지 않게 해 매번 소스를 컴파일한다
+        env["PYTHONDONTWRITEBYTECODE"] = "1"
+        env["PYTHONPYCACHEPREFIX"] = pycache
+    return env
+
+
+def cold_start(tool_path: str, event: Dict[str, Any], warm: int, env: Dict[str, str],
+               import_profile: bool = False) -> Dict[str, Any]:
+    """새 프로세스에서 한 번 측정 (import_profile 이면 -X importtime 결과도 함께)"""
+    command = [sys.executable]
+    if import_profile:
+        command += ["-X", "importtime"]
+    command += [os.path.abspath(__file__), "--child", tool_path, "--event", json.dumps(event, ensure_ascii=False),
+                "--warm", str(warm)]
+    started = time.perf_counter()
+    completed = subprocess.run(command, capture_output=True, text=True, env=env)
+    elapsed = (time.perf_counter() - started) * 1000.0
+    if completed.returncode != 0:
+        raise RuntimeError(f"{os.path.basename(tool_path)} failed:\n{completed.stderr[-2000:]}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["process_ms"] = elapsed
+    if import_profile:
+        result["slowest_imports"] = slowest_imports(completed.stderr)
+    return result
+
+
+def slowest_imports(importtime: str, top: int = 10) -> List[Dict[str, Any]]:
+    """-X importtime 출력에서 핸들러 모듈 import 와 호출 중 최상위 import 의 누적 시간 상위 top 개"""
+    lines = importtime.splitlines()
+    if IMPORT_MARKER in lines:
+        lines = lines[lines.index(IMPORT_MARKER) + 1:]
+    imports = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        # 들여쓰기가 한 칸인 항목이 도구 코드가 직접 import 한 모듈이다
+        if name.startswith(" ") and not name.startswith("  "):
+            imports.append({"module": name.strip(), "cumulative_ms": round(int(parts[1]) / 1000.0, 3)})
+    return sorted(imports, key=lambda entry: -entry["cumulative_ms"])[:top]
+
+
+def _stats(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"p50": 0.0, "max": 0.0, "mean": 0.0}
+    return {
+        "p50": round(statistics.median(values), 3),
+        "max": round(max(values), 3),
+        "mean": round(statistics.fmean(values), 3),
+    }
+
+
+def benchmark_tool(name: str, tool_path: str, args, env: Dict[str, str]) -> Dict[str, Any]:
+    """도구 하나의 콜드 스타트를 --runs 번 측정해 요약"""
+    event = EVENTS[name]
+    # .pyc 를 만들고 파일 캐시를 데운다 (기록하지 않음)
+    cold_start(tool_path, event, 0, env)
+    runs = [cold_start(tool_path, event, args.warm, env) for _ in range(args.runs)]
+    summary = {
+        "runs": len(runs),
+        "import_ms": _stats([run["import_ms"] for run in runs]),
+        "first_invocation_ms": _stats([run["first_invocation_ms"] for run in runs]),
+        "warm_invocation_ms": _stats([ms for run in runs for ms in run["warm_invocation_ms"]]),
+        "process_ms": _stats([run["process_ms"] for run in runs]),
+        "modules_at_import": runs[-1]["modules_at_import"],
+        "status_code": runs[-1]["status_code"],
+    }
+    if args.import_profile:
+        summary["slowest_imports"] = cold_start(tool_path, event, 0, env, import_profile=True)["slowest_imports"]
+    return summary
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]):
+    """이전 결과와 도구별 import / 첫 호출 / 웜 호출 p50 차이를 출력"""
+    if baseline.get("config") != current["config"]:
+        print("⚠ Baseline was run with a different configuration; differences may not be meaningful")
+    print(f"Compared with {baseline.get('git_commit') or 'baseline'}:")
+    for name, result in current["tools"].items():
+        old = baseline.get("tools", {}).get(name)
+        if old is None:
+            continue
+        deltas = "  ".join(f"{key.replace('_ms', '')} {result[key]['p50'] - old[key]['p50']:+.2f} ms"
+                           for key in ("import_ms", "first_invocation_ms", "warm_invocation_ms"))
+        print(f"  {name:<22} {deltas}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold/warm start latency of agent tool implementations")
+    parser.add_argument("--agent-dir", default="agents/customer-support-agent", help="Agent directory")
+    parser.add_argument("--tools", nargs="+", choices=sorted(EVENTS), default=list(EVENTS), help="Tools to measure")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes (cold starts) per tool")
+    parser.add_argument("--warm", type=int, default=20, help="Warm invocations after the first one in each process")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Environment variable for the tool (repeatable)")
+    parser.add_argument("--no-bytecode", action="store_true", help="Compile from source on every run (no .pyc)")
+    parser.add_argument("--import-profile", action="store_true", help="Report the slowest imports (-X importtime)")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--compare", help="Previous JSON results to compare against")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--event", help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, json.loads(args.event), args.warm)))
+        return
+
+    overrides = {}
+    for item in args.env:
+        key, separator, value = item.partition("=")
+        if not separator:
+            parser.error(f"--env expects KEY=VALUE: {item}")
+        overrides[key] = value
+
+    impl_dir = os.path.join(args.agent_dir, "tools", "implementations")
+    config = {"tools": args.tools, "runs": args.runs, "warm": args.warm, "env": overrides,
+              "bytecode": not args.no_bytecode}
+    with tempfile.TemporaryDirectory(prefix="tool-cold-start-") as pycache:
+        env = _child_env(overrides, not args.no_bytecode, pycache)
+        tools = {}
+        for name in args.tools:
+            tools[name] = result = benchmark_tool(name, os.path.join(impl_dir, f"{name}.py"), args, env)
+            print(f"  {name:<22} import p50 {result['import_ms']['p50']:.2f} ms  "
+                  f"first call p50 {result['first_invocation_ms']['p50']:.2f} ms  "
+                  f"warm p50 {result['warm_invocation_ms']['p50']:.2f} ms  "
+                  f"loaded at import: {', '.join(result['modules_at_import']) or '-'}")
+
+    results = {
+        "format_version": RESULT_FORMAT_VERSION,
+        "benchmark": "tool-cold-start",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_commit": git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": config,
+        "tools": tools,
+    }
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(results, json.load(f))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"✓ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""
+Knowledge Base 동기화 지원 모듈
+
+scripts/sync-knowledge-base.py 가 사용하는 동기화 전용 구성 요소를 모아둔 패키지.
+(검색 도구와 공유하는 인덱스 포맷은 Agent의 tools/implementations 쪽에 둔다)
+"""
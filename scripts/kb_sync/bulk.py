@@ -0,0 +1,415 @@
+"""
+벡터 스토어 Bulk Upsert
+
+OpenSearch / Azure Search / Vertex AI Vector Search 에 문서를 한 건씩 색인하지 않고
+bulk 요청으로 묶어서 보낸다.
+
+- 요청 크기는 문서 수(max_docs)와 페이로드 바이트(max_bytes) 두 기준으로 자른다
+- 최대 max_in_flight 개의 bulk 요청을 동시에 보내고, 그 이상은 add() 가 막힌다 (backpressure)
+- 응답에서 실패한 항목 중 재시도 가능한 항목(429, 5xx 등)만 지수 백오프로 다시 보낸다
+- 소스에서 사라진 문서의 삭제도 같은 방식으로 묶어 보내되, 초당 삭제 수를 제한한다 (BulkDeleter)
+"""
+import base64
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+# 재시도할 HTTP 상태 코드 (요청 전체 또는 항목 단위)
+# 409(버전 충돌)와 422(매핑/검증 오류)는 같은 요청을 다시 보내도 결과가 같으므로 바로 실패로 보고한다
+# (upsert / delete 에 버전 조건을 붙이지 않으므로 해소할 버전 충돌도 없다)
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+def vector_values(item: Dict[str, Any]) -> List[float]:
+    """
+    항목의 임베딩을 JSON 직렬화용 float 리스트로 변환
+
+    파이프라인에서는 float16/int8 등 압축 형식(numpy 행)으로 다루다가 전송 직전에만 복원한다.
+    """
+    vector = np.asarray(item["embedding"], dtype=np.float32)
+    if item.get("embedding_scale") is not None:
+        vector = vector * item["embedding_scale"]
+    return vector.tolist()
+
+
+class BulkIndexError(Exception):
+    """재시도 후에도 색인하지 못한 항목이 남음"""
+
+    def __init__(self, failures: List[Tuple[str, str]]):
+        self.failures = failures
+        sample = ", ".join(f"{doc_id}: {error}" for doc_id, error in failures[:5])
+        super().__init__(f"{len(failures)} documents failed to index ({sample})")
+
+
+@dataclass
+class ItemFailure:
+    """bulk 응답에서 실패한 항목 (position 은 요청 내 순서)"""
+    position: int
+    error: str
+    retryable: bool
+
+
+class BulkBackend:
+    """
+    벡터 스토어별 bulk 요청 형식
+
+    encode() 로 항목을 직렬화해 두면 BulkUpserter 가 바이트 크기를 기준으로 배치를 나누고,
+    build_body() 로 요청 본문을 만든 뒤 parse_response() 로 항목별 실패를 해석한다.
+    """
+    name = "backend"
+    content_type = "application/json"
+
+    def __init__(self, session: Optional[requests.Session] = None, timeout: float = 30.0):
+        self.session = session or requests.Session()
+        self.timeout = timeout
+
+    def url(self) -> str:
+        raise NotImplementedError
+
+    def headers(self) -> Dict[str, str]:
+        return {"Content-Type": self.content_type}
+
+    def encode(self, item: Dict[str, Any]) -> bytes:
+        raise NotImplementedError
+
+    def build_body(self, encoded: List[bytes]) -> bytes:
+        raise NotImplementedError
+
+    def parse_response(self, response: requests.Response, count: int) -> List[ItemFailure]:
+        raise NotImplementedError
+
+    def delete_url(self) -> str:
+        return self.url()
+
+    def encode_delete(self, doc_id: str) -> bytes:
+        raise NotImplementedError
+
+    def build_delete_body(self, encoded: List[bytes]) -> bytes:
+        return self.build_body(encoded)
+
+    def send(self, encoded: List[bytes], delete: bool = False) -> List[ItemFailure]:
+        """bulk 요청 1회 전송. 요청 전체가 실패하면 모든 항목을 실패로 반환"""
+        url = self.delete_url() if delete else self.url()
+        body = self.build_delete_body(encoded) if delete else self.build_body(encoded)
+        try:
+            response = self.session.post(url, data=body, headers=self.headers(), timeout=self.timeout)
+        except requests.RequestException as e:
+            return [ItemFailure(i, str(e), True) for i in range(len(encoded))]
+
+        if response.status_code >= 300 and response.status_code != 207:
+            retryable = response.status_code in RETRYABLE_STATUS
+            error = f"HTTP {response.status_code}"
+            return [ItemFailure(i, error, retryable) for i in range(len(encoded))]
+        return self.parse_response(response, len(encoded))
+
+
+class OpenSearchBulkBackend(BulkBackend):
+    """OpenSearch _bulk API (NDJSON)"""
+    name = "opensearch"
+    content_type = "application/x-ndjson"
+
+    def __init__(self, endpoint: str, index_name: str, auth: Any = None, **kwargs):
+        super().__init__(**kwargs)
+        self.endpoint = endpoint.rstrip("/")
+        self.index_name = index_name
+        if auth is not None:
+            self.session.auth = auth
+
+    def url(self) -> str:
+        return f"{self.endpoint}/_bulk"
+
+    def encode(self, item: Dict[str, Any]) -> bytes:
+        action = {"index": {"_index": self.index_name, "_id": item["id"]}}
+        source = {"embedding": vector_values(item), **item.get("metadata", {})}
+        return (json.dumps(action) + "\n" + json.dumps(source, ensure_ascii=False) + "\n").encode("utf-8")
+
+    def encode_delete(self, doc_id: str) -> bytes:
+        return (json.dumps({"delete": {"_index": self.index_name, "_id": doc_id}}) + "\n").encode("utf-8")
+
+    def build_body(self, encoded: List[bytes]) -> bytes:
+        return b"".join(encoded)
+
+    def parse_response(self, response: requests.Response, count: int) -> List[ItemFailure]:
+        body = response.json()
+        if not body.get("errors"):
+            return []
+        failures = []
+        for i, entry in enumerate(body.get("items", [])):
+            result = next(iter(entry.values()))
+            status = result.get("status", 200)
+            if status == 404 and result.get("result") == "not_found":
+                # 이미 없는 문서의 삭제는 성공으로 본다
+                continue
+            if status >= 300:
+                error = result.get("error", {})
+                reason = error.get("type", f"HTTP {status}") if isinstance(error, dict) else str(error)
+                failures.append(ItemFailure(i, reason, status in RETRYABLE_STATUS))
+        return failures
+
+
+class AzureSearchBulkBackend(BulkBackend):
+    """Azure AI Search 문서 인덱싱 API (docs/index, mergeOrUpload)"""
+    name = "azure_search"
+
+    def __init__(self, endpoint: str, index_name: str, api_key: str,
+                 api_version: str = "2023-11-01", **kwargs):
+        super().__init__(**kwargs)
+        self.endpoint = endpoint.rstrip("/")
+        self.index_name = index_name
+        self.api_key = api_key
+        self.api_version = api_version
+
+    @staticmethod
+    def document_key(doc_id: str) -> str:
+        """Azure Search 키에는 '#' 등을 쓸 수 없으므로 URL-safe base64 로 변환"""
+        return base64.urlsafe_b64encode(doc_id.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def url(self) -> str:
+        return f"{self.endpoint}/indexes/{self.index_name}/docs/index?api-version={self.api_version}"
+
+    def headers(self) -> Dict[str, str]:
+        return {**super().headers(), "api-key": self.api_key}
+
+    def encode(self, item: Dict[str, Any]) -> bytes:
+        doc = {
+            "@search.action": "mergeOrUpload",
+            "id": self.document_key(item["id"]),
+            "chunk_id": item["id"],
+            "embedding": vector_values(item),
+            **item.get("metadata", {}),
+        }
+        return json.dumps(doc, ensure_ascii=False).encode("utf-8")
+
+    def encode_delete(self, doc_id: str) -> bytes:
+        return json.dumps({"@search.action": "delete", "id": self.document_key(doc_id)}).encode("utf-8")
+
+    def build_body(self, encoded: List[bytes]) -> bytes:
+        return b'{"value":[' + b",".join(encoded) + b"]}"
+
+    def parse_response(self, response: requests.Response, count: int) -> List[ItemFailure]:
+        failures = []
+        for i, result in enumerate(response.json().get("value", [])):
+            if not result.get("status", True):
+                status = result.get("statusCode", 500)
+                failures.append(ItemFailure(i, result.get("errorMessage") or f"HTTP {status}",
+                                            status in RETRYABLE_STATUS))
+        return failures
+
+
+class VertexVectorSearchBulkBackend(BulkBackend):
+    """
+    Vertex AI Vector Search upsertDatapoints API
+
+    요청 단위로 성공/실패하므로 항목별 실패는 요청 전체 실패로만 나타난다.
+    """
+    name = "vertex_search"
+
+    def __init__(self, index_resource: str, region: str, access_token: str, **kwargs):
+        super().__init__(**kwargs)
+        self.index_resource = index_resource
+        self.region = region
+        self.access_token = access_token
+
+    def url(self) -> str:
+        return f"https://{self.region}-aiplatform.googleapis.com/v1/{self.index_resource}:upsertDatapoints"
+
+    def headers(self) -> Dict[str, str]:
+        return {**super().headers(), "Authorization": f"Bearer {self.access_token}"}
+
+    def encode(self, item: Dict[str, Any]) -> bytes:
+        datapoint = {
+            "datapointId": item["id"],
+            "featureVector": vector_values(item),
+            "restricts": [{"namespace": "source", "allowList": [item.get("metadata", {}).get("source", "")]}],
+        }
+        return json.dumps(datapoint, ensure_ascii=False).encode("utf-8")
+
+    def build_body(self, encoded: List[bytes]) -> bytes:
+        return b'{"datapoints":[' + b",".join(encoded) + b"]}"
+
+    def delete_url(self) -> str:
+        return f"https://{self.region}-aiplatform.googleapis.com/v1/{self.index_resource}:removeDatapoints"
+
+    def encode_delete(self, doc_id: str) -> bytes:
+        return json.dumps(doc_id).encode("utf-8")
+
+    def build_delete_body(self, encoded: List[bytes]) -> bytes:
+        return b'{"datapointIds":[' + b",".join(encoded) + b"]}"
+
+    def parse_response(self, response: requests.Response, count: int) -> List[ItemFailure]:
+        return []
+
+
+@dataclass
+class BulkStats:
+    """bulk upsert 누적 통계"""
+    requests: int = 0
+    documents: int = 0
+    bytes_sent: int = 0
+    retries: int = 0
+    failed: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def to_dict(self) -> Dict[str, int]:
+        return {"requests": self.requests, "documents": self.documents, "bytes_sent": self.bytes_sent,
+                "retries": self.retries, "failed": self.failed}
+
+    def summary(self) -> str:
+        return (f"{self.documents} documents in {self.requests} bulk requests "
+                f"({self.bytes_sent / 1024 / 1024:.1f} MiB, {self.retries} retried, {self.failed} failed)")
+
+
+class BulkUpserter:
+    """
+    항목을 버퍼링해 bulk 요청으로 보내는 upsert 레이어
+
+    Args:
+        backend: 벡터 스토어별 BulkBackend
+        max_docs: bulk 요청당 최대 문서 수 (indexing.batchSize)
+        max_bytes: bulk 요청당 최대 페이로드 바이트 (indexing.maxBatchBytes)
+        max_in_flight: 동시에 진행할 bulk 요청 수 (indexing.maxConcurrency)
+        retry_attempts: 실패 항목 재시도 횟수 (indexing.retryAttempts)
+        backoff_seconds: 첫 재시도 대기 시간 (재시도마다 2배)
+    """
+
+    def __init__(self, backend: BulkBackend, max_docs: int = 100, max_bytes: int = 10 * 1024 * 1024,
+                 max_in_flight: int = 5, retry_attempts: int = 3, backoff_seconds: float = 0.5):
+        self.backend = backend
+        self.max_docs = max_docs
+        self.max_bytes = max_bytes
+        self.retry_attempts = retry_attempts
+        self.backoff_seconds = backoff_seconds
+        self.stats = BulkStats()
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight)
+        backend.session.mount("http://", adapter)
+        backend.session.mount("https://", adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="kb-bulk")
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._futures: List[Future] = []
+        self._failures: List[Tuple[str, str]] = []
+        self._buffer: List[Tuple[str, bytes]] = []
+        self._buffer_bytes = 0
+
+    def add(self, item: Dict[str, Any]):
+        """항목 추가. 배치가 차면 전송하며, 진행 중인 요청이 가득 차 있으면 대기한다"""
+        encoded = self._encode(item)
+        if self._buffer and (len(self._buffer) >= self.max_docs
+                             or self._buffer_bytes + len(encoded) > self.max_bytes):
+            self._submit()
+        self._buffer.append((item["id"], encoded))
+        self._buffer_bytes += len(encoded)
+
+    def add_many(self, items: List[Dict[str, Any]]):
+        for item in items:
+            self.add(item)
+
+    def _encode(self, item: Dict[str, Any]) -> bytes:
+        return self.backend.encode(item)
+
+    def _send(self, encoded: List[bytes]) -> List[ItemFailure]:
+        return self.backend.send(encoded)
+
+    def _submit(self):
+        batch, self._buffer, self._buffer_bytes = self._buffer, [], 0
+        self._slots.acquire()
+        future = self._executor.submit(self._send_with_retry, batch)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures = [f for f in self._futures if not f.done() or f.exception()]
+        self._futures.append(future)
+
+    def _send_with_retry(self, batch: List[Tuple[str, bytes]]):
+        pending = batch
+        for attempt in range(self.retry_attempts + 1):
+            if attempt:
+                time.sleep(self.backoff_seconds * (2 ** (attempt - 1)))
+            failures = self._send([encoded for _, encoded in pending])
+            with self.stats._lock:
+                self.stats.requests += 1
+                self.stats.bytes_sent += sum(len(encoded) for _, encoded in pending)
+                self.stats.documents += len(pending) - len(failures)
+                if attempt:
+                    self.stats.retries += len(pending)
+
+            retry = []
+            for failure in failures:
+                doc_id, encoded = pending[failure.position]
+                if failure.retryable and attempt < self.retry_attempts:
+                    retry.append((doc_id, encoded))
+                else:
+                    with self.stats._lock:
+                        self.stats.failed += 1
+                        self._failures.append((doc_id, failure.error))
+            if not retry:
+                return
+            pending = retry
+
+    def flush(self):
+        """버퍼에 남은 항목을 보내고 진행 중인 요청이 끝날 때까지 대기"""
+        if self._buffer:
+            self._submit()
+        for future in self._futures:
+            future.result()
+        self._futures = []
+
+    def close(self):
+        """flush 후 종료. 최종 실패 항목이 있으면 BulkIndexError"""
+        try:
+            self.flush()
+        finally:
+            self._executor.shutdown(wait=True)
+        if self._failures:
+            raise BulkIndexError(self._failures)
+
+
+class RateLimiter:
+    """초당 rate 개 이하로 항목을 내보내도록 요청 간격을 벌린다 (여러 스레드가 공유)"""
+
+    def __init__(self, rate: float):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, count: int = 1):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + count / self.rate
+        if start > now:
+            time.sleep(start - now)
+
+
+class BulkDeleter(BulkUpserter):
+    """
+    문서 ID 를 bulk 삭제 요청으로 묶어 보내는 레이어
+
+    소스에서 문서가 한꺼번에 많이 사라져도 벡터 스토어에 부하가 몰리지 않도록
+    max_per_second (indexing.deleteRateLimit) 로 초당 삭제 수를 제한한다. 재시도 포함.
+    이미 없는 문서의 삭제는 성공으로 처리된다.
+    """
+
+    def __init__(self, backend: BulkBackend, max_per_second: Optional[float] = None, **kwargs):
+        super().__init__(backend, **kwargs)
+        self.rate_limiter = RateLimiter(max_per_second) if max_per_second else None
+
+    def delete_many(self, doc_ids: List[str]):
+        for doc_id in doc_ids:
+            self.add({"id": doc_id})
+
+    def _encode(self, item: Dict[str, Any]) -> bytes:
+        return self.backend.encode_delete(item["id"])
+
+    def _send(self, encoded: List[bytes]) -> List[ItemFailure]:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(len(encoded))
+        return self.backend.send(encoded, delete=True)
@@ -0,0 +1,6 @@
+"""
+데이터 소스별 문서 수집기
+
+각 수집기는 문서를 하나씩 yield 하는 iterable 이며, KB 동기화 파이프라인의 collect 단계가 된다.
+문서 형식: {"id", "content", "source", "metadata": {...}}
+"""
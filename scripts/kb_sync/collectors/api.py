@@ -0,0 +1,333 @@
+"""
+API 문서 수집기 (aiohttp)
+
+- page / cursor 방식 페이지네이션을 지원하고
+- page 방식은 max_concurrency 개 페이지를 동시에 요청하며
+- OAuth2 client credentials 토큰을 만료 전까지 캐시하고 필요하면 갱신하고
+- 페이지별 ETag / Last-Modified 를 매니페스트에 저장해 If-None-Match / If-Modified-Since 로
+  조건부 요청을 보낸다. 304 응답 페이지는 본문 전송도, 임베딩도 하지 않는다.
+
+수집은 별도 스레드의 이벤트 루프에서 실행되고, 문서는 크기가 제한된 큐를 통해
+일반 iterator 로 파이프라인 collect 단계에 전달된다.
+"""
+import asyncio
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urlencode
+
+from kb_sync.manifest import SourceManifest
+
+_END = object()
+
+
+class OAuth2TokenProvider:
+    """
+    OAuth2 client credentials 토큰 캐시
+
+    만료 refresh_margin 초 전까지는 캐시된 토큰을 쓰고, 동시에 여러 요청이 갱신하려 해도
+    토큰 엔드포인트는 한 번만 호출한다.
+    """
+
+    def __init__(self, token_url: str, client_id: str, client_secret: str,
+                 scope: Optional[str] = None, refresh_margin: float = 60.0):
+        self.token_url = token_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.scope = scope
+        self.refresh_margin = refresh_margin
+        self.requests = 0
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop = None
+
+    async def token(self, session) -> str:
+        # 토큰은 동기화 실행(이벤트 루프)이 바뀌어도 재사용하고, 잠금만 루프마다 새로 만든다
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._lock, self._loop = asyncio.Lock(), loop
+        async with self._lock:
+            if self._token is None or time.monotonic() >= self._expires_at - self.refresh_margin:
+                await self._refresh(session)
+            return self._token
+
+    async def _refresh(self, session):
+        data = {"grant_type": "client_credentials", "client_id": self.client_id, "client_secret": self.client_secret}
+        if self.scope:
+            data["scope"] = self.scope
+        async with session.post(self.token_url, data=data) as response:
+            response.raise_for_status()
+            body = await response.json(content_type=None)
+        self.requests += 1
+        self._token = body["access_token"]
+        self._expires_at = time.monotonic() + float(body.get("expires_in", 3600))
+
+    def invalidate(self):
+        """401 응답을 받으면 캐시된 토큰을 버린다"""
+        self._token = None
+
+    async def headers(self, session) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {await self.token(session)}"}
+
+
+class StaticAuth:
+    """api_key / basic 처럼 고정된 인증 헤더"""
+
+    def __init__(self, headers: Dict[str, str]):
+        self._headers = headers
+
+    async def headers(self, session) -> Dict[str, str]:
+        return dict(self._headers)
+
+    def invalidate(self):
+        pass
+
+
+@dataclass
+class ApiCollectStats:
+    pages: int = 0
+    not_modified: int = 0
+    documents: int = 0
+    unchanged: int = 0
+
+
+class ApiCollector:
+    """
+    Args:
+        endpoint: 문서 목록 API URL
+        source_id: 데이터 소스 ID (문서 ID 접두사)
+        manifest: 페이지별 ETag/Last-Modified 와 항목 ID 를 기록하는 매니페스트
+        auth: OAuth2TokenProvider / StaticAuth (None 이면 인증 없음)
+        pagination: {"type": "page" | "cursor", "pageParam", "pageSize", "pageSizeParam",
+                     "totalPagesField", "cursorParam", "nextCursorField"}
+        items_field / id_field / content_field / title_field: 응답 JSON 필드 이름
+        max_concurrency: 동시에 요청할 페이지 수
+        queue_size: 파이프라인으로 넘기기 전 버퍼링할 문서 수
+    """
+
+    def __init__(self, endpoint: str, source_id: str, manifest: Optional[SourceManifest] = None,
+                 auth=None, pagination: Optional[Dict[str, Any]] = None,
+                 items_field: str = "items", id_field: str = "id", content_field: str = "content",
+                 title_field: Optional[str] = "title", max_concurrency: int = 4,
+                 timeout: float = 30.0, queue_size: int = 100):
+        self.endpoint = endpoint
+        self.source_id = source_id
+        self.manifest = manifest or SourceManifest()
+        self.auth = auth
+        self.pagination = {
+            "type": "page",
+            "pageParam": "page",
+            "totalPagesField": "totalPages",
+            "cursorParam": "cursor",
+            "nextCursorField": "nextCursor",
+            **(pagination or {}),
+        }
+        self.items_field = items_field
+        self.id_field = id_field
+        self.content_field = content_field
+        self.title_field = title_field
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.queue_size = queue_size
+        self.stats = ApiCollectStats()
+        self.unchanged_ids: List[str] = []
+        self.present_ids: Set[str] = set()
+        self._known_ids: Set[str] = set()
+        self._visited: Set[str] = set()
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+    def _params(self, page: Optional[int] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+        params = {}
+        if page is not None:
+            params[self.pagination["pageParam"]] = page
+        if cursor is not None:
+            params[self.pagination["cursorParam"]] = cursor
+        if self.pagination.get("pageSize"):
+            params[self.pagination.get("pageSizeParam", "pageSize")] = self.pagination["pageSize"]
+        return params
+
+    async def fetch_page(self, session, semaphore, params: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        페이지 요청 (조건부)
+
+        Returns:
+            (매니페스트 키, 응답 JSON) - 304 이면 응답 JSON 은 None
+        """
+        key = f"{self.endpoint}?{urlencode(sorted(params.items()))}"
+        entry = self.manifest.get(key) or {}
+        for attempt in range(2):
+            headers = {"Accept": "application/json"}
+            if self.auth is not None:
+                headers.update(await self.auth.headers(session))
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+            async with semaphore:
+                async with session.get(self.endpoint, params=params, headers=headers) as response:
+                    if response.status == 401 and attempt == 0 and self.auth is not None:
+                        self.auth.invalidate()
+                        continue
+                    self.stats.pages += 1
+                    if response.status == 304:
+                        self.stats.not_modified += 1
+                        return key, None
+                    response.raise_for_status()
+                    body = await response.json(content_type=None)
+                    self.manifest.update(key, etag=response.headers.get("ETag"),
+                                         last_modified=response.headers.get("Last-Modified"))
+                    return key, body
+        raise RuntimeError(f"Authentication failed for {self.endpoint}")
+
+    # ------------------------------------------------------------------
+    # 페이지 처리
+    # ------------------------------------------------------------------
+    async def _handle(self, key: str, body: Optional[Dict[str, Any]], emit) -> Dict[str, Any]:
+        """페이지 결과를 문서로 내보내고, 다음 페이지 판단에 쓸 매니페스트 항목을 반환"""
+        self._visited.add(key)
+        if body is None:
+            entry = self.manifest.get(key) or {}
+            ids = entry.get("item_ids", [])
+            self.stats.unchanged += len(ids)
+            self.unchanged_ids.extend(ids)
+            self.present_ids.update(ids)
+            return entry
+
+        items = body.get(self.items_field, [])
+        ids = []
+        for item in items:
+            document = self.to_document(item)
+            ids.append(document["id"])
+            self.present_ids.add(document["id"])
+            self.stats.documents += 1
+            await emit(document)
+        self.manifest.update(
+            key,
+            item_ids=ids,
+            total_pages=body.get(self.pagination["totalPagesField"]),
+            next_cursor=body.get(self.pagination["nextCursorField"]),
+        )
+        return self.manifest.get(key)
+
+    def prune(self) -> List[str]:
+        """
+        모든 페이지를 읽은 뒤 호출: 더 이상 요청하지 않은 페이지를 매니페스트에서 지우고,
+        이전 페이지 목록에는 있었지만 이번에는 어느 페이지에도 없는 문서 ID 를 반환
+        """
+        for key in list(self.manifest.entries):
+            if key not in self._visited:
+                self.manifest.entries.pop(key, None)
+        return sorted(self._known_ids - self.present_ids)
+
+    def to_document(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        item_id = str(item[self.id_field])
+        content = item.get(self.content_field) or ""
+        title = item.get(self.title_field) if self.title_field else None
+        metadata = {"source_id": self.source_id}
+        if title:
+            metadata["title"] = title
+            content = f"{title}\n{content}"
+        return {
+            "id": f"{self.source_id}/{item_id}",
+            "content": content,
+            "source": item.get("url") or f"{self.endpoint}#{item_id}",
+            "metadata": metadata,
+        }
+
+    async def _collect_pages(self, session, semaphore, emit):
+        first_page = self.pagination.get("startPage", 1)
+        entry = await self._handle(*await self.fetch_page(session, semaphore, self._params(first_page)), emit)
+        total_pages = entry.get("total_pages")
+
+        async def fetch(page: int) -> Dict[str, Any]:
+            return await self._handle(*await self.fetch_page(session, semaphore, self._params(page)), emit)
+
+        if total_pages:
+            await asyncio.gather(*(fetch(page) for page in range(first_page + 1, first_page + int(total_pages))))
+            return
+
+        # 전체 페이지 수를 모르면 max_concurrency 개씩 요청하다가 빈 페이지가 나오면 멈춘다
+        page = first_page + 1
+        last_empty = not entry.get("item_ids")
+        while not last_empty:
+            window = range(page, page + self.max_concurrency)
+            entries = await asyncio.gather(*(fetch(p) for p in window))
+            last_empty = any(not e.get("item_ids") for e in entries)
+            page += self.max_concurrency
+
+    async def _collect_cursor(self, session, semaphore, emit):
+        # 다음 커서는 이전 응답에 있으므로 순차적으로 요청한다 (304 이면 저장된 커서 사용)
+        cursor = None
+        while True:
+            entry = await self._handle(*await self.fetch_page(session, semaphore, self._params(cursor=cursor)), emit)
+            cursor = entry.get("next_cursor")
+            if not cursor:
+                return
+
+    async def collect(self, emit):
+        """모든 페이지를 수집하며 문서마다 await emit(document) 호출"""
+        import aiohttp
+
+        # 페이지 항목은 수집 중에 덮어쓰이므로 이전 동기화의 문서 ID 를 먼저 모아 둔다
+        self._known_ids = {doc_id for entry in self.manifest.entries.values() for doc_id in entry.get("item_ids", [])}
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            if self.pagination["type"] == "cursor":
+                await self._collect_cursor(session, semaphore, emit)
+            else:
+                await self._collect_pages(session, semaphore, emit)
+
+    # ------------------------------------------------------------------
+    # 동기 iterator
+    # ------------------------------------------------------------------
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        out: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        stopped = threading.Event()
+        errors: List[BaseException] = []
+
+        def put(item):
+            while not stopped.is_set():
+                try:
+                    out.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+            raise asyncio.CancelledError()
+
+        async def emit(document):
+            try:
+                out.put_nowait(document)
+            except queue.Full:
+                await asyncio.to_thread(put, document)
+
+        def run():
+            try:
+                asyncio.run(self.collect(emit))
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                try:
+                    put(_END)
+                except asyncio.CancelledError:
+                    pass
+
+        thread = threading.Thread(target=run, name=f"kb-api-{self.source_id}", daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = out.get()
+                if item is _END:
+                    break
+                yield item
+        finally:
+            stopped.set()
+            thread.join()
+        if errors:
+            raise errors[0]
@@ -0,0 +1,234 @@
+"""
+데이터베이스 문서 수집기
+
+- 서버 측 커서(PostgreSQL named cursor)와 fetchmany 배치로 결과를 스트리밍하고
+- incrementalColumn(updated_at 등) 워터마크 이후에 변경된 행만 조회한다.
+
+워터마크는 환경별 소스 매니페스트의 state 에 저장되므로 매시간 동기화가 전체 테이블을
+다시 읽지 않는다. 같은 시각에 커밋된 행을 놓치지 않도록 워터마크와 같은 값(>=)부터 읽고,
+매니페스트에 같은 버전으로 기록된 행은 건너뛴다. 워터마크는 컬럼 값의 타입(watermark_type)과 함께
+저장해 숫자 버전("9" < "10")이나 날짜를 문자열이 아닌 원래 값으로 비교한다.
+
+증분 조회로는 삭제되거나 쿼리 조건(WHERE active = true 등)에서 빠진 행을 알 수 없으므로,
+prune() 이 ID 컬럼만 조회해 매니페스트와 비교한다.
+"""
+import datetime
+import decimal
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set
+
+from kb_sync.manifest import SourceManifest
+
+_SAFE_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def connect(connection_string: str):
+    """
+    연결 문자열로 DB-API 연결 생성
+
+    sqlite:///<path>          로컬 SQLite (개발/테스트용)
+    postgresql://...          PostgreSQL (psycopg2 필요)
+
+    Returns:
+        (connection, DB-API 모듈)
+    """
+    if connection_string.startswith("sqlite:///"):
+        import sqlite3
+        return sqlite3.connect(connection_string[len("sqlite:///"):]), sqlite3
+    if connection_string.startswith(("postgresql://", "postgres://")):
+        import psycopg2
+        return psycopg2.connect(connection_string), psycopg2
+    raise ValueError(f"Unsupported database connection string: {connection_string.split(':', 1)[0]}")
+
+
+def _placeholder(db_module) -> str:
+    return "?" if db_module.paramstyle == "qmark" else "%s"
+
+
+@dataclass
+class DatabaseCollectStats:
+    rows: int = 0
+    unchanged: int = 0
+    batches: int = 0
+
+
+class DatabaseCollector:
+    """
+    Args:
+        connection_string: DB 연결 문자열
+        source_id: 데이터 소스 ID (문서 ID 접두사)
+        query: 수집할 행을 조회하는 SELECT 문
+        manifest: 행별 버전과 워터마크를 기록하는 매니페스트
+        id_column: 문서 ID 로 쓸 컬럼
+        incremental_column: 증분 조회에 쓸 변경 시각 컬럼 (None 이면 매번 전체 조회)
+        content_columns: 문서 내용으로 이어 붙일 컬럼 (None 이면 ID / 변경 시각 외 전체)
+        batch_size: fetchmany 배치 크기 (서버 측 커서의 itersize)
+    """
+
+    def __init__(self, connection_string: str, source_id: str, query: str,
+                 manifest: Optional[SourceManifest] = None, id_column: str = "id",
+                 incremental_column: Optional[str] = "updated_at",
+                 content_columns: Optional[Sequence[str]] = None, batch_size: int = 1000):
+        if incremental_column and not _SAFE_IDENTIFIER.match(incremental_column):
+            raise ValueError(f"Invalid incremental column: {incremental_column}")
+        self.connection_string = connection_string
+        self.source_id = source_id
+        self.query = query.strip().rstrip(";")
+        self.manifest = manifest or SourceManifest()
+        self.id_column = id_column
+        self.incremental_column = incremental_column
+        self.content_columns = list(content_columns) if content_columns else None
+        self.batch_size = batch_size
+        self.stats = DatabaseCollectStats()
+        self.collected_ids: List[str] = []
+
+    @property
+    def watermark(self) -> Optional[Any]:
+        """마지막으로 수집한 incremental_column 값 (watermark_type 이 없는 이전 매니페스트는 문자열)"""
+        text = self.manifest.state.get("watermark")
+        if text is None:
+            return None
+        return _parse(text, self.manifest.state.get("watermark_type"))
+
+    def build_query(self, db_module):
+        """워터마크 조건과 정렬을 붙인 쿼리와 파라미터"""
+        if not self.incremental_column:
+            return self.query, ()
+        column = self.incremental_column
+        sql = f"SELECT * FROM ({self.query}) AS kb_source"
+        params = ()
+        if self.watermark is not None:
+            sql += f" WHERE {column} >= {_placeholder(db_module)}"
+            params = (self.watermark,)
+        return sql + f" ORDER BY {column}", params
+
+    def _cursor(self, connection, db_module):
+        if db_module.__name__ == "psycopg2":
+            # named cursor = 서버 측 커서: 결과를 서버에 두고 itersize 단위로 가져온다
+            cursor = connection.cursor(name=f"kb_sync_{re.sub(r'[^A-Za-z0-9_]', '_', self.source_id)}")
+            cursor.itersize = self.batch_size
+            return cursor
+        return connection.cursor()
+
+    def _rows(self, build_query=None) -> Iterator[Dict[str, Any]]:
+        """build_query(db_module) -> (sql, params) 결과를 배치 단위로 스트리밍 (기본: 수집 쿼리)"""
+        connection, db_module = connect(self.connection_string)
+        try:
+            cursor = self._cursor(connection, db_module)
+            try:
+                cursor.execute(*(build_query or self.build_query)(db_module))
+                columns = None
+                while True:
+                    batch = cursor.fetchmany(self.batch_size)
+                    if not batch:
+                        break
+                    if columns is None:
+                        columns = [c[0] for c in cursor.description]
+                    if build_query is None:
+                        self.stats.batches += 1
+                    for row in batch:
+                        yield dict(zip(columns, row))
+            finally:
+                cursor.close()
+        finally:
+            connection.close()
+
+    def list_ids(self) -> Set[str]:
+        """현재 쿼리 결과에 있는 모든 행 ID (ID 컬럼만 같은 배치 크기로 스트리밍)"""
+        if not _SAFE_IDENTIFIER.match(self.id_column):
+            raise ValueError(f"Invalid id column: {self.id_column}")
+
+        def build_query(db_module):
+            return f"SELECT {self.id_column} FROM ({self.query}) AS kb_source", ()
+
+        return {str(row[self.id_column]) for row in self._rows(build_query)}
+
+    def prune(self) -> List[str]:
+        """
+        수집이 끝난 뒤 호출: 쿼리 결과에서 빠진 행을 매니페스트에서 지우고 그 문서 ID 를 반환
+
+        증분 조회가 아니면 이번에 수집한 행이 곧 전체이므로 다시 조회하지 않는다.
+        """
+        present = self.list_ids() if self.incremental_column else set(self.collected_ids)
+        removed = [row_id for row_id in list(self.manifest.entries) if row_id not in present]
+        for row_id in removed:
+            self.manifest.entries.pop(row_id, None)
+        return [f"{self.source_id}/{row_id}" for row_id in removed]
+
+    def to_document(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        row_id = str(row[self.id_column])
+        skip = {self.id_column, self.incremental_column}
+        columns = self.content_columns or [c for c in row if c not in skip]
+        content = "\n".join(str(row[c]) for c in columns if row.get(c) is not None)
+        metadata = {"source_id": self.source_id}
+        if self.incremental_column:
+            metadata[self.incremental_column] = _text(row.get(self.incremental_column))
+        return {
+            "id": f"{self.source_id}/{row_id}",
+            "content": content,
+            "source": f"database:{self.source_id}/{row_id}",
+            "metadata": metadata,
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        watermark = self.watermark
+        for row in self._rows():
+            row_id = str(row[self.id_column])
+            value = row.get(self.incremental_column) if self.incremental_column else None
+            version = _text(value)
+            if version is not None:
+                if self.manifest.unchanged(row_id, version=version):
+                    self.stats.unchanged += 1
+                    continue
+                if watermark is None or _newer(value, watermark):
+                    watermark = value
+            self.stats.rows += 1
+            self.manifest.update(row_id, version=version)
+            self.collected_ids.append(row_id)
+            yield self.to_document(row)
+        if watermark is not None:
+            self.manifest.state["watermark"] = _text(watermark)
+            self.manifest.state["watermark_type"] = _kind(watermark)
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+# watermark_type 별로 매니페스트의 문자열을 컬럼 값으로 되돌리는 함수
+_PARSERS = {
+    "datetime": datetime.datetime.fromisoformat,
+    "date": datetime.date.fromisoformat,
+    "int": int,
+    "float": float,
+    "decimal": decimal.Decimal,
+}
+
+
+def _kind(value: Any) -> str:
+    if isinstance(value, datetime.datetime):
+        return "datetime"
+    if isinstance(value, datetime.date):
+        return "date"
+    if isinstance(value, int) and not isinstance(value, bool):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, decimal.Decimal):
+        return "decimal"
+    return "str"
+
+
+def _parse(text: str, kind: Optional[str]) -> Any:
+    return _PARSERS.get(kind, str)(text)
+
+
+def _newer(value: Any, watermark: Any) -> bool:
+    """value 가 watermark 보다 뒤인지 (컬럼 타입 그대로 비교)"""
+    if isinstance(watermark, str) and not isinstance(value, str):
+        # watermark_type 을 기록하기 전의 매니페스트: 행 값의 타입으로 읽어 비교한다
+        watermark = _parse(watermark, _kind(value))
+    return value > watermark
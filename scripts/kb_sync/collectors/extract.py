@@ -0,0 +1,202 @@
+"""
+파일 내용에서 텍스트 추출
+
+PDF 파싱은 CPU 작업이라 스레드로는 GIL 때문에 동기화 전체가 직렬화된다.
+ExtractionPool 은 파이프라인 extract 단계에서 파일을 프로세스 풀로 분산하며,
+파일마다 실행 시간(SIGALRM)과 메모리(RLIMIT_AS) 상한을 둔다.
+
+수집기는 작은 파일은 bytes 로, 큰 파일은 임시 파일 경로로 넘기며
+임시 파일은 워커 프로세스에서 메모리 매핑으로 읽는다.
+
+    raw 문서: {"id", "source", "metadata": {"file_type", ...}, "raw": bytes | "raw_path": str}
+"""
+import codecs
+import io
+import mmap
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# 수집 가능한 파일 타입 (data-sources.yaml 의 fileTypes)
+SUPPORTED_FILE_TYPES = ("pdf", "txt", "md")
+
+_DECODE_BLOCK = 1024 * 1024
+
+
+class ExtractionError(Exception):
+    """파일에서 텍스트를 추출하지 못함"""
+
+
+def file_type_of(key: str) -> str:
+    """객체 키 / 파일 이름의 확장자 (소문자, 점 제외)"""
+    name = key.rsplit("/", 1)[-1]
+    return name.rsplit(".", 1)[-1].lower() if "." in name else ""
+
+
+def extract_text(file_type: str, data) -> str:
+    """
+    파일 타입에 맞게 텍스트 추출
+
+    data 는 bytes 또는 mmap 같은 버퍼 (읽기/seek 가능한 객체)
+    """
+    if file_type in ("txt", "md"):
+        # 큰 버퍼도 한 번에 복사하지 않도록 블록 단위로 디코딩
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        view = memoryview(data)
+        parts = [decoder.decode(view[i:i + _DECODE_BLOCK]) for i in range(0, len(view), _DECODE_BLOCK)]
+        parts.append(decoder.decode(b"", final=True))
+        return "".join(parts)
+    if file_type == "pdf":
+        try:
+            from pypdf import PdfReader
+        except ImportError as e:
+            raise ExtractionError("pypdf is required to extract PDF text (pip install pypdf)") from e
+        stream = data if isinstance(data, mmap.mmap) else io.BytesIO(data)
+        reader = PdfReader(stream)
+        return "\n".join(page.extract_text() or "" for page in reader.pages)
+    raise ExtractionError(f"Unsupported file type: {file_type}")
+
+
+def extract_file(file_type: str, path: str) -> str:
+    """파일을 메모리 매핑으로 열어 텍스트 추출"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return extract_text(file_type, mapped)
+
+
+def extract_document(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """raw 문서를 현재 프로세스에서 추출해 content 를 채운 문서로 변환"""
+    file_type = doc["metadata"]["file_type"]
+    if "raw_path" in doc:
+        content = extract_file(file_type, doc["raw_path"])
+    else:
+        content = extract_text(file_type, doc["raw"])
+    return _with_content(doc, content)
+
+
+def _with_content(doc: Dict[str, Any], content: str) -> Dict[str, Any]:
+    document = {k: v for k, v in doc.items() if k not in ("raw", "raw_path")}
+    document["content"] = content
+    return document
+
+
+def _init_worker(memory_limit_bytes: Optional[int]):
+    """워커 프로세스 초기화: 주소 공간 상한 설정"""
+    if memory_limit_bytes:
+        try:
+            import resource
+        except ImportError:
+            return
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit_bytes, memory_limit_bytes))
+
+
+def _on_timeout(signum, frame):
+    raise TimeoutError("extraction timed out")
+
+
+def _extract_in_worker(file_type: str, raw: Optional[bytes], path: Optional[str], timeout: Optional[float]) -> str:
+    """워커 프로세스에서 실행: SIGALRM 으로 파일별 실행 시간 제한"""
+    use_alarm = bool(timeout) and hasattr(signal, "setitimer")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return extract_file(file_type, path) if path is not None else extract_text(file_type, raw)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+class ExtractionPool:
+    """
+    파이프라인 extract 단계 (Stage(workers=max_workers) 로 사용)
+
+    content 가 이미 있는 문서(DB, API)는 그대로 통과시키고, raw 문서만 프로세스 풀에서 추출한다.
+    텍스트가 없는 파일(스캔 PDF 등)도 빈 content 로 통과시킨다.
+    시간/메모리 상한을 넘거나 파싱에 실패한 파일은 건너뛰고 failed / failed_ids 에 기록하며,
+    워커가 비정상 종료되면 풀을 새로 만든다.
+
+    Args:
+        max_workers: 워커 프로세스 수
+        timeout: 파일당 추출 시간 상한 (초)
+        memory_limit_mb: 워커 프로세스 주소 공간 상한 (MB)
+    """
+
+    def __init__(self, max_workers: int = 4, timeout: Optional[float] = 60.0,
+                 memory_limit_mb: Optional[int] = 1024):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.memory_limit_bytes = memory_limit_mb * 1024 * 1024 if memory_limit_mb else None
+        self.extracted = 0
+        self.failed: List[Tuple[str, str]] = []  # (source_id, 매니페스트 키)
+        self.failed_ids: List[str] = []  # 문서 ID
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: 부모 프로세스의 스레드/메모리 매핑을 물려받지 않아 메모리 상한이 파일 처리에만 적용된다
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.memory_limit_bytes,),
+                )
+            return self._executor
+
+    def _reset(self, broken: ProcessPoolExecutor):
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False)
+
+    def __call__(self, doc: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        if "raw" not in doc and "raw_path" not in doc:
+            yield doc
+            return
+
+        pool = self._pool()
+        try:
+            future = pool.submit(_extract_in_worker, doc["metadata"]["file_type"],
+                                 doc.get("raw"), doc.get("raw_path"), self.timeout)
+            content = future.result()
+        except BrokenProcessPool as e:
+            # 워커가 메모리 상한 등으로 비정상 종료됨
+            self._reset(pool)
+            self._fail(doc, e)
+            return
+        except Exception as e:
+            # ExtractionError, TimeoutError, MemoryError, 파서 내부 오류 (손상된 PDF 등)
+            self._fail(doc, e)
+            return
+        finally:
+            if doc.get("raw_path"):
+                try:
+                    os.remove(doc["raw_path"])
+                except FileNotFoundError:
+                    pass
+
+        with self._lock:
+            self.extracted += 1
+        # 빈 텍스트도 통과시킨다: 청크 0개로 기록되어야 이전에 색인한 청크가 삭제된다
+        yield _with_content(doc, content)
+
+    def _fail(self, doc: Dict[str, Any], error: BaseException):
+        reason = type(error).__name__ if not str(error) else f"{type(error).__name__}: {error}"
+        print(f"  ⚠ Skipping {doc.get('source', doc['id'])}: {reason}")
+        with self._lock:
+            self.failed.append((doc["metadata"].get("source_id", ""), doc["metadata"].get("key", doc["id"])))
+            self.failed_ids.append(doc["id"])
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
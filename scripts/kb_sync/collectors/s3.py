@@ -0,0 +1,230 @@
+"""
+S3 문서 수집기
+
+- list_objects_v2 를 페이지 단위로 읽으면서
+- fileTypes 에 해당하고 ETag/LastModified 가 바뀐 객체만
+- 공유 커넥션 풀을 쓰는 클라이언트 하나로 여러 스레드에서 동시에 다운로드한다.
+  (텍스트 추출은 kb_sync.collectors.extract.ExtractionPool 이 프로세스 풀에서 수행)
+
+작은 파일이 수천 개인 소스는 객체당 왕복 지연이 대부분이므로, 동시 다운로드 수(max_workers)가
+처리량을 결정한다. 진행 중인 다운로드는 max_workers * 2 개로 제한되어 메모리가 일정하게 유지된다.
+"""
+import os
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from kb_sync.collectors.extract import file_type_of
+from kb_sync.manifest import SourceManifest
+
+_SPOOL_BLOCK = 1024 * 1024
+
+
+def create_s3_client(max_workers: int, endpoint_url: Optional[str] = None):
+    """
+    동시 다운로드 수만큼 커넥션 풀을 가진 boto3 S3 클라이언트
+
+    endpoint_url 을 지정하면 MinIO 등 S3 호환 스토리지를 사용할 수 있다.
+    """
+    import boto3
+    from botocore.config import Config
+
+    config = Config(max_pool_connections=max_workers, retries={"max_attempts": 5, "mode": "adaptive"})
+    return boto3.client("s3", endpoint_url=endpoint_url, config=config)
+
+
+class LocalS3Client:
+    """
+    로컬 디렉터리를 S3 처럼 다루는 클라이언트 (개발/테스트용)
+
+    <root>/<bucket>/<key> 파일을 객체로 보고 list_objects_v2 / get_object 의
+    필요한 부분(페이지네이션, ETag, LastModified)만 흉내 낸다.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def list_objects_v2(self, Bucket: str, Prefix: str = "", MaxKeys: int = 1000,
+                        ContinuationToken: Optional[str] = None) -> Dict[str, Any]:
+        bucket_dir = os.path.join(self.root, Bucket)
+        keys = []
+        for dirpath, _, filenames in os.walk(bucket_dir):
+            for name in filenames:
+                key = os.path.relpath(os.path.join(dirpath, name), bucket_dir).replace(os.sep, "/")
+                if key.startswith(Prefix):
+                    keys.append(key)
+        keys.sort()
+        start = int(ContinuationToken or 0)
+        page = keys[start:start + MaxKeys]
+        response = {"Contents": [self._head(Bucket, key) for key in page], "KeyCount": len(page)}
+        if start + MaxKeys < len(keys):
+            response["IsTruncated"] = True
+            response["NextContinuationToken"] = str(start + MaxKeys)
+        else:
+            response["IsTruncated"] = False
+        return response
+
+    def _head(self, bucket: str, key: str) -> Dict[str, Any]:
+        stat = os.stat(os.path.join(self.root, bucket, key))
+        return {
+            "Key": key,
+            "Size": stat.st_size,
+            "ETag": f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+            "LastModified": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+        }
+
+    def get_object(self, Bucket: str, Key: str) -> Dict[str, Any]:
+        head = self._head(Bucket, Key)
+        return {**head, "ContentLength": head["Size"], "Body": open(os.path.join(self.root, Bucket, Key), "rb")}
+
+
+@dataclass
+class S3CollectStats:
+    listed: int = 0
+    filtered: int = 0
+    unchanged: int = 0
+    downloaded: int = 0
+    bytes_downloaded: int = 0
+
+
+class S3Collector:
+    """
+    Args:
+        client: boto3 S3 클라이언트 (또는 LocalS3Client)
+        source_id: 데이터 소스 ID (문서 ID 접두사)
+        bucket / prefix: 수집 대상
+        file_types: 수집할 확장자 목록 (빈 값이면 전체)
+        manifest: 객체별 ETag/LastModified 를 기록하는 매니페스트
+        max_workers: 동시 다운로드 수
+        page_size: list_objects_v2 페이지 크기
+        spool_threshold: 이 크기(바이트)보다 큰 객체는 임시 파일로 내려받는다
+        spool_dir: 임시 파일 디렉터리 (None 이면 시스템 임시 디렉터리)
+    """
+
+    def __init__(self, client, source_id: str, bucket: str, prefix: str = "",
+                 file_types: Optional[Iterable[str]] = None, manifest: Optional[SourceManifest] = None,
+                 max_workers: int = 16, page_size: int = 1000,
+                 spool_threshold: int = 8 * 1024 * 1024, spool_dir: Optional[str] = None):
+        self.client = client
+        self.source_id = source_id
+        self.bucket = bucket
+        self.prefix = prefix
+        self.file_types: Set[str] = {t.lower().lstrip(".") for t in (file_types or [])}
+        self.manifest = manifest or SourceManifest()
+        self.max_workers = max_workers
+        self.page_size = page_size
+        self.spool_threshold = spool_threshold
+        self.spool_dir = spool_dir
+        self.stats = S3CollectStats()
+        self.unchanged_keys: List[str] = []
+        self.present_keys: Set[str] = set()
+        self._stats_lock = threading.Lock()
+
+    def list_objects(self) -> Iterator[Dict[str, Any]]:
+        """prefix 아래 객체를 페이지 단위로 나열"""
+        token = None
+        while True:
+            kwargs = {"Bucket": self.bucket, "Prefix": self.prefix, "MaxKeys": self.page_size}
+            if token:
+                kwargs["ContinuationToken"] = token
+            page = self.client.list_objects_v2(**kwargs)
+            yield from page.get("Contents", [])
+            if not page.get("IsTruncated"):
+                return
+            token = page["NextContinuationToken"]
+
+    def _wanted(self, obj: Dict[str, Any]) -> bool:
+        key = obj["Key"]
+        if key.endswith("/"):
+            return False
+        if self.file_types and file_type_of(key) not in self.file_types:
+            self.stats.filtered += 1
+            return False
+        self.present_keys.add(key)
+        if self.manifest.unchanged(key, etag=obj.get("ETag"), last_modified=_iso(obj.get("LastModified"))):
+            self.stats.unchanged += 1
+            self.unchanged_keys.append(key)
+            return False
+        return True
+
+    def fetch(self, obj: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        객체 다운로드 (워커 스레드에서 실행)
+
+        텍스트 추출은 파이프라인 extract 단계(프로세스 풀)에서 하므로 raw 문서를 반환한다.
+        spool_threshold 보다 큰 객체는 메모리에 올리지 않고 spool_dir 의 임시 파일로 내려받는다.
+        """
+        key = obj["Key"]
+        response = self.client.get_object(Bucket=self.bucket, Key=key)
+        body = response["Body"]
+        size = response.get("ContentLength", obj.get("Size", 0))
+        raw: Dict[str, Any] = {}
+        try:
+            if size > self.spool_threshold:
+                fd, path = tempfile.mkstemp(prefix="kb-s3-", suffix=f".{file_type_of(key)}", dir=self.spool_dir)
+                with os.fdopen(fd, "wb") as f:
+                    for block in iter(lambda: body.read(_SPOOL_BLOCK), b""):
+                        f.write(block)
+                raw["raw_path"] = path
+            else:
+                raw["raw"] = body.read()
+        finally:
+            body.close()
+        with self._stats_lock:
+            self.stats.downloaded += 1
+            self.stats.bytes_downloaded += size
+        return self.to_document(obj, raw)
+
+    def to_document(self, obj: Dict[str, Any], raw: Dict[str, Any]) -> Dict[str, Any]:
+        key = obj["Key"]
+        last_modified = _iso(obj.get("LastModified"))
+        self.manifest.update(key, etag=obj.get("ETag"), last_modified=last_modified, size=obj.get("Size"))
+        return {
+            "id": f"{self.source_id}/{key}",
+            "source": f"s3://{self.bucket}/{key}",
+            "metadata": {
+                "source_id": self.source_id,
+                "key": key,
+                "file_type": file_type_of(key),
+                "last_modified": last_modified,
+            },
+            **raw,
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        window = self.max_workers * 2
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="kb-s3") as executor:
+            pending: Dict[Future, Dict[str, Any]] = {}
+            for obj in self.list_objects():
+                self.stats.listed += 1
+                if not self._wanted(obj):
+                    continue
+                pending[executor.submit(self.fetch, obj)] = obj
+                if len(pending) >= window:
+                    yield from self._drain(pending, FIRST_COMPLETED)
+            while pending:
+                yield from self._drain(pending, FIRST_COMPLETED)
+
+    def prune(self) -> List[str]:
+        """
+        목록 전체를 읽은 뒤 호출: 버킷에서 사라진 객체를 매니페스트에서 지우고 그 문서 ID 를 반환
+        """
+        removed = [key for key in list(self.manifest.entries) if key not in self.present_keys]
+        for key in removed:
+            self.manifest.entries.pop(key, None)
+        return [f"{self.source_id}/{key}" for key in removed]
+
+    def _drain(self, pending: Dict[Future, Dict[str, Any]], return_when) -> Iterator[Dict[str, Any]]:
+        done, _ = wait(list(pending), return_when=return_when)
+        for future in done:
+            pending.pop(future)
+            yield future.result()
+
+
+def _iso(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
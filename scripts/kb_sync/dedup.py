@@ -0,0 +1,340 @@
+"""
+거의 중복된(near-duplicate) 청크 탐지
+
+임베딩 전에 청크의 MinHash 서명을 계산하고 LSH(band) 버킷으로 후보를 찾아
+Jaccard 유사도가 임계값 이상인 청크를 건너뛰거나(skip) 대표 청크에 병합(merge)한다.
+
+서명 인덱스는 환경별 상태 디렉터리에 저장되어 다음 동기화에서도 재사용된다.
+(같은 청크 ID가 다시 들어오면 자기 자신과는 중복으로 보지 않는다)
+버린 중복 청크는 내용을 함께 기록해 두었다가, 대표 청크가 삭제되면 다시 색인한다.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WHITESPACE = re.compile(r"\s+")
+
+DEDUP_MODES = ("skip", "merge")
+
+
+def shingles(text: str, size: int = 5) -> List[int]:
+    """공백을 정규화한 문자 shingle 의 32비트 해시 목록 (한국어에도 동작)"""
+    text = _WHITESPACE.sub(" ", text.strip().lower())
+    if len(text) <= size:
+        grams = [text]
+    else:
+        grams = {text[i:i + size] for i in range(len(text) - size + 1)}
+    return [int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=4).digest(), "little") for g in grams]
+
+
+class MinHasher:
+    """num_perm 개의 해시 함수로 MinHash 서명 계산 (numpy 벡터 연산)"""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        # a, b 를 32비트로 제한하면 a * h + b 가 uint64 범위를 넘지 않는다 (h 도 32비트)
+        self._a = rng.integers(1, _MAX_HASH, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.asarray(shingles(text), dtype=np.uint64)
+        values = (hashes[:, None] * self._a[None, :] + self._b[None, :]) % _MERSENNE_PRIME
+        return (values & _MAX_HASH).min(axis=0).astype(np.uint32)
+
+
+def estimated_jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean(a == b))
+
+
+class SignatureIndex:
+    """
+    MinHash 서명 + LSH 버킷 인덱스
+
+    서명 외에 대표 청크별 병합 출처(merged), 중복 청크와 그 대표 청크(duplicate_of),
+    다시 색인할 때 쓰는 청크 내용(chunks: 중복 청크, merge 모드의 대표 청크)을 함께 저장한다.
+
+    Args:
+        path: 인덱스 파일 경로 (.npz, None 이면 메모리에서만 유지)
+        threshold: 중복으로 판단할 추정 Jaccard 유사도
+        num_perm: 서명 길이
+        bands: LSH band 수 (num_perm 의 약수)
+    """
+
+    def __init__(self, path: Optional[str] = None, threshold: float = 0.9,
+                 num_perm: int = 128, bands: int = 32):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.path = path
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.merged: Dict[str, List[str]] = {}
+        self.duplicate_of: Dict[str, str] = {}
+        self.chunks: Dict[str, Dict[str, Any]] = {}
+        self._buckets: Dict[Tuple[int, bytes], List[str]] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self._load()
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def _insert(self, chunk_id: str, signature: np.ndarray):
+        self.signatures[chunk_id] = signature
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, []).append(chunk_id)
+
+    def _drop_signature(self, chunk_id: str):
+        signature = self.signatures.pop(chunk_id, None)
+        if signature is None:
+            return
+        for key in self._band_keys(signature):
+            bucket = self._buckets.get(key, [])
+            if chunk_id in bucket:
+                bucket.remove(chunk_id)
+
+    def _remove(self, chunk_id: str):
+        self._drop_signature(chunk_id)
+        self.merged.pop(chunk_id, None)
+        self.chunks.pop(chunk_id, None)
+        self.duplicate_of.pop(chunk_id, None)
+
+    def remove(self, chunk_ids: Iterable[str]):
+        """
+        삭제된 청크를 인덱스에서 제거
+
+        삭제된 청크를 대표로 하던 중복 기록도 함께 지운다 (DedupFilter.readmit() 으로 먼저 다시 색인한다).
+        """
+        chunk_ids = set(chunk_ids)
+        with self._lock:
+            for chunk_id in chunk_ids:
+                self._remove(chunk_id)
+            for duplicate_id in [d for d, canonical_id in self.duplicate_of.items() if canonical_id in chunk_ids]:
+                self._remove(duplicate_id)
+
+    def find_duplicate(self, chunk_id: str, signature: np.ndarray, exclude: Iterable[str] = ()) -> Optional[str]:
+        """signature 와 threshold 이상 유사한 다른 청크 ID (exclude 제외, 없으면 None)"""
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+        candidates.discard(chunk_id)
+        candidates.difference_update(exclude)
+        best, best_score = None, self.threshold
+        for candidate in sorted(candidates):
+            score = estimated_jaccard(signature, self.signatures[candidate])
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+
+    def lookup(self, chunk_id: str, signature: np.ndarray, exclude: Iterable[str] = ()) -> Optional[str]:
+        """인덱스를 바꾸지 않고 중복 대상만 찾는다 (다른 스레드의 update() 와 동시에 호출 가능)"""
+        with self._lock:
+            return self.find_duplicate(chunk_id, signature, exclude)
+
+    def check_signature(self, chunk_id: str, signature: np.ndarray) -> Optional[str]:
+        """check() 와 같되 이미 계산한 서명을 받는다"""
+        with self._lock:
+            duplicate_of = self.find_duplicate(chunk_id, signature)
+            existing = self.signatures.get(chunk_id)
+            if duplicate_of is None and (existing is None or not np.array_equal(existing, signature)):
+                self._drop_signature(chunk_id)
+                self._insert(chunk_id, signature)
+            return duplicate_of
+
+    def check(self, chunk_id: str, text: str) -> Optional[str]:
+        """
+        청크를 인덱스에 반영하고, 이미 있는 청크와 중복이면 그 청크 ID 를 반환
+
+        중복이 아니면 서명을 인덱스에 추가한다 (같은 ID 의 내용이 바뀌었으면 서명을 교체).
+        """
+        return self.check_signature(chunk_id, self.hasher.signature(text))
+
+    def keep(self, chunk: Dict[str, Any]):
+        """청크 내용을 기록 (나중에 병합 출처를 붙여 다시 색인할 수 있도록)"""
+        with self._lock:
+            self.chunks[chunk["id"]] = _payload(chunk)
+
+    def chunk(self, chunk_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self.chunks.get(chunk_id)
+
+    def merged_sources(self, chunk_id: str) -> List[str]:
+        with self._lock:
+            return list(self.merged.get(chunk_id, ()))
+
+    def record_duplicate(self, canonical_id: str, duplicate: Dict[str, Any]):
+        """버린 중복 청크와 내용을 기록 (대표 청크가 삭제되면 다시 색인한다)"""
+        with self._lock:
+            self._drop_signature(duplicate["id"])
+            self.duplicate_of[duplicate["id"]] = canonical_id
+            self.chunks[duplicate["id"]] = _payload(duplicate)
+
+    def record_merge(self, canonical_id: str, duplicate: Dict[str, Any]) -> List[str]:
+        """대표 청크의 병합 출처에 중복 청크의 출처를 추가하고 전체 목록을 반환"""
+        with self._lock:
+            sources = self.merged.setdefault(canonical_id, [])
+            ref = duplicate.get("source") or duplicate["id"]
+            if ref not in sources:
+                sources.append(ref)
+            return list(sources)
+
+    def orphans(self, canonical_ids: Set[str]) -> List[Dict[str, Any]]:
+        """canonical_ids 중 하나의 중복으로 기록된 청크의 내용"""
+        with self._lock:
+            return [self.chunks[duplicate_id] for duplicate_id, canonical_id in self.duplicate_of.items()
+                    if canonical_id in canonical_ids and duplicate_id in self.chunks]
+
+    def update(self, staged: "SignatureIndex"):
+        """
+        동기화 한 번 동안 staged 에 쌓인 서명과 중복/병합 기록을 반영
+
+        staged 에서 통과한 청크는 더 이상 중복이 아니고, 중복이 된 청크는 서명을 뺀다.
+        """
+        with self._lock:
+            for chunk_id, signature in staged.signatures.items():
+                self._drop_signature(chunk_id)
+                self._insert(chunk_id, signature)
+                self.duplicate_of.pop(chunk_id, None)
+                if chunk_id not in staged.chunks:
+                    self.chunks.pop(chunk_id, None)
+            for duplicate_id, canonical_id in staged.duplicate_of.items():
+                self._drop_signature(duplicate_id)
+                self.duplicate_of[duplicate_id] = canonical_id
+            self.chunks.update(staged.chunks)
+            for canonical_id, refs in staged.merged.items():
+                sources = self.merged.setdefault(canonical_id, [])
+                sources.extend(ref for ref in refs if ref not in sources)
+
+    def save(self):
+        """서명 행렬(uint32)과 청크 ID, 병합/중복 기록과 청크 내용을 npz 파일로 저장"""
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._lock:
+            ids = list(self.signatures)
+            signatures = (np.stack([self.signatures[i] for i in ids]) if ids
+                          else np.empty((0, self.hasher.num_perm), dtype=np.uint32))
+            merged = json.dumps(self.merged, ensure_ascii=False)
+            duplicates = json.dumps(self.duplicate_of, ensure_ascii=False)
+            chunks = json.dumps(self.chunks, ensure_ascii=False)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, ids=np.asarray(ids, dtype=np.str_), signatures=signatures, bands=self.bands, merged=merged,
+                     duplicates=duplicates, chunks=chunks)
+        os.replace(tmp, self.path)
+
+    def _load(self):
+        with np.load(self.path) as data:
+            if int(data["bands"]) != self.bands or data["signatures"].shape[1] != self.hasher.num_perm:
+                # 서명 설정이 바뀌면 기존 인덱스를 버리고 새로 만든다
+                return
+            for chunk_id, signature in zip(data["ids"].tolist(), data["signatures"]):
+                self._insert(chunk_id, signature)
+            self.merged = json.loads(str(data["merged"]))
+            if "duplicates" in data.files:
+                self.duplicate_of = json.loads(str(data["duplicates"]))
+                self.chunks = json.loads(str(data["chunks"]))
+
+
+def _payload(chunk: Dict[str, Any]) -> Dict[str, Any]:
+    """다시 색인할 때 필요한 청크 필드 (병합 출처는 색인할 때마다 새로 붙인다)"""
+    payload = {key: chunk[key] for key in ("id", "document_id", "source", "content") if key in chunk}
+    payload["metadata"] = {k: v for k, v in chunk.get("metadata", {}).items() if k != "merged_sources"}
+    return payload
+
+
+class DedupFilter:
+    """
+    파이프라인 단계용 중복 필터
+
+    mode:
+        skip  - 중복 청크를 버린다
+        merge - 중복 청크를 버리고, 출처를 대표 청크 메타데이터의 merged_sources 에 기록한다
+                (rewrites() 의 대표 청크를 다시 색인해 반영한다)
+
+    이번 동기화에서 계산한 서명과 중복/병합 기록은 staged 에만 쌓이고, 색인이 성공한 뒤
+    commit() 해야 공유 인덱스에 반영된다. 실패한 동기화의 청크가 다음 동기화의 중복 기준이 되지 않는다.
+    """
+
+    def __init__(self, index: SignatureIndex, mode: str = "skip"):
+        if mode not in DEDUP_MODES:
+            raise ValueError(f"Unknown dedup mode: {mode}")
+        self.index = index
+        self.mode = mode
+        self.duplicates = 0
+        self.readmitted = 0
+        self.staged = SignatureIndex(threshold=index.threshold, num_perm=index.hasher.num_perm, bands=index.bands)
+        self.removed: Set[str] = set()
+
+    def __call__(self, chunk: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        signature = self.index.hasher.signature(chunk.get("content", ""))
+        duplicate_of = self.index.lookup(chunk["id"], signature, exclude=self.removed)
+        if duplicate_of is None:
+            duplicate_of = self.staged.check_signature(chunk["id"], signature)
+        if duplicate_of is None:
+            self.staged.duplicate_of.pop(chunk["id"], None)
+            self.staged.chunks.pop(chunk["id"], None)
+            if self.mode == "merge":
+                self.staged.keep(chunk)
+                sources = self.index.merged_sources(chunk["id"])
+                if sources:
+                    # 다시 색인하는 대표 청크도 이전에 병합된 출처를 유지한다
+                    chunk = {**chunk, "metadata": {**chunk.get("metadata", {}), "merged_sources": sources}}
+            yield chunk
+            return
+        self.duplicates += 1
+        self.staged.record_duplicate(duplicate_of, chunk)
+        if self.mode == "merge":
+            self.staged.record_merge(duplicate_of, chunk)
+
+    def readmit(self, chunk_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """
+        삭제되는 청크를 중복 기준에서 빼고, 그 청크의 중복으로 버렸던 청크를 다시 필터에 통과시킨다
+
+        반환한 청크는 새로 색인해야 한다 (서로 중복인 청크는 그중 하나만 반환된다).
+        """
+        self.removed.update(chunk_ids)
+        orphans = self.staged.orphans(self.removed)
+        # 이번 동기화에서 다시 본 청크는 staged 의 기록이 최신이다
+        orphans += [payload for payload in self.index.orphans(self.removed)
+                    if payload["id"] not in self.staged.signatures and payload["id"] not in self.staged.duplicate_of]
+        readmitted = []
+        for payload in orphans:
+            if payload["id"] not in self.removed:
+                readmitted.extend(self(payload))
+        self.readmitted += len(readmitted)
+        return readmitted
+
+    def rewrites(self) -> List[Dict[str, Any]]:
+        """
+        merge 모드에서 이번 동기화에 병합 출처가 늘어난 대표 청크 (merged_sources 를 채워 다시 색인한다)
+
+        내용이 기록되지 않은 대표 청크(내용 기록 전에 색인된 청크)는 건너뛴다.
+        """
+        chunks = []
+        for canonical_id, refs in self.staged.merged.items():
+            if canonical_id in self.removed:
+                continue
+            payload = self.staged.chunk(canonical_id) or self.index.chunk(canonical_id)
+            if payload is None:
+                continue
+            sources = self.index.merged_sources(canonical_id)
+            sources.extend(ref for ref in refs if ref not in sources)
+            chunks.append({**payload, "metadata": {**payload["metadata"], "merged_sources": sources}})
+        return chunks
+
+    def commit(self):
+        """색인이 끝난 뒤 이번 동기화의 기록을 공유 인덱스에 반영하고 삭제된 청크를 뺀다"""
+        self.index.update(self.staged)
+        self.index.remove(self.removed)
@@ -0,0 +1,326 @@
+"""
+버전 인덱스 + alias 전환 (blue/green 재색인)
+
+전체 재색인은 <index_name>-v<버전> 인덱스를 새로 만들어 채우고, 샘플 질의로 워밍한 뒤
+<index_name> alias 를 한 번의 요청으로 새 인덱스로 옮긴다. 검색 쪽은 계속 <index_name> 으로
+조회하므로 절반만 채워진 인덱스를 보거나 재색인 부하를 받는 일이 없다.
+
+- OpenSearch: _aliases API (remove/add/remove_index 를 한 요청으로 원자적으로 적용)
+- Azure AI Search: index alias (2024-03-01-Preview), 새 인덱스 스키마는 현재 인덱스에서 복사
+- Vertex AI Vector Search: alias 개념이 없어 지원하지 않음 (IndexEndpoint deploy/undeploy 로 전환)
+- 로컬 번들: <index_name> 심볼릭 링크를 새 버전 디렉터리로 교체
+"""
+import os
+import re
+import shutil
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import requests
+
+from kb_sync.bulk import vector_values
+
+
+def version_name(alias: str, version: str) -> str:
+    return f"{alias}-v{version}"
+
+
+def new_version() -> str:
+    """
+    정렬 가능한 버전 문자열 (UTC 시각 + 밀리초 + 임의 접미사)
+
+    같은 초에 시작한 재색인(스냅샷 가져오기와 재색인 등)이 같은 인덱스/디렉터리 이름을 쓰지 않도록
+    초 단위 시각 뒤에 밀리초와 6자리 16진수 접미사를 붙인다.
+    """
+    now = time.time()
+    return (time.strftime("%Y%m%d%H%M%S", time.gmtime(now))
+            + f"{int(now * 1000) % 1000:03d}{uuid.uuid4().hex[:6]}")
+
+
+def _versions_of(alias: str, names: List[str]) -> List[str]:
+    # 이전 형식(초 단위 시각 14자리) 버전도 함께 정리 대상으로 본다
+    pattern = re.compile(rf"^{re.escape(alias)}-v\d{{14}}(?:\d{{3}}[0-9a-f]{{6}})?$")
+    return sorted(name for name in names if pattern.match(name))
+
+
+class IndexManager:
+    """벡터 스토어 인덱스 생성 / alias 전환 / 정리 / 워밍"""
+    name = "index-manager"
+
+    def __init__(self, session: Optional[requests.Session] = None, timeout: float = 30.0):
+        self.session = session or requests.Session()
+        self.timeout = timeout
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        response = self.session.request(method, url, headers=self.headers(), timeout=self.timeout, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def headers(self) -> Dict[str, str]:
+        return {"Content-Type": "application/json"}
+
+    def create_index(self, name: str, alias: str, dimensions: int):
+        raise NotImplementedError
+
+    def index_exists(self, name: str) -> bool:
+        """name 인덱스 또는 alias 가 있으면 True"""
+        raise NotImplementedError
+
+    def ensure_index(self, name: str, alias: str, dimensions: int) -> bool:
+        """
+        name 인덱스(또는 alias)가 없으면 create_index 와 같은 매핑으로 만든다 (만들었으면 True)
+
+        증분 동기화는 라이브 인덱스에 바로 bulk 로 쓰므로, 인덱스가 없을 때 먼저 만들지 않으면
+        벡터 스토어의 동적 매핑(embedding 은 float 배열, 메타데이터는 text)으로 만들어진다.
+        """
+        if self.index_exists(name):
+            return False
+        try:
+            self.create_index(name, alias, dimensions)
+        except requests.HTTPError:
+            # 같은 환경의 다른 소스 동기화가 먼저 만들었으면 그 인덱스를 쓴다
+            if self.index_exists(name):
+                return False
+            raise
+        return True
+
+    def alias_targets(self, alias: str) -> List[str]:
+        """alias 가 가리키는 인덱스 (alias 가 없으면 빈 목록)"""
+        raise NotImplementedError
+
+    def swap_alias(self, alias: str, index: str):
+        raise NotImplementedError
+
+    def list_versions(self, alias: str) -> List[str]:
+        raise NotImplementedError
+
+    def delete_index(self, name: str):
+        raise NotImplementedError
+
+    def search(self, index: str, vector: List[float], k: int):
+        raise NotImplementedError
+
+    def set_version(self, index: str, version: str):
+        """인덱스에 KB 게시 버전을 기록 (검색 도구의 결과 캐시가 이 값으로 무효화된다)"""
+        raise NotImplementedError
+
+    def warm(self, index: str, queries: np.ndarray, k: int = 5) -> List[float]:
+        """질의 벡터로 검색해 캐시를 데우고 질의별 지연 시간(초)을 반환"""
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            self.search(index, vector_values({"embedding": query}), k)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    def garbage_collect(self, alias: str, keep: int) -> List[str]:
+        """alias 가 가리키지 않는 오래된 버전을 최근 keep 개(현재 포함)만 남기고 삭제"""
+        active = set(self.alias_targets(alias))
+        versions = self.list_versions(alias)
+        retained = set(versions[-keep:]) | active if keep > 0 else active
+        removed = [name for name in versions if name not in retained]
+        for name in removed:
+            self.delete_index(name)
+        return removed
+
+
+# 검색 도구의 메타데이터 필터(terms / range)가 쓰는 필드 - 동적 매핑(text)으로는 정확히 일치하지 않는다.
+# S3 문서의 last_modified 는 ISO 8601, DB 행의 updated_at 은 컬럼 값 그대로이므로
+# 날짜로 읽을 수 없는 값은 색인을 거부하지 않고 필터에서만 빠지게 한다.
+METADATA_FIELD_MAPPINGS = {
+    "source_id": {"type": "keyword"},
+    "file_type": {"type": "keyword"},
+    "language": {"type": "keyword"},
+    "last_modified": {"type": "date", "format": "strict_date_optional_time||epoch_second",
+                      "ignore_malformed": True},
+    "updated_at": {"type": "date", "format": "strict_date_optional_time||yyyy-MM-dd HH:mm:ss||epoch_second",
+                   "ignore_malformed": True},
+}
+
+
+class OpenSearchIndexManager(IndexManager):
+    name = "opensearch"
+
+    def __init__(self, endpoint: str, auth: Any = None, **kwargs):
+        super().__init__(**kwargs)
+        self.endpoint = endpoint.rstrip("/")
+        if auth is not None:
+            self.session.auth = auth
+
+    def create_index(self, name: str, alias: str, dimensions: int):
+        body = {
+            "settings": {"index": {"knn": True}},
+            "mappings": {"properties": {
+                "embedding": {"type": "knn_vector", "dimension": dimensions},
+                **METADATA_FIELD_MAPPINGS,
+            }},
+        }
+        self._request("PUT", f"{self.endpoint}/{name}", json=body)
+
+    def index_exists(self, name: str) -> bool:
+        response = self.session.get(f"{self.endpoint}/{name}", headers=self.headers(), timeout=self.timeout)
+        if response.status_code == 404:
+            return False
+        response.raise_for_status()
+        return True
+
+    def alias_targets(self, alias: str) -> List[str]:
+        response = self.session.get(f"{self.endpoint}/_alias/{alias}", headers=self.headers(), timeout=self.timeout)
+        if response.status_code == 404:
+            return []
+        response.raise_for_status()
+        return sorted(response.json())
+
+    def _is_concrete_index(self, name: str) -> bool:
+        response = self.session.get(f"{self.endpoint}/{name}", headers=self.headers(), timeout=self.timeout)
+        if response.status_code == 404:
+            return False
+        response.raise_for_status()
+        # alias 로 조회하면 실제 인덱스 이름이 키로 돌아온다
+        return name in response.json()
+
+    def swap_alias(self, alias: str, index: str):
+        actions = [{"remove": {"index": old, "alias": alias}} for old in self.alias_targets(alias) if old != index]
+        if self._is_concrete_index(alias):
+            # blue/green 이전에 같은 이름으로 만든 실제 인덱스는 alias 추가와 같은 요청에서 삭제한다
+            actions.append({"remove_index": {"index": alias}})
+        actions.append({"add": {"index": index, "alias": alias}})
+        self._request("POST", f"{self.endpoint}/_aliases", json={"actions": actions})
+
+    def list_versions(self, alias: str) -> List[str]:
+        response = self.session.get(f"{self.endpoint}/_cat/indices/{alias}-v*",
+                                    params={"format": "json", "h": "index"},
+                                    headers=self.headers(), timeout=self.timeout)
+        if response.status_code == 404:
+            return []
+        response.raise_for_status()
+        return _versions_of(alias, [row["index"] for row in response.json()])
+
+    def delete_index(self, name: str):
+        self._request("DELETE", f"{self.endpoint}/{name}")
+
+    def refresh(self, name: str):
+        self._request("POST", f"{self.endpoint}/{name}/_refresh")
+
+    def set_version(self, index: str, version: str):
+        self._request("PUT", f"{self.endpoint}/{index}/_mapping", json={"_meta": {"kb_version": version}})
+
+    def search(self, index: str, vector: List[float], k: int):
+        body = {"size": k, "query": {"knn": {"embedding": {"vector": vector, "k": k}}}}
+        return self._request("POST", f"{self.endpoint}/{index}/_search", json=body).json()
+
+    def warm(self, index: str, queries: np.ndarray, k: int = 5) -> List[float]:
+        self.refresh(index)
+        return super().warm(index, queries, k)
+
+
+class AzureSearchIndexManager(IndexManager):
+    """
+    Azure AI Search 인덱스 / alias 관리
+
+    새 버전 인덱스의 스키마(필드, vectorSearch 설정)는 alias 가 현재 가리키는 인덱스
+    (처음이면 alias 와 같은 이름의 인덱스)에서 복사한다.
+    """
+    name = "azure_search"
+
+    def __init__(self, endpoint: str, api_key: str, api_version: str = "2024-03-01-Preview", **kwargs):
+        super().__init__(**kwargs)
+        self.endpoint = endpoint.rstrip("/")
+        self.api_key = api_key
+        self.params = {"api-version": api_version}
+
+    def headers(self) -> Dict[str, str]:
+        return {**super().headers(), "api-key": self.api_key}
+
+    def _get(self, path: str) -> Optional[Dict[str, Any]]:
+        response = self.session.get(f"{self.endpoint}{path}", params=self.params,
+                                    headers=self.headers(), timeout=self.timeout)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    def create_index(self, name: str, alias: str, dimensions: int):
+        source = (self.alias_targets(alias) or [alias])[-1]
+        schema = self._get(f"/indexes/{source}")
+        if schema is None:
+            raise ValueError(f"Azure Search index {source} not found; create the index schema before a blue/green rebuild")
+        schema = {k: v for k, v in schema.items() if not k.startswith("@odata")}
+        schema["name"] = name
+        self._request("PUT", f"{self.endpoint}/indexes/{name}", params=self.params, json=schema)
+
+    def index_exists(self, name: str) -> bool:
+        return self._get(f"/indexes/{name}") is not None or bool(self.alias_targets(name))
+
+    def alias_targets(self, alias: str) -> List[str]:
+        body = self._get(f"/aliases/{alias}")
+        return list(body.get("indexes", [])) if body else []
+
+    def swap_alias(self, alias: str, index: str):
+        if not self.alias_targets(alias) and self._get(f"/indexes/{alias}") is not None:
+            raise ValueError(f"An Azure Search index named {alias} exists; "
+                             f"delete it (or rename it) before switching to alias-based blue/green deployment")
+        self._request("PUT", f"{self.endpoint}/aliases/{alias}", params=self.params,
+                      json={"name": alias, "indexes": [index]})
+
+    def list_versions(self, alias: str) -> List[str]:
+        body = self._get("/indexes?$select=name") or {}
+        return _versions_of(alias, [index["name"] for index in body.get("value", [])])
+
+    def delete_index(self, name: str):
+        self._request("DELETE", f"{self.endpoint}/indexes/{name}", params=self.params)
+
+    def search(self, index: str, vector: List[float], k: int):
+        body = {"top": k, "vectorQueries": [{"kind": "vector", "vector": vector, "fields": "embedding", "k": k}]}
+        return self._request("POST", f"{self.endpoint}/indexes/{index}/docs/search",
+                             params=self.params, json=body).json()
+
+
+class LocalBundleVersions:
+    """
+    로컬 인덱스 번들 버전 관리
+
+    <root>/<alias>-v<버전>/ 디렉터리에 번들을 만들고 <root>/<alias> 심볼릭 링크를 원자적으로 교체한다.
+    검색 도구는 <root>/<alias> 경로를 그대로 열면 된다.
+    """
+
+    def __init__(self, root: str, alias: str):
+        self.root = root
+        self.alias = alias
+        self.alias_path = os.path.join(root, alias)
+
+    def path(self, version: str) -> str:
+        return os.path.join(self.root, version_name(self.alias, version))
+
+    def current(self) -> Optional[str]:
+        if os.path.islink(self.alias_path):
+            return os.path.basename(os.readlink(self.alias_path))
+        return None
+
+    def activate(self, version: str):
+        """alias 링크를 version 디렉터리로 교체 (rename 이므로 읽는 쪽은 이전/새 번들 중 하나만 본다)"""
+        target = version_name(self.alias, version)
+        tmp_link = f"{self.alias_path}.link-{os.getpid()}"
+        if os.path.lexists(tmp_link):
+            os.unlink(tmp_link)
+        os.symlink(target, tmp_link)
+        if os.path.isdir(self.alias_path) and not os.path.islink(self.alias_path):
+            # blue/green 이전의 일반 디렉터리 번들
+            shutil.rmtree(self.alias_path)
+        os.replace(tmp_link, self.alias_path)
+
+    def versions(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return _versions_of(self.alias, os.listdir(self.root))
+
+    def garbage_collect(self, keep: int) -> List[str]:
+        current = self.current()
+        versions = self.versions()
+        retained = set(versions[-keep:] if keep > 0 else []) | {current}
+        removed = [name for name in versions if name not in retained]
+        for name in removed:
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+        return removed
@@ -0,0 +1,51 @@
+"""
+데이터 소스별 동기화 매니페스트
+
+소스에서 마지막으로 색인한 항목(S3 객체, DB 행 등)의 버전 정보를 환경별로 저장한다.
+수집 중에는 변경 사항을 메모리에만 모아 두고, 파이프라인이 성공한 뒤 save() 로 기록하므로
+실패한 동기화가 "이미 색인됨"으로 잘못 표시되는 일은 없다.
+"""
+import json
+import os
+import threading
+from typing import Any, Dict, Optional
+
+
+class SourceManifest:
+    """
+    Args:
+        path: 매니페스트 JSON 파일 경로 (None 이면 메모리에서만 유지)
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.state: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.entries = data.get("entries", {})
+            self.state = data.get("state", {})
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self.entries.get(key)
+
+    def unchanged(self, key: str, **version: Any) -> bool:
+        """key 의 저장된 버전 정보가 version 과 모두 같으면 True"""
+        entry = self.get(key)
+        return entry is not None and all(entry.get(k) == v for k, v in version.items())
+
+    def update(self, key: str, **fields: Any):
+        with self._lock:
+            self.entries.setdefault(key, {}).update(fields)
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with self._lock, open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"entries": self.entries, "state": self.state}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
@@ -0,0 +1,300 @@
+"""
+KB 동기화 스트리밍 파이프라인
+
+collect → chunk → embed → index 단계를 스레드로 띄우고, 단계 사이를
+크기가 제한된 큐(queue.Queue(maxsize))로 연결한다.
+
+- 하위 단계가 느리면 put() 이 막히면서 상위 단계가 자연스럽게 멈춘다 (backpressure)
+- 메모리 사용량은 코퍼스 크기가 아니라 큐 깊이 × 배치 크기로 제한된다
+- 한 단계에서 예외가 나면 나머지 단계도 중단하고 run_pipeline() 이 예외를 다시 던진다
+
+단계마다 처리 항목/바이트 수, 작업 시간과 큐 대기 시간(입력을 기다린 시간, 하위 단계가
+가득 차 출력을 기다린 시간)을 StageStats 로 집계하므로 어느 단계가 병목인지 알 수 있다.
+"""
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+# 큐 사이에서 "더 이상 항목 없음"을 알리는 표식
+_END = object()
+
+# 중단 여부를 확인하는 주기 (초)
+_POLL_INTERVAL = 0.1
+
+
+class PipelineAborted(Exception):
+    """다른 단계의 실패로 파이프라인이 중단됨"""
+
+
+@dataclass
+class StageStats:
+    """
+    단계별 처리량 통계
+
+    busy_seconds 는 단계 함수가 일한 시간(출력 대기 제외, 워커 합계),
+    wait_in_seconds 는 상위 단계를 기다린 시간, wait_out_seconds 는 하위 큐가 가득 차 막힌 시간.
+    bytes 는 collect 단계는 내보낸 항목, 나머지 단계는 받은 항목 기준 (Stage.size_of 가 있을 때만).
+    retries / errors 는 단계 함수가 내부에서 재시도하거나 건너뛴 항목 수로, 호출하는 쪽에서 채운다.
+    """
+    name: str
+    items_in: int = 0
+    items_out: int = 0
+    bytes: int = 0
+    busy_seconds: float = 0.0
+    wait_in_seconds: float = 0.0
+    wait_out_seconds: float = 0.0
+    retries: int = 0
+    errors: int = 0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def elapsed_seconds(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """초당 처리한 입력 항목 수 (단계 경과 시간 기준)"""
+        elapsed = self.elapsed_seconds
+        return self.items_in / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        elapsed = self.elapsed_seconds
+        return self.bytes / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        text = (f"{self.name}: {self.items_in} in / {self.items_out} out "
+                f"in {self.elapsed_seconds:.2f}s, busy {self.busy_seconds:.2f}s, "
+                f"wait in {self.wait_in_seconds:.2f}s / out {self.wait_out_seconds:.2f}s "
+                f"({self.throughput:.1f} items/s")
+        if self.bytes:
+            text += f", {self.bytes_per_second / 1024 / 1024:.2f} MiB/s"
+        text += ")"
+        if self.retries or self.errors:
+            text += f" [{self.retries} retries, {self.errors} errors]"
+        return text
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON 으로 기록할 수 있는 형태"""
+        return {
+            "name": self.name,
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "bytes": self.bytes,
+            "elapsed_seconds": round(self.elapsed_seconds, 6),
+            "busy_seconds": round(self.busy_seconds, 6),
+            "wait_in_seconds": round(self.wait_in_seconds, 6),
+            "wait_out_seconds": round(self.wait_out_seconds, 6),
+            "items_per_second": round(self.throughput, 3),
+            "bytes_per_second": round(self.bytes_per_second, 3),
+            "retries": self.retries,
+            "errors": self.errors,
+        }
+
+
+class Stage:
+    """
+    파이프라인 단계 정의
+
+    fn 은 입력 항목(또는 batch_size 가 지정된 경우 항목 리스트)을 받아
+    하위 단계로 넘길 항목들의 iterable 을 반환한다. 마지막 단계의 반환값은 버려진다.
+    size_of 가 주어지면 입력 항목마다 바이트 수를 구해 StageStats.bytes 에 더한다.
+    """
+
+    def __init__(self, name: str, fn: Callable[[Any], Optional[Iterable[Any]]],
+                 batch_size: Optional[int] = None, workers: int = 1,
+                 size_of: Optional[Callable[[Any], int]] = None):
+        if workers < 1:
+            raise ValueError(f"Stage {name}: workers must be >= 1")
+        self.name = name
+        self.fn = fn
+        self.batch_size = batch_size
+        self.workers = workers
+        self.size_of = size_of
+
+
+class _Pipeline:
+    def __init__(self, source: Iterable[Any], stages: List[Stage], queue_size: int,
+                 source_size_of: Optional[Callable[[Any], int]] = None):
+        if queue_size < 1:
+            raise ValueError("queue_size must be >= 1")
+        self.source = source
+        self.source_size_of = source_size_of
+        self.stages = stages
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+        self.stats = [StageStats("collect")] + [StageStats(s.name) for s in stages]
+        self.abort = threading.Event()
+        self.error: Optional[BaseException] = None
+        self._error_lock = threading.Lock()
+        self._remaining = [s.workers for s in stages]
+        self._remaining_lock = threading.Lock()
+
+    def _fail(self, exc: BaseException):
+        with self._error_lock:
+            if self.error is None:
+                self.error = exc
+        self.abort.set()
+
+    def _put(self, q: "queue.Queue", item: Any, stats: Optional[StageStats] = None):
+        started = time.monotonic()
+        try:
+            while True:
+                if self.abort.is_set():
+                    raise PipelineAborted()
+                try:
+                    q.put(item, timeout=_POLL_INTERVAL)
+                    return
+                except queue.Full:
+                    continue
+        finally:
+            if stats is not None:
+                with stats._lock:
+                    stats.wait_out_seconds += time.monotonic() - started
+
+    def _get(self, q: "queue.Queue", stats: StageStats) -> Any:
+        started = time.monotonic()
+        try:
+            while True:
+                if self.abort.is_set():
+                    raise PipelineAborted()
+                try:
+                    return q.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+        finally:
+            with stats._lock:
+                stats.wait_in_seconds += time.monotonic() - started
+
+    def _run_source(self):
+        stats = self.stats[0]
+        stats.started_at = time.monotonic()
+        out = self.queues[0] if self.queues else None
+        try:
+            for item in self.source:
+                stats.items_in += 1
+                stats.items_out += 1
+                if self.source_size_of is not None:
+                    stats.bytes += self.source_size_of(item)
+                if out is not None:
+                    self._put(out, item, stats)
+            if out is not None:
+                self._put(out, _END)
+        except PipelineAborted:
+            pass
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            stats.finished_at = time.monotonic()
+
+    def _emit(self, idx: int, outputs: Optional[Iterable[Any]]):
+        stats = self.stats[idx + 1]
+        if outputs is None:
+            return
+        out = self.queues[idx + 1] if idx + 1 < len(self.queues) else None
+        for item in outputs:
+            with stats._lock:
+                stats.items_out += 1
+            if out is not None:
+                self._put(out, item, stats)
+
+    def _call(self, idx: int, arg: Any, count: int):
+        stage = self.stages[idx]
+        stats = self.stats[idx + 1]
+        with stats._lock:
+            stats.items_in += count
+        started = time.monotonic()
+        waited = stats.wait_out_seconds
+        outputs = stage.fn(arg)
+        # 제너레이터는 소비하는 동안에도 작업이 일어나므로 emit 까지 포함해 측정하고,
+        # 하위 큐를 기다린 시간은 뺀다 (워커가 여럿이면 다른 워커의 대기도 섞이므로 근사치)
+        self._emit(idx, outputs)
+        with stats._lock:
+            stats.busy_seconds += max(time.monotonic() - started - (stats.wait_out_seconds - waited), 0.0)
+
+    def _run_stage(self, idx: int):
+        stage = self.stages[idx]
+        stats = self.stats[idx + 1]
+        inbox = self.queues[idx]
+        with stats._lock:
+            if stats.started_at is None:
+                stats.started_at = time.monotonic()
+        batch: List[Any] = []
+        try:
+            while True:
+                item = self._get(inbox, stats)
+                if item is _END:
+                    # 같은 단계의 다른 워커도 종료할 수 있도록 표식을 되돌려 놓는다
+                    self._put(inbox, _END)
+                    break
+                if stage.size_of is not None:
+                    size = stage.size_of(item)
+                    with stats._lock:
+                        stats.bytes += size
+                if stage.batch_size:
+                    batch.append(item)
+                    if len(batch) >= stage.batch_size:
+                        self._call(idx, batch, len(batch))
+                        batch = []
+                else:
+                    self._call(idx, item, 1)
+            if batch:
+                self._call(idx, batch, len(batch))
+            self._finish_worker(idx)
+        except PipelineAborted:
+            pass
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            stats.finished_at = time.monotonic()
+
+    def _finish_worker(self, idx: int):
+        with self._remaining_lock:
+            self._remaining[idx] -= 1
+            last = self._remaining[idx] == 0
+        if last and idx + 1 < len(self.queues):
+            self._put(self.queues[idx + 1], _END)
+
+    def run(self) -> List[StageStats]:
+        threads = [threading.Thread(target=self._run_source, name="kb-collect", daemon=True)]
+        for idx, stage in enumerate(self.stages):
+            for w in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._run_stage, args=(idx,),
+                    name=f"kb-{stage.name}-{w}", daemon=True
+                ))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if self.error is not None:
+            raise self.error
+        return self.stats
+
+
+def run_pipeline(source: Iterable[Any], stages: List[Stage], queue_size: int = 100,
+                 source_size_of: Optional[Callable[[Any], int]] = None) -> List[StageStats]:
+    """
+    source 에서 나온 항목을 stages 순서대로 흘려보낸다.
+
+    Args:
+        source: 수집 단계 (문서를 하나씩 yield 하는 iterable)
+        stages: 이후 단계 목록
+        queue_size: 단계 사이 큐의 최대 깊이 (항목 수)
+        source_size_of: collect 단계 항목의 바이트 수 (처리량 집계용)
+
+    Returns:
+        collect 단계를 포함한 단계별 StageStats 리스트
+    """
+    return _Pipeline(source, stages, queue_size, source_size_of).run()
+
+
+def chain_sources(sources: Iterable[Callable[[], Iterator[Any]]]) -> Iterator[Any]:
+    """여러 수집 함수를 순서대로 이어 하나의 source 로 만든다"""
+    for make_iter in sources:
+        yield from make_iter()
@@ -0,0 +1,189 @@
+"""
+데이터 소스별 동기화 스케줄러
+
+data-sources.yaml 의 syncSchedule(cron 5필드)에 맞춰 소스마다 독립된 스레드에서 동기화를 실행한다.
+
+- 서로 다른 소스는 동시에 실행되고
+- 같은 소스는 잠금 파일(flock)로 겹쳐 실행되지 않는다
+  (이전 실행이 아직 끝나지 않았으면 이번 차례는 건너뛴다. CLI 로 따로 실행한 동기화와도 배타적)
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set
+
+try:
+    import fcntl
+except ImportError:  # Windows 등 fcntl 이 없는 환경에서는 프로세스 내 잠금만 사용
+    fcntl = None
+
+# 필드별 (최솟값, 최댓값): 분, 시, 일, 월, 요일(0=일요일, 7 도 일요일)
+_FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+# 다음 실행 시각을 찾을 때 탐색할 최대 기간
+_MAX_LOOKAHEAD = timedelta(days=366 * 5)
+
+
+class CronSchedule:
+    """
+    cron 표현식 (분 시 일 월 요일)
+
+    각 필드는 *, 숫자, a-b, */n, a-b/n 과 쉼표 목록을 지원한다.
+    일과 요일이 모두 제한되면 cron 과 같이 둘 중 하나만 맞아도 실행한다.
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Invalid cron expression (expected 5 fields): {expression}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_field(field, low, high) for field, (low, high) in zip(fields, _FIELD_RANGES)
+        )
+        self.weekdays = {0 if d == 7 else d for d in weekdays}
+        self._day_restricted = fields[2] != "*"
+        self._weekday_restricted = fields[4] != "*"
+
+    def matches(self, when: datetime) -> bool:
+        return (when.minute in self.minutes and when.hour in self.hours
+                and when.month in self.months and self._day_matches(when))
+
+    def _day_matches(self, when: datetime) -> bool:
+        day_ok = when.day in self.days
+        weekday_ok = (when.isoweekday() % 7) in self.weekdays
+        if self._day_restricted and self._weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, when: datetime) -> datetime:
+        """when 이후(초과) 첫 실행 시각 (맞지 않는 월/일/시는 한 번에 건너뛴다)"""
+        candidate = when.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = when + _MAX_LOOKAHEAD
+        while candidate <= limit:
+            if candidate.month not in self.months:
+                candidate = (candidate.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression never matches: {self.expression}")
+
+
+def _parse_field(field: str, low: int, high: int) -> Set[int]:
+    values: Set[int] = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step <= 0:
+                raise ValueError(f"Invalid cron step: {field}")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-", 1))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if start < low or end > high or start > end:
+            raise ValueError(f"Cron field out of range: {field}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class SourceLock:
+    """
+    소스별 동기화 잠금 (비차단)
+
+    flock 은 열린 파일 단위로 동작하므로 같은 프로세스의 다른 스레드와 다른 프로세스 모두에 배타적이다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def acquire(self) -> bool:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        f = open(self.path, "a")
+        if fcntl is not None:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                f.close()
+                return False
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+
+class SourceScheduler:
+    """
+    소스마다 syncSchedule 에 맞춰 run_source(source_id) 를 실행하는 데몬
+
+    Args:
+        schedules: {소스 ID: cron 표현식}
+        run_source: 소스 하나를 동기화하는 함수 (예외는 로그만 남기고 다음 차례를 기다린다)
+        now: 현재 시각 함수 (테스트용)
+    """
+
+    def __init__(self, schedules: Dict[str, str], run_source: Callable[[str], None],
+                 now: Callable[[], datetime] = datetime.now):
+        self.schedules = {source_id: CronSchedule(expr) for source_id, expr in schedules.items()}
+        self.run_source = run_source
+        self.now = now
+        self.runs: Dict[str, int] = {source_id: 0 for source_id in schedules}
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def next_runs(self) -> Dict[str, datetime]:
+        now = self.now()
+        return {source_id: schedule.next_after(now) for source_id, schedule in self.schedules.items()}
+
+    def _loop(self, source_id: str):
+        schedule = self.schedules[source_id]
+        while not self._stop.is_set():
+            due = schedule.next_after(self.now())
+            while not self._stop.is_set():
+                remaining = (due - self.now()).total_seconds()
+                if remaining <= 0:
+                    break
+                self._stop.wait(min(remaining, 60))
+            if self._stop.is_set():
+                return
+            try:
+                self.run_source(source_id)
+                self.runs[source_id] += 1
+            except Exception as e:
+                print(f"✗ Scheduled sync of {source_id} failed: {e}")
+
+    def start(self):
+        for source_id in self.schedules:
+            thread = threading.Thread(target=self._loop, args=(source_id,), name=f"kb-sync-{source_id}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+
+    def wait(self):
+        """Ctrl+C 가 올 때까지 대기"""
+        try:
+            while not self._stop.wait(1):
+                pass
+        except KeyboardInterrupt:
+            self.stop()
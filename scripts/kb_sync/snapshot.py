@@ -0,0 +1,159 @@
+"""
+환경 승격용 KB 스냅샷
+
+dev → staging → production 으로 승격할 때 환경마다 수집/임베딩을 다시 하지 않도록,
+한 환경의 로컬 인덱스 번들을 하나의 tar 파일로 내보내고 다른 환경에 그대로 bulk 로드한다.
+
+    snapshot.json   형식 버전, 원본 환경/인덱스, 번들 manifest, 파일별 크기와 SHA-256
+    manifest.json   ┐
+    vectors.bin     │ 로컬 인덱스 번들 (kb_index.bundle) 파일 그대로
+    scales.f32      │ - 벡터는 저장 모드(float32/float16/int8) 그대로의 이진 행렬
+    chunks.jsonl    │ - 청크 내용과 메타데이터는 행 순서대로
+    chunks.idx      │
+    ivf.*           │ (선택) IVF 근사 최근접 이웃 인덱스
+    bm25.*          │ (선택) 하이브리드 검색용 BM25 역색인
+    metadata.*      ┘ 메타데이터 필터용 컬럼 / 비트맵 인덱스
+
+가져올 때는 모든 파일의 체크섬을 확인한 뒤에만 번들을 사용한다.
+"""
+import hashlib
+import io
+import json
+import os
+import tarfile
+import time
+from typing import Any, Dict, Iterator, List
+
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_MANIFEST = "snapshot.json"
+BUNDLE_FILES = ("manifest.json", "vectors.bin", "scales.f32", "chunks.jsonl", "chunks.idx",
+                "ivf.centroids.f32", "ivf.rows.u32", "ivf.offsets.u64",
+                "bm25.terms.u64", "bm25.offsets.u64", "bm25.rows.u32", "bm25.tf.u16", "bm25.lengths.u32",
+                "metadata.json", "metadata.bitmaps.u8", "metadata.updated_at.i64")
+
+_COPY_BLOCK = 1024 * 1024
+
+
+class SnapshotError(Exception):
+    """스냅샷 파일이 손상되었거나 대상 환경과 호환되지 않음"""
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_COPY_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _tar_mode(path: str, write: bool) -> str:
+    if path.endswith((".tar.gz", ".tgz")):
+        return "w:gz" if write else "r:gz"
+    return "w" if write else "r"
+
+
+def export_snapshot(bundle_path: str, output: str, **info) -> Dict[str, Any]:
+    """
+    로컬 인덱스 번들을 스냅샷 파일로 내보내기
+
+    output 이 .tar.gz / .tgz 이면 gzip 으로 압축한다 (벡터는 거의 압축되지 않으므로 기본은 무압축).
+    info 는 원본 환경 정보 등으로 snapshot.json 에 함께 기록된다.
+    """
+    with open(os.path.join(bundle_path, "manifest.json"), "r", encoding="utf-8") as f:
+        bundle_manifest = json.load(f)
+    files = [name for name in BUNDLE_FILES if os.path.exists(os.path.join(bundle_path, name))]
+    snapshot = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        **info,
+        "bundle": bundle_manifest,
+        "files": {
+            name: {"bytes": os.path.getsize(os.path.join(bundle_path, name)),
+                   "sha256": _sha256(os.path.join(bundle_path, name))}
+            for name in files
+        },
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    tmp_output = f"{output}.tmp-{os.getpid()}"
+    try:
+        with tarfile.open(tmp_output, _tar_mode(output, write=True)) as tar:
+            # snapshot.json 을 먼저 두어 읽는 쪽이 파일을 받기 전에 형식을 확인할 수 있게 한다
+            data = json.dumps(snapshot, indent=2, ensure_ascii=False).encode("utf-8")
+            member = tarfile.TarInfo(SNAPSHOT_MANIFEST)
+            member.size = len(data)
+            member.mtime = int(time.time())
+            tar.addfile(member, io.BytesIO(data))
+            for name in files:
+                tar.add(os.path.join(bundle_path, name), arcname=name, recursive=False)
+    except BaseException:
+        if os.path.exists(tmp_output):
+            os.remove(tmp_output)
+        raise
+    os.replace(tmp_output, output)
+    return snapshot
+
+
+def read_snapshot(path: str, dest: str) -> Dict[str, Any]:
+    """
+    스냅샷 파일을 dest 디렉터리에 번들로 풀고 체크섬을 확인
+
+    번들 파일 외의 항목(경로가 포함된 이름, 링크 등)이 있거나 크기/체크섬이 다르면 SnapshotError.
+    반환값은 snapshot.json 내용이며, dest 는 IndexBundle 로 바로 열 수 있다.
+    """
+    os.makedirs(dest, exist_ok=True)
+    snapshot = None
+    digests: Dict[str, Dict[str, Any]] = {}
+    with tarfile.open(path, _tar_mode(path, write=False)) as tar:
+        for member in tar:
+            if not member.isfile() or member.name not in (SNAPSHOT_MANIFEST,) + BUNDLE_FILES:
+                raise SnapshotError(f"Unexpected entry in snapshot: {member.name}")
+            source = tar.extractfile(member)
+            if member.name == SNAPSHOT_MANIFEST:
+                snapshot = json.loads(source.read().decode("utf-8"))
+                if snapshot.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+                    raise SnapshotError(f"Unsupported snapshot format: {snapshot.get('format_version')}")
+                continue
+            digest = hashlib.sha256()
+            size = 0
+            with open(os.path.join(dest, member.name), "wb") as f:
+                for block in iter(lambda: source.read(_COPY_BLOCK), b""):
+                    digest.update(block)
+                    f.write(block)
+                    size += len(block)
+            digests[member.name] = {"bytes": size, "sha256": digest.hexdigest()}
+
+    if snapshot is None:
+        raise SnapshotError(f"{SNAPSHOT_MANIFEST} missing from snapshot {path}")
+    if set(digests) != set(snapshot["files"]):
+        missing = sorted(set(snapshot["files"]) - set(digests))
+        raise SnapshotError(f"Snapshot files do not match its manifest (missing: {', '.join(missing) or 'none'})")
+    for name, expected in snapshot["files"].items():
+        if digests[name] != expected:
+            raise SnapshotError(f"Checksum mismatch for {name} in snapshot {path}")
+    return snapshot
+
+
+def iter_bundle_items(bundle, block_size: int = 1024) -> Iterator[List[Dict[str, Any]]]:
+    """
+    번들 행을 bulk upsert 항목 배치로 변환 (generate_embeddings 결과와 같은 형태)
+
+    벡터는 저장 모드 그대로 넘기며, 전송 직전에 vector_values() 로 복원된다.
+    """
+    records = bundle.iter_chunks()
+    for start in range(0, bundle.count, block_size):
+        stop = min(start + block_size, bundle.count)
+        vectors = bundle.vectors[start:stop]
+        scales = bundle.scales[start:stop] if bundle.scales is not None else None
+        items = []
+        for i in range(stop - start):
+            record = next(records)
+            item = {
+                "id": record["id"],
+                "embedding": vectors[i],
+                "metadata": {**record.get("metadata", {}), "content": record.get("content", "")},
+            }
+            if scales is not None:
+                item["embedding_scale"] = float(scales[i])
+            items.append(item)
+        yield items
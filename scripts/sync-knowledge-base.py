@@ -8,144 +8,763 @@ Knowledge Base 동기화 스크립트
 - 벡터 스토어(OpenSearch / Azure Search / Vertex Search 등)에 인덱스를 반영한다.
 
 CI/CD Deploy Stage에서 각 환경(Dev/Staging/Prod)의 KB를 최신 상태로 유지하는 역할.
+
+수집 → 청크 분할 → 임베딩 → 인덱싱은 크기가 제한된 큐로 연결된 단계로 동시에 실행되며
+(kb_sync.pipeline), 메모리 사용량은 전체 문서 수가 아니라 큐 깊이에 비례한다.
+
+환경 승격(dev → staging → production)은 --export-snapshot 으로 내보낸 스냅샷을
+--import-snapshot 으로 bulk 로드하면 다시 수집/임베딩하지 않고 끝난다 (kb_sync.snapshot).
 """
 import yaml
 import os
 import argparse
+import base64
+import contextlib
+import json
+import shutil
 import sys
-from typing import Dict, Any, List
+import tempfile
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Any, List, Iterator, Optional, Set
+
+from kb_sync.bulk import (
+    AzureSearchBulkBackend,
+    BulkBackend,
+    BulkDeleter,
+    BulkUpserter,
+    OpenSearchBulkBackend,
+    VertexVectorSearchBulkBackend,
+)
+from kb_sync.collectors import s3 as s3_collector
+from kb_sync.collectors.api import ApiCollector, OAuth2TokenProvider, StaticAuth
+from kb_sync.collectors.database import DatabaseCollector
+from kb_sync.collectors.extract import ExtractionPool
+from kb_sync.collectors.s3 import LocalS3Client, S3Collector
+from kb_sync.dedup import DedupFilter, SignatureIndex
+from kb_sync.manifest import SourceManifest
+from kb_sync.indices import (
+    AzureSearchIndexManager,
+    IndexManager,
+    LocalBundleVersions,
+    OpenSearchIndexManager,
+    new_version,
+    version_name,
+)
+from kb_sync.pipeline import Stage, run_pipeline, chain_sources
+from kb_sync.schedule import SourceLock, SourceScheduler
+from kb_sync.snapshot import SnapshotError, export_snapshot, iter_bundle_items, read_snapshot
+
+# 단계 사이 큐의 기본 깊이 (항목 수)
+DEFAULT_QUEUE_SIZE = 200
+
+# 환경(dev/staging/production) 간에 공유하는 임베딩 캐시 기본 위치
+DEFAULT_EMBEDDING_CACHE_DIR = os.getenv("KB_EMBEDDING_CACHE_DIR", "build/kb-cache/embeddings")
+
+
+# 로컬 인덱스 번들(검색 도구가 프로세스 안에서 읽는 인덱스) 기본 위치
+DEFAULT_LOCAL_INDEX_DIR = os.getenv("KB_LOCAL_INDEX_DIR", "build/kb-index")
+
+# 환경별 동기화 상태(중복 서명 인덱스 등) 기본 위치
+DEFAULT_STATE_DIR = os.getenv("KB_SYNC_STATE_DIR", "build/kb-state")
 
+# S3 데이터 소스의 기본 동시 다운로드 수 (data-sources.yaml 의 maxConcurrency 로 변경)
+DEFAULT_S3_CONCURRENCY = 32
+
+# 이 크기보다 큰 S3 객체는 메모리 대신 임시 파일로 내려받아 메모리 매핑으로 추출한다
+DEFAULT_SPOOL_THRESHOLD = 8 * 1024 * 1024
+
+# API 소스의 기본 동시 페이지 요청 수 (data-sources.yaml 의 maxConcurrency 로 변경)
+DEFAULT_API_CONCURRENCY = 4
+
+# 데이터베이스 소스의 기본 fetchmany 배치 크기 (data-sources.yaml 의 batchSize 로 변경)
+DEFAULT_DB_BATCH_SIZE = 1000
+
+# import_kb_index() 로 로드되는 인덱스/캐시 포맷 모듈
+kb_index = None
+
+
+def import_kb_index(agent_dir: str):
+    """
+    Agent 도구 구현 디렉터리(tools/implementations)의 kb_index 모듈 로드
 
-def collect_documents_from_s3(bucket: str, path: str) -> List[Dict[str, Any]]:
-    """S3에서 문서 수집"""
-    print(f"Collecting documents from s3://{bucket}/{path}...")
+    인덱스/캐시 포맷은 검색 도구(Lambda)와 공유하므로 도구 구현 쪽 모듈을 그대로 사용한다.
+    """
+    global kb_index
+    impl_dir = os.path.join(agent_dir, "tools", "implementations")
+    if impl_dir not in sys.path:
+        sys.path.insert(0, impl_dir)
+    import kb_index as module
+    kb_index = module
+    return kb_index
+
+
+def create_s3_client(max_workers: int):
+    """
+    S3 클라이언트 생성
+
+    KB_S3_LOCAL_ROOT 가 설정되면 로컬 디렉터리(<root>/<bucket>/<key>)를 S3 대신 사용하고,
+    KB_S3_ENDPOINT_URL 이 설정되면 S3 호환 스토리지(MinIO 등)에 연결한다.
+    """
+    local_root = os.getenv("KB_S3_LOCAL_ROOT")
+    if local_root:
+        return LocalS3Client(local_root)
+    return s3_collector.create_s3_client(max_workers, os.getenv("KB_S3_ENDPOINT_URL"))
+
+
+def collect_documents_from_s3(ds: Dict[str, Any], manifest: SourceManifest,
+                              unchanged: Optional[Set[str]] = None, spool_dir: Optional[str] = None,
+                              spool_threshold: int = DEFAULT_SPOOL_THRESHOLD,
+                              removed: Optional[Dict[str, List[str]]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    S3에서 문서 수집 (raw 문서를 하나씩 yield, 텍스트 추출은 extract 단계에서 수행)
+
+    목록은 페이지 단위로 읽고, fileTypes 에 해당하면서 매니페스트의 ETag/LastModified 와
+    달라진 객체만 maxConcurrency 개 스레드에서 공유 커넥션 풀로 동시에 다운로드한다.
+    spool_threshold 보다 큰 객체는 spool_dir 의 임시 파일로 내려받는다.
+    건너뛴(변경되지 않은) 객체의 문서 ID 는 unchanged 에, 버킷에서 사라진 객체의 문서 ID 는
+    removed[소스 ID] 에 기록된다.
+    """
+    bucket, path = ds["bucket"], ds.get("path", "")
+    max_workers = ds.get("maxConcurrency", DEFAULT_S3_CONCURRENCY)
+    print(f"Collecting documents from s3://{bucket}/{path} ({max_workers} concurrent downloads)...")
     
-    # 실제 구현은 boto3를 사용
-    # 예시:
-    # import boto3
-    # s3 = boto3.client('s3')
-    # 
-    # documents = []
-    # paginator = s3.get_paginator('list_objects_v2')
-    # for page in paginator.paginate(Bucket=bucket, Prefix=path):
-    #     for obj in page.get('Contents', []):
-    #         # 문서 다운로드 및 처리
-    #         documents.append(...)
+    collector = S3Collector(
+        create_s3_client(max_workers),
+        ds["id"],
+        bucket,
+        path,
+        file_types=ds.get("fileTypes"),
+        manifest=manifest,
+        max_workers=max_workers,
+        spool_threshold=spool_threshold,
+        spool_dir=spool_dir,
+    )
+    yield from collector
+    if unchanged is not None:
+        unchanged.update(f"{ds['id']}/{key}" for key in collector.unchanged_keys)
+    deleted = collector.prune()
+    if removed is not None:
+        removed[ds["id"]] = deleted
     
-    # 임시 더미 데이터
-    documents = [
-        {"id": "doc1", "content": "반품 정책: 30일 이내 반품 가능", "source": f"s3://{bucket}/{path}/doc1.txt"},
-        {"id": "doc2", "content": "배송 정책: 3-5일 소요", "source": f"s3://{bucket}/{path}/doc2.txt"}
-    ]
+    stats = collector.stats
+    print(f"✓ Collected {stats.downloaded} documents from S3 "
+          f"({stats.unchanged} unchanged, {len(deleted)} removed, {stats.filtered} filtered by file type, "
+          f"{stats.bytes_downloaded / 1024 / 1024:.1f} MB)")
+
+
+def collect_documents_from_database(ds: Dict[str, Any], manifest: SourceManifest,
+                                    unchanged: Optional[Set[str]] = None,
+                                    removed: Optional[Dict[str, List[str]]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    데이터베이스에서 문서 수집 (문서를 하나씩 yield)
+
+    fetchall() 대신 서버 측 커서와 fetchmany(batchSize) 로 결과를 스트리밍하며,
+    incrementalColumn 이 설정되면 매니페스트의 워터마크 이후에 변경된 행만 조회한다.
+    삭제되었거나 쿼리 조건에서 빠진 행은 ID 컬럼만 다시 조회해 찾고 removed[소스 ID] 에 기록하며,
+    이번에 조회되지 않은(변경되지 않은) 나머지 행의 문서 ID 는 unchanged 에 추가된다.
+    """
+    connection_string = ds.get("connectionString", "")
+    if not connection_string or "${" in connection_string or not ds.get("query"):
+        print(f"⚠ Database source {ds['id']} has no connection string or query configured; skipping")
+        return
     
-    print(f"✓ Collected {len(documents)} documents from S3")
-    return documents
+    collector = DatabaseCollector(
+        connection_string,
+        ds["id"],
+        ds["query"],
+        manifest=manifest,
+        id_column=ds.get("idColumn", "id"),
+        incremental_column=ds.get("incrementalColumn"),
+        content_columns=ds.get("contentColumns"),
+        batch_size=ds.get("batchSize", DEFAULT_DB_BATCH_SIZE),
+    )
+    since = f" (changed since {collector.watermark})" if collector.watermark else ""
+    print(f"Collecting documents from database ({ds['id']}){since}...")
+    
+    yield from collector
+    deleted = collector.prune()
+    if removed is not None:
+        removed[ds["id"]] = deleted
+    if unchanged is not None:
+        collected = set(collector.collected_ids)
+        unchanged.update(f"{ds['id']}/{row_id}" for row_id in list(manifest.entries) if row_id not in collected)
+    
+    stats = collector.stats
+    print(f"✓ Collected {stats.rows} documents from database "
+          f"({stats.batches} batches, {stats.unchanged} unchanged, {len(deleted)} removed)")
+
+
+def create_api_auth(auth_config: Optional[Dict[str, Any]]):
+    """
+    data-sources.yaml 의 authentication 설정으로 인증 객체 생성
+
+    oauth2:  tokenUrl, clientId, clientSecret, scope (client credentials, 토큰 캐시/갱신)
+    api_key: apiKey, header (기본 X-API-Key)
+    basic:   username, password
+    """
+    if not auth_config:
+        return None
+    auth_type = auth_config.get("type")
+    if auth_type == "oauth2":
+        return OAuth2TokenProvider(auth_config["tokenUrl"], auth_config.get("clientId", ""),
+                                   auth_config.get("clientSecret", ""), auth_config.get("scope"))
+    if auth_type == "api_key":
+        return StaticAuth({auth_config.get("header", "X-API-Key"): auth_config["apiKey"]})
+    if auth_type == "basic":
+        credentials = f"{auth_config['username']}:{auth_config.get('password', '')}".encode("utf-8")
+        return StaticAuth({"Authorization": f"Basic {base64.b64encode(credentials).decode('ascii')}"})
+    raise ValueError(f"Unsupported API authentication type: {auth_type}")
 
 
-def collect_documents_from_database(connection_string: str, query: str) -> List[Dict[str, Any]]:
-    """데이터베이스에서 문서 수집"""
-    print(f"Collecting documents from database...")
+def collect_documents_from_api(ds: Dict[str, Any], manifest: SourceManifest,
+                               unchanged: Optional[Set[str]] = None,
+                               removed: Optional[Dict[str, List[str]]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    API에서 문서 수집 (문서를 하나씩 yield)
+
+    페이지는 maxConcurrency 개까지 동시에 요청하고, 매니페스트에 저장된 ETag/Last-Modified 로
+    조건부 요청을 보내 304 응답 페이지의 문서 ID 는 unchanged 에 추가한다.
+    이전 동기화에는 있었지만 이번에는 어느 페이지에도 없는 문서 ID 는 removed[소스 ID] 에 기록된다.
+    """
+    if "${" in json.dumps(ds):
+        print(f"⚠ API source {ds['id']} has unresolved environment variables; skipping")
+        return
     
-    # 실제 구현은 데이터베이스 연결 라이브러리 사용
-    # 예시:
-    # import psycopg2
-    # conn = psycopg2.connect(connection_string)
-    # cursor = conn.cursor()
-    # cursor.execute(query)
-    # results = cursor.fetchall()
+    collector = ApiCollector(
+        ds["endpoint"],
+        ds["id"],
+        manifest=manifest,
+        auth=create_api_auth(ds.get("authentication")),
+        pagination=ds.get("pagination"),
+        items_field=ds.get("itemsField", "items"),
+        id_field=ds.get("idField", "id"),
+        content_field=ds.get("contentField", "content"),
+        max_concurrency=ds.get("maxConcurrency", DEFAULT_API_CONCURRENCY),
+    )
+    print(f"Collecting documents from {ds['endpoint']} ({collector.max_concurrency} concurrent requests)...")
     
-    # 임시 더미 데이터
-    documents = [
-        {"id": "faq1", "content": "FAQ: 제품 사용법", "source": "database"},
-        {"id": "faq2", "content": "FAQ: 결제 방법", "source": "database"}
-    ]
+    yield from collector
+    if unchanged is not None:
+        unchanged.update(collector.unchanged_ids)
+    deleted = collector.prune()
+    if removed is not None:
+        removed[ds["id"]] = deleted
     
-    print(f"✓ Collected {len(documents)} documents from database")
-    return documents
+    stats = collector.stats
+    print(f"✓ Collected {stats.documents} documents from API "
+          f"({stats.pages} pages, {stats.not_modified} not modified, {len(deleted)} removed)")
+
 
+def chunk_document(doc: Dict[str, Any], chunk_size: int, chunk_overlap: int) -> Iterator[Dict[str, Any]]:
+    """
+    문서를 chunkSize / chunkOverlap 설정에 맞춰 청크로 분할
 
-def generate_embeddings(documents: List[Dict[str, Any]], model: str) -> List[Dict[str, Any]]:
-    """임베딩 생성"""
-    print(f"Generating embeddings using model: {model}...")
+    - 토큰 수 대신 문자 수를 근사치로 사용한다.
+    - 청크 ID는 "<문서ID>#<순번>" 형식이며, 원본 문서 ID는 document_id 로 남긴다.
+    - 검색 필터용으로 청크 언어(language)를 메타데이터에 기록한다.
+    - 내용이 비어 있으면 청크를 만들지 않는다 (이전에 색인한 청크는 삭제 대상이 된다).
+    """
+    content = doc.get("content", "")
+    if not content.strip():
+        return
+    step = max(chunk_size - chunk_overlap, 1)
+    starts = range(0, max(len(content) - chunk_overlap, 1), step) if len(content) > chunk_size else [0]
     
+    for i, start in enumerate(starts):
+        chunk = dict(doc)
+        chunk["id"] = f"{doc['id']}#{i}"
+        chunk["document_id"] = doc["id"]
+        chunk["content"] = content[start:start + chunk_size]
+        chunk["metadata"] = {**doc.get("metadata", {}), "language": kb_index.detect_language(chunk["content"])}
+        yield chunk
+
+
+def embed_texts(texts: List[str], model: str, dimensions: int):
+    """임베딩 모델 API 호출 (캐시에 없는 텍스트만 배치로 전달된다)"""
     # 실제 구현은 임베딩 모델 API 호출
     # 예시:
     # import boto3
     # bedrock = boto3.client('bedrock-runtime')
     # 
     # embeddings = []
-    # for doc in documents:
+    # for text in texts:
     #     response = bedrock.invoke_model(
     #         modelId=model,
-    #         body=json.dumps({"inputText": doc["content"]})
+    #         body=json.dumps({"inputText": text})
     #     )
-    #     embedding = json.loads(response['body'].read())
-    #     embeddings.append({...})
+    #     embeddings.append(json.loads(response['body'].read())['embedding'])
+    
+    # 임시 더미 임베딩 (문자 n-gram 해싱, 검색 도구의 더미 임베딩과 동일)
+    return kb_index.hashed_embeddings(texts, dimensions)
+
+
+def generate_embeddings(documents: List[Dict[str, Any]], model: str, cache=None,
+                        dimensions: int = 1536, storage: str = "float32") -> List[Dict[str, Any]]:
+    """
+    임베딩 생성 (파이프라인의 embed 단계에서 배치 단위로 호출된다)
+
+    cache(kb_index.EmbeddingCache)가 주어지면 (모델, 청크 내용 해시)로 캐시를 먼저 조회하고
+    캐시에 없는 청크만 임베딩 모델을 호출한다.
+
+    벡터는 Python float 리스트가 아니라 정규화 후 storage 모드(float32/float16/int8)로
+    변환된 numpy 행으로 전달되며, int8 모드에서는 embedding_scale 이 함께 붙는다.
+    """
+    texts = [doc["content"] for doc in documents]
+    
+    if cache is not None:
+        vectors = cache.get_or_compute(texts, lambda batch: embed_texts(batch, model, dimensions))
+    else:
+        vectors = embed_texts(texts, model, dimensions)
+    
+    data, scales = kb_index.quantize(kb_index.normalize(vectors), storage)
     
-    # 임시 더미 데이터
     embeddings = []
-    for doc in documents:
-        embeddings.append({
+    for i, doc in enumerate(documents):
+        embedding = {
             "id": doc["id"],
-            "embedding": [0.1] * 1536,  # 더미 임베딩 벡터
+            "embedding": data[i],
             "metadata": {
+                **doc.get("metadata", {}),
+                "document_id": doc.get("document_id", doc["id"]),
                 "source": doc.get("source", ""),
                 "content": doc["content"]
             }
-        })
+        }
+        if scales is not None:
+            embedding["embedding_scale"] = float(scales[i])
+        embeddings.append(embedding)
     
-    print(f"✓ Generated embeddings for {len(embeddings)} documents")
     return embeddings
 
 
-def update_opensearch_index(embeddings: List[Dict[str, Any]], environment: str, index_name: str):
-    """OpenSearch 인덱스 업데이트"""
-    print(f"Updating OpenSearch index: {index_name} (environment: {environment})...")
+def write_local_index(writer, embeddings: List[Dict[str, Any]]):
+    """embed 단계 결과를 로컬 인덱스 번들에 추가 (벡터는 이미 storage 모드로 변환된 상태)"""
+    records = []
+    for emb in embeddings:
+        metadata = {k: v for k, v in emb["metadata"].items() if k != "content"}
+        records.append({"id": emb["id"], "content": emb["metadata"]["content"], "metadata": metadata})
     
-    # 실제 구현은 OpenSearch 클라이언트 사용
-    # 예시:
-    # from opensearchpy import OpenSearch
-    # 
-    # client = OpenSearch(...)
-    # 
-    # for emb in embeddings:
-    #     client.index(
-    #         index=index_name,
-    #         id=emb["id"],
-    #         body={
-    #             "embedding": emb["embedding"],
-    #             "metadata": emb["metadata"]
-    #         }
-    #     )
+    scales = [emb["embedding_scale"] for emb in embeddings] if writer.storage == "int8" else None
+    writer.add(records, [emb["embedding"] for emb in embeddings], scales, encoded=True)
+
+
+def create_opensearch_backend(index_name: str) -> Optional[BulkBackend]:
+    """
+    OpenSearch bulk 백엔드 생성 (OPENSEARCH_ENDPOINT 미설정 시 None)
+
+    문서를 한 건씩 client.index() 하지 않고 _bulk API 로 묶어서 보낸다.
+    """
+    endpoint = os.getenv("OPENSEARCH_ENDPOINT")
+    if not endpoint:
+        return None
     
-    print(f"✓ Updated OpenSearch index with {len(embeddings)} documents")
+    auth = None
+    if os.getenv("OPENSEARCH_USER"):
+        auth = (os.getenv("OPENSEARCH_USER"), os.getenv("OPENSEARCH_PASSWORD", ""))
+    # AWS OpenSearch Service(IAM 인증)는 requests-aws4auth 의 AWS4Auth 를 auth 로 넘기면 된다
+    return OpenSearchBulkBackend(endpoint, index_name, auth=auth)
 
 
-def update_azure_search_index(embeddings: List[Dict[str, Any]], environment: str, index_name: str):
-    """Azure Cognitive Search 인덱스 업데이트"""
-    print(f"Updating Azure Search index: {index_name} (environment: {environment})...")
+def create_azure_search_backend(index_name: str) -> Optional[BulkBackend]:
+    """Azure AI Search bulk 백엔드 생성 (AZURE_SEARCH_ENDPOINT / AZURE_SEARCH_API_KEY 필요)"""
+    endpoint = os.getenv("AZURE_SEARCH_ENDPOINT")
+    api_key = os.getenv("AZURE_SEARCH_API_KEY")
+    if not endpoint or not api_key:
+        return None
     
-    # 실제 구현은 Azure Search SDK 사용
-    print(f"✓ Updated Azure Search index with {len(embeddings)} documents")
+    return AzureSearchBulkBackend(endpoint, index_name, api_key)
 
 
-def update_vertex_search_index(embeddings: List[Dict[str, Any]], environment: str, index_name: str):
-    """Vertex AI Search 인덱스 업데이트"""
-    print(f"Updating Vertex AI Search index: {index_name} (environment: {environment})...")
+def create_vertex_search_backend(index_name: str) -> Optional[BulkBackend]:
+    """
+    Vertex AI Vector Search bulk 백엔드 생성
+
+    VERTEX_INDEX_RESOURCE (projects/.../locations/.../indexes/...) 와
+    GOOGLE_OAUTH_ACCESS_TOKEN (gcloud auth print-access-token) 이 필요하다.
+    """
+    index_resource = os.getenv("VERTEX_INDEX_RESOURCE")
+    access_token = os.getenv("GOOGLE_OAUTH_ACCESS_TOKEN")
+    if not index_resource or not access_token:
+        return None
     
-    # 실제 구현은 Vertex AI SDK 사용
-    print(f"✓ Updated Vertex AI Search index with {len(embeddings)} documents")
+    return VertexVectorSearchBulkBackend(index_resource, os.getenv("VERTEX_REGION", "us-central1"), access_token)
+
+
+def create_bulk_upserter(backend: BulkBackend, indexing_config: Dict[str, Any]) -> BulkUpserter:
+    """embedding-config.yaml 의 indexing 설정으로 BulkUpserter 생성"""
+    return BulkUpserter(
+        backend,
+        max_docs=indexing_config.get("batchSize", 100),
+        max_bytes=indexing_config.get("maxBatchBytes", 10 * 1024 * 1024),
+        max_in_flight=indexing_config.get("maxConcurrency", 5),
+        retry_attempts=indexing_config.get("retryAttempts", 3),
+    )
+
 
+def item_nbytes(item: Dict[str, Any]) -> int:
+    """
+    파이프라인 항목의 바이트 수 (단계별 bytes/s 집계용)
 
-def sync_knowledge_base(agent_def_file: str, environment: str):
+    raw 문서는 파일 크기, 문서/청크는 UTF-8 내용 크기, 임베딩 결과는 내용 + 벡터 크기
+    """
+    if "raw" in item:
+        return len(item["raw"])
+    if "raw_path" in item:
+        try:
+            return os.path.getsize(item["raw_path"])
+        except OSError:
+            return 0
+    content = item["content"] if "content" in item else item.get("metadata", {}).get("content", "")
+    return len(content.encode("utf-8")) + getattr(item.get("embedding"), "nbytes", 0)
+
+
+def append_metrics(path: str, report: Dict[str, Any]):
+    """실행 요약을 JSON Lines 파일에 한 줄로 추가 (데몬 모드에서는 소스 실행마다 한 줄)"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    line = json.dumps(report, ensure_ascii=False)
+    with _state_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+def create_bulk_deleter(backend: BulkBackend, indexing_config: Dict[str, Any]) -> BulkDeleter:
+    """embedding-config.yaml 의 indexing 설정으로 BulkDeleter 생성 (deleteRateLimit: 초당 삭제 수)"""
+    return BulkDeleter(
+        backend,
+        max_per_second=indexing_config.get("deleteRateLimit"),
+        max_docs=indexing_config.get("batchSize", 100),
+        max_in_flight=indexing_config.get("maxConcurrency", 5),
+        retry_attempts=indexing_config.get("retryAttempts", 3),
+    )
+
+
+def plan_deletions(manifests: Dict[str, SourceManifest], removed: Dict[str, List[str]],
+                   chunk_counts: Dict[str, Dict[str, int]]) -> List[str]:
+    """
+    벡터 스토어에서 지울 청크 ID
+
+    - 소스에서 사라진 문서의 모든 청크
+    - 다시 색인한 문서에서 청크 수가 줄어 남게 된 뒤쪽 청크
+
+    문서별 청크 수는 소스 매니페스트의 state["chunks"] 에 기록되며, 여기서 함께 갱신한다.
+    """
+    stale = []
+    for source_id, manifest in manifests.items():
+        ledger = manifest.state.setdefault("chunks", {})
+        for doc_id in removed.get(source_id, []):
+            stale.extend(f"{doc_id}#{i}" for i in range(ledger.pop(doc_id, 0)))
+        for doc_id, count in chunk_counts.get(source_id, {}).items():
+            stale.extend(f"{doc_id}#{i}" for i in range(count, ledger.get(doc_id, 0)))
+            ledger[doc_id] = count
+    return stale
+
+
+def load_embedding_config(agent_dir: str) -> Dict[str, Any]:
+    """knowledge-base/embedding-config.yaml 로드 (없으면 빈 설정)"""
+    config_file = os.path.join(agent_dir, "knowledge-base", "embedding-config.yaml")
+    if not os.path.exists(config_file):
+        return {}
+    
+    with open(config_file, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+def load_data_sources(agent_dir: str, kb_config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    활성화된 데이터 소스 목록
+
+    knowledge-base/data-sources.yaml 이 있으면 그 설정(id, fileTypes, enabled 등)을 사용하고,
+    없으면 agent-definition.yaml 의 knowledgeBase.dataSources 에 "<type>-<순번>" ID 를 붙여 사용한다.
+    문자열 값의 ${ENV_VAR} 는 환경 변수로 치환된다.
+    """
+    sources_file = os.path.join(agent_dir, "knowledge-base", "data-sources.yaml")
+    if os.path.exists(sources_file):
+        with open(sources_file, 'r', encoding='utf-8') as f:
+            data_sources = (yaml.safe_load(f) or {}).get("dataSources", [])
+    else:
+        data_sources = [{"id": f"{ds['type']}-{i}", **ds} for i, ds in enumerate(kb_config.get("dataSources", []))]
+    
+    return [expand_env(ds) for ds in data_sources if ds.get("enabled", True)]
+
+
+def expand_env(value: Any) -> Any:
+    """설정 값(중첩 dict/list 포함)의 ${ENV_VAR} 를 환경 변수로 치환"""
+    if isinstance(value, str):
+        return os.path.expandvars(value)
+    if isinstance(value, dict):
+        return {k: expand_env(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [expand_env(v) for v in value]
+    return value
+
+
+def iter_documents(data_sources: List[Dict[str, Any]], manifests: Dict[str, SourceManifest],
+                   unchanged: Optional[Set[str]] = None, spool_dir: Optional[str] = None,
+                   spool_threshold: int = DEFAULT_SPOOL_THRESHOLD,
+                   removed: Optional[Dict[str, List[str]]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    dataSources 별 수집 함수를 이어 붙인 collect 단계 source
+
+    removed 에는 끝까지 수집한 소스만 기록되므로, 설정이 없어 건너뛴 소스의 문서가 삭제되는 일은 없다.
+    """
+    sources = []
+    
+    for ds in data_sources:
+        if ds["type"] == "s3":
+            sources.append(lambda ds=ds: collect_documents_from_s3(ds, manifests[ds["id"]], unchanged,
+                                                                     spool_dir, spool_threshold, removed))
+        elif ds["type"] == "database":
+            sources.append(lambda ds=ds: collect_documents_from_database(ds, manifests[ds["id"]], unchanged,
+                                                                           removed))
+        elif ds["type"] == "api":
+            sources.append(lambda ds=ds: collect_documents_from_api(ds, manifests[ds["id"]], unchanged, removed))
+        else:
+            print(f"⚠ Unsupported data source type: {ds['type']} ({ds['id']})")
+    
+    return chain_sources(sources)
+
+
+def load_previous_bundle(path: str, dimensions: int, storage: str):
+    """이전 동기화의 로컬 인덱스 번들 (없거나 저장 모드/차원이 다르면 None)"""
+    if not os.path.exists(os.path.join(path, "manifest.json")):
+        return None
+    try:
+        bundle = kb_index.IndexBundle(path)
+    except ValueError:
+        return None
+    if bundle.storage != storage or bundle.dimensions != dimensions:
+        return None
+    return bundle
+
+
+def select_data_sources(data_sources: List[Dict[str, Any]],
+                        source_ids: Optional[List[str]]) -> List[Dict[str, Any]]:
+    """source_ids 에 해당하는 데이터 소스만 (None 이면 전체)"""
+    if not source_ids:
+        return data_sources
+    known = {ds["id"] for ds in data_sources}
+    unknown = [source_id for source_id in source_ids if source_id not in known]
+    if unknown:
+        raise ValueError(f"Unknown or disabled data source: {', '.join(unknown)}")
+    return [ds for ds in data_sources if ds["id"] in source_ids]
+
+
+def acquire_source_locks(env_state_dir: str, data_sources: List[Dict[str, Any]]):
+    """
+    소스별 잠금 획득 (비차단)
+
+    같은 소스의 이전 동기화(데몬 또는 다른 CLI 실행)가 아직 실행 중이면 그 소스는 이번에 건너뛴다.
+
+    Returns:
+        (획득한 잠금 목록, 실행할 데이터 소스 목록)
+    """
+    locks, runnable = [], []
+    for ds in data_sources:
+        lock = SourceLock(os.path.join(env_state_dir, "locks", f"{ds['id']}.lock"))
+        if lock.acquire():
+            locks.append(lock)
+            runnable.append(ds)
+        else:
+            print(f"⚠ Previous sync of {ds['id']} is still running; skipping")
+    return locks, runnable
+
+
+_state_lock = threading.Lock()
+_environment_locks: Dict[str, threading.Lock] = {}
+_signature_indexes: Dict[str, SignatureIndex] = {}
+
+
+def environment_lock(env_state_dir: str) -> threading.Lock:
+    """환경별 로컬 번들 / 상태 파일 기록 잠금 (데몬에서 동시에 실행되는 소스 간)"""
+    with _state_lock:
+        return _environment_locks.setdefault(os.path.abspath(env_state_dir), threading.Lock())
+
+
+def reindex_dedup_followups(dedup: DedupFilter, stale_chunks: List[str], writer, upserter,
+                            batch_size: int, embed: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]):
+    """
+    파이프라인이 끝난 뒤 중복 필터의 후속 색인
+
+    - 삭제되는 청크의 중복으로 버렸던 청크를 새로 색인한다 (대표 청크와 함께 내용이 사라지지 않도록)
+    - merge 모드에서 병합 출처가 늘어난 대표 청크를 merged_sources 와 함께 다시 색인한다
+      (로컬 번들은 행을 추가하지 않고 close() 할 때 메타데이터만 바꾼다)
+    """
+    readmitted = dedup.readmit(stale_chunks)
+    rewrites = dedup.rewrites()
+    if writer is not None:
+        for chunk in rewrites:
+            writer.update_metadata(chunk["id"], {"merged_sources": chunk["metadata"]["merged_sources"]})
+    chunks = readmitted
+    if upserter is not None:
+        # 파이프라인에서 보낸 대표 청크의 이전 버전이 다시 색인한 버전보다 늦게 반영되지 않도록
+        upserter.flush()
+        chunks = readmitted + rewrites
+    for start in range(0, len(chunks), batch_size):
+        embeddings = embed(chunks[start:start + batch_size])
+        if writer is not None and start < len(readmitted):
+            write_local_index(writer, embeddings[:len(readmitted) - start])
+        if upserter is not None:
+            upserter.add_many(embeddings)
+
+
+def shared_signature_index(path: str, threshold: float) -> SignatureIndex:
+    """
+    같은 프로세스에서 동시에 실행되는 소스 동기화가 공유하는 중복 서명 인덱스
+
+    소스마다 따로 로드/저장하면 나중에 저장한 쪽이 다른 소스의 서명을 덮어쓰므로 하나를 공유한다.
+    """
+    key = os.path.abspath(path)
+    with _state_lock:
+        index = _signature_indexes.get(key)
+        if index is None or index.threshold != threshold:
+            index = _signature_indexes[key] = SignatureIndex(path, threshold=threshold)
+        return index
+
+
+def carry_over_local_index(writer, dimensions: int, storage: str, synced_sources: Set[str],
+                           unchanged: Set[str]) -> int:
+    """
+    현재 로컬 번들에서 이번 동기화가 다시 쓰지 않은 청크를 새 번들로 복사
+
+    - 이번에 동기화하지 않은 소스의 청크
+    - 동기화한 소스 중 변경되지 않은 문서의 청크
+    (환경 잠금 안에서 호출하므로 다른 소스가 방금 기록한 번들을 기준으로 한다)
+    """
+    previous = load_previous_bundle(writer.path, dimensions, storage)
+    if previous is None:
+        return 0
+    
+    def keep(record: Dict[str, Any]) -> bool:
+        metadata = record["metadata"]
+        return metadata.get("source_id") not in synced_sources or metadata.get("document_id") in unchanged
+    
+    return writer.carry_over(previous, keep)
+
+
+def create_index_manager(vector_store: str) -> Optional[IndexManager]:
+    """blue/green 재색인용 인덱스 관리자 (bulk 백엔드와 같은 환경 변수 사용)"""
+    if vector_store == "opensearch":
+        auth = None
+        if os.getenv("OPENSEARCH_USER"):
+            auth = (os.getenv("OPENSEARCH_USER"), os.getenv("OPENSEARCH_PASSWORD", ""))
+        return OpenSearchIndexManager(os.environ["OPENSEARCH_ENDPOINT"], auth=auth)
+    if vector_store == "azure_search":
+        return AzureSearchIndexManager(os.environ["AZURE_SEARCH_ENDPOINT"], os.environ["AZURE_SEARCH_API_KEY"])
+    # Vertex AI Vector Search 는 alias 가 없고 IndexEndpoint 에 배포된 인덱스를 바꿔야 한다
+    raise ValueError(f"Blue/green rebuild is not supported for {vector_store}; "
+                     f"deploy the new index to the IndexEndpoint and undeploy the old one instead")
+
+
+def ensure_live_index(vector_store: str, index: str, dimensions: int):
+    """
+    증분 동기화 / 스냅샷 가져오기 전에 라이브 인덱스가 없으면 blue/green 버전 인덱스와 같은 매핑으로 생성
+
+    검색 도구의 kNN 질의와 메타데이터 필터는 knn_vector / keyword / date 매핑을 전제로 한다.
+    Vertex AI Vector Search 인덱스는 인덱스 엔드포인트 배포와 함께 따로 만든다.
+    """
+    if vector_store == "vertex_search":
+        return
+    if create_index_manager(vector_store).ensure_index(index, index, dimensions):
+        print(f"  created index {index}")
+
+
+def discard_index(index_manager: IndexManager, index: str):
+    """실패한 blue/green 재색인의 새 인덱스 삭제 (alias 는 그대로 이전 인덱스를 가리킨다)"""
+    try:
+        index_manager.delete_index(index)
+    except Exception as e:
+        print(f"⚠ Failed to delete incomplete index {index}: {e}")
+
+
+def load_warmup_queries(agent_dir: str, count: int, model: str, dimensions: int):
+    """
+    워밍용 질의 벡터 (평가 데이터셋 tests/evaluation-dataset.json 의 input 중 앞의 count 개)
+    """
+    dataset_file = os.path.join(agent_dir, "tests", "evaluation-dataset.json")
+    if count <= 0 or not os.path.exists(dataset_file):
+        return None
+    with open(dataset_file, 'r', encoding='utf-8') as f:
+        texts = [tc["input"] for tc in json.load(f).get("testCases", []) if tc.get("input")][:count]
+    if not texts:
+        return None
+    return kb_index.normalize(embed_texts(texts, model, dimensions))
+
+
+def publish_index_version(vector_store: str, index: str, version: str):
+    """
+    벡터 스토어 인덱스에 이번 동기화의 KB 게시 버전을 기록
+
+    검색 도구는 (질의, 필터, KB 게시 버전) 으로 결과를 캐시하므로, 인덱스 내용을 바꾼 뒤에는 항상
+    새 버전을 기록해야 이전 결과가 쓰이지 않는다. 로컬 번들은 manifest 에 같은 버전이 기록된다.
+    검색 도구는 OpenSearch 만 조회하므로 다른 벡터 스토어에는 기록하지 않는다.
+    """
+    if vector_store == "opensearch":
+        create_index_manager(vector_store).set_version(index, version)
+
+
+def promote_blue_green(index_manager: Optional[IndexManager], local_versions: Optional[LocalBundleVersions],
+                       alias: str, target_index: str, version: str, bundle_path: Optional[str],
+                       warmup_queries, keep_versions: int):
+    """새 버전을 워밍한 뒤 alias 를 전환하고, 오래된 버전을 정리"""
+    if warmup_queries is not None:
+        if bundle_path is not None:
+            bundle = kb_index.IndexBundle(bundle_path)
+            start = time.perf_counter()
+            if bundle.count:
+                bundle.scores(warmup_queries)
+            print(f"  warm-up: local bundle {len(warmup_queries)} queries in {time.perf_counter() - start:.3f}s")
+        if index_manager is not None:
+            latencies = sorted(index_manager.warm(target_index, warmup_queries))
+            print(f"  warm-up: {target_index} {len(latencies)} queries, "
+                  f"p50 {latencies[len(latencies) // 2] * 1000:.0f} ms, max {latencies[-1] * 1000:.0f} ms")
+    
+    if index_manager is not None:
+        previous = index_manager.alias_targets(alias)
+        index_manager.swap_alias(alias, target_index)
+        print(f"  alias {alias}: {', '.join(previous) or '(none)'} -> {target_index}")
+        removed = index_manager.garbage_collect(alias, keep_versions)
+        if removed:
+            print(f"  removed old indexes: {', '.join(removed)}")
+    if local_versions is not None and bundle_path is not None:
+        local_versions.activate(version)
+        removed = local_versions.garbage_collect(keep_versions)
+        print(f"  local index: {local_versions.alias_path} -> {os.path.basename(bundle_path)}"
+              + (f" (removed {len(removed)} old versions)" if removed else ""))
+
+
+def sync_knowledge_base(agent_def_file: str, environment: str, queue_size: int = DEFAULT_QUEUE_SIZE,
+                        embedding_cache_dir: str = DEFAULT_EMBEDDING_CACHE_DIR,
+                        local_index_dir: str = DEFAULT_LOCAL_INDEX_DIR,
+                        vector_storage: Optional[str] = None,
+                        state_dir: str = DEFAULT_STATE_DIR,
+                        source_ids: Optional[List[str]] = None,
+                        blue_green: bool = False,
+                        metrics_output: Optional[str] = None):
     """
     Knowledge Base 동기화 메인 함수
 
     1) agent-definition.yaml 에서 knowledgeBase 설정 로드
-    2) dataSources 별로 문서 수집
-    3) 임베딩 생성
-    4) vectorStore 타입(opensearch/azure_search/vertex_search)에 맞게 인덱스 업데이트
+    2) dataSources 별로 변경된 문서 수집 (collect, knowledge-base/data-sources.yaml)
+    3) PDF 등 파일에서 텍스트 추출 (extract, 프로세스 풀)
+    4) 문서를 청크로 분할 (chunk)
+    5) 거의 중복된 청크 제거 (dedup, embedding-config.yaml 의 deduplication 설정)
+    6) 임베딩 생성 (embed, indexing.batchSize 단위)
+    7) vectorStore 타입(opensearch/azure_search/vertex_search)에 맞게 인덱스 업데이트 (index)
+    8) 소스에서 사라진 문서와 줄어든 문서의 남은 청크를 bulk 삭제 (indexing.deleteRateLimit)
+
+    2)~7) 은 크기 queue_size 인 큐로 연결되어 동시에 실행된다.
+    embedding_cache_dir 이 주어지면 환경 간에 공유되는 임베딩 캐시를 사용한다.
+    local_index_dir 이 주어지면 검색 도구용 로컬 인덱스 번들(<local_index_dir>/<index_name>)도 기록한다.
+    벡터 저장 모드는 vector_storage 또는 embedding-config.yaml 의 embedding.storage (기본 float32).
+    중복 서명 인덱스, 소스별 매니페스트 등 환경별 상태는 <state_dir>/<index_name>/ 에 저장된다.
+    source_ids 가 주어지면 해당 소스만 동기화하고, 다른 소스의 로컬 인덱스 청크는 그대로 유지한다.
+    blue_green 이면 라이브 인덱스에 쓰지 않고 새 버전 인덱스/번들을 전체 재색인한 뒤,
+    샘플 질의로 워밍하고 alias 를 원자적으로 전환한다 (embedding-config.yaml 의 blueGreen 설정).
+    metrics_output 이 주어지면 단계별 처리량/대기 시간/재시도/오류를 담은 실행 요약을 JSON 한 줄로 덧붙인다.
     """
+    run_started_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    run_started = time.monotonic()
     with open(agent_def_file, 'r', encoding='utf-8') as f:
         agent_def = yaml.safe_load(f)
     
@@ -155,59 +774,489 @@ def sync_knowledge_base(agent_def_file: str, environment: str):
         print("Knowledge Base is not enabled for this agent")
         return
     
-    print(f"Syncing Knowledge Base for environment: {environment}")
+    # 벡터 스토어 선택 (파이프라인 시작 전에 확인)
+    vector_store = kb_config.get("vectorStore", "opensearch")
+    index_name = f"{agent_def['metadata']['name']}-kb-{environment}"
     
-    # 데이터 소스에서 문서 수집
-    all_documents = []
+    backend_factories = {
+        "opensearch": create_opensearch_backend,
+        "azure_search": create_azure_search_backend,
+        "vertex_search": create_vertex_search_backend,
+    }
+    if vector_store not in backend_factories:
+        print(f"Unknown vector store type: {vector_store}")
+        return
+    if blue_green and source_ids:
+        raise ValueError("A blue/green rebuild always syncs every data source; --source cannot be combined with it")
     
-    if "dataSources" in kb_config:
-        for ds in kb_config["dataSources"]:
-            if ds["type"] == "s3":
-                docs = collect_documents_from_s3(ds["bucket"], ds.get("path", ""))
-                all_documents.extend(docs)
-            elif ds["type"] == "database":
-                docs = collect_documents_from_database(
-                    ds.get("connectionString", ""),
-                    ds.get("query", "")
-                )
-                all_documents.extend(docs)
+    # blue/green: <index_name>-v<버전> 인덱스를 새로 채운 뒤 <index_name> alias 를 전환한다
+    version = new_version() if blue_green else None
+    target_index = version_name(index_name, version) if blue_green else index_name
+    backend = backend_factories[vector_store](target_index)
+    index_manager = create_index_manager(vector_store) if blue_green and backend is not None else None
+    # 검색 도구의 결과 캐시 무효화 기준 (로컬 번들 manifest 와 벡터 스토어 인덱스에 같은 값을 기록)
+    kb_version = uuid.uuid4().hex
     
-    if not all_documents:
-        print("No documents found to sync")
+    agent_dir = os.path.dirname(os.path.abspath(agent_def_file))
+    embedding_config = load_embedding_config(agent_dir)
+    dimensions = embedding_config.get("embedding", {}).get("dimensions", 1536)
+    chunk_size = embedding_config.get("embedding", {}).get("chunkSize", 1000)
+    chunk_overlap = embedding_config.get("embedding", {}).get("chunkOverlap", 200)
+    indexing_config = embedding_config.get("indexing", {})
+    batch_size = indexing_config.get("batchSize", 100)
+    storage = vector_storage or embedding_config.get("embedding", {}).get("storage", "float32")
+    model = kb_config.get("embeddingModel", "text-embedding-ada-002")
+    blue_green_config = embedding_config.get("blueGreen", {})
+    
+    import_kb_index(agent_dir)
+    cache = None
+    if embedding_cache_dir:
+        cache = kb_index.EmbeddingCache(embedding_cache_dir, model, dimensions)
+    
+    env_state_dir = os.path.join(state_dir, index_name)
+    # 선택한 소스만, 같은 소스의 다른 동기화가 실행 중이 아닐 때만 실행한다
+    data_sources = select_data_sources(load_data_sources(agent_dir, kb_config), source_ids)
+    selected = len(data_sources)
+    locks, data_sources = acquire_source_locks(env_state_dir, data_sources)
+    if blue_green and len(data_sources) < selected:
+        for lock in locks:
+            lock.release()
+        print("⚠ Blue/green rebuild needs every data source; try again when the running syncs finish")
+        return
+    if not data_sources:
+        print("No data sources to sync")
         return
     
-    # 임베딩 생성
-    embeddings = generate_embeddings(
-        all_documents,
-        kb_config.get("embeddingModel", "text-embedding-ada-002")
-    )
+    try:
+        dedup_config = embedding_config.get("deduplication", {})
+        dedup = None
+        if dedup_config.get("enabled", False):
+            dedup = DedupFilter(
+                shared_signature_index(os.path.join(env_state_dir, "dedup-signatures.npz"),
+                                       dedup_config.get("threshold", 0.9)),
+                mode=dedup_config.get("mode", "skip"),
+            )
+        
+        # 소스별 매니페스트: 변경되지 않은 항목은 다시 수집/임베딩/색인하지 않는다
+        manifests = {
+            ds["id"]: SourceManifest(os.path.join(env_state_dir, "manifests", f"{ds['id']}.json"))
+            for ds in data_sources
+        }
+        unchanged: Set[str] = set()
+        # 삭제 전파: 소스별로 사라진 문서 ID, 이번에 색인한 문서별 청크 수
+        removed: Dict[str, List[str]] = {}
+        chunk_counts: Dict[str, Dict[str, int]] = {}
+        
+        extraction_config = embedding_config.get("extraction", {})
+        spool_threshold = int(extraction_config.get("mmapThresholdMb", 8) * 1024 * 1024)
+        deleter = None
+        
+        writer = None
+        bundle_path = os.path.join(local_index_dir, index_name) if local_index_dir else None
+        local_versions = LocalBundleVersions(local_index_dir, index_name) if local_index_dir and blue_green else None
+        previous_bundle = load_previous_bundle(bundle_path, dimensions, storage) if bundle_path else None
+        for manifest in manifests.values():
+            # 새 인덱스/번들은 비어 있는 상태에서 시작하므로 전체를 다시 수집한다. 매니페스트가 기록된 뒤
+            # 번들이 지워지고 다른 소스의 동기화가 새로 만들었다면 번들 ID 가 달라지므로 이 소스도 다시 수집한다
+            if blue_green or (bundle_path and (previous_bundle is None or
+                                               manifest.state.get("bundle_id") != previous_bundle.bundle_id)):
+                manifest.entries.clear()
+                manifest.state.clear()
+        if bundle_path:
+            writer = kb_index.IndexBundleWriter(local_versions.path(version) if local_versions else bundle_path,
+                                                dimensions, storage, model, ann=embedding_config.get("ann"),
+                                                lexical=embedding_config.get("lexical"), version=kb_version)
+        
+        print(f"Syncing Knowledge Base for environment: {environment}")
+        if blue_green:
+            print(f"Blue/green rebuild: building {target_index}, then switching alias {index_name}")
+        print(f"Updating {vector_store} index: {target_index} (batch size: {batch_size}, queue size: {queue_size})...")
+        
+        if backend is None:
+            print(f"⚠ {vector_store} endpoint is not configured; documents will not be uploaded (dry run)")
+            upserter = None
+        else:
+            upserter = create_bulk_upserter(backend, indexing_config)
+        
+        def chunk_stage(doc: Dict[str, Any]) -> List[Dict[str, Any]]:
+            chunks = list(chunk_document(doc, chunk_size, chunk_overlap))
+            source_id = doc.get("metadata", {}).get("source_id", "")
+            chunk_counts.setdefault(source_id, {})[doc["id"]] = len(chunks)
+            return chunks
+        
+        def index_batch(batch: List[Dict[str, Any]]):
+            if writer is not None:
+                write_local_index(writer, batch)
+            if upserter is not None:
+                upserter.add_many(batch)
+        
+        try:
+            if index_manager is not None:
+                index_manager.create_index(target_index, index_name, dimensions)
+            elif backend is not None:
+                ensure_live_index(vector_store, target_index, dimensions)
+            # 추출 워커 프로세스와 큰 객체를 내려받는 임시 디렉터리는 파이프라인이 끝나거나 실패하면 정리한다
+            extraction = ExtractionPool(
+                max_workers=extraction_config.get("workers", os.cpu_count() or 1),
+                timeout=extraction_config.get("timeoutSeconds", 60),
+                memory_limit_mb=extraction_config.get("memoryLimitMb", 1024),
+            )
+            with contextlib.closing(extraction), tempfile.TemporaryDirectory(prefix="kb-sync-") as spool_dir:
+                stats = run_pipeline(
+                    iter_documents(data_sources, manifests, unchanged, spool_dir, spool_threshold, removed),
+                    [
+                        Stage("extract", extraction, workers=extraction.max_workers, size_of=item_nbytes),
+                        Stage("chunk", chunk_stage, size_of=item_nbytes),
+                        Stage("dedup", dedup if dedup is not None else lambda chunk: [chunk], size_of=item_nbytes),
+                        Stage("embed", lambda batch: generate_embeddings(batch, model, cache, dimensions, storage),
+                              batch_size=batch_size, size_of=item_nbytes),
+                        Stage("index", index_batch, batch_size=batch_size, size_of=item_nbytes),
+                    ],
+                    queue_size=queue_size,
+                    source_size_of=item_nbytes,
+                )
+            stage_stats = {stage.name: stage for stage in stats}
+            stage_stats["extract"].errors = len(extraction.failed)
+            
+            stale_chunks = plan_deletions(manifests, removed, chunk_counts)
+            if dedup is not None:
+                reindex_dedup_followups(dedup, stale_chunks, writer, upserter, batch_size,
+                                        lambda batch: generate_embeddings(batch, model, cache, dimensions, storage))
+            if upserter is not None:
+                try:
+                    upserter.close()
+                finally:
+                    stage_stats["index"].retries = upserter.stats.retries
+                    stage_stats["index"].errors = upserter.stats.failed
+                print(f"  bulk upsert: {upserter.stats.summary()}")
+            
+            # 소스에서 사라진 문서 / 줄어든 청크를 벡터 스토어에서 삭제 (로컬 번들에는 복사되지 않는다)
+            if stale_chunks and backend is not None:
+                deleter = create_bulk_deleter(backend, indexing_config)
+                deleter.delete_many(stale_chunks)
+                deleter.close()
+                print(f"  bulk delete: {deleter.stats.summary()}")
+            if backend is not None and (stats[0].items_out or stale_chunks):
+                publish_index_version(vector_store, target_index, kb_version)
+        except BaseException:
+            if writer is not None:
+                writer.abort()
+            if index_manager is not None:
+                discard_index(index_manager, target_index)
+            raise
+        
+        # 추출에 실패한 파일은 다음 동기화에서 다시 시도하도록 매니페스트에서 빼고, 벡터 스토어에 남아 있는
+        # 이전 청크와 같도록 로컬 번들에도 이전 청크를 그대로 복사한다
+        for source_id, key in extraction.failed:
+            if source_id in manifests:
+                manifests[source_id].entries.pop(key, None)
+        unchanged.update(extraction.failed_ids)
+        
+        # 같은 환경의 다른 소스 동기화와 로컬 번들 / 상태 기록이 겹치지 않도록 환경 단위로 직렬화한다
+        with environment_lock(env_state_dir):
+            if blue_green:
+                writer_path = writer.close() if writer is not None else None
+                warmup_queries = load_warmup_queries(agent_dir, blue_green_config.get("warmupQueries", 20),
+                                                     model, dimensions)
+                promote_blue_green(index_manager, local_versions, index_name, target_index, version,
+                                   writer_path, warmup_queries, blue_green_config.get("keepVersions", 2))
+            elif writer is not None:
+                try:
+                    carried = carry_over_local_index(writer, dimensions, storage,
+                                                     {ds["id"] for ds in data_sources}, unchanged)
+                except BaseException:
+                    writer.abort()
+                    raise
+                writer.close()
+                print(f"  local index: {writer.count} vectors ({storage}, {carried} carried over) -> {writer.path}")
+            for manifest in manifests.values():
+                if writer is not None:
+                    manifest.state["bundle_id"] = writer.bundle_id
+                manifest.save()
+            if dedup is not None:
+                dedup.commit()
+                dedup.index.save()
+        if dedup is not None:
+            print(f"  dedup: {dedup.duplicates} near-duplicate chunks {'merged' if dedup.mode == 'merge' else 'skipped'}"
+                  f"{f', {dedup.readmitted} re-admitted' if dedup.readmitted else ''}")
+        
+        if extraction.failed:
+            print(f"  extract: {extraction.extracted} files extracted, {len(extraction.failed)} skipped")
+        if stale_chunks:
+            print(f"  removed: {sum(len(ids) for ids in removed.values())} documents, {len(stale_chunks)} stale chunks")
+        
+        if metrics_output:
+            append_metrics(metrics_output, {
+                "started_at": run_started_at,
+                "duration_seconds": round(time.monotonic() - run_started, 3),
+                "environment": environment,
+                "index": target_index,
+                "vector_store": vector_store,
+                "sources": [ds["id"] for ds in data_sources],
+                "blue_green": blue_green,
+                "queue_size": queue_size,
+                "batch_size": batch_size,
+                "stages": [stage.to_dict() for stage in stats],
+                "bulk_upsert": upserter.stats.to_dict() if upserter is not None else None,
+                "bulk_delete": deleter.stats.to_dict() if deleter is not None else None,
+                "embedding_cache": {"hits": cache.hits, "misses": cache.misses} if cache is not None else None,
+                "dedup": {"duplicates": dedup.duplicates} if dedup is not None else None,
+                "extraction": {"extracted": extraction.extracted, "failed": len(extraction.failed)},
+                "removed": {"documents": sum(len(ids) for ids in removed.values()), "chunks": len(stale_chunks)},
+            })
+        
+        if stats[0].items_out == 0:
+            print("No new or changed documents to sync")
+            return
+        
+        for stage in stats:
+            print(f"  {stage.summary()}")
+        if cache is not None:
+            print(f"  embedding cache: {cache.hits} hits / {cache.misses} misses ({cache.path})")
+        
+        print(f"✓ Knowledge Base sync completed successfully")
+    finally:
+        for lock in locks:
+            lock.release()
+
+
+def load_kb_config(agent_def_file: str):
+    """agent-definition.yaml 의 (에이전트 이름, knowledgeBase 설정)"""
+    with open(agent_def_file, 'r', encoding='utf-8') as f:
+        agent_def = yaml.safe_load(f)
+    return agent_def["metadata"]["name"], agent_def.get("spec", {}).get("knowledgeBase", {})
+
+
+def reset_environment_state(env_state_dir: str):
+    """
+    환경의 소스 매니페스트와 중복 서명을 삭제
+
+    스냅샷으로 인덱스를 통째로 교체하면 이전 상태가 새 인덱스 내용과 맞지 않으므로,
+    다음 동기화는 전체를 다시 수집한다 (임베딩은 환경 간 공유 캐시에서 재사용된다).
+    """
+    shutil.rmtree(os.path.join(env_state_dir, "manifests"), ignore_errors=True)
+    signatures = os.path.join(env_state_dir, "dedup-signatures.npz")
+    if os.path.exists(signatures):
+        os.remove(signatures)
+    with _state_lock:
+        _signature_indexes.pop(os.path.abspath(signatures), None)
+
+
+def export_knowledge_base_snapshot(agent_def_file: str, environment: str, output: str,
+                                   local_index_dir: str = DEFAULT_LOCAL_INDEX_DIR) -> Dict[str, Any]:
+    """
+    환경의 로컬 인덱스 번들을 승격용 스냅샷 파일로 내보내기
+
+    청크 내용/메타데이터와 임베딩 행렬, manifest, 체크섬을 하나의 tar 파일에 담는다.
+    """
+    agent_name, kb_config = load_kb_config(agent_def_file)
+    index_name = f"{agent_name}-kb-{environment}"
+    bundle_path = os.path.join(local_index_dir, index_name) if local_index_dir else ""
+    if not bundle_path or not os.path.exists(os.path.join(bundle_path, "manifest.json")):
+        raise ValueError(f"No local index bundle for {environment} at {bundle_path or '(disabled)'}; "
+                         f"run a sync with --local-index-dir first")
     
-    # 벡터 스토어 업데이트
-    vector_store = kb_config.get("vectorStore", "opensearch")
-    index_name = f"{agent_def['metadata']['name']}-kb-{environment}"
+    snapshot = export_snapshot(bundle_path, output, agent=agent_name, environment=environment,
+                               index_name=index_name, vector_store=kb_config.get("vectorStore", "opensearch"))
+    size = sum(f["bytes"] for f in snapshot["files"].values())
+    print(f"✓ Exported {snapshot['bundle']['count']} vectors ({snapshot['bundle']['storage']}, "
+          f"{size / 1024 / 1024:.1f} MiB) from {environment} to {output}")
+    return snapshot
+
+
+def import_knowledge_base_snapshot(agent_def_file: str, environment: str, snapshot_file: str,
+                                   local_index_dir: str = DEFAULT_LOCAL_INDEX_DIR,
+                                   state_dir: str = DEFAULT_STATE_DIR,
+                                   blue_green: bool = False):
+    """
+    다른 환경에서 내보낸 스냅샷을 이 환경의 인덱스에 bulk 로드 (수집/임베딩 없이 승격)
+
+    체크섬을 확인한 뒤 로컬 번들을 스냅샷 내용으로 교체하고, 벡터 스토어에는 bulk upsert 로 올린다.
+    bulk upsert 는 기존 문서를 덮어쓸 뿐 지우지는 않으므로, 스냅샷에 없는 문서까지 정확히 맞추려면
+    blue_green 으로 새 버전 인덱스에 로드한 뒤 alias 를 전환한다.
+    """
+    agent_name, kb_config = load_kb_config(agent_def_file)
+    if not kb_config.get("enabled", False):
+        print("Knowledge Base is not enabled for this agent")
+        return
     
-    if vector_store == "opensearch":
-        update_opensearch_index(embeddings, environment, index_name)
-    elif vector_store == "azure_search":
-        update_azure_search_index(embeddings, environment, index_name)
-    elif vector_store == "vertex_search":
-        update_vertex_search_index(embeddings, environment, index_name)
-    else:
+    vector_store = kb_config.get("vectorStore", "opensearch")
+    index_name = f"{agent_name}-kb-{environment}"
+    backend_factories = {
+        "opensearch": create_opensearch_backend,
+        "azure_search": create_azure_search_backend,
+        "vertex_search": create_vertex_search_backend,
+    }
+    if vector_store not in backend_factories:
         print(f"Unknown vector store type: {vector_store}")
         return
     
-    print(f"✓ Knowledge Base sync completed successfully")
+    agent_dir = os.path.dirname(os.path.abspath(agent_def_file))
+    embedding_config = load_embedding_config(agent_dir)
+    dimensions = embedding_config.get("embedding", {}).get("dimensions", 1536)
+    indexing_config = embedding_config.get("indexing", {})
+    model = kb_config.get("embeddingModel", "text-embedding-ada-002")
+    blue_green_config = embedding_config.get("blueGreen", {})
+    import_kb_index(agent_dir)
+    
+    env_state_dir = os.path.join(state_dir, index_name)
+    # 가져오는 동안 이 환경의 소스 동기화가 번들을 다시 쓰지 않도록 모든 소스 잠금을 잡는다
+    data_sources = load_data_sources(agent_dir, kb_config)
+    locks, runnable = acquire_source_locks(env_state_dir, data_sources)
+    try:
+        if len(runnable) < len(data_sources):
+            print("⚠ Snapshot import needs every data source idle; try again when the running syncs finish")
+            return
+        
+        with tempfile.TemporaryDirectory(prefix="kb-snapshot-") as snapshot_dir:
+            snapshot = read_snapshot(snapshot_file, snapshot_dir)
+            bundle = kb_index.IndexBundle(snapshot_dir)
+            if bundle.dimensions != dimensions or bundle.manifest.get("model") != model:
+                raise SnapshotError(f"Snapshot was built with {bundle.manifest.get('model')} ({bundle.dimensions} dims), "
+                                    f"but {environment} uses {model} ({dimensions} dims)")
+            
+            version = new_version() if blue_green else None
+            target_index = version_name(index_name, version) if blue_green else index_name
+            backend = backend_factories[vector_store](target_index)
+            index_manager = create_index_manager(vector_store) if blue_green and backend is not None else None
+            local_versions = LocalBundleVersions(local_index_dir, index_name) if local_index_dir and blue_green else None
+            kb_version = uuid.uuid4().hex
+            
+            print(f"Importing snapshot of {snapshot.get('environment', 'unknown')} "
+                  f"({bundle.count} vectors, {bundle.storage}) into {environment}")
+            print(f"Updating {vector_store} index: {target_index}...")
+            
+            writer = None
+            if local_index_dir:
+                writer = kb_index.IndexBundleWriter(
+                    local_versions.path(version) if local_versions else os.path.join(local_index_dir, index_name),
+                    dimensions, bundle.storage, model, ann=embedding_config.get("ann"),
+                    lexical=embedding_config.get("lexical"), version=kb_version)
+            if backend is None:
+                print(f"⚠ {vector_store} endpoint is not configured; documents will not be uploaded (dry run)")
+                upserter = None
+            else:
+                upserter = create_bulk_upserter(backend, indexing_config)
+            
+            try:
+                if index_manager is not None:
+                    index_manager.create_index(target_index, index_name, dimensions)
+                elif backend is not None:
+                    ensure_live_index(vector_store, target_index, dimensions)
+                if writer is not None:
+                    writer.carry_over(bundle, lambda record: True)
+                if upserter is not None:
+                    for items in iter_bundle_items(bundle, indexing_config.get("batchSize", 100)):
+                        upserter.add_many(items)
+                    upserter.close()
+                    print(f"  bulk upsert: {upserter.stats.summary()}")
+                    publish_index_version(vector_store, target_index, kb_version)
+            except BaseException:
+                if writer is not None:
+                    writer.abort()
+                if index_manager is not None:
+                    discard_index(index_manager, target_index)
+                raise
+            
+            with environment_lock(env_state_dir):
+                writer_path = writer.close() if writer is not None else None
+                if blue_green:
+                    warmup_queries = load_warmup_queries(agent_dir, blue_green_config.get("warmupQueries", 20),
+                                                         model, dimensions)
+                    promote_blue_green(index_manager, local_versions, index_name, target_index, version,
+                                       writer_path, warmup_queries, blue_green_config.get("keepVersions", 2))
+                elif writer_path is not None:
+                    print(f"  local index: {writer.count} vectors ({bundle.storage}) -> {writer_path}")
+                reset_environment_state(env_state_dir)
+        
+        print(f"✓ Snapshot import completed successfully")
+    finally:
+        for lock in locks:
+            lock.release()
+
+
+def run_daemon(agent_def_file: str, environment: str, source_ids: Optional[List[str]] = None, **sync_options):
+    """
+    스케줄러(데몬) 모드
+
+    data-sources.yaml 의 syncSchedule 에 맞춰 소스마다 독립적으로 sync_knowledge_base 를 실행한다.
+    서로 다른 소스는 동시에 실행되고, 같은 소스의 실행은 겹치지 않는다.
+    """
+    with open(agent_def_file, 'r', encoding='utf-8') as f:
+        agent_def = yaml.safe_load(f)
+    agent_dir = os.path.dirname(os.path.abspath(agent_def_file))
+    kb_config = agent_def.get("spec", {}).get("knowledgeBase", {})
+    data_sources = select_data_sources(load_data_sources(agent_dir, kb_config), source_ids)
+    
+    schedules = {ds["id"]: ds["syncSchedule"] for ds in data_sources if ds.get("syncSchedule")}
+    for ds in data_sources:
+        if not ds.get("syncSchedule"):
+            print(f"⚠ Data source {ds['id']} has no syncSchedule; not scheduled")
+    if not schedules:
+        print("No scheduled data sources")
+        return
+    
+    scheduler = SourceScheduler(
+        schedules,
+        lambda source_id: sync_knowledge_base(agent_def_file, environment, source_ids=[source_id], **sync_options),
+    )
+    for source_id, next_run in scheduler.next_runs().items():
+        print(f"  {source_id}: '{schedules[source_id]}' (next run: {next_run:%Y-%m-%d %H:%M})")
+    print(f"✓ Knowledge Base sync scheduler started for environment: {environment}")
+    scheduler.start()
+    scheduler.wait()
 
 
 def main():
     parser = argparse.ArgumentParser(description="Sync Knowledge Base")
     parser.add_argument("--agent-definition", required=True, help="Agent definition YAML file")
     parser.add_argument("--environment", required=True, choices=["dev", "staging", "production"], help="Environment")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="Max items buffered between pipeline stages")
+    parser.add_argument("--embedding-cache-dir", default=DEFAULT_EMBEDDING_CACHE_DIR,
+                        help="Embedding cache shared across environments (empty string disables)")
+    parser.add_argument("--local-index-dir", default=DEFAULT_LOCAL_INDEX_DIR,
+                        help="Directory for the local search index bundle (empty string disables)")
+    parser.add_argument("--vector-storage", choices=["float32", "float16", "int8"],
+                        help="Vector storage mode (default: embedding.storage in embedding-config.yaml)")
+    parser.add_argument("--state-dir", default=DEFAULT_STATE_DIR,
+                        help="Directory for per-environment sync state (dedup signatures, source manifests, ...)")
+    parser.add_argument("--source", action="append", dest="sources",
+                        help="Sync only this data source ID (repeatable, default: all enabled sources)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Run as a scheduler, syncing each source on its syncSchedule")
+    parser.add_argument("--blue-green", action="store_true",
+                        help="Rebuild into a new versioned index, warm it, then atomically switch the alias")
+    parser.add_argument("--metrics-output", metavar="FILE",
+                        help="Append a JSON line with per-stage throughput, queue wait, retries and errors for each run")
+    parser.add_argument("--export-snapshot", metavar="FILE",
+                        help="Export the environment's local index as a snapshot (.tar or .tar.gz) and exit")
+    parser.add_argument("--import-snapshot", metavar="FILE",
+                        help="Bulk-load a snapshot exported from another environment instead of syncing")
     
     args = parser.parse_args()
     
+    sync_options = dict(
+        queue_size=args.queue_size,
+        embedding_cache_dir=args.embedding_cache_dir,
+        local_index_dir=args.local_index_dir,
+        vector_storage=args.vector_storage,
+        state_dir=args.state_dir,
+        metrics_output=args.metrics_output,
+    )
+    
     try:
-        sync_knowledge_base(args.agent_definition, args.environment)
+        if args.export_snapshot:
+            export_knowledge_base_snapshot(args.agent_definition, args.environment, args.export_snapshot,
+                                           args.local_index_dir)
+        elif args.import_snapshot:
+            import_knowledge_base_snapshot(args.agent_definition, args.environment, args.import_snapshot,
+                                           args.local_index_dir, args.state_dir, blue_green=args.blue_green)
+        elif args.daemon:
+            run_daemon(args.agent_definition, args.environment, args.sources, **sync_options)
+        else:
+            sync_knowledge_base(args.agent_definition, args.environment, source_ids=args.sources,
+                                blue_green=args.blue_green, **sync_options)
     except Exception as e:
         print(f"✗ Knowledge Base sync failed: {e}")
         sys.exit(1)
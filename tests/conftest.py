@@ -0,0 +1,13 @@
+"""
+pytest 공통 설정
+
+scripts/ 와 Agent 도구 구현 디렉터리의 모듈을 테스트에서 import 할 수 있도록 경로를 추가한다.
+"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+for path in (ROOT / "scripts", ROOT / "agents" / "customer-support-agent" / "tools" / "implementations"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
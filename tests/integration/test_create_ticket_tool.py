@@ -0,0 +1,179 @@
+"""
+create-ticket 도구 통합 테스트 (로컬 티켓 API 대역: 연결 재사용, OAuth2 토큰 캐시, 재시도, 타임아웃)
+"""
+import importlib.util
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TOOL = os.path.join(ROOT, "agents", "customer-support-agent", "tools", "implementations", "create-ticket.py")
+TICKET = {"title": "배송 지연 문의", "description": "상품이 도착하지 않았습니다", "priority": "high",
+          "customer_id": "customer-001"}
+
+
+def _load_tool():
+    spec = importlib.util.spec_from_file_location("create_ticket_tool", TOOL)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeTicketApi:
+    """
+    토큰 발급과 티켓 생성 요청을 기록하는 티켓 API (HTTP/1.1 keep-alive)
+
+    statuses 에 넣은 상태 코드를 /tickets 요청에 차례로 돌려준 뒤 201 을 돌려주고,
+    revoked 에 있는 토큰은 401 로 거절한다.
+    """
+
+    def __init__(self):
+        self.tickets = []
+        self.tokens = []
+        self.statuses = []
+        self.revoked = set()
+        self.delay = 0.0
+        store = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode()
+                if self.path == "/oauth/token":
+                    token = f"token-{len(store.tokens) + 1}"
+                    store.tokens.append(body)
+                    self._send(200, {"access_token": token, "expires_in": 3600})
+                    return
+                store.tickets.append({"client": self.client_address[1], "headers": dict(self.headers),
+                                      "payload": json.loads(body)})
+                time.sleep(store.delay)
+                if self.headers.get("Authorization", "").split(" ")[-1] in store.revoked:
+                    self._send(401, {"error": "invalid_token"})
+                elif store.statuses:
+                    self._send(store.statuses.pop(0), {"error": "try again"}, {"Retry-After": "0"})
+                else:
+                    self._send(201, {"id": f"TICKET-{len(store.tickets)}", "status": "open",
+                                     "created_at": "2026-01-01T00:00:00Z"})
+
+            def _send(self, status, payload, headers=None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def api(monkeypatch):
+    with FakeTicketApi() as server:
+        monkeypatch.setenv("TICKET_API_ENDPOINT", f"{server.url}/tickets")
+        monkeypatch.setenv("TICKET_OAUTH_TOKEN_URL", f"{server.url}/oauth/token")
+        monkeypatch.setenv("TICKET_OAUTH_CLIENT_ID", "agent")
+        monkeypatch.setenv("TICKET_OAUTH_CLIENT_SECRET", "secret")
+        monkeypatch.setenv("TICKET_API_BACKOFF", "0.01")
+        monkeypatch.delenv("TICKET_API_AUTH", raising=False)
+        yield server
+
+
+def test_tickets_reuse_one_connection_and_cached_token(api):
+    tool = _load_tool()
+    created = [tool.create_ticket(**TICKET) for _ in range(3)]
+
+    assert [ticket["ticket_id"] for ticket in created] == ["TICKET-1", "TICKET-2", "TICKET-3"]
+    assert created[0] == {"ticket_id": "TICKET-1", "status": "open", "created_at": "2026-01-01T00:00:00Z"}
+    assert api.tickets[0]["payload"] == TICKET
+    assert len(api.tokens) == 1 and "client_id=agent" in api.tokens[0]
+    assert {ticket["headers"]["Authorization"] for ticket in api.tickets} == {"Bearer token-1"}
+    assert len({ticket["client"] for ticket in api.tickets}) == 1
+
+
+def test_rate_limits_and_server_errors_are_retried_with_one_idempotency_key(api):
+    api.statuses = [429, 503]
+    tool = _load_tool()
+
+    assert tool.create_ticket(**TICKET)["ticket_id"] == "TICKET-3"
+    assert len({ticket["headers"]["Idempotency-Key"] for ticket in api.tickets}) == 1
+    assert tool.create_ticket(**TICKET)["ticket_id"] == "TICKET-4"
+    assert api.tickets[3]["headers"]["Idempotency-Key"] != api.tickets[0]["headers"]["Idempotency-Key"]
+
+
+def test_exhausted_retries_fail_the_call(api, monkeypatch):
+    monkeypatch.setenv("TICKET_API_RETRIES", "2")
+    api.statuses = [503, 503, 503, 503]
+    tool = _load_tool()
+
+    with pytest.raises(RuntimeError, match="503"):
+        tool.create_ticket(**TICKET)
+    assert len(api.tickets) == 3
+
+
+def test_rejected_token_is_refreshed_once(api):
+    tool = _load_tool()
+    tool.create_ticket(**TICKET)
+    api.revoked.add("token-1")
+
+    assert tool.create_ticket(**TICKET)["ticket_id"] == "TICKET-3"
+    assert len(api.tokens) == 2 and api.tickets[-1]["headers"]["Authorization"] == "Bearer token-2"
+
+
+def test_read_timeout_bounds_the_call(api, monkeypatch):
+    monkeypatch.setenv("TICKET_API_READ_TIMEOUT", "0.2")
+    monkeypatch.setenv("TICKET_API_RETRIES", "0")
+    api.delay = 1.0
+    tool = _load_tool()
+
+    started = time.perf_counter()
+    with pytest.raises(requests.exceptions.RequestException):
+        tool.create_ticket(**TICKET)
+    assert time.perf_counter() - started < 0.9
+
+
+def test_api_key_authentication(api, monkeypatch):
+    monkeypatch.setenv("TICKET_API_AUTH", "api_key")
+    monkeypatch.setenv("TICKET_API_KEY", "key-123")
+    tool = _load_tool()
+
+    tool.create_ticket(**TICKET)
+    assert api.tokens == [] and api.tickets[0]["headers"]["Authorization"] == "Bearer key-123"
+
+
+def test_oauth2_requires_a_token_url(monkeypatch):
+    monkeypatch.setenv("TICKET_API_ENDPOINT", "http://127.0.0.1:9/tickets")
+    monkeypatch.delenv("TICKET_OAUTH_TOKEN_URL", raising=False)
+    monkeypatch.delenv("TICKET_API_AUTH", raising=False)
+
+    with pytest.raises(ValueError, match="TICKET_OAUTH_TOKEN_URL"):
+        _load_tool().create_ticket(**TICKET)
+
+
+def test_without_endpoint_returns_a_dummy_ticket(monkeypatch):
+    monkeypatch.delenv("TICKET_API_ENDPOINT", raising=False)
+    response = _load_tool().lambda_handler({"parameters": TICKET}, None)
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"])["ticket_id"].startswith("TICKET-")
@@ -0,0 +1,174 @@
+"""
+API 수집기 통합 테스트 (로컬 HTTP 서버를 문서 API / OAuth2 토큰 엔드포인트 대신 사용)
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from kb_sync.collectors.api import ApiCollector, OAuth2TokenProvider
+from kb_sync.manifest import SourceManifest
+
+
+class FakeDocsApi:
+    """페이지별 ETag 를 주는 문서 API + client credentials 토큰 엔드포인트"""
+
+    def __init__(self, pages, total_pages=True, delay=0.0):
+        self.pages = pages
+        self.total_pages = total_pages
+        self.delay = delay
+        self.token_requests = 0
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload=None, headers=()):
+                data = json.dumps(payload).encode() if payload is not None else b""
+                self.send_response(status)
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                with api.lock:
+                    api.token_requests += 1
+                self._send(200, {"access_token": f"token-{api.token_requests}", "expires_in": 3600})
+
+            def do_GET(self):
+                if self.headers.get("Authorization") != f"Bearer token-{api.token_requests}":
+                    return self._send(401, {"error": "invalid_token"})
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if "cursor" in query or url.path == "/cursor":
+                    page = int(query.get("cursor", ["1"])[0])
+                else:
+                    page = int(query["page"][0])
+                with api.lock:
+                    api.requests.append(page)
+                    api.in_flight += 1
+                    api.max_in_flight = max(api.max_in_flight, api.in_flight)
+                time.sleep(api.delay)
+                with api.lock:
+                    api.in_flight -= 1
+                items = api.pages.get(page, [])
+                etag = f'"{hash(json.dumps(items)) & 0xffffffff:x}"'
+                if self.headers.get("If-None-Match") == etag:
+                    return self._send(304)
+                payload = {"items": items}
+                if api.total_pages:
+                    payload["totalPages"] = len(api.pages)
+                if url.path == "/cursor" and page < len(api.pages):
+                    payload["nextCursor"] = str(page + 1)
+                self._send(200, payload, [("Content-Type", "application/json"), ("ETag", etag)])
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.endpoint = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+
+
+@pytest.fixture
+def make_api():
+    apis = []
+
+    def factory(**kwargs):
+        api = FakeDocsApi(**kwargs)
+        apis.append(api)
+        return api
+
+    yield factory
+    for api in apis:
+        api.close()
+
+
+def _pages(n, per_page=3):
+    return {p: [{"id": f"p{p}-{i}", "title": f"문서 {p}-{i}", "content": f"API 문서 내용 {p}-{i}"}
+                for i in range(per_page)] for p in range(1, n + 1)}
+
+
+def _collector(api, manifest, path="/docs", **kwargs):
+    auth = OAuth2TokenProvider(f"{api.endpoint}/token", "client", "secret")
+    return ApiCollector(f"{api.endpoint}{path}", "api-docs", manifest=manifest, auth=auth, **kwargs)
+
+
+def test_pages_are_fetched_concurrently_with_cached_token(make_api):
+    api = make_api(pages=_pages(8), delay=0.05)
+    collector = _collector(api, SourceManifest(), max_concurrency=4)
+    documents = list(collector)
+
+    assert len(documents) == 24
+    assert documents[0]["content"].startswith("문서 1-0\n")
+    assert sorted(api.requests) == list(range(1, 9))
+    assert 1 < api.max_in_flight <= 4
+    assert api.token_requests == 1
+
+
+def test_pages_without_total_stop_at_empty_page(make_api):
+    api = make_api(pages=_pages(5), total_pages=False)
+    documents = list(_collector(api, SourceManifest(), max_concurrency=3))
+
+    assert len(documents) == 15
+    assert set(range(1, 7)) <= set(api.requests)
+
+
+def test_unchanged_pages_are_not_modified(make_api, tmp_path):
+    api = make_api(pages=_pages(3))
+    path = str(tmp_path / "manifest.json")
+    first = SourceManifest(path)
+    assert len(list(_collector(api, first))) == 9
+    first.save()
+
+    api.pages[2] = [{"id": "p2-0", "content": "변경된 내용"}]
+    collector = _collector(api, SourceManifest(path))
+    documents = list(collector)
+
+    assert [d["id"] for d in documents] == ["api-docs/p2-0"]
+    assert collector.stats.not_modified == 2
+    assert sorted(collector.unchanged_ids) == sorted(f"api-docs/p{p}-{i}" for p in (1, 3) for i in range(3))
+
+
+def test_cursor_pagination_and_token_refresh(make_api, tmp_path):
+    api = make_api(pages=_pages(3))
+    manifest = SourceManifest(str(tmp_path / "manifest.json"))
+    collector = _collector(api, manifest, path="/cursor", pagination={"type": "cursor"})
+    assert len(list(collector)) == 9
+
+    # 서버가 토큰을 폐기하면 401 을 받고 새 토큰으로 재시도한다
+    api.token_requests += 1
+    collector = _collector(api, manifest, path="/cursor", pagination={"type": "cursor"})
+    assert list(collector) == []
+    assert collector.stats.not_modified == 3
+    assert api.requests[-3:] == [1, 2, 3]
+
+
+def test_items_missing_from_every_page_are_pruned(make_api, tmp_path):
+    api = make_api(pages=_pages(3))
+    path = str(tmp_path / "manifest.json")
+    first = _collector(api, SourceManifest(path))
+    list(first)
+    assert first.prune() == []
+    first.manifest.save()
+
+    # 마지막 페이지가 없어지고 2 페이지에서 항목 하나가 빠진다
+    del api.pages[3]
+    api.pages[2] = api.pages[2][:2]
+    collector = _collector(api, SourceManifest(path))
+    list(collector)
+
+    assert collector.prune() == ["api-docs/p2-2"] + [f"api-docs/p3-{i}" for i in range(3)]
+    assert sorted(i for e in collector.manifest.entries.values() for i in e["item_ids"]) == \
+        [f"api-docs/p{p}-{i}" for p, n in ((1, 3), (2, 2)) for i in range(n)]
@@ -0,0 +1,219 @@
+"""
+blue/green 재색인 통합 테스트 (로컬 HTTP 서버를 OpenSearch 대신 사용)
+"""
+import importlib.util
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import numpy as np
+import pytest
+
+from kb_index import IndexBundle
+from kb_sync.indices import LocalBundleVersions, OpenSearchIndexManager, new_version, version_name
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+AGENT_DEFINITION = os.path.join(ROOT, "agents", "customer-support-agent", "agent-definition.yaml")
+
+
+class FakeOpenSearch:
+    """인덱스 생성/삭제, alias 조회/전환, _cat/indices, 검색만 흉내 내는 서버"""
+
+    def __init__(self):
+        self.indices = set()
+        self.aliases = {}
+        self.alias_requests = []
+        self.searches = []
+        self.created = {}
+        self.bulk_requests = 0
+        store = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload=None):
+                data = json.dumps(payload if payload is not None else {}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length)) if length else None
+
+            def do_PUT(self):
+                name = urlparse(self.path).path.strip("/")
+                store.created[name] = self._body()
+                store.indices.add(name)
+                self._send(200, {"acknowledged": True})
+
+            def do_DELETE(self):
+                name = urlparse(self.path).path.strip("/")
+                store.indices.discard(name)
+                store.aliases = {a: i for a, i in store.aliases.items() if i != name}
+                self._send(200, {"acknowledged": True})
+
+            def do_GET(self):
+                parts = urlparse(self.path).path.strip("/").split("/")
+                if parts[0] == "_alias":
+                    targets = [i for a, i in store.aliases.items() if a == parts[1]]
+                    if not targets:
+                        return self._send(404, {"error": "alias missing"})
+                    return self._send(200, {i: {"aliases": {parts[1]: {}}} for i in targets})
+                if parts[0] == "_cat":
+                    prefix = parts[2].rstrip("*")
+                    return self._send(200, [{"index": i} for i in sorted(store.indices) if i.startswith(prefix)])
+                name = store.aliases.get(parts[0], parts[0])
+                if name not in store.indices:
+                    return self._send(404, {"error": "index missing"})
+                self._send(200, {name: {}})
+
+            def do_POST(self):
+                parts = urlparse(self.path).path.strip("/").split("/")
+                if parts[-1] == "_bulk":
+                    self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                    store.bulk_requests += 1
+                    return self._send(200, {"errors": False, "items": []})
+                body = self._body()
+                if parts[0] == "_aliases":
+                    store.alias_requests.append(body["actions"])
+                    for action in body["actions"]:
+                        (kind, args), = action.items()
+                        if kind == "remove":
+                            store.aliases.pop(args["alias"], None)
+                        elif kind == "remove_index":
+                            store.indices.discard(args["index"])
+                        else:
+                            store.aliases[args["alias"]] = args["index"]
+                    return self._send(200, {"acknowledged": True})
+                if parts[-1] == "_search":
+                    store.searches.append(parts[0])
+                self._send(200, {"hits": {"hits": []}})
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.endpoint = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+
+
+@pytest.fixture
+def opensearch():
+    server = FakeOpenSearch()
+    yield server
+    server.close()
+
+
+def test_opensearch_alias_swap_replaces_legacy_index_and_collects_old_versions(opensearch):
+    manager = OpenSearchIndexManager(opensearch.endpoint)
+    opensearch.indices.add("kb")  # blue/green 이전에 alias 이름으로 만든 실제 인덱스
+
+    for version in ("20260101000000", "20260102000000", "20260103000000"):
+        name = version_name("kb", version)
+        manager.create_index(name, "kb", dimensions=8)
+        latencies = manager.warm(name, np.ones((3, 8), dtype=np.float32))
+        assert len(latencies) == 3
+        manager.swap_alias("kb", name)
+        assert manager.alias_targets("kb") == [name]
+
+    # 첫 전환은 기존 인덱스 삭제와 alias 추가를 한 요청으로 처리한다
+    assert opensearch.alias_requests[0] == [{"remove_index": {"index": "kb"}},
+                                            {"add": {"index": "kb-v20260101000000", "alias": "kb"}}]
+    assert opensearch.alias_requests[1][0] == {"remove": {"index": "kb-v20260101000000", "alias": "kb"}}
+    assert opensearch.searches.count("kb-v20260103000000") == 3
+
+    assert manager.garbage_collect("kb", keep=2) == ["kb-v20260101000000"]
+    assert opensearch.indices == {"kb-v20260102000000", "kb-v20260103000000"}
+
+
+def test_opensearch_index_maps_metadata_filter_fields(opensearch):
+    OpenSearchIndexManager(opensearch.endpoint).create_index("kb-v20260101000000", "kb", dimensions=8)
+
+    body = opensearch.created["kb-v20260101000000"]
+    properties = body["mappings"]["properties"]
+    assert body["settings"]["index"]["knn"] is True
+    assert properties["embedding"] == {"type": "knn_vector", "dimension": 8}
+    assert {field: properties[field]["type"] for field in ("source_id", "file_type", "language")} == {
+        "source_id": "keyword", "file_type": "keyword", "language": "keyword"}
+    assert properties["last_modified"]["type"] == properties["updated_at"]["type"] == "date"
+    assert "epoch_second" in properties["updated_at"]["format"]
+
+
+def test_incremental_sync_creates_live_index_with_mapping(tmp_path, monkeypatch, opensearch):
+    s3_root = tmp_path / "s3" / "agent-knowledge-base" / "documents"
+    s3_root.mkdir(parents=True)
+    (s3_root / "returns.md").write_text("반품 정책: 30일 이내 반품 가능", encoding="utf-8")
+    monkeypatch.setenv("KB_S3_LOCAL_ROOT", str(tmp_path / "s3"))
+    monkeypatch.setenv("OPENSEARCH_ENDPOINT", opensearch.endpoint)
+    spec = importlib.util.spec_from_file_location("sync_knowledge_base", os.path.join(ROOT, "scripts", "sync-knowledge-base.py"))
+    sync = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(sync)
+
+    options = dict(embedding_cache_dir="", local_index_dir="", state_dir=str(tmp_path / "state"))
+    sync.sync_knowledge_base(AGENT_DEFINITION, "dev", source_ids=["s3-documents"], **options)
+
+    properties = opensearch.created["customer-support-agent-kb-dev"]["mappings"]["properties"]
+    assert properties["embedding"]["type"] == "knn_vector" and properties["source_id"]["type"] == "keyword"
+    assert opensearch.bulk_requests >= 1
+
+    # 이미 있는 인덱스는 다시 만들지 않는다
+    opensearch.created.clear()
+    time.sleep(0.01)
+    (s3_root / "returns.md").write_text("반품 정책: 14일 이내 반품 가능", encoding="utf-8")
+    sync.sync_knowledge_base(AGENT_DEFINITION, "dev", source_ids=["s3-documents"], **options)
+    assert "customer-support-agent-kb-dev" not in opensearch.created
+
+
+def test_local_versions_switch_link_and_keep_recent(tmp_path):
+    versions = LocalBundleVersions(str(tmp_path), "kb")
+    (tmp_path / "kb").mkdir()  # 이전 방식의 일반 디렉터리 번들
+    for version in ("20260101000000", "20260102000000", "20260103000000"):
+        os.makedirs(versions.path(version))
+        versions.activate(version)
+        assert versions.current() == version_name("kb", version)
+
+    assert os.path.islink(tmp_path / "kb")
+    assert versions.garbage_collect(keep=2) == ["kb-v20260101000000"]
+    assert versions.versions() == ["kb-v20260102000000", "kb-v20260103000000"]
+
+
+def test_versions_started_in_the_same_second_are_distinct_and_ordered(tmp_path):
+    versions = [new_version() for _ in range(20)]
+    assert len(set(versions)) == 20
+    assert [version[:17] for version in versions] == sorted(version[:17] for version in versions)
+
+    local = LocalBundleVersions(str(tmp_path), "kb")
+    for version in ("20260101000000", versions[0]):  # 이전 형식 버전과 함께 정리된다
+        os.makedirs(local.path(version))
+    assert local.versions() == [version_name("kb", "20260101000000"), version_name("kb", versions[0])]
+
+
+def test_blue_green_sync_builds_new_local_version(tmp_path, monkeypatch):
+    s3_root = tmp_path / "s3" / "agent-knowledge-base" / "documents"
+    s3_root.mkdir(parents=True)
+    (s3_root / "returns.md").write_text("반품 정책: 30일 이내 반품 가능", encoding="utf-8")
+    monkeypatch.setenv("KB_S3_LOCAL_ROOT", str(tmp_path / "s3"))
+    monkeypatch.delenv("OPENSEARCH_ENDPOINT", raising=False)
+    spec = importlib.util.spec_from_file_location("sync_knowledge_base", os.path.join(ROOT, "scripts", "sync-knowledge-base.py"))
+    sync = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(sync)
+
+    index_dir = tmp_path / "index"
+    options = dict(embedding_cache_dir="", local_index_dir=str(index_dir), state_dir=str(tmp_path / "state"))
+    sync.sync_knowledge_base(AGENT_DEFINITION, "dev", **options)
+    sync.sync_knowledge_base(AGENT_DEFINITION, "dev", blue_green=True, **options)
+
+    alias_path = index_dir / "customer-support-agent-kb-dev"
+    assert os.path.islink(alias_path)
+    ids = {record["id"] for record in IndexBundle(str(alias_path)).iter_chunks()}
+    assert "s3-documents/documents/returns.md#0" in ids
+
+    with pytest.raises(ValueError):
+        sync.sync_knowledge_base(AGENT_DEFINITION, "dev", source_ids=["s3-documents"], blue_green=True, **options)
@@ -0,0 +1,238 @@
+"""
+벡터 스토어 bulk upsert 통합 테스트 (로컬 HTTP 서버를 OpenSearch / Azure Search 대신 사용)
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from kb_sync.bulk import AzureSearchBulkBackend, BulkDeleter, BulkIndexError, BulkUpserter, OpenSearchBulkBackend
+
+
+class FakeVectorStore:
+    """_bulk / docs/index 요청을 받아 저장하고, 지정한 문서를 실패시키는 로컬 서버 (인덱스 생성과 _mapping 의 _meta 도 기록)"""
+
+    def __init__(self, flaky_ids=(), rejected_ids=(), delay=0.0, statuses=None):
+        self.flaky_ids = set(flaky_ids)     # 첫 시도에 429
+        self.rejected_ids = set(rejected_ids)  # 항상 400 (재시도 불가)
+        self.statuses = dict(statuses or {})  # 문서 ID -> 항상 돌려줄 상태 코드
+        self.delay = delay
+        self.documents = {}
+        self.deleted = []
+        self.requests = []
+        self.meta = {}
+        self.indices = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        store = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                with store.lock:
+                    store.in_flight += 1
+                    store.max_in_flight = max(store.max_in_flight, store.in_flight)
+                time.sleep(store.delay)
+                try:
+                    if self.path == "/_bulk":
+                        status, payload = store.handle_bulk(body)
+                    else:
+                        status, payload = store.handle_azure(body)
+                finally:
+                    with store.lock:
+                        store.in_flight -= 1
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_PUT(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                parts = self.path.strip("/").split("/")
+                if len(parts) == 1:
+                    store.indices[parts[0]] = body
+                else:
+                    store.meta[parts[0]] = body.get("_meta", {})
+                self._send(200, b'{"acknowledged": true}')
+
+            def do_GET(self):
+                name = self.path.strip("/")
+                if name in store.indices:
+                    self._send(200, json.dumps({name: store.indices[name]}).encode())
+                else:
+                    self._send(404, b'{"error": "index_not_found_exception"}')
+
+            def _send(self, status, data):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.endpoint = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def _outcome(self, doc_id):
+        with self.lock:
+            if doc_id in self.statuses:
+                return self.statuses[doc_id]
+            if doc_id in self.rejected_ids:
+                return 400
+            if doc_id in self.flaky_ids:
+                self.flaky_ids.discard(doc_id)
+                return 429
+            return 201
+
+    def handle_bulk(self, body):
+        lines = iter(body.decode().splitlines())
+        items = []
+        for line in lines:
+            (op, action), = json.loads(line).items()
+            doc_id = action["_id"]
+            if op == "delete":
+                with self.lock:
+                    found = self.documents.pop(doc_id, None) is not None
+                    self.deleted.append(doc_id)
+                items.append({op: {"_id": doc_id, "status": 200, "result": "deleted"} if found
+                              else {"_id": doc_id, "status": 404, "result": "not_found"}})
+                continue
+            source = next(lines)
+            status = self._outcome(doc_id)
+            if status == 201:
+                self.documents[doc_id] = json.loads(source)
+                items.append({op: {"_id": doc_id, "status": 201}})
+            else:
+                items.append({op: {"_id": doc_id, "status": status, "error": {"type": "rejected"}}})
+        with self.lock:
+            self.requests.append([next(iter(i.values()))["_id"] for i in items])
+        return 200, {"errors": any(next(iter(i.values()))["status"] >= 300 for i in items), "items": items}
+
+    def handle_azure(self, body):
+        results = []
+        for doc in json.loads(body)["value"]:
+            status = self._outcome(doc["chunk_id"])
+            if status == 201:
+                self.documents[doc["chunk_id"]] = doc
+            results.append({"key": doc["id"], "status": status == 201, "statusCode": status,
+                            "errorMessage": None if status == 201 else "rejected"})
+        with self.lock:
+            self.requests.append([d["chunk_id"] for d in json.loads(body)["value"]])
+        return 207, {"value": results}
+
+    def close(self):
+        self.server.shutdown()
+
+
+@pytest.fixture
+def make_store():
+    stores = []
+
+    def factory(**kwargs):
+        store = FakeVectorStore(**kwargs)
+        stores.append(store)
+        return store
+
+    yield factory
+    for store in stores:
+        store.close()
+
+
+def _items(n):
+    return [{"id": f"doc{i}#0", "embedding": [0.1, 0.2], "metadata": {"content": f"문서 {i}"}} for i in range(n)]
+
+
+def test_opensearch_bulk_retries_only_failed_items(make_store):
+    """429 로 실패한 항목만 다시 전송되는지 확인"""
+    store = make_store(flaky_ids={"doc3#0", "doc7#0"})
+    upserter = BulkUpserter(OpenSearchBulkBackend(store.endpoint, "kb-dev"),
+                            max_docs=5, max_in_flight=2, backoff_seconds=0.01)
+
+    upserter.add_many(_items(10))
+    upserter.close()
+
+    assert len(store.documents) == 10
+    assert sorted(r for r in store.requests if len(r) == 1) == [["doc3#0"], ["doc7#0"]]
+    assert upserter.stats.retries == 2
+
+
+def test_bulk_requests_are_sized_by_bytes(make_store):
+    """문서 수 한도보다 바이트 한도가 먼저 차면 요청이 나뉘는지 확인"""
+    store = make_store()
+    backend = OpenSearchBulkBackend(store.endpoint, "kb-dev")
+    item_bytes = len(backend.encode(_items(1)[0]))
+    upserter = BulkUpserter(backend, max_docs=100, max_bytes=item_bytes * 3)
+
+    upserter.add_many(_items(10))
+    upserter.close()
+
+    assert sorted(len(r) for r in store.requests) == [1, 3, 3, 3]
+
+
+def test_bulk_in_flight_requests_are_bounded(make_store):
+    """동시에 진행되는 bulk 요청 수가 max_in_flight 를 넘지 않는지 확인"""
+    store = make_store(delay=0.05)
+    upserter = BulkUpserter(OpenSearchBulkBackend(store.endpoint, "kb-dev"), max_docs=2, max_in_flight=3)
+
+    upserter.add_many(_items(20))
+    upserter.close()
+
+    assert len(store.documents) == 20
+    assert 1 < store.max_in_flight <= 3
+
+
+def test_azure_partial_failure_reports_permanent_errors(make_store):
+    """재시도 불가능한 실패는 재전송하지 않고 BulkIndexError 로 보고되는지 확인"""
+    store = make_store(flaky_ids={"doc1#0"}, rejected_ids={"doc2#0"})
+    upserter = BulkUpserter(AzureSearchBulkBackend(store.endpoint, "kb-dev", "test-key"),
+                            max_docs=10, backoff_seconds=0.01)
+
+    upserter.add_many(_items(4))
+    with pytest.raises(BulkIndexError) as exc_info:
+        upserter.close()
+
+    assert exc_info.value.failures == [("doc2#0", "rejected")]
+    assert set(store.documents) == {"doc0#0", "doc1#0", "doc3#0"}
+    assert store.requests[1] == ["doc1#0"]
+
+
+def test_conflict_and_validation_errors_are_not_retried(make_store):
+    """409 / 422 항목은 다시 보내지 않고 바로 실패로 보고되는지 확인"""
+    store = make_store(flaky_ids={"doc0#0"}, statuses={"doc1#0": 409, "doc2#0": 422})
+    upserter = BulkUpserter(OpenSearchBulkBackend(store.endpoint, "kb-dev"), max_docs=10, backoff_seconds=0.01)
+
+    upserter.add_many(_items(4))
+    with pytest.raises(BulkIndexError) as exc_info:
+        upserter.close()
+
+    assert sorted(exc_info.value.failures) == [("doc1#0", "rejected"), ("doc2#0", "rejected")]
+    assert store.requests[1:] == [["doc0#0"]]
+    assert upserter.stats.retries == 1 and upserter.stats.failed == 2
+
+
+def test_bulk_delete_is_rate_limited(make_store):
+    """삭제는 초당 max_per_second 개를 넘지 않고, 이미 없는 문서의 삭제는 성공으로 처리되는지 확인"""
+    store = make_store()
+    backend = OpenSearchBulkBackend(store.endpoint, "kb-dev")
+    upserter = BulkUpserter(backend, max_docs=10)
+    upserter.add_many(_items(10))
+    upserter.close()
+
+    deleter = BulkDeleter(backend, max_per_second=200, max_docs=5, max_in_flight=4)
+    start = time.perf_counter()
+    deleter.delete_many([f"doc{i}#0" for i in range(20)])
+    deleter.close()
+
+    # 5개씩 4번: 마지막 요청은 첫 요청보다 15/200 초 뒤에 시작한다
+    assert time.perf_counter() - start >= 0.07
+    assert store.documents == {}
+    assert sorted(store.deleted) == sorted(f"doc{i}#0" for i in range(20))
+    assert deleter.stats.documents == 20 and deleter.stats.failed == 0
@@ -0,0 +1,127 @@
+"""
+데이터베이스 수집기 통합 테스트 (로컬 SQLite)
+"""
+import sqlite3
+
+from kb_sync.collectors.database import DatabaseCollector
+from kb_sync.manifest import SourceManifest
+
+QUERY = "SELECT id, question, answer, updated_at FROM faq WHERE active = 1"
+
+
+def _create_faq(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE faq (id INTEGER PRIMARY KEY, question TEXT, answer TEXT, active INTEGER, updated_at TEXT)")
+    conn.executemany("INSERT INTO faq VALUES (?, ?, ?, 1, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def _collector(db_path, manifest_path, batch_size=2):
+    return DatabaseCollector(f"sqlite:///{db_path}", "database-faq", QUERY,
+                             manifest=SourceManifest(str(manifest_path)), batch_size=batch_size)
+
+
+def test_rows_are_streamed_in_batches(tmp_path):
+    db_path = tmp_path / "faq.db"
+    _create_faq(db_path, [(i, f"질문 {i}", f"답변 {i}", f"2024-01-0{i}T00:00:00") for i in range(1, 6)])
+
+    collector = _collector(db_path, tmp_path / "manifest.json")
+    documents = iter(collector)
+    first = next(documents)
+
+    # 첫 문서는 첫 배치만 읽은 상태에서 나온다
+    assert collector.stats.batches == 1
+    assert first == {
+        "id": "database-faq/1",
+        "content": "질문 1\n답변 1",
+        "source": "database:database-faq/1",
+        "metadata": {"source_id": "database-faq", "updated_at": "2024-01-01T00:00:00"},
+    }
+    assert len(list(documents)) == 4
+    assert collector.stats.batches == 3
+    assert collector.manifest.state["watermark"] == "2024-01-05T00:00:00"
+
+
+def test_incremental_sync_reads_only_rows_after_watermark(tmp_path):
+    db_path = tmp_path / "faq.db"
+    manifest_path = tmp_path / "manifest.json"
+    _create_faq(db_path, [(1, "배송", "3-5일", "2024-01-01T00:00:00"), (2, "반품", "30일", "2024-01-02T00:00:00")])
+
+    collector = _collector(db_path, manifest_path)
+    assert len(list(collector)) == 2
+    collector.manifest.save()
+
+    conn = sqlite3.connect(db_path)
+    # 워터마크와 같은 시각에 늦게 커밋된 행과 이후에 변경된 행
+    conn.execute("INSERT INTO faq VALUES (3, '결제', '카드', 1, '2024-01-02T00:00:00')")
+    conn.execute("UPDATE faq SET answer = '2-3일', updated_at = '2024-01-03T00:00:00' WHERE id = 1")
+    conn.commit()
+    conn.close()
+
+    collector = _collector(db_path, manifest_path)
+    assert collector.build_query(sqlite3)[1] == ("2024-01-02T00:00:00",)
+    documents = list(collector)
+
+    assert [d["id"] for d in documents] == ["database-faq/3", "database-faq/1"]
+    assert documents[1]["content"] == "배송\n2-3일"
+    assert collector.stats.unchanged == 1
+    assert collector.manifest.state["watermark"] == "2024-01-03T00:00:00"
+
+
+def test_deactivated_and_deleted_rows_are_pruned(tmp_path):
+    db_path = tmp_path / "faq.db"
+    manifest_path = tmp_path / "manifest.json"
+    _create_faq(db_path, [(i, f"질문 {i}", f"답변 {i}", "2024-01-01T00:00:00") for i in range(1, 5)])
+    collector = _collector(db_path, manifest_path)
+    list(collector)
+    assert collector.prune() == []
+    collector.manifest.save()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE faq SET active = 0 WHERE id = 2")
+    conn.execute("DELETE FROM faq WHERE id = 4")
+    conn.commit()
+    conn.close()
+
+    # 증분 조회로는 변경된 행이 없지만 ID 조회로 빠진 행을 찾는다
+    collector = _collector(db_path, manifest_path)
+    assert list(collector) == []
+    assert sorted(collector.prune()) == ["database-faq/2", "database-faq/4"]
+    assert sorted(collector.manifest.entries) == ["1", "3"]
+
+
+
+def test_numeric_watermark_is_compared_as_a_number(tmp_path):
+    """버전 컬럼이 정수이면 "9" 다음의 "10" 도 워터마크를 넘는 것으로 본다"""
+    db_path = tmp_path / "faq.db"
+    manifest_path = tmp_path / "manifest.json"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE faq (id INTEGER PRIMARY KEY, question TEXT, answer TEXT, active INTEGER, version INTEGER)")
+    conn.executemany("INSERT INTO faq VALUES (?, ?, ?, 1, ?)", [(1, "배송", "3-5일", 8), (2, "반품", "30일", 9)])
+    conn.commit()
+
+    def collector():
+        return DatabaseCollector(f"sqlite:///{db_path}", "database-faq",
+                                 "SELECT id, question, answer, version FROM faq WHERE active = 1",
+                                 manifest=SourceManifest(str(manifest_path)), incremental_column="version")
+
+    first = collector()
+    assert len(list(first)) == 2
+    first.manifest.save()
+    assert first.manifest.state == {"watermark": "9", "watermark_type": "int"}
+
+    conn.execute("INSERT INTO faq VALUES (3, '결제', '카드', 1, 10)")
+    conn.execute("UPDATE faq SET answer = '2-3일', version = 11 WHERE id = 1")
+    conn.commit()
+    conn.close()
+
+    second = collector()
+    assert second.build_query(sqlite3)[1] == (9,)
+    assert [d["id"] for d in second] == ["database-faq/3", "database-faq/1"]
+    second.manifest.save()
+    assert second.manifest.state["watermark"] == "11"
+
+    third = collector()
+    assert third.build_query(sqlite3)[1] == (11,)
+    assert list(third) == [] and third.stats.unchanged == 1
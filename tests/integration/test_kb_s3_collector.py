@@ -0,0 +1,150 @@
+"""
+S3 수집기 통합 테스트 (로컬 디렉터리를 S3 대신 사용)
+"""
+import importlib.util
+import os
+import threading
+import time
+
+from kb_index import IndexBundle
+from kb_sync.collectors.extract import extract_document
+from kb_sync.collectors.s3 import LocalS3Client, S3Collector
+from kb_sync.manifest import SourceManifest
+from tests.integration.test_kb_bulk_upsert import FakeVectorStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+AGENT_DEFINITION = os.path.join(ROOT, "agents", "customer-support-agent", "agent-definition.yaml")
+
+
+def _put(root, key, content):
+    path = root / "agent-knowledge-base" / key
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+
+
+def _load_sync_script():
+    spec = importlib.util.spec_from_file_location("sync_knowledge_base", os.path.join(ROOT, "scripts", "sync-knowledge-base.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_collector_paginates_filters_and_skips_unchanged(tmp_path):
+    for i in range(7):
+        _put(tmp_path, f"documents/guide-{i}.md", f"# 안내 {i}\n배송 정책 {i}")
+    _put(tmp_path, "documents/logo.png", "not a document")
+    _put(tmp_path, "other/outside.txt", "prefix 밖의 문서")
+
+    manifest = SourceManifest(str(tmp_path / "manifest.json"))
+    collector = S3Collector(LocalS3Client(str(tmp_path)), "s3-documents", "agent-knowledge-base", "documents/",
+                            file_types=["pdf", "txt", "md"], manifest=manifest, max_workers=3, page_size=2)
+    documents = sorted((extract_document(d) for d in collector), key=lambda d: d["id"])
+
+    assert [d["id"] for d in documents] == [f"s3-documents/documents/guide-{i}.md" for i in range(7)]
+    assert documents[0]["source"] == "s3://agent-knowledge-base/documents/guide-0.md"
+    assert documents[0]["metadata"]["file_type"] == "md"
+    assert collector.stats.listed == 8
+    assert collector.stats.filtered == 1
+    manifest.save()
+
+    # 한 객체만 변경하면 그 객체만 다시 다운로드된다
+    time.sleep(0.01)
+    _put(tmp_path, "documents/guide-3.md", "# 안내 3\n변경된 배송 정책")
+    collector = S3Collector(LocalS3Client(str(tmp_path)), "s3-documents", "agent-knowledge-base", "documents/",
+                            file_types=["md"], manifest=SourceManifest(str(tmp_path / "manifest.json")), page_size=2)
+    documents = [extract_document(d) for d in collector]
+
+    assert [d["content"] for d in documents] == ["# 안내 3\n변경된 배송 정책"]
+    assert collector.stats.unchanged == 6
+    assert len(collector.unchanged_keys) == 6
+
+
+def test_collector_downloads_concurrently(tmp_path):
+    """객체당 지연이 있어도 max_workers 개가 동시에 다운로드되는지 확인"""
+    for i in range(16):
+        _put(tmp_path, f"documents/doc-{i}.txt", f"문서 {i}")
+
+    class SlowClient(LocalS3Client):
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def get_object(self, Bucket, Key):
+            with self.lock:
+                SlowClient.active += 1
+                SlowClient.peak = max(SlowClient.peak, SlowClient.active)
+            time.sleep(0.05)
+            with self.lock:
+                SlowClient.active -= 1
+            return super().get_object(Bucket, Key)
+
+    collector = S3Collector(SlowClient(str(tmp_path)), "s3", "agent-knowledge-base", "documents/", max_workers=8)
+    start = time.perf_counter()
+    assert len(list(collector)) == 16
+    assert time.perf_counter() - start < 16 * 0.05 / 2
+    assert SlowClient.peak > 1
+
+
+def test_incremental_sync_keeps_unchanged_documents_in_local_index(tmp_path, monkeypatch):
+    s3_root = tmp_path / "s3"
+    _put(s3_root, "documents/returns.md", "반품 정책: 30일 이내 반품 가능")
+    _put(s3_root, "documents/shipping.txt", "배송 정책: 3-5일 소요")
+    monkeypatch.setenv("KB_S3_LOCAL_ROOT", str(s3_root))
+    monkeypatch.delenv("OPENSEARCH_ENDPOINT", raising=False)
+    sync = _load_sync_script()
+
+    def run():
+        sync.sync_knowledge_base(AGENT_DEFINITION, "dev", embedding_cache_dir="",
+                                 local_index_dir=str(tmp_path / "index"), state_dir=str(tmp_path / "state"))
+        bundle = IndexBundle(str(tmp_path / "index" / "customer-support-agent-kb-dev"))
+        return {record["id"]: record for record in bundle.iter_chunks()}
+
+    first = run()
+    assert "s3-documents/documents/returns.md#0" in first
+    assert "s3-documents/documents/shipping.txt#0" in first
+
+    time.sleep(0.01)
+    _put(s3_root, "documents/shipping.txt", "배송 정책: 2-3일 소요")
+    second = run()
+
+    assert second.keys() == first.keys()
+    assert second["s3-documents/documents/shipping.txt#0"]["content"] == "배송 정책: 2-3일 소요"
+    assert second["s3-documents/documents/returns.md#0"] == first["s3-documents/documents/returns.md#0"]
+
+
+def test_removed_objects_and_shrunk_documents_are_deleted_from_vector_store(tmp_path, monkeypatch):
+    s3_root = tmp_path / "s3"
+    long_text = " ".join(f"배송 안내 문장 {i}번." for i in range(250))
+    _put(s3_root, "documents/returns.md", "반품 정책: 30일 이내 반품 가능")
+    _put(s3_root, "documents/shipping.txt", long_text)
+    store = FakeVectorStore()
+    monkeypatch.setenv("KB_S3_LOCAL_ROOT", str(s3_root))
+    monkeypatch.setenv("OPENSEARCH_ENDPOINT", store.endpoint)
+    sync = _load_sync_script()
+
+    def run():
+        sync.sync_knowledge_base(AGENT_DEFINITION, "dev", embedding_cache_dir="",
+                                 local_index_dir=str(tmp_path / "index"), state_dir=str(tmp_path / "state"))
+
+    try:
+        run()
+        first_version = store.meta["customer-support-agent-kb-dev"]["kb_version"]
+        shipping_chunks = sorted(k for k in store.documents if k.startswith("s3-documents/documents/shipping.txt#"))
+        assert len(shipping_chunks) > 2
+        assert "s3-documents/documents/returns.md#0" in store.documents
+
+        # 객체 하나를 지우고, 다른 하나는 청크 하나 분량으로 줄인다
+        time.sleep(0.01)
+        (s3_root / "agent-knowledge-base" / "documents" / "returns.md").unlink()
+        _put(s3_root, "documents/shipping.txt", "배송 정책: 2-3일 소요")
+        run()
+    finally:
+        store.close()
+
+    assert set(store.documents) == {"s3-documents/documents/shipping.txt#0"}
+    assert sorted(store.deleted) == sorted(["s3-documents/documents/returns.md#0"] + shipping_chunks[1:])
+    bundle = IndexBundle(str(tmp_path / "index" / "customer-support-agent-kb-dev"))
+    assert [record["id"] for record in bundle.iter_chunks()] == ["s3-documents/documents/shipping.txt#0"]
+    # 인덱스 _meta 와 로컬 번들에 같은 새 게시 버전이 기록된다 (검색 결과 캐시 무효화)
+    assert store.meta["customer-support-agent-kb-dev"]["kb_version"] == bundle.version != first_version
+
@@ -0,0 +1,51 @@
+"""
+KB 검색 벤치마크 스크립트 통합 테스트 (작은 합성 코퍼스)
+"""
+import importlib.util
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _load_benchmark():
+    spec = importlib.util.spec_from_file_location("benchmark_kb_search",
+                                                  os.path.join(ROOT, "scripts", "benchmark-kb-search.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _run(benchmark, monkeypatch, *args):
+    monkeypatch.setattr(sys, "argv", ["benchmark-kb-search.py",
+                                      "--agent-dir", os.path.join(ROOT, "agents", "customer-support-agent"),
+                                      "--chunks", "2000", "--dimensions", "32", "--queries", "40", *args])
+    benchmark.main()
+
+
+def test_benchmark_reports_every_mode_in_comparable_json(tmp_path, monkeypatch, capsys):
+    benchmark = _load_benchmark()
+    first, second = tmp_path / "first.json", tmp_path / "second.json"
+
+    _run(benchmark, monkeypatch, "--output", str(first))
+    _run(benchmark, monkeypatch, "--output", str(second), "--compare", str(first))
+
+    results = json.loads(first.read_text())
+    assert results["format_version"] == 1 and results["config"]["seed"] == 42
+    run = results["runs"][0]
+    assert run["chunks"] == 2000 and run["build"]["seconds"] > 0
+    assert run["memory"]["bundle_bytes"]["total"] >= run["memory"]["bundle_bytes"]["vectors"] == 2000 * 32 * 4
+    assert set(run["modes"]) == set(benchmark.MODES)
+    for mode in run["modes"].values():
+        assert mode["queries"] == 40
+        assert 0.0 <= mode["mrr"] <= mode["recall@10"] <= 1.0
+        assert mode["latency_ms"]["p50"] <= mode["latency_ms"]["p99"]
+    # 상품 코드가 있는 질의는 BM25 가 찾아낸다
+    assert run["modes"]["hybrid"]["recall@10"] >= run["modes"]["ann"]["recall@10"]
+
+    # 같은 seed 는 같은 코퍼스와 질의를 만든다
+    again = json.loads(second.read_text())["runs"][0]["modes"]
+    assert {m: r["recall@10"] for m, r in again.items() if m != "reranked"} \
+        == {m: r["recall@10"] for m, r in run["modes"].items() if m != "reranked"}
+    assert "Compared with" in capsys.readouterr().out
@@ -0,0 +1,380 @@
+"""
+search-knowledge-base 도구 통합 테스트 (KB 동기화가 만든 로컬 번들 검색, OpenSearch 대체 경로)
+"""
+import importlib.util
+import json
+import os
+import threading
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+AGENT_DIR = os.path.join(ROOT, "agents", "customer-support-agent")
+AGENT_DEFINITION = os.path.join(AGENT_DIR, "agent-definition.yaml")
+BUNDLE = "customer-support-agent-kb-dev"
+
+
+def _load(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _load_tool():
+    return _load("search_knowledge_base_tool", os.path.join(AGENT_DIR, "tools", "implementations", "search-knowledge-base.py"))
+
+
+@pytest.fixture
+def index_dir(tmp_path, monkeypatch):
+    documents = tmp_path / "s3" / "agent-knowledge-base" / "documents"
+    documents.mkdir(parents=True)
+    (documents / "returns.md").write_text("반품 정책: 구매 후 30일 이내 반품 가능합니다", encoding="utf-8")
+    (documents / "shipping.txt").write_text("배송 정책: 일반 배송은 3-5일 소요됩니다", encoding="utf-8")
+    (documents / "payment.md").write_text("결제 수단: 신용카드와 계좌이체를 지원합니다", encoding="utf-8")
+    monkeypatch.setenv("KB_S3_LOCAL_ROOT", str(tmp_path / "s3"))
+    monkeypatch.delenv("OPENSEARCH_ENDPOINT", raising=False)
+    sync = _load("sync_knowledge_base", os.path.join(ROOT, "scripts", "sync-knowledge-base.py"))
+    sync.sync_knowledge_base(AGENT_DEFINITION, "dev", embedding_cache_dir="",
+                             local_index_dir=str(tmp_path / "index"), state_dir=str(tmp_path / "state"))
+    return tmp_path / "index"
+
+
+class FakeOpenSearchSearch:
+    """_msearch 요청을 기록하고 검색마다 고정된 hit 를 돌려주는 서버 (_mapping 은 kb_version 을 돌려준다)"""
+
+    def __init__(self):
+        self.requests = []
+        self.kb_version = None
+        self.mapping_requests = 0
+        # 요청마다 클라이언트 포트 (keep-alive 연결 재사용 확인용)
+        self.clients = []
+        store = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                lines = [json.loads(line) for line in self.rfile.read(length).decode().splitlines()]
+                store.requests.append((self.path, lines))
+                store.clients.append(self.client_address[1])
+                hits = {"hits": {"hits": [
+                    {"_score": 0.9, "_source": {"document_id": "s3-documents/returns.md", "content": "반품 정책"}},
+                ]}}
+                self._send({"responses": [hits] * (len(lines) // 2)})
+
+            def do_GET(self):
+                store.clients.append(self.client_address[1])
+                store.mapping_requests += 1
+                meta = {"kb_version": store.kb_version} if store.kb_version else {}
+                self._send({"customer-support-agent-kb-dev-v20260101000000": {"mappings": {"_meta": meta}}})
+
+            def _send(self, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_search_serves_queries_from_local_bundle(index_dir, monkeypatch):
+    monkeypatch.setenv("KB_INDEX_PATH", str(index_dir / BUNDLE))
+    tool = _load_tool()
+
+    results = tool.search_knowledge_base("반품 정책 알려주세요", max_results=2)
+
+    assert len(results) == 2
+    assert results[0]["title"] == "returns.md"
+    assert results[0]["content"].startswith("반품 정책")
+    assert results[0]["relevance_score"] >= results[1]["relevance_score"]
+    response = tool.lambda_handler({"parameters": {"query": "배송 기간", "max_results": 1}}, None)
+    assert json.loads(response["body"])["results"][0]["title"] == "shipping.txt"
+
+
+def test_search_falls_back_to_opensearch(index_dir, monkeypatch):
+    monkeypatch.setenv("KB_INDEX_PATH", str(index_dir / "missing"))
+    monkeypatch.setenv("KB_INDEX_NAME", "customer-support-agent-kb-dev")
+    with FakeOpenSearchSearch() as server:
+        monkeypatch.setenv("OPENSEARCH_ENDPOINT", server.url)
+        tool = _load_tool()
+
+        results = tool.search_knowledge_base("반품", max_results=3)
+
+    # l2 점수 0.9 == 코사인 유사도 0.944, 0~1 로 보정
+    assert results == [{"title": "returns.md", "content": "반품 정책", "relevance_score": 0.8748}]
+    path, (header, body) = server.requests[0]
+    assert path == "/_msearch"
+    assert header == {"index": "customer-support-agent-kb-dev"}
+    assert body["query"]["knn"]["embedding"]["k"] == 3
+    assert len(body["query"]["knn"]["embedding"]["vector"]) == 1536
+
+
+def test_bundle_from_another_embedding_model_is_not_used(index_dir, monkeypatch):
+    monkeypatch.setenv("KB_INDEX_PATH", str(index_dir / BUNDLE))
+    monkeypatch.setenv("KB_EMBEDDING_MODEL", "other-model")
+    tool = _load_tool()
+
+    assert tool._get_local_index() is None
+    assert tool.search_knowledge_base("반품") == []
+
+
+def test_exact_search_mode(index_dir, monkeypatch):
+    monkeypatch.setenv("KB_INDEX_PATH", str(index_dir / BUNDLE))
+    monkeypatch.setenv("KB_SEARCH_MODE", "exact")
+    tool = _load_tool()
+
+    results = tool.search_knowledge_base("결제 수단", max_results=10)
+
+    assert results[0]["title"] == "payment.md"
+    assert len(results) == 3
+
+
+def test_repeated_questions_reuse_the_query_embedding(index_dir, monkeypatch):
+    monkeypatch.setenv("KB_INDEX_PATH", str(index_dir / BUNDLE))
+    monkeypatch.setenv("KB_RESULT_CACHE_SIZE", "0")
+    tool = _load_tool()
+    invoke = tool._invoke_embedding_model
+    calls = []
+    monkeypatch.setattr(tool, "_invoke_embedding_model", lambda texts: calls.append(texts) or invoke(texts))
+
+    first = tool.search_knowledge_base("반품 절차", max_results=1)
+    second = tool.search_knowledge_base("반품 절차?", max_results=1)
+
+    assert first == second
+    assert calls == [["반품 절차"]]
+    assert tool._get_query_cache().stats()["hits"] == 1
+
+
+def test_hybrid_search_ranks_documents_by_policy_code(tmp_path, monkeypatch):
+    documents = tmp_path / "s3" / "agent-knowledge-base" / "documents"
+    documents.mkdir(parents=True)
+    for code in ("RT-1001", "RT-1010", "RT-1100", "RT-0110"):
+        (documents / f"{code}.md").write_text(f"정책 {code}: 반품 및 교환 처리 기준 안내", encoding="utf-8")
+    monkeypatch.setenv("KB_S3_LOCAL_ROOT", str(tmp_path / "s3"))
+    monkeypatch.delenv("OPENSEARCH_ENDPOINT", raising=False)
+    sync = _load("sync_knowledge_base", os.path.join(ROOT, "scripts", "sync-knowledge-base.py"))
+    sync.sync_knowledge_base(AGENT_DEFINITION, "dev", embedding_cache_dir="",
+                             local_index_dir=str(tmp_path / "index"), state_dir=str(tmp_path / "state"))
+    monkeypatch.setenv("KB_INDEX_PATH", str(tmp_path / "index" / BUNDLE))
+
+    tool = _load_tool()
+    for code in ("RT-1010", "RT-0110"):
+        assert tool.search_knowledge_base(f"{code} 기준", max_results=1)[0]["title"] == f"{code}.md"
+
+
+@pytest.mark.parametrize("mode", ["hybrid", "ann", "exact"])
+def test_batch_search_matches_single_queries(index_dir, monkeypatch, mode):
+    monkeypatch.setenv("KB_INDEX_PATH", str(index_dir / BUNDLE))
+    monkeypatch.setenv("KB_SEARCH_MODE", mode)
+    tool = _load_tool()
+    invoke = tool._invoke_embedding_model
+    calls = []
+    monkeypatch.setattr(tool, "_invoke_embedding_model", lambda texts: calls.append(texts) or invoke(texts))
+    queries = ["반품 정책", "배송 기간", "결제 수단", "반품 정책?"]
+
+    batch = tool.search_knowledge_base_batch(queries, max_results=2)
+
+    assert calls == [["반품 정책", "배송 기간", "결제 수단"]]  # 중복 질의는 한 번만, 요청도 한 번
+    assert batch == [tool.search_knowledge_base(query, max_results=2) for query in queries]
+    assert tool.search_knowledge_base_batch([], max_results=2) == []
+
+
+def test_lambda_handler_accepts_queries(index_dir, monkeypatch):
+    monkeypatch.setenv("KB_INDEX_PATH", str(index_dir / BUNDLE))
+    tool = _load_tool()
+
+    response = tool.lambda_handler({"parameters": {"queries": json.dumps(["반품", "배송"]), "max_results": 1}}, None)
+
+    results = json.loads(response["body"])["results"]
+    assert [r[0]["title"] for r in results] == ["returns.md", "shipping.txt"]
+
+
+def test_lambda_handler_converts_string_max_results(index_dir, monkeypatch):
+    monkeypatch.setenv("KB_INDEX_PATH", str(index_dir / BUNDLE))
+    tool = _load_tool()
+
+    def results(max_results):
+        response = tool.lambda_handler({"parameters": {"query": "배송 기간", "max_results": max_results}}, None)
+        return json.loads(response["body"])["results"]
+
+    assert len(results("1")) == 1
+    assert results("1") == results(1)
+    assert len(results("0")) == 1
+    assert tool._parse_max_results("1000") == tool.MAX_RESULTS_LIMIT
+    assert tool._parse_max_results("many") == 5
+
+
+def test_batch_falls_back_to_a_single_msearch(index_dir, monkeypatch):
+    monkeypatch.delenv("KB_INDEX_PATH", raising=False)
+    with FakeOpenSearchSearch() as server:
+        monkeypatch.setenv("OPENSEARCH_ENDPOINT", server.url)
+        tool = _load_tool()
+
+        results = tool.search_knowledge_base_batch(["반품", "배송", "결제"], max_results=1)
+
+    assert len(results) == 3 and len(server.requests) == 1
+    assert len(server.requests[0][1]) == 6
+
+
+@pytest.mark.parametrize("mode", ["hybrid", "ann", "exact"])
+def test_filters_restrict_local_results(index_dir, monkeypatch, mode):
+    monkeypatch.setenv("KB_INDEX_PATH", str(index_dir / BUNDLE))
+    monkeypatch.setenv("KB_SEARCH_MODE", mode)
+    tool = _load_tool()
+
+    results = tool.search_knowledge_base("반품 정책", max_results=5, filters={"file_type": "txt"})
+    assert [r["title"] for r in results] == ["shipping.txt"]
+    results = tool.search_knowledge_base("배송", max_results=5, filters={"file_type": ["md"], "language": "ko"})
+    assert {r["title"] for r in results} == {"returns.md", "payment.md"}
+    assert tool.search_knowledge_base("반품", filters={"source_id": "database-faq"}) == []
+    assert tool.search_knowledge_base("반품", filters={"updated_after": "2999-01-01T00:00:00Z"}) == []
+
+    response = tool.lambda_handler({"parameters": {"query": "결제", "filters": json.dumps({"file_type": "txt"})}}, None)
+    assert [r["title"] for r in json.loads(response["body"])["results"]] == ["shipping.txt"]
+    with pytest.raises(ValueError, match="Unknown search filter"):
+        tool.search_knowledge_base("반품", filters={"category": "faq"})
+
+
+def test_filters_are_sent_to_opensearch_knn(index_dir, monkeypatch):
+    monkeypatch.delenv("KB_INDEX_PATH", raising=False)
+    with FakeOpenSearchSearch() as server:
+        monkeypatch.setenv("OPENSEARCH_ENDPOINT", server.url)
+        tool = _load_tool()
+
+        tool.search_knowledge_base("반품", filters={"source_id": "s3-documents", "updated_after": "2024-01-01"})
+
+    knn_filter = server.requests[0][1][1]["query"]["knn"]["embedding"]["filter"]["bool"]["filter"]
+    assert knn_filter[0] == {"terms": {"source_id": ["s3-documents"]}}
+    assert knn_filter[1]["bool"]["should"][0] == {"range": {"last_modified": {"gte": "2024-01-01"}}}
+
+
+def test_rerank_stage_returns_calibrated_scores(index_dir, monkeypatch):
+    monkeypatch.setenv("KB_INDEX_PATH", str(index_dir / BUNDLE))
+    monkeypatch.setenv("KB_RERANK_CANDIDATES", "10")
+    tool = _load_tool()
+
+    results = tool.search_knowledge_base("계좌이체 결제", max_results=2)
+
+    assert len(results) == 2 and results[0]["title"] == "payment.md"
+    scores = [r["relevance_score"] for r in results]
+    assert scores == sorted(scores, reverse=True) and all(0.0 <= s <= 1.0 for s in scores)
+    assert tool._get_reranker().stats()["reranked"] == 3
+
+
+def test_results_are_cached_until_a_new_bundle_is_published(index_dir, tmp_path, monkeypatch):
+    monkeypatch.setenv("KB_INDEX_PATH", str(index_dir / BUNDLE))
+    tool = _load_tool()
+    invoke = tool._invoke_embedding_model
+    calls = []
+    monkeypatch.setattr(tool, "_invoke_embedding_model", lambda texts: calls.append(texts) or invoke(texts))
+
+    first = tool.search_knowledge_base("배송 기간", max_results=1, filters={"file_type": "txt"})
+    first[0]["content"] = "changed by caller"
+    assert tool.search_knowledge_base("배송 기간?", max_results=1, filters={"file_type": ["txt"]})[0]["content"] \
+        == "배송 정책: 일반 배송은 3-5일 소요됩니다"
+    assert calls == [["배송 기간"]]
+    assert tool._get_result_cache().stats()["hits"] == 1
+
+    # KB 동기화가 새 번들을 게시하면 캐시가 비워지고 새 내용을 검색한다
+    (tmp_path / "s3" / "agent-knowledge-base" / "documents" / "shipping.txt").write_text(
+        "배송 정책: 일반 배송은 1-2일 소요됩니다", encoding="utf-8")
+    sync = _load("sync_knowledge_base", os.path.join(ROOT, "scripts", "sync-knowledge-base.py"))
+    sync.sync_knowledge_base(AGENT_DEFINITION, "dev", embedding_cache_dir="",
+                             local_index_dir=str(index_dir), state_dir=str(tmp_path / "state"))
+
+    results = tool.search_knowledge_base("배송 기간", max_results=1, filters={"file_type": "txt"})
+    assert results[0]["content"] == "배송 정책: 일반 배송은 1-2일 소요됩니다"
+    assert tool._get_result_cache().stats()["invalidations"] == 1
+
+
+def test_opensearch_results_are_cached_per_kb_version(monkeypatch):
+    monkeypatch.delenv("KB_INDEX_PATH", raising=False)
+    monkeypatch.delenv("KB_INDEX_VERSION_TTL", raising=False)
+    with FakeOpenSearchSearch() as server:
+        monkeypatch.setenv("OPENSEARCH_ENDPOINT", server.url)
+        tool = _load_tool()
+
+        # 게시 버전이 기록되지 않은 인덱스는 캐시하지 않는다
+        tool.search_knowledge_base("반품")
+        tool.search_knowledge_base("반품")
+        assert len(server.requests) == 2
+
+        server.kb_version = "a"
+        tool.search_knowledge_base("반품")
+        tool.search_knowledge_base("반품")
+        assert len(server.requests) == 3
+
+        # 게시 버전은 검색마다 읽으므로 새 버전이 게시되면 바로 다시 검색한다
+        server.kb_version = "b"
+        tool.search_knowledge_base("반품")
+        assert len(server.requests) == 4
+    assert server.mapping_requests == 5
+
+
+def test_index_version_ttl_reuses_the_version(monkeypatch):
+    monkeypatch.delenv("KB_INDEX_PATH", raising=False)
+    monkeypatch.setenv("KB_INDEX_VERSION_TTL", "30")
+    clock = [1000.0]
+    with FakeOpenSearchSearch() as server:
+        monkeypatch.setenv("OPENSEARCH_ENDPOINT", server.url)
+        server.kb_version = "a"
+        tool = _load_tool()
+        monkeypatch.setattr(tool, "time", types.SimpleNamespace(monotonic=lambda: clock[0]))
+
+        tool.search_knowledge_base("반품")
+        server.kb_version = "b"
+        tool.search_knowledge_base("반품")
+        assert len(server.requests) == 1
+        clock[0] += 31
+        tool.search_knowledge_base("반품")
+        assert len(server.requests) == 2
+    assert server.mapping_requests == 2
+
+
+def test_opensearch_requests_reuse_one_keep_alive_connection(monkeypatch):
+    monkeypatch.delenv("KB_INDEX_PATH", raising=False)
+    with FakeOpenSearchSearch() as server:
+        monkeypatch.setenv("OPENSEARCH_ENDPOINT", server.url)
+        server.kb_version = "a"
+        tool = _load_tool()
+
+        tool.search_knowledge_base("반품")
+        tool.search_knowledge_base("배송")
+        tool.search_knowledge_base_batch(["결제", "환불"])
+
+    # 호출마다 _mapping 1번 + _msearch 1번이 같은 연결로
+    assert len(server.clients) == 6 and len(set(server.clients)) == 1
+
+
+def test_preload_opens_the_bundle_at_import(index_dir, monkeypatch):
+    monkeypatch.setenv("KB_INDEX_PATH", str(index_dir / BUNDLE))
+    monkeypatch.setenv("KB_PRELOAD", "1")
+    tool = _load_tool()
+    assert tool._local_index is not None and tool._reranker is not None and tool._query_cache is not None
+
+    bundle = tool._local_index
+    assert tool.search_knowledge_base("반품 정책", max_results=1)[0]["title"] == "returns.md"
+    assert tool._local_index is bundle
+
+    # 잘못된 설정이어도 import 는 실패하지 않는다
+    monkeypatch.setenv("KB_RERANK_BUDGET_MS", "fast")
+    assert _load_tool()._reranker is None
@@ -0,0 +1,72 @@
+"""
+스냅샷으로 환경 승격 통합 테스트 (dev 에서 동기화 → 내보내기 → staging 에 가져오기)
+"""
+import importlib.util
+import os
+
+import pytest
+
+from kb_index import IndexBundle
+from kb_sync.snapshot import SnapshotError
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+AGENT_DEFINITION = os.path.join(ROOT, "agents", "customer-support-agent", "agent-definition.yaml")
+
+
+@pytest.fixture
+def sync(tmp_path, monkeypatch):
+    documents = tmp_path / "s3" / "agent-knowledge-base" / "documents"
+    documents.mkdir(parents=True)
+    (documents / "returns.md").write_text("반품 정책: 30일 이내 반품 가능", encoding="utf-8")
+    (documents / "shipping.txt").write_text("배송 정책: 3-5일 소요", encoding="utf-8")
+    monkeypatch.setenv("KB_S3_LOCAL_ROOT", str(tmp_path / "s3"))
+    monkeypatch.delenv("OPENSEARCH_ENDPOINT", raising=False)
+    spec = importlib.util.spec_from_file_location("sync_knowledge_base", os.path.join(ROOT, "scripts", "sync-knowledge-base.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_promote_dev_snapshot_to_staging(sync, tmp_path):
+    index_dir, state_dir = str(tmp_path / "index"), str(tmp_path / "state")
+    sync.sync_knowledge_base(AGENT_DEFINITION, "dev", embedding_cache_dir="",
+                             local_index_dir=index_dir, state_dir=state_dir)
+    # staging 에 이전 상태가 남아 있어도 가져오기 후에는 지워진다
+    stale_manifest = tmp_path / "state" / "customer-support-agent-kb-staging" / "manifests" / "s3-documents.json"
+    stale_manifest.parent.mkdir(parents=True)
+    stale_manifest.write_text("{}", encoding="utf-8")
+
+    snapshot_file = str(tmp_path / "dev.tar.gz")
+    snapshot = sync.export_knowledge_base_snapshot(AGENT_DEFINITION, "dev", snapshot_file, index_dir)
+    assert snapshot["index_name"] == "customer-support-agent-kb-dev"
+
+    sync.import_knowledge_base_snapshot(AGENT_DEFINITION, "staging", snapshot_file, index_dir, state_dir)
+
+    dev = IndexBundle(os.path.join(index_dir, "customer-support-agent-kb-dev"))
+    staging = IndexBundle(os.path.join(index_dir, "customer-support-agent-kb-staging"))
+    assert list(staging.iter_chunks()) == list(dev.iter_chunks())
+    assert (staging.vectors == dev.vectors).all()
+    assert not stale_manifest.exists()
+
+    # 가져온 뒤의 증분 동기화는 전체를 다시 수집해 같은 내용을 만든다
+    sync.sync_knowledge_base(AGENT_DEFINITION, "staging", embedding_cache_dir="",
+                             local_index_dir=index_dir, state_dir=state_dir)
+    resynced = IndexBundle(os.path.join(index_dir, "customer-support-agent-kb-staging"))
+    assert {r["id"] for r in resynced.iter_chunks()} == {r["id"] for r in dev.iter_chunks()}
+
+
+def test_snapshot_with_different_embedding_model_is_rejected(sync, tmp_path):
+    index_dir, state_dir = str(tmp_path / "index"), str(tmp_path / "state")
+    sync.sync_knowledge_base(AGENT_DEFINITION, "dev", embedding_cache_dir="",
+                             local_index_dir=index_dir, state_dir=state_dir, vector_storage="int8")
+    bundle_path = os.path.join(index_dir, "customer-support-agent-kb-dev")
+    manifest_file = os.path.join(bundle_path, "manifest.json")
+    with open(manifest_file, encoding="utf-8") as f:
+        manifest = f.read()
+    with open(manifest_file, "w", encoding="utf-8") as f:
+        f.write(manifest.replace('"model": "', '"model": "other-'))
+    sync.export_knowledge_base_snapshot(AGENT_DEFINITION, "dev", str(tmp_path / "dev.tar"), index_dir)
+
+    with pytest.raises(SnapshotError, match="other-"):
+        sync.import_knowledge_base_snapshot(AGENT_DEFINITION, "staging", str(tmp_path / "dev.tar"), index_dir, state_dir)
+    assert not os.path.exists(os.path.join(index_dir, "customer-support-agent-kb-staging"))
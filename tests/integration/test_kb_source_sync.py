@@ -0,0 +1,192 @@
+"""
+데이터 소스별 동기화 통합 테스트 (로컬 디렉터리 S3 + SQLite)
+"""
+import importlib.util
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+from kb_index import IndexBundle
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+AGENT_DEFINITION = os.path.join(ROOT, "agents", "customer-support-agent", "agent-definition.yaml")
+BUNDLE = "customer-support-agent-kb-dev"
+
+
+def _load_sync_script():
+    spec = importlib.util.spec_from_file_location("sync_knowledge_base", os.path.join(ROOT, "scripts", "sync-knowledge-base.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _setup_sources(tmp_path, monkeypatch):
+    s3_dir = tmp_path / "s3" / "agent-knowledge-base" / "documents"
+    s3_dir.mkdir(parents=True)
+    (s3_dir / "returns.md").write_text("반품 정책: 30일 이내 반품 가능", encoding="utf-8")
+
+    db_path = tmp_path / "faq.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE faq (id INTEGER PRIMARY KEY, question TEXT, answer TEXT, active BOOLEAN, updated_at TEXT)")
+    conn.execute("INSERT INTO faq VALUES (1, '결제 방법', '신용카드, 계좌이체', 1, '2024-01-01T00:00:00')")
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setenv("KB_S3_LOCAL_ROOT", str(tmp_path / "s3"))
+    monkeypatch.setenv("DB_CONNECTION_STRING", f"sqlite:///{db_path}")
+    monkeypatch.delenv("OPENSEARCH_ENDPOINT", raising=False)
+    return s3_dir
+
+
+def _sync(sync, tmp_path, **kwargs):
+    sync.sync_knowledge_base(AGENT_DEFINITION, "dev", embedding_cache_dir="",
+                             local_index_dir=str(tmp_path / "index"), state_dir=str(tmp_path / "state"), **kwargs)
+    bundle = IndexBundle(str(tmp_path / "index" / BUNDLE))
+    return {record["id"]: record for record in bundle.iter_chunks()}
+
+
+def test_single_source_sync_keeps_other_sources(tmp_path, monkeypatch):
+    s3_dir = _setup_sources(tmp_path, monkeypatch)
+    sync = _load_sync_script()
+
+    first = _sync(sync, tmp_path)
+    assert set(first) == {"s3-documents/documents/returns.md#0", "database-faq/1#0"}
+    assert (tmp_path / "state" / BUNDLE / "manifests" / "database-faq.json").exists()
+
+    time.sleep(0.01)
+    (s3_dir / "returns.md").write_text("반품 정책: 14일 이내 반품 가능", encoding="utf-8")
+    second = _sync(sync, tmp_path, source_ids=["s3-documents"])
+
+    assert set(second) == set(first)
+    assert second["s3-documents/documents/returns.md#0"]["content"] == "반품 정책: 14일 이내 반품 가능"
+    assert second["database-faq/1#0"] == first["database-faq/1#0"]
+
+
+def test_concurrent_source_syncs_do_not_lose_chunks(tmp_path, monkeypatch):
+    _setup_sources(tmp_path, monkeypatch)
+    sync = _load_sync_script()
+
+    threads = [
+        threading.Thread(target=_sync, args=(sync, tmp_path), kwargs={"source_ids": [source_id]})
+        for source_id in ("s3-documents", "database-faq")
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    bundle = IndexBundle(str(tmp_path / "index" / BUNDLE))
+    assert {record["id"] for record in bundle.iter_chunks()} == {"s3-documents/documents/returns.md#0",
+                                                                   "database-faq/1#0"}
+
+
+def test_metrics_output_records_each_run(tmp_path, monkeypatch):
+    _setup_sources(tmp_path, monkeypatch)
+    sync = _load_sync_script()
+    metrics_file = tmp_path / "metrics" / "kb-sync.jsonl"
+
+    _sync(sync, tmp_path, metrics_output=str(metrics_file))
+    _sync(sync, tmp_path, metrics_output=str(metrics_file))
+
+    first, second = [json.loads(line) for line in metrics_file.read_text(encoding="utf-8").splitlines()]
+    stages = {stage["name"]: stage for stage in first["stages"]}
+    assert list(stages) == ["collect", "extract", "chunk", "dedup", "embed", "index"]
+    assert stages["collect"]["items_out"] == 2
+    assert stages["extract"]["bytes"] > 0 and stages["extract"]["errors"] == 0
+    assert stages["index"]["bytes"] > stages["chunk"]["bytes"]  # 벡터 포함
+    assert "s3-documents" in first["sources"]
+    # 두 번째 실행은 변경이 없으므로 수집 항목이 없다
+    assert second["stages"][0]["items_out"] == 0
+
+
+
+def test_duplicates_are_readmitted_when_canonical_document_is_deleted(tmp_path, monkeypatch):
+    s3_dir = _setup_sources(tmp_path, monkeypatch)
+    (s3_dir / "returns-copy.md").write_text("반품 정책: 30일 이내 반품 가능", encoding="utf-8")
+    sync = _load_sync_script()
+
+    first = _sync(sync, tmp_path, source_ids=["s3-documents"])
+    [canonical] = [chunk_id for chunk_id in first if chunk_id.startswith("s3-")]
+    duplicate = ({"s3-documents/documents/returns.md#0", "s3-documents/documents/returns-copy.md#0"}
+                 - {canonical}).pop()
+
+    time.sleep(0.01)
+    (s3_dir / os.path.basename(canonical.split("#")[0])).unlink()
+    second = _sync(sync, tmp_path, source_ids=["s3-documents"])
+
+    assert set(second) == {duplicate}
+    assert second[duplicate]["content"] == "반품 정책: 30일 이내 반품 가능"
+
+
+def test_merge_mode_writes_merged_sources_to_canonical_chunk(tmp_path, monkeypatch):
+    s3_dir = _setup_sources(tmp_path, monkeypatch)
+    sync = _load_sync_script()
+    load_embedding_config = sync.load_embedding_config
+
+    def merge_config(agent_dir):
+        config = load_embedding_config(agent_dir)
+        config["deduplication"] = {**config.get("deduplication", {}), "enabled": True, "mode": "merge"}
+        return config
+
+    monkeypatch.setattr(sync, "load_embedding_config", merge_config)
+    first = _sync(sync, tmp_path, source_ids=["s3-documents"])
+    canonical = "s3-documents/documents/returns.md#0"
+    assert "merged_sources" not in first[canonical]["metadata"]
+
+    # 변경되지 않은 대표 청크도 병합 출처와 함께 다시 기록된다
+    (s3_dir / "returns-copy.md").write_text("반품 정책: 30일 이내 반품 가능", encoding="utf-8")
+    second = _sync(sync, tmp_path, source_ids=["s3-documents"])
+
+    assert set(second) == {canonical}
+    assert second[canonical]["metadata"]["merged_sources"] == ["s3://agent-knowledge-base/documents/returns-copy.md"]
+
+
+def test_sources_are_recollected_after_the_bundle_is_rebuilt_without_them(tmp_path, monkeypatch):
+    _setup_sources(tmp_path, monkeypatch)
+    sync = _load_sync_script()
+
+    _sync(sync, tmp_path)
+    shutil.rmtree(tmp_path / "index" / BUNDLE)
+    # 번들이 없으므로 s3 만 다시 수집한 새 번들이 만들어진다
+    assert set(_sync(sync, tmp_path, source_ids=["s3-documents"])) == {"s3-documents/documents/returns.md#0"}
+
+    # database-faq 매니페스트는 지워진 번들 기준이므로 변경이 없어도 다시 수집한다
+    assert set(_sync(sync, tmp_path, source_ids=["database-faq"])) == {"s3-documents/documents/returns.md#0",
+                                                                       "database-faq/1#0"}
+
+
+def test_document_that_extracts_to_no_text_loses_its_chunks(tmp_path, monkeypatch):
+    s3_dir = _setup_sources(tmp_path, monkeypatch)
+    sync = _load_sync_script()
+
+    assert "s3-documents/documents/returns.md#0" in _sync(sync, tmp_path)
+    time.sleep(0.01)
+    (s3_dir / "returns.md").write_text("  \n", encoding="utf-8")
+
+    assert set(_sync(sync, tmp_path, source_ids=["s3-documents"])) == {"database-faq/1#0"}
+    manifest = json.loads((tmp_path / "state" / BUNDLE / "manifests" / "s3-documents.json").read_text())
+    assert manifest["state"]["chunks"]["s3-documents/documents/returns.md"] == 0
+
+
+def test_failed_extraction_keeps_previous_chunks_in_local_bundle(tmp_path, monkeypatch):
+    s3_dir = _setup_sources(tmp_path, monkeypatch)
+    sync = _load_sync_script()
+    first = _sync(sync, tmp_path)
+
+    class FailingExtraction(sync.ExtractionPool):
+        def __call__(self, doc):
+            self._fail(doc, RuntimeError("corrupt file"))
+            return iter(())
+
+    monkeypatch.setattr(sync, "ExtractionPool", FailingExtraction)
+    time.sleep(0.01)
+    (s3_dir / "returns.md").write_text("반품 정책: 14일 이내 반품 가능", encoding="utf-8")
+    second = _sync(sync, tmp_path, source_ids=["s3-documents"])
+
+    # 벡터 스토어에 남아 있는 이전 청크와 같도록 로컬 번들도 이전 청크를 유지하고, 다음 동기화에서 다시 추출한다
+    assert second["s3-documents/documents/returns.md#0"] == first["s3-documents/documents/returns.md#0"]
+    manifest = json.loads((tmp_path / "state" / BUNDLE / "manifests" / "s3-documents.json").read_text())
+    assert "documents/returns.md" not in manifest["entries"]
@@ -0,0 +1,36 @@
+"""
+티켓 API 지연 시간 벤치마크 스크립트 통합 테스트
+"""
+import importlib.util
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _load_benchmark():
+    spec = importlib.util.spec_from_file_location("benchmark_ticket_api",
+                                                  os.path.join(ROOT, "scripts", "benchmark-ticket-api.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_pooled_client_reuses_connections_and_survives_failures(tmp_path, monkeypatch, capsys):
+    benchmark = _load_benchmark()
+    output = tmp_path / "ticket-api.json"
+    monkeypatch.setattr(sys, "argv", ["benchmark-ticket-api.py",
+                                      "--agent-dir", os.path.join(ROOT, "agents", "customer-support-agent"),
+                                      "--calls", "20", "--server-latency-ms", "0", "--failure-every", "10",
+                                      "--backoff", "0", "--output", str(output)])
+    benchmark.main()
+
+    results = json.loads(output.read_text())
+    assert results["format_version"] == 1 and set(results["modes"]) == set(benchmark.MODES)
+    bare, pooled = results["modes"]["bare"], results["modes"]["pooled"]
+    assert bare["server"]["connections"] == 40 and bare["server"]["token_requests"] == 20 and bare["failed"] == 2
+    assert pooled["server"]["connections"] == 1 and pooled["server"]["token_requests"] == 1
+    assert pooled["failed"] == 0 and pooled["server"]["ticket_requests"] == 22
+    assert pooled["latency_ms"]["p50"] <= pooled["latency_ms"]["p99"]
+    assert "✓ Results written" in capsys.readouterr().out
@@ -0,0 +1,55 @@
+"""
+도구 콜드/웜 스타트 측정 스크립트 통합 테스트
+"""
+import importlib.util
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _load_benchmark():
+    spec = importlib.util.spec_from_file_location("benchmark_tool_cold_start",
+                                                  os.path.join(ROOT, "scripts", "benchmark-tool-cold-start.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_tools_import_without_heavy_modules(tmp_path, monkeypatch, capsys):
+    benchmark = _load_benchmark()
+    output = tmp_path / "cold-start.json"
+    for name in ("KB_INDEX_PATH", "OPENSEARCH_ENDPOINT", "KB_PRELOAD"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(sys, "argv", ["benchmark-tool-cold-start.py",
+                                      "--agent-dir", os.path.join(ROOT, "agents", "customer-support-agent"),
+                                      "--runs", "2", "--warm", "3", "--import-profile", "--output", str(output)])
+    benchmark.main()
+
+    results = json.loads(output.read_text())
+    assert results["format_version"] == 1 and results["config"]["bytecode"] is True
+    assert set(results["tools"]) == set(benchmark.EVENTS)
+    for tool in results["tools"].values():
+        assert tool["runs"] == 2 and tool["status_code"] == 200
+        # NumPy, requests, kb_index 는 import 가 아니라 필요할 때 적재된다
+        assert tool["modules_at_import"] == []
+        assert tool["import_ms"]["p50"] <= tool["import_ms"]["max"]
+        assert tool["process_ms"]["p50"] > tool["import_ms"]["p50"]
+    search = results["tools"]["search-knowledge-base"]
+    assert "kb_index" in [entry["module"] for entry in search["slowest_imports"]]
+    assert "search-knowledge-base" in capsys.readouterr().out
+
+
+def test_slowest_imports_reports_top_level_imports_after_the_marker():
+    benchmark = _load_benchmark()
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 | json",
+        benchmark.IMPORT_MARKER,
+        "import time:       300 |        300 |   numpy.core",
+        "import time:       200 |       5000 | numpy",
+        "import time:       150 |        150 | datetime",
+    ])
+    assert benchmark.slowest_imports(stderr) == [{"module": "numpy", "cumulative_ms": 5.0},
+                                                 {"module": "datetime", "cumulative_ms": 0.15}]
@@ -0,0 +1,116 @@
+"""
+로컬 인덱스 번들의 IVF 근사 최근접 이웃 검색 단위 테스트
+"""
+import os
+
+import numpy as np
+import pytest
+
+from kb_index import IVF_FILES, IndexBundle, IndexBundleWriter, normalize, recall_at_k, top_k
+
+
+def _clustered(count=3000, dimensions=32, clusters=40, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = normalize(rng.normal(size=(clusters, dimensions)))
+    labels = rng.integers(0, clusters, size=count)
+    return normalize(centers[labels] + 0.3 * rng.normal(size=(count, dimensions)) / np.sqrt(dimensions))
+
+
+def _write(path, vectors, storage="float32", ann=None):
+    writer = IndexBundleWriter(str(path), vectors.shape[1], storage, "test-model", ann=ann)
+    records = [{"id": f"doc{i}#0", "content": f"내용 {i}", "metadata": {}} for i in range(len(vectors))]
+    writer.add(records, vectors)
+    writer.close()
+    return IndexBundle(str(path))
+
+
+@pytest.mark.parametrize("storage", ["float32", "int8"])
+def test_ivf_search_recall_against_exact(tmp_path, storage):
+    vectors = _clustered()
+    bundle = _write(tmp_path / "kb", vectors, storage, ann={"type": "ivf", "probes": 6})
+
+    assert bundle.manifest["ann"]["lists"] == 55  # sqrt(3000)
+    assert all(os.path.exists(tmp_path / "kb" / name) for name in IVF_FILES)
+    assert int(bundle.ivf.offsets[-1]) == bundle.count
+    assert sorted(np.asarray(bundle.ivf.rows).tolist()) == list(range(bundle.count))
+
+    queries = _clustered(count=50, seed=1)
+    hits = 0
+    for query in queries:
+        rows, scores = bundle.search(query, 10)
+        exact, _ = top_k(bundle.scores(query), 10)
+        hits += len(set(rows.tolist()) & set(exact.tolist()))
+        assert np.all(np.diff(scores) <= 0)
+    assert hits / (10 * len(queries)) >= 0.9
+
+
+def test_probing_every_list_is_exact(tmp_path):
+    vectors = _clustered(count=500)
+    bundle = _write(tmp_path / "kb", vectors, ann={"lists": 10})
+    query = vectors[7]
+
+    rows, scores = bundle.search(query, 5, probes=10)
+    exact, exact_scores = top_k(bundle.scores(query), 5)
+    assert rows.tolist() == exact.tolist()
+    assert rows[0] == 7
+    np.testing.assert_allclose(scores, exact_scores)
+
+
+def test_small_bundle_skips_ivf(tmp_path):
+    vectors = _clustered(count=100)
+    bundle = _write(tmp_path / "kb", vectors, ann={"minVectors": 1000})
+
+    assert "ann" not in bundle.manifest and bundle.ivf is None
+    rows, _ = bundle.search(vectors[3], 3)
+    assert rows[0] == 3
+
+
+def test_carried_over_bundle_rebuilds_ivf(tmp_path):
+    vectors = _clustered(count=800)
+    previous = _write(tmp_path / "kb", vectors, ann={"lists": 8})
+
+    writer = IndexBundleWriter(str(tmp_path / "kb"), vectors.shape[1], "float32", "test-model", ann={"lists": 8})
+    writer.carry_over(previous, lambda record: int(record["id"][3:-2]) % 2 == 0)
+    writer.close()
+    bundle = IndexBundle(str(tmp_path / "kb"))
+
+    assert bundle.count == 400
+    assert int(bundle.ivf.offsets[-1]) == 400
+    rows, _ = bundle.search(vectors[10], 1, probes=8)
+    assert bundle.chunks(rows)[0]["id"] == "doc10#0"
+
+
+@pytest.mark.parametrize("storage", ["float32", "float16", "int8"])
+def test_exact_search_matches_full_sort(tmp_path, storage):
+    vectors = _clustered(count=700)
+    bundle = _write(tmp_path / "kb", vectors, storage)
+    query = _clustered(count=1, seed=3)[0]
+
+    rows, scores = bundle.exact_search(query, 8)
+    expected = np.argsort(-bundle.scores(query), kind="stable")[:8]
+    assert rows.tolist() == expected.tolist()
+    np.testing.assert_allclose(scores, bundle.scores(query)[expected])
+    assert len(bundle.exact_search(query, 10000)[0]) == 700
+
+
+def test_recall_at_k_uses_exact_search_as_ground_truth(tmp_path):
+    bundle = _write(tmp_path / "kb", _clustered(count=2000), ann={"lists": 40})
+    queries = _clustered(count=20, seed=4)
+
+    assert recall_at_k(bundle, queries, 10, probes=40) == 1.0
+    assert recall_at_k(bundle, queries, 10, probes=1) < recall_at_k(bundle, queries, 10, probes=8)
+    rows, _ = bundle.search(queries[0], 10, probes=1, exact=True)
+    assert rows.tolist() == bundle.exact_search(queries[0], 10)[0].tolist()
+
+
+@pytest.mark.parametrize("exact", [False, True])
+def test_search_many_matches_single_queries(tmp_path, exact):
+    bundle = _write(tmp_path / "kb", _clustered(count=1500), ann={"lists": 30, "probes": 4})
+    queries = _clustered(count=6, seed=5)
+
+    batch = bundle.search_many(queries, 5, exact=exact)
+
+    for query, (rows, scores) in zip(queries, batch):
+        single_rows, single_scores = bundle.search(query, 5, exact=exact)
+        assert rows.tolist() == single_rows.tolist()
+        np.testing.assert_allclose(scores, single_scores, rtol=1e-5)
@@ -0,0 +1,90 @@
+"""
+KB 동기화 중복 청크 필터 단위 테스트
+"""
+from kb_sync.dedup import DedupFilter, SignatureIndex
+
+BOILERPLATE = "반품 정책: 제품 구매 후 30일 이내 반품 가능합니다. 반품 신청은 고객센터로 연락주시거나 온라인에서 신청하실 수 있습니다."
+
+
+def _chunk(chunk_id, content, source="s3"):
+    return {"id": chunk_id, "content": content, "source": source}
+
+
+def test_near_duplicates_are_skipped():
+    """공백/대소문자만 다른 청크는 건너뛰고 다른 내용은 통과시키는지 확인"""
+    dedup = DedupFilter(SignatureIndex(threshold=0.8))
+
+    kept = []
+    for chunk in [
+        _chunk("s3-doc1#0", BOILERPLATE),
+        _chunk("faq1#0", BOILERPLATE.replace(" ", "  ") + " ", source="database"),
+        _chunk("faq2#0", "FAQ: 결제 방법 - 신용카드, 계좌이체, 간편결제를 지원합니다.", source="database"),
+    ]:
+        kept.extend(dedup(chunk))
+
+    assert [c["id"] for c in kept] == ["s3-doc1#0", "faq2#0"]
+    assert dedup.duplicates == 1
+
+
+def test_merge_rewrites_canonical_chunk_with_duplicate_source():
+    dedup = DedupFilter(SignatureIndex(threshold=0.8), mode="merge")
+
+    list(dedup(_chunk("s3-doc1#0", BOILERPLATE)))
+    list(dedup(_chunk("faq1#0", BOILERPLATE, source="database")))
+
+    assert dedup.rewrites() == [{"id": "s3-doc1#0", "source": "s3", "content": BOILERPLATE,
+                                 "metadata": {"merged_sources": ["database"]}}]
+    dedup.commit()
+    assert dedup.index.merged == {"s3-doc1#0": ["database"]}
+
+    # 다음 동기화에서 다시 색인하는 대표 청크는 병합된 출처를 유지하고, 새 출처가 더해진다
+    again = DedupFilter(dedup.index, mode="merge")
+    assert list(again(_chunk("s3-doc1#0", BOILERPLATE)))[0]["metadata"] == {"merged_sources": ["database"]}
+    list(again(_chunk("api1#0", BOILERPLATE, source="api")))
+    assert again.rewrites()[0]["metadata"] == {"merged_sources": ["database", "api"]}
+
+
+def test_signatures_are_committed_only_after_the_index_write():
+    """commit() 하지 않은(색인에 실패한) 동기화의 청크는 다음 동기화의 중복 기준이 되지 않는다"""
+    index = SignatureIndex(threshold=0.8)
+    failed = DedupFilter(index)
+    assert len(list(failed(_chunk("s3-doc1#0", BOILERPLATE)))) == 1
+    assert list(failed(_chunk("faq1#0", BOILERPLATE))) == []
+    assert index.signatures == {} and index.duplicate_of == {}
+
+    retry = DedupFilter(index)
+    assert [c["id"] for c in retry(_chunk("faq1#0", BOILERPLATE))] == ["faq1#0"]
+    retry.commit()
+    assert set(index.signatures) == {"faq1#0"}
+
+
+def test_deleting_canonical_chunk_readmits_its_duplicates(tmp_path):
+    path = str(tmp_path / "dedup-signatures.npz")
+    first = DedupFilter(SignatureIndex(path, threshold=0.8))
+    for chunk in [_chunk("s3-doc1#0", BOILERPLATE), _chunk("faq1#0", BOILERPLATE, source="database"),
+                  _chunk("faq2#0", BOILERPLATE + " ", source="database")]:
+        list(first(chunk))
+    first.commit()
+    first.index.save()
+
+    second = DedupFilter(SignatureIndex(path, threshold=0.8))
+    readmitted = second.readmit(["s3-doc1#0"])
+    # 서로 중복인 청크는 하나만 다시 색인하고, 나머지는 새 대표 청크의 중복이 된다
+    assert [c["id"] for c in readmitted] == ["faq1#0"]
+    assert readmitted[0]["content"] == BOILERPLATE and readmitted[0]["source"] == "database"
+    second.commit()
+    assert set(second.index.signatures) == {"faq1#0"}
+    assert second.index.duplicate_of == {"faq2#0": "faq1#0"}
+    assert set(second.index.chunks) == {"faq2#0"}
+
+
+def test_signature_index_persists_between_syncs(tmp_path):
+    """저장된 서명 인덱스로 다음 동기화에서도 중복을 찾고, 같은 청크 ID 는 통과시키는지 확인"""
+    path = str(tmp_path / "dedup-signatures.npz")
+    first = SignatureIndex(path, threshold=0.8)
+    assert first.check("s3-doc1#0", BOILERPLATE) is None
+    first.save()
+
+    second = SignatureIndex(path, threshold=0.8)
+    assert second.check("s3-doc1#0", BOILERPLATE) is None
+    assert second.check("faq1#0", BOILERPLATE) == "s3-doc1#0"
@@ -0,0 +1,72 @@
+"""
+KB 임베딩 캐시 단위 테스트
+"""
+import numpy as np
+import pytest
+
+from kb_index import EmbeddingCache, content_key
+
+
+def _fake_embed(calls):
+    def embed(texts):
+        calls.append(list(texts))
+        return [[float(len(t)), 1.0, 2.0, 3.0] for t in texts]
+    return embed
+
+
+def test_cache_only_embeds_misses(tmp_path):
+    """캐시에 있는 텍스트는 임베딩 모델을 다시 호출하지 않는지 확인"""
+    calls = []
+    cache = EmbeddingCache(str(tmp_path), "test-model", 4)
+
+    first = cache.get_or_compute(["반품", "배송 기간", "반품"], _fake_embed(calls))
+    second = cache.get_or_compute(["배송 기간", "결제"], _fake_embed(calls))
+
+    assert calls == [["반품", "배송 기간"], ["결제"]]
+    assert first.dtype == np.float32 and first.shape == (3, 4)
+    np.testing.assert_array_equal(first[1], second[0])
+    assert cache.misses == 3
+
+
+def test_cache_is_shared_between_instances(tmp_path):
+    """다른 프로세스(환경)의 캐시 인스턴스가 기록한 벡터를 읽을 수 있는지 확인"""
+    dev = EmbeddingCache(str(tmp_path), "test-model", 4)
+    staging = EmbeddingCache(str(tmp_path), "test-model", 4)
+
+    dev.put_many({content_key("FAQ: 결제 방법"): [1, 2, 3, 4]})
+    found = staging.get_many([content_key("FAQ: 결제 방법")])
+
+    np.testing.assert_array_equal(found[content_key("FAQ: 결제 방법")], [1, 2, 3, 4])
+
+
+def test_append_after_a_torn_write_stays_aligned(tmp_path):
+    """쓰는 도중 중단되어 남은 불완전한 행/줄이 다음 쓰기의 벡터와 인덱스를 망가뜨리지 않는지 확인"""
+    cache = EmbeddingCache(str(tmp_path), "test-model", 4)
+    cache.put_many({content_key("반품"): [1, 2, 3, 4]})
+    with open(tmp_path / "test-model" / "vectors.f32", "ab") as f:
+        f.write(b"\x00" * 6)
+    with open(tmp_path / "test-model" / "index.tsv", "a", encoding="utf-8") as f:
+        f.write(content_key("중단된 쓰기")[:20])
+
+    writer = EmbeddingCache(str(tmp_path), "test-model", 4)
+    writer.put_many({content_key("배송"): [5, 6, 7, 8]})
+
+    reader = EmbeddingCache(str(tmp_path), "test-model", 4)
+    found = reader.get_many([content_key("반품"), content_key("배송")])
+    np.testing.assert_array_equal(found[content_key("반품")], [1, 2, 3, 4])
+    np.testing.assert_array_equal(found[content_key("배송")], [5, 6, 7, 8])
+    assert len(reader) == 2
+
+
+def test_cache_is_keyed_by_model(tmp_path):
+    """모델이 다르면 같은 내용이라도 캐시를 공유하지 않는지 확인"""
+    EmbeddingCache(str(tmp_path), "model-a", 4).put_many({content_key("x"): [1, 1, 1, 1]})
+
+    assert EmbeddingCache(str(tmp_path), "model-b", 4).get_many([content_key("x")]) == {}
+
+
+def test_cache_rejects_dimension_mismatch(tmp_path):
+    EmbeddingCache(str(tmp_path), "test-model", 4)
+
+    with pytest.raises(ValueError):
+        EmbeddingCache(str(tmp_path), "test-model", 8)
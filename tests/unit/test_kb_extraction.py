@@ -0,0 +1,68 @@
+"""
+KB 동기화 텍스트 추출 단계(프로세스 풀) 단위 테스트
+"""
+import pytest
+
+from kb_sync.collectors.extract import ExtractionPool, extract_file
+
+
+@pytest.fixture
+def pool():
+    pool = ExtractionPool(max_workers=2, timeout=10, memory_limit_mb=None)
+    yield pool
+    pool.close()
+
+
+def _raw(doc_id, file_type, **raw):
+    return {"id": doc_id, "source": f"s3://bucket/{doc_id}", "metadata": {"source_id": "s3", "key": doc_id,
+                                                                          "file_type": file_type}, **raw}
+
+
+def test_raw_documents_are_extracted_in_worker_processes(pool, tmp_path):
+    large = tmp_path / "large.md"
+    large.write_text("# 대용량 안내\n" + "배송 정책 " * 1000, encoding="utf-8")
+
+    small = list(pool(_raw("small.txt", "txt", raw="반품 정책".encode("utf-8"))))
+    spooled = list(pool(_raw("large.md", "md", raw_path=str(large))))
+
+    assert small[0]["content"] == "반품 정책"
+    assert "raw" not in small[0]
+    assert spooled[0]["content"].startswith("# 대용량 안내\n배송 정책")
+    assert "raw_path" not in spooled[0]
+    # 메모리 매핑으로 읽은 임시 파일은 추출 후 삭제된다
+    assert not large.exists()
+
+
+def test_documents_with_content_pass_through(pool):
+    doc = {"id": "faq/1", "content": "FAQ", "source": "database", "metadata": {}}
+    assert list(pool(doc)) == [doc]
+    assert pool._executor is None
+
+
+def test_files_without_text_pass_through_with_empty_content(pool):
+    docs = list(pool(_raw("scan.txt", "txt", raw=b"  \n")))
+    assert [doc["content"] for doc in docs] == ["  \n"]
+    assert pool.failed == []
+
+
+def test_failed_files_are_skipped_and_recorded(pool):
+    assert list(pool(_raw("image.png", "png", raw=b"\x89PNG"))) == []
+    assert pool.failed == [("s3", "image.png")]
+
+
+def test_per_file_timeout(tmp_path):
+    path = tmp_path / "huge.txt"
+    path.write_bytes("가".encode("utf-8") * (20 * 1024 * 1024))
+    pool = ExtractionPool(max_workers=1, timeout=0.001, memory_limit_mb=None)
+    try:
+        assert list(pool(_raw("huge.txt", "txt", raw_path=str(path)))) == []
+        assert pool.failed == [("s3", "huge.txt")]
+    finally:
+        pool.close()
+
+
+def test_extract_file_decodes_across_block_boundaries(tmp_path):
+    path = tmp_path / "doc.txt"
+    text = "한글" * (1024 * 1024)
+    path.write_text(text, encoding="utf-8")
+    assert extract_file("txt", str(path)) == text
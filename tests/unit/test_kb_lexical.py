@@ -0,0 +1,73 @@
+"""
+BM25 역색인과 하이브리드(RRF) 검색 단위 테스트
+"""
+import numpy as np
+
+from kb_index import IndexBundle, IndexBundleWriter, hashed_embeddings, reciprocal_rank_fusion, tokenize
+
+CHUNKS = [
+    "반품 정책: 구매 후 30일 이내 반품 가능합니다",
+    "배송 정책: 일반 배송은 3-5일 소요됩니다",
+    "상품 SKU-4821 무선 이어폰 보증 기간은 1년입니다",
+    "상품 SKU-4812 유선 이어폰 보증 기간은 6개월입니다",
+    "결제 수단: 신용카드와 계좌이체를 지원합니다",
+]
+
+
+def _bundle(path, lexical=None):
+    writer = IndexBundleWriter(str(path), 64, "float32", "test-model", lexical=lexical or {"enabled": True})
+    writer.add([{"id": f"c{i}", "content": text, "metadata": {}} for i, text in enumerate(CHUNKS)],
+               hashed_embeddings(CHUNKS, 64))
+    writer.close()
+    return IndexBundle(str(path))
+
+
+def test_tokenize_mixes_codes_and_korean_bigrams():
+    assert tokenize("주문번호ORD-2024 반품!") == ["주문", "문번", "번호", "ord-2024", "ord", "2024", "반품"]
+    assert tokenize("ＳＫＵ_7 가") == ["sku_7", "sku", "7", "가"]
+
+
+def test_bm25_ranks_exact_code_first(tmp_path):
+    bundle = _bundle(tmp_path / "kb")
+
+    assert bundle.manifest["lexical"]["type"] == "bm25"
+    rows, scores = bundle.lexical.search("SKU-4812 보증", 3)
+    assert rows[0] == 3
+    assert np.all(np.diff(scores) <= 0)
+    # 조사가 붙은 질의도 2-gram 이 겹친다
+    assert bundle.lexical.search("반품은요", 1)[0][0] == 0
+    assert len(bundle.lexical.search("없는용어", 3)[0]) == 0
+
+
+def test_rare_terms_weigh_more(tmp_path):
+    bundle = _bundle(tmp_path / "kb")
+    rows, scores = bundle.lexical.scores("정책 계좌이체")
+    by_row = dict(zip(rows.tolist(), scores.tolist()))
+    # "정책" 은 두 청크, "계좌이체" 는 한 청크에만 있다
+    assert by_row[4] > by_row[0]
+
+
+def test_reciprocal_rank_fusion():
+    rows, scores = reciprocal_rank_fusion([np.array([1, 2, 3]), np.array([3, 4])], k=60)
+    assert rows.tolist() == [3, 1, 2, 4]
+    assert scores[0] == np.float32(1 / 63 + 1 / 61)
+
+
+def test_hybrid_search_lifts_exact_matches(tmp_path):
+    bundle = _bundle(tmp_path / "kb")
+    # 코드를 이해하지 못한 임베딩 모델처럼 벡터 검색은 반품 청크를 1위로 둔다
+    vector = hashed_embeddings([CHUNKS[0]], 64)[0]
+    assert bundle.search(vector, 1)[0][0] == 0
+
+    rows, _ = bundle.hybrid_search(vector, "SKU-4812", 2)
+    assert rows[0] == 3
+    np.testing.assert_allclose(bundle.similarity(rows, vector), bundle.scores(vector)[rows], rtol=1e-6)
+
+
+def test_bundle_without_lexical_index_uses_vectors_only(tmp_path):
+    bundle = _bundle(tmp_path / "kb", lexical={"enabled": False})
+    vector = hashed_embeddings([CHUNKS[1]], 64)[0]
+
+    assert bundle.lexical is None
+    rows, scores = bundle.hybrid_search(vector, CHUNKS[1], 1)
+    assert rows.tolist() == [1] and scores[0] > 0.99
@@ -0,0 +1,98 @@
+"""
+메타데이터 비트맵 인덱스와 필터 검색 단위 테스트
+"""
+import numpy as np
+import pytest
+
+from kb_index import IndexBundle, IndexBundleWriter, detect_language, hashed_embeddings
+
+CHUNKS = [
+    ("반품 정책: 구매 후 30일 이내 반품 가능합니다", "s3-documents", "md", "2024-01-10T00:00:00Z"),
+    ("Return policy: items can be returned within 30 days", "s3-documents", "pdf", "2024-03-01T00:00:00Z"),
+    ("배송 정책: 일반 배송은 3-5일 소요됩니다", "s3-documents", "txt", "2023-12-01T00:00:00Z"),
+    ("결제 수단: 신용카드와 계좌이체를 지원합니다", "database-faq", "", "2024-02-15T09:00:00+09:00"),
+    ("Shipping takes 3-5 business days", "database-faq", "", None),
+]
+
+
+def _bundle(path, ann=None):
+    records = []
+    for i, (text, source_id, file_type, modified) in enumerate(CHUNKS):
+        metadata = {"source_id": source_id, "language": detect_language(text)}
+        if file_type:
+            metadata["file_type"] = file_type
+            metadata["last_modified"] = modified
+        elif modified:
+            metadata["updated_at"] = modified
+        records.append({"id": f"c{i}", "content": text, "metadata": metadata})
+    writer = IndexBundleWriter(str(path), 64, "float32", "test-model", ann=ann, lexical={"enabled": True})
+    writer.add(records, hashed_embeddings([text for text, *_ in CHUNKS], 64))
+    writer.close()
+    return IndexBundle(str(path))
+
+
+def _rows(mask):
+    return np.flatnonzero(mask).tolist()
+
+
+def test_detect_language():
+    assert detect_language("반품 SKU-1") == "ko"
+    assert detect_language("Return policy") == "en"
+    assert detect_language("1234 !") == ""
+
+
+def test_values_or_within_key_and_across_keys(tmp_path):
+    bundle = _bundle(tmp_path / "kb")
+
+    assert bundle.manifest["metadata"]["columns"] == ["source_id", "file_type", "language"]
+    assert _rows(bundle.filter_mask({"source_id": "database-faq"})) == [3, 4]
+    assert _rows(bundle.filter_mask({"file_type": ["md", "pdf"]})) == [0, 1]
+    assert _rows(bundle.filter_mask({"source_id": "s3-documents", "language": "en"})) == [1]
+    assert _rows(bundle.filter_mask({"language": "ja"})) == []
+    assert bundle.filter_mask({}) is None and bundle.filter_mask(None) is None
+
+
+def test_updated_after_uses_last_modified_or_updated_at(tmp_path):
+    bundle = _bundle(tmp_path / "kb")
+
+    # 2024-02-15T09:00+09:00 == 2024-02-15T00:00Z, 변경 시각을 모르는 행은 제외
+    assert _rows(bundle.filter_mask({"updated_after": "2024-02-15T00:00:00Z"})) == [1, 3]
+    assert _rows(bundle.filter_mask({"updated_after": "2024-01-01", "source_id": "s3-documents"})) == [0, 1]
+
+
+def test_invalid_filters_raise(tmp_path):
+    bundle = _bundle(tmp_path / "kb")
+
+    with pytest.raises(ValueError, match="Unknown search filter: category"):
+        bundle.filter_mask({"category": "faq"})
+    with pytest.raises(ValueError, match="updated_after"):
+        bundle.filter_mask({"updated_after": "last week"})
+
+
+@pytest.mark.parametrize("ann", [None, {"type": "ivf", "lists": 2, "probes": 1, "minVectors": 1}])
+def test_filtered_search_matches_brute_force_over_subset(tmp_path, ann):
+    bundle = _bundle(tmp_path / "kb", ann=ann)
+    query = hashed_embeddings(["배송 기간"], 64)[0]
+    # 허용 행(2개)이 IVF 탐색 범위(5 * 1 / 2)보다 적으면 IVF 를 쓰더라도 허용 행만 정확히 비교한다
+    allowed = bundle.filter_mask({"source_id": "database-faq"})
+
+    rows, scores = bundle.search(query, 2, allowed=allowed)
+    subset = np.flatnonzero(allowed)
+    expected = subset[np.argsort(-bundle.scores(query)[subset], kind="stable")[:2]]
+    assert rows.tolist() == expected.tolist()
+    np.testing.assert_allclose(scores, bundle.scores(query)[rows], rtol=1e-6)
+
+    hybrid_rows, _ = bundle.hybrid_search(query, "배송 기간", 5, allowed=allowed)
+    assert set(hybrid_rows.tolist()) <= set(subset.tolist())
+    assert bundle.lexical.search("Shipping", 5, allowed=allowed)[0].tolist() == [4]
+    assert bundle.lexical.search("Shipping", 5, allowed=~allowed)[0].tolist() == []
+
+
+def test_ivf_candidates_are_intersected_with_large_subsets(tmp_path):
+    bundle = _bundle(tmp_path / "kb", ann={"type": "ivf", "lists": 2, "probes": 1, "minVectors": 1})
+    query = hashed_embeddings(["배송 기간"], 64)[0]
+    allowed = bundle.filter_mask({"source_id": "s3-documents"})
+
+    rows, _ = bundle.search(query, 5, allowed=allowed)
+    candidates = bundle.ivf.candidates(query, 1)
+    assert sorted(rows.tolist()) == [row for row in candidates.tolist() if allowed[row]]
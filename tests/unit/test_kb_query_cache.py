@@ -0,0 +1,97 @@
+"""
+검색 질의 임베딩 캐시 단위 테스트
+"""
+import threading
+
+import numpy as np
+
+from kb_index import EmbeddingCache, QueryEmbeddingCache, normalize_query
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _embed(calls):
+    def embed(texts):
+        calls.extend(texts)
+        return [[float(len(t)), 1.0, 0.0, 0.0] for t in texts]
+    return embed
+
+
+def test_normalize_query():
+    assert normalize_query("  반품   절차? ") == "반품 절차"
+    assert normalize_query("Return Policy!!") == "return policy"
+    assert normalize_query("ＡＢＣ 배송") == "abc 배송"  # 전각 문자 (NFKC)
+
+
+def test_repeated_queries_hit_the_cache():
+    calls = []
+    cache = QueryEmbeddingCache(max_entries=10, ttl_seconds=0)
+
+    first = cache.get_or_compute("반품 절차?", _embed(calls))
+    second = cache.get_or_compute(" 반품  절차", _embed(calls))
+
+    assert calls == ["반품 절차"]
+    assert second is first and first.dtype == np.float32
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_counters_are_exact_under_concurrent_lookups():
+    cache = QueryEmbeddingCache(max_entries=10, ttl_seconds=0)
+    cache.get_or_compute("반품", _embed([]))
+
+    def lookup():
+        for _ in range(500):
+            cache.get_or_compute("반품", _embed([]))
+
+    threads = [threading.Thread(target=lookup) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert (cache.hits, cache.misses) == (4000, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    calls = []
+    cache = QueryEmbeddingCache(max_entries=2, ttl_seconds=0)
+    for query in ["반품", "배송", "반품", "결제"]:
+        cache.get_or_compute(query, _embed(calls))
+
+    assert len(cache) == 2 and cache.evictions == 1
+    cache.get_or_compute("배송", _embed(calls))  # "반품" 을 최근에 썼으므로 "배송" 이 제거되었다
+    assert calls == ["반품", "배송", "결제", "배송"]
+
+
+def test_entries_expire_after_ttl():
+    calls, clock = [], FakeClock()
+    cache = QueryEmbeddingCache(max_entries=10, ttl_seconds=60, clock=clock)
+
+    cache.get_or_compute("배송 기간", _embed(calls))
+    clock.now += 59
+    cache.get_or_compute("배송 기간", _embed(calls))
+    clock.now += 2
+    cache.get_or_compute("배송 기간", _embed(calls))
+
+    assert calls == ["배송 기간", "배송 기간"]
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 2, "shared_hits": 0,
+                             "evictions": 0, "expirations": 1}
+
+
+def test_shared_tier_survives_cold_start(tmp_path):
+    calls = []
+    warm = QueryEmbeddingCache(shared=EmbeddingCache(str(tmp_path), "test-model", 4))
+    warm.get_or_compute("반품 절차", _embed(calls))
+
+    # 새 프로세스(콜드 스타트): 메모리 캐시는 비어 있지만 디스크 캐시에서 찾는다
+    cold = QueryEmbeddingCache(shared=EmbeddingCache(str(tmp_path), "test-model", 4))
+    vector = cold.get_or_compute("반품 절차?", _embed(calls))
+
+    assert calls == ["반품 절차"]
+    assert (cold.misses, cold.shared_hits) == (1, 1)
+    np.testing.assert_array_equal(vector, [5.0, 1.0, 0.0, 0.0])
@@ -0,0 +1,86 @@
+"""
+2단계 재순위화와 relevance_score 보정 단위 테스트
+"""
+import itertools
+
+from kb_index import Reranker
+
+NOW = 1_700_000_000  # 2023-11-14T22:13:20Z
+
+
+def _reranker(**kwargs):
+    return Reranker(**{"candidates": 10, "budget_ms": 0, "now": lambda: NOW, **kwargs})
+
+
+def test_scores_are_calibrated_into_unit_interval():
+    reranker = _reranker()
+    scores = [reranker.calibrate(cosine) for cosine in (-1.0, 0.0, 0.75, 0.9, 1.0)]
+
+    assert all(0.0 <= score <= 1.0 for score in scores)
+    assert scores == sorted(scores)
+    assert scores[2] == 0.5
+    assert reranker.calibrate(1.0, lexical=1.0, recency=1.0) < 1.0
+
+
+def test_lexical_overlap_lifts_exact_matches():
+    candidates = [
+        ({}, "반품 및 교환 처리 기준 안내", 0.82),
+        ({}, "정책 RT-1010: 반품 및 교환 처리 기준 안내", 0.80),
+    ]
+
+    ranked = _reranker().rerank("RT-1010 반품 기준", candidates)
+    assert [position for position, _ in ranked] == [1, 0]
+    # 재순위화하지 않으면 코사인 유사도 순서 그대로
+    assert [position for position, _ in _reranker(candidates=0).rerank("RT-1010 반품 기준", candidates)] == [0, 1]
+
+
+def test_recent_documents_rank_higher():
+    candidates = [
+        ({"last_modified": "2020-01-01T00:00:00Z"}, "배송 정책", 0.8),
+        ({"updated_at": NOW - 86400}, "배송 정책", 0.8),
+        ({}, "배송 정책", 0.8),
+    ]
+
+    ranked = _reranker().rerank("배송", candidates)
+    assert [position for position, _ in ranked] == [1, 0, 2]
+
+
+def test_budget_truncates_reranking():
+    # clock 호출마다 10ms 가 지난다 (시작 시각 + 후보마다 한 번)
+    ticks = itertools.count(step=0.01)
+    reranker = _reranker(budget_ms=25, clock=lambda: next(ticks))
+    candidates = [({}, "환불 안내", 0.8), ({}, "배송 안내", 0.8), ({}, "결제 안내", 0.8), ({}, "반품 안내", 0.8)]
+
+    order = reranker.rerank("반품 환불 배송", candidates)
+    ranked = dict(order)
+
+    assert reranker.stats() == {"reranked": 2, "truncated": 1}
+    # 예산 안에 다시 매긴 후보만 어휘 겹침이 반영되고, 나머지는 1단계 순서 그대로 뒤에 온다
+    assert [position for position, _ in order][2:] == [2, 3]
+    assert ranked[0] > ranked[2] and ranked[1] > ranked[2]
+    assert ranked[2] == reranker.calibrate(0.8, position=2) and ranked[3] == reranker.calibrate(0.8, position=3)
+
+
+def test_lexical_only_match_keeps_its_hybrid_rank():
+    # 하이브리드(RRF) 순서: 상품 코드 문서는 BM25 로만 찾은 2위 (코사인 유사도는 낮다)
+    candidates = [
+        ({}, "제품 보증 기간 및 수리 안내", 0.86),
+        ({}, "SKU-55123 제품 보증 안내", 0.74),
+        ({}, "보증 기간 연장 안내", 0.84),
+        ({}, "제품 보증서 재발급 안내", 0.83),
+    ]
+    query = "SKU-55123 제품 보증 기간 안내"
+
+    assert [position for position, _ in _reranker().rerank(query, candidates)] == [0, 1, 2, 3]
+    # 1단계 순위를 무시하면 코사인 유사도에 밀려 4위가 된다
+    assert [position for position, _ in _reranker(rank_weight=0).rerank(query, candidates)] == [0, 2, 3, 1]
+
+
+def test_candidates_beyond_the_rerank_window_keep_first_stage_order():
+    candidates = [({}, "반품 안내", 0.8), ({}, "반품 절차", 0.8), ({}, "배송", 0.5), ({}, "배송", 0.9)]
+
+    ranked = _reranker(candidates=2).rerank("반품", candidates)
+
+    assert [position for position, _ in ranked] == [0, 1, 2, 3]
+    scores = [score for _, score in ranked]
+    assert scores == sorted(scores, reverse=True)
@@ -0,0 +1,40 @@
+"""
+검색 결과 캐시 단위 테스트
+"""
+from kb_index import SearchResultCache, result_cache_key
+
+RESULTS = [{"title": "returns.md", "content": "반품 정책", "relevance_score": 0.9}]
+
+
+def test_key_normalizes_query_and_filters():
+    assert result_cache_key("반품 절차?", 5) == result_cache_key(" 반품  절차", 5)
+    assert result_cache_key("반품", 5, {"file_type": "md"}) == result_cache_key("반품", 5, {"file_type": ["md"]})
+    assert (result_cache_key("반품", 5, {"file_type": ["pdf", "md"], "updated_after": "2024-01-01T00:00:00Z"})
+            == result_cache_key("반품", 5, {"updated_after": "2024-01-01", "file_type": ["md", "pdf"]}))
+    assert result_cache_key("반품", 5) != result_cache_key("반품", 3)
+    assert result_cache_key("반품", 5) != result_cache_key("반품", 5, {"language": "ko"})
+
+
+def test_new_version_invalidates_every_entry():
+    cache = SearchResultCache()
+    cache.put("v1", "a", RESULTS)
+    cache.put("v1", "b", RESULTS)
+
+    assert cache.get("v1", "a") == RESULTS
+    assert cache.get("v2", "a") is None
+    assert len(cache) == 0
+    assert cache.stats() == {"entries": 0, "version": "v2", "hits": 1, "misses": 1,
+                             "evictions": 0, "invalidations": 1}
+
+
+def test_entries_are_copies_and_evicted_lru():
+    cache = SearchResultCache(max_entries=2)
+    cache.put("v1", "a", RESULTS)
+    cache.get("v1", "a")[0]["relevance_score"] = 0.0
+    assert cache.get("v1", "a") == RESULTS
+
+    cache.put("v1", "b", RESULTS)
+    cache.get("v1", "a")
+    cache.put("v1", "c", RESULTS)
+    assert cache.get("v1", "b") is None
+    assert cache.get("v1", "a") == RESULTS and cache.evictions == 1
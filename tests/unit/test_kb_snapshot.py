@@ -0,0 +1,77 @@
+"""
+KB 스냅샷 내보내기/가져오기 단위 테스트
+"""
+import io
+import tarfile
+
+import numpy as np
+import pytest
+
+from kb_index import IndexBundle, IndexBundleWriter, normalize
+from kb_sync.bulk import vector_values
+from kb_sync.snapshot import SnapshotError, export_snapshot, iter_bundle_items, read_snapshot
+
+
+def _bundle(path, storage="int8", count=12):
+    vectors = normalize(np.random.default_rng(2).normal(size=(count, 16)))
+    records = [{"id": f"doc{i}#0", "content": f"내용 {i}", "metadata": {"source_id": "s3", "document_id": f"doc{i}"}}
+               for i in range(count)]
+    writer = IndexBundleWriter(str(path), 16, storage, "test-model")
+    writer.add(records, vectors)
+    writer.close()
+    return vectors, records
+
+
+@pytest.mark.parametrize("name", ["kb.tar", "kb.tar.gz"])
+def test_snapshot_round_trip(tmp_path, name):
+    vectors, records = _bundle(tmp_path / "kb")
+    snapshot = export_snapshot(str(tmp_path / "kb"), str(tmp_path / name), environment="dev")
+
+    assert snapshot["environment"] == "dev"
+    assert snapshot["bundle"]["count"] == 12
+    assert read_snapshot(str(tmp_path / name), str(tmp_path / "restored")) == snapshot
+
+    bundle = IndexBundle(str(tmp_path / "restored"))
+    original = IndexBundle(str(tmp_path / "kb"))
+    assert list(bundle.iter_chunks()) == records
+    np.testing.assert_array_equal(bundle.vectors, original.vectors)
+    np.testing.assert_array_equal(bundle.scales, original.scales)
+
+
+def test_bundle_items_restore_vectors_for_bulk_upsert(tmp_path):
+    vectors, records = _bundle(tmp_path / "kb", count=7)
+    batches = list(iter_bundle_items(IndexBundle(str(tmp_path / "kb")), block_size=3))
+
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    item = batches[1][0]
+    assert item["id"] == "doc3#0"
+    assert item["metadata"] == {"source_id": "s3", "document_id": "doc3", "content": "내용 3"}
+    np.testing.assert_allclose(vector_values(item), vectors[3], atol=1e-2)
+
+
+def test_corrupted_snapshot_is_rejected(tmp_path):
+    _bundle(tmp_path / "kb", storage="float32")
+    export_snapshot(str(tmp_path / "kb"), str(tmp_path / "kb.tar"))
+
+    # 내보낸 뒤 파일 하나를 바꿔치기
+    with tarfile.open(str(tmp_path / "kb.tar")) as tar:
+        members = [(m, tar.extractfile(m).read()) for m in tar]
+    with tarfile.open(str(tmp_path / "tampered.tar"), "w") as tar:
+        for member, data in members:
+            if member.name == "vectors.bin":
+                data = bytes(len(data))
+            tar.addfile(member, io.BytesIO(data))
+
+    with pytest.raises(SnapshotError, match="Checksum mismatch for vectors.bin"):
+        read_snapshot(str(tmp_path / "tampered.tar"), str(tmp_path / "restored"))
+
+
+def test_unexpected_entries_are_rejected(tmp_path):
+    with tarfile.open(str(tmp_path / "evil.tar"), "w") as tar:
+        member = tarfile.TarInfo("../outside.txt")
+        member.size = 1
+        tar.addfile(member, io.BytesIO(b"x"))
+
+    with pytest.raises(SnapshotError, match="Unexpected entry"):
+        read_snapshot(str(tmp_path / "evil.tar"), str(tmp_path / "restored"))
+    assert not (tmp_path / "outside.txt").exists()
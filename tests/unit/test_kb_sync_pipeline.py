@@ -0,0 +1,112 @@
+"""
+KB 동기화 파이프라인 단위 테스트
+"""
+import threading
+import time
+
+import pytest
+
+from kb_sync.pipeline import Stage, run_pipeline
+
+
+def test_pipeline_preserves_items_and_batches():
+    """모든 항목이 단계를 거쳐 전달되고 batch_size 단위로 묶이는지 확인"""
+    indexed = []
+    batch_sizes = []
+
+    def index(batch):
+        batch_sizes.append(len(batch))
+        indexed.extend(batch)
+
+    stats = run_pipeline(
+        iter(range(25)),
+        [
+            Stage("double", lambda x: [x * 2]),
+            Stage("index", index, batch_size=10),
+        ],
+        queue_size=4,
+    )
+
+    assert indexed == [x * 2 for x in range(25)]
+    assert batch_sizes == [10, 10, 5]
+    assert [s.name for s in stats] == ["collect", "double", "index"]
+    assert stats[0].items_out == 25
+    assert stats[2].items_in == 25
+
+
+def test_pipeline_backpressure_bounds_in_flight_items():
+    """느린 하위 단계가 있으면 수집이 큐 깊이 이상 앞서가지 않는지 확인"""
+    produced = []
+    consumed = []
+    max_gap = []
+
+    def source():
+        for i in range(50):
+            produced.append(i)
+            max_gap.append(len(produced) - len(consumed))
+            yield i
+
+    def slow(x):
+        time.sleep(0.002)
+        consumed.append(x)
+
+    run_pipeline(source(), [Stage("slow", slow)], queue_size=3)
+
+    # 큐(3) + 처리 중(1) + 생성 중(1) 이상 앞서가면 안 된다
+    assert max(max_gap) <= 5
+
+
+def test_pipeline_propagates_stage_errors():
+    """한 단계의 예외가 전체 파이프라인을 중단시키고 호출자에게 전달되는지 확인"""
+    def boom(x):
+        if x == 3:
+            raise RuntimeError("embedding failed")
+        return [x]
+
+    with pytest.raises(RuntimeError, match="embedding failed"):
+        run_pipeline(iter(range(1000)), [Stage("embed", boom), Stage("index", lambda x: None)], queue_size=2)
+
+
+def test_pipeline_multiple_workers():
+    """workers > 1 인 단계가 모든 항목을 한 번씩 처리하는지 확인"""
+    seen = []
+    lock = threading.Lock()
+
+    def record(x):
+        with lock:
+            seen.append(x)
+
+    run_pipeline(iter(range(100)), [Stage("index", record, workers=4)], queue_size=5)
+
+    assert sorted(seen) == list(range(100))
+
+
+def test_pipeline_reports_queue_wait_and_bytes():
+    """느린 하위 단계는 상위 단계의 출력 대기로, 느린 상위 단계는 하위 단계의 입력 대기로 집계되는지 확인"""
+    def slow_source():
+        for i in range(5):
+            time.sleep(0.02)
+            yield "x" * (i + 1)
+
+    def slow_sink(batch):
+        time.sleep(0.05)
+
+    stats = run_pipeline(
+        slow_source(),
+        [
+            Stage("upper", lambda s: [s.upper()], size_of=len),
+            Stage("sink", slow_sink, batch_size=1),
+        ],
+        queue_size=1,
+        source_size_of=len,
+    )
+    collect, upper, sink = stats
+
+    assert collect.bytes == upper.bytes == 15
+    assert upper.wait_in_seconds > 0.05        # 수집을 기다림
+    assert upper.wait_out_seconds > 0.05       # 가득 찬 sink 큐를 기다림
+    assert upper.busy_seconds < upper.wait_out_seconds
+    assert sink.busy_seconds >= 0.25
+    report = upper.to_dict()
+    assert report["name"] == "upper" and report["items_in"] == 5 and report["bytes"] == 15
+    assert "wait in" in upper.summary()
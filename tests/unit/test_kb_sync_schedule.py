@@ -0,0 +1,69 @@
+"""
+KB 동기화 스케줄러 단위 테스트
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from kb_sync.schedule import CronSchedule, SourceLock, SourceScheduler
+
+
+@pytest.mark.parametrize("expression, after, expected", [
+    ("0 */6 * * *", datetime(2024, 1, 1, 5, 30), datetime(2024, 1, 1, 6, 0)),
+    ("0 */6 * * *", datetime(2024, 1, 1, 6, 0), datetime(2024, 1, 1, 12, 0)),
+    ("0 */1 * * *", datetime(2024, 1, 1, 23, 15), datetime(2024, 1, 2, 0, 0)),
+    ("0 0 * * *", datetime(2024, 2, 28, 12, 0), datetime(2024, 2, 29, 0, 0)),
+    ("30 9 * * 1-5", datetime(2024, 1, 5, 10, 0), datetime(2024, 1, 8, 9, 30)),  # 금요일 -> 월요일
+    ("15,45 2 1 */3 *", datetime(2024, 1, 1, 2, 20), datetime(2024, 1, 1, 2, 45)),
+    ("15,45 2 1 */3 *", datetime(2024, 1, 1, 3, 0), datetime(2024, 4, 1, 2, 15)),
+])
+def test_cron_next_after(expression, after, expected):
+    assert CronSchedule(expression).next_after(after) == expected
+
+
+@pytest.mark.parametrize("expression", ["* * *", "60 * * * *", "*/0 * * * *", "5-1 * * * *"])
+def test_invalid_cron_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+def test_source_lock_prevents_overlapping_runs(tmp_path):
+    path = str(tmp_path / "locks" / "s3-documents.lock")
+    first, second = SourceLock(path), SourceLock(path)
+
+    assert first.acquire()
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+    second.release()
+
+
+def test_scheduler_runs_independent_sources_concurrently():
+    """정각 직전 시각에서 시작하면 두 소스가 다음 정각에 동시에 실행되는지 확인"""
+    started = time.monotonic()
+    base = datetime(2024, 1, 1, 0, 59, 59, 800000)
+    starts = {}
+    lock = threading.Lock()
+
+    def run_source(source_id):
+        with lock:
+            starts[source_id] = time.monotonic()
+        time.sleep(0.3)
+
+    scheduler = SourceScheduler({"s3-documents": "0 */6 * * *", "database-faq": "0 */1 * * *"}, run_source,
+                                now=lambda: base + timedelta(seconds=time.monotonic() - started))
+    assert scheduler.next_runs()["database-faq"] == datetime(2024, 1, 1, 1, 0)
+    assert scheduler.next_runs()["s3-documents"] == datetime(2024, 1, 1, 6, 0)
+
+    scheduler = SourceScheduler({"database-faq": "0 */1 * * *", "api-docs": "0 * * * *"}, run_source,
+                                now=lambda: base + timedelta(seconds=time.monotonic() - started))
+    scheduler.start()
+    deadline = time.monotonic() + 5
+    while sum(scheduler.runs.values()) < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    scheduler.stop(timeout=1)
+
+    assert scheduler.runs == {"database-faq": 1, "api-docs": 1}
+    assert abs(starts["database-faq"] - starts["api-docs"]) < 0.2
@@ -0,0 +1,85 @@
+"""
+KB 벡터 저장 모드 / 로컬 인덱스 번들 단위 테스트
+"""
+import os
+
+import numpy as np
+import pytest
+
+from kb_index import IndexBundle, IndexBundleWriter, dequantize, normalize, quantize
+from kb_index.vectors import dot_scores
+
+
+@pytest.mark.parametrize("mode,tolerance", [("float32", 1e-7), ("float16", 1e-3), ("int8", 1e-2)])
+def test_quantize_round_trip(mode, tolerance):
+    """저장 모드별 복원 오차가 허용 범위 이내인지 확인"""
+    vectors = normalize(np.random.default_rng(0).normal(size=(50, 64)))
+
+    data, scales = quantize(vectors, mode)
+
+    assert (scales is not None) == (mode == "int8")
+    assert np.abs(dequantize(data, scales) - vectors).max() < tolerance
+    np.testing.assert_allclose(dot_scores(data, scales, vectors[0]), dequantize(data, scales) @ vectors[0],
+                               rtol=1e-5, atol=1e-6)
+
+
+def test_bundle_round_trip(tmp_path):
+    """번들에 기록한 벡터와 청크를 그대로 읽을 수 있는지 확인"""
+    vectors = np.random.default_rng(1).normal(size=(10, 16))
+    records = [{"id": f"doc{i}#0", "content": f"내용 {i}", "metadata": {"source": "s3"}} for i in range(10)]
+
+    writer = IndexBundleWriter(str(tmp_path / "kb"), 16, "int8", "test-model")
+    writer.add(records[:4], vectors[:4])
+    writer.add(records[4:], vectors[4:])
+    writer.close()
+
+    bundle = IndexBundle(str(tmp_path / "kb"))
+    assert bundle.count == 10 and bundle.storage == "int8"
+    assert bundle.nbytes == 10 * 16 + 10 * 4
+    assert bundle.chunks([7, 2]) == [records[7], records[2]]
+    assert int(np.argmax(bundle.scores(normalize(vectors[3])))) == 3
+
+
+def test_bundle_abort_keeps_previous_version(tmp_path):
+    """기록 중 실패하면 기존 번들이 유지되는지 확인"""
+    path = str(tmp_path / "kb")
+    first = IndexBundleWriter(path, 4)
+    first.add([{"id": "a"}], np.ones((1, 4)))
+    first.close()
+
+    second = IndexBundleWriter(path, 4)
+    second.add([{"id": "b"}], np.ones((1, 4)))
+    second.abort()
+
+    assert IndexBundle(path).chunks([0])[0]["id"] == "a"
+
+
+def test_republishing_swaps_a_link_and_keeps_open_bundles_readable(tmp_path):
+    """같은 경로에 다시 게시하면 링크만 교체하고, 이전에 연 번들은 계속 읽을 수 있는지 확인"""
+    path = str(tmp_path / "kb")
+    for chunk_id in ("a", "b", "c"):
+        writer = IndexBundleWriter(path, 4)
+        writer.add([{"id": chunk_id}], np.ones((1, 4)))
+        writer.close()
+        if chunk_id == "b":
+            opened = IndexBundle(path)
+
+    assert os.path.islink(path) and IndexBundle(path).chunks([0])[0]["id"] == "c"
+    # 이전 게시 디렉터리는 지워지고 현재 링크 대상만 남는다
+    assert sorted(os.listdir(tmp_path)) == ["kb", os.readlink(path)]
+    assert opened.chunks([0])[0]["id"] == "b" and opened.vectors.shape == (1, 4)
+
+
+def test_republishing_keeps_blue_green_version_directories(tmp_path):
+    """blue/green 버전 디렉터리를 가리키던 링크를 교체해도 버전 디렉터리는 지우지 않는지 확인"""
+    version = IndexBundleWriter(str(tmp_path / "kb-v20260101000000"), 4)
+    version.add([{"id": "a"}], np.ones((1, 4)))
+    version.close()
+    os.symlink("kb-v20260101000000", tmp_path / "kb")
+
+    writer = IndexBundleWriter(str(tmp_path / "kb"), 4)
+    writer.add([{"id": "b"}], np.ones((1, 4)))
+    writer.close()
+
+    assert IndexBundle(str(tmp_path / "kb")).chunks([0])[0]["id"] == "b"
+    assert IndexBundle(str(tmp_path / "kb-v20260101000000")).chunks([0])[0]["id"] == "a"